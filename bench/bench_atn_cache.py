@@ -0,0 +1,87 @@
+"""
+Grammar load time with and without the on-disk ATN cache.
+
+Each sample is a fresh interpreter timing ``verilog_parser.grammar()``
+(import of the ANTLR runtime and the generated lexer / parser) and,
+within it, the time spent building the ATNs: deserializing them, or
+loading them from the warmed cache.
+
+Usage:
+    python bench/bench_atn_cache.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SNIPPET = """
+import time
+from antlr4.atn.ATNDeserializer import ATNDeserializer
+import src.antlr_cache as antlr_cache
+
+atn_time = [0.0]
+
+def timed(fn):
+    def wrapper(*args):
+        t = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            atn_time[0] += time.perf_counter() - t
+    return wrapper
+
+# Deserialization (no cache / miss) and cache loads (hit)
+ATNDeserializer.deserialize = timed(ATNDeserializer.deserialize)
+antlr_cache._load = timed(antlr_cache._load)
+
+t = time.perf_counter()
+from src.verilog_parser import grammar
+grammar()
+print(time.perf_counter() - t, atn_time[0])
+"""
+
+
+def _sample(env):
+    # type: (dict) -> tuple
+    out = subprocess.run([sys.executable, "-c", _SNIPPET], cwd=ROOT, env=env,
+                         stdout=subprocess.PIPE, check=True,
+                         universal_newlines=True).stdout
+    total, atn = out.strip().splitlines()[-1].split()
+    return float(total), float(atn)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--runs", type=int, default=7)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache:
+        base = dict(os.environ, RTL_SCAN_CACHE_DIR=cache)
+        # Installed packages have their bytecode cached; so should we, or
+        # compiling the generated parser dominates every sample
+        base.pop("PYTHONDONTWRITEBYTECODE", None)
+        cold = dict(base, RTL_SCAN_ATN_CACHE="0")
+        _sample(base)                       # warm the caches
+        results = {
+            "no cache": [_sample(cold) for _ in range(args.runs)],
+            "cached": [_sample(base) for _ in range(args.runs)],
+        }
+
+    print("%-9s %22s %22s" % ("", "grammar load", "ATN build"))
+    for name, samples in results.items():
+        print("%-9s median %7.1f ms   min %7.1f ms  median %7.1f ms" % (
+            name,
+            statistics.median(s[0] for s in samples) * 1e3,
+            min(s[0] for s in samples) * 1e3,
+            statistics.median(s[1] for s in samples) * 1e3))
+    saved = (statistics.median(s[1] for s in results["no cache"])
+             - statistics.median(s[1] for s in results["cached"]))
+    print("ATN build time saved: %.1f ms per process" % (saved * 1e3))
+
+if __name__ == "__main__":
+    main()
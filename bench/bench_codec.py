@@ -0,0 +1,106 @@
+"""
+Size and throughput of the binary module codec against JSON and pickle.
+
+Builds a synthetic design of M modules (ports, parameters and a flat
+list of instances with P pins each, fresh strings per occurrence as the
+parser produces them) and reports the encoded size and the encode /
+decode time of:
+
+  codec   codec.encode_modules() / decode_modules()
+  json    to_full_dict() + json.dumps / json.loads + from_full_dict()
+  pickle  pickle.dumps / pickle.loads (highest protocol)
+
+Usage:
+    python bench/bench_codec.py [--modules M] [--instances N] [--pins P]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.codec import decode_modules, encode_modules  # noqa: E402
+from src.data_model import (  # noqa: E402
+    ConnectionInfo,
+    InstanceInfo,
+    ModuleInfo,
+    ParameterInfo,
+    PortInfo,
+)
+from src.port_classify import PortDirection  # noqa: E402
+
+
+def _fresh(s):
+    # type: (str) -> str
+    return "".join(list(s))
+
+
+def _design(n_modules, n_instances, pins):
+    # type: (int, int, int) -> list
+    mods = []
+    for m in range(n_modules):
+        mods.append(ModuleInfo(
+            name="block_%d" % m, file_path="/proj/rtl/block_%d.sv" % m,
+            line_number=1,
+            ports=[PortInfo(_fresh("data_%d_i" % p), PortDirection.INPUT, 32,
+                            _fresh("[31:0]"), _fresh("logic"))
+                   for p in range(pins)],
+            parameters=[ParameterInfo("WIDTH", "32", resolved=32),
+                        ParameterInfo("DEPTH", "16", resolved=16)],
+            instances=[InstanceInfo(
+                "u_cell_%d" % i, _fresh("std_cell_%d" % (i % 50)),
+                [ConnectionInfo(_fresh("pin_%d" % p),
+                                "net_%d_%d" % (i, p % 8))
+                 for p in range(pins)],
+                {"W": "8"} if i % 4 == 0 else {})
+                for i in range(n_instances)]))
+    return mods
+
+
+def _json_encode(mods):
+    return json.dumps([m.to_full_dict() for m in mods]).encode("utf-8")
+
+
+def _json_decode(data):
+    return [ModuleInfo.from_full_dict(d) for d in json.loads(data)]
+
+
+def _timed(fn, arg):
+    t = time.perf_counter()
+    out = fn(arg)
+    return out, time.perf_counter() - t
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--modules", type=int, default=50)
+    p.add_argument("--instances", type=int, default=2000)
+    p.add_argument("--pins", type=int, default=20)
+    args = p.parse_args()
+
+    mods = _design(args.modules, args.instances, args.pins)
+    n = args.modules * args.instances
+    print("%d modules x %d instances x %d pins" % (
+        args.modules, args.instances, args.pins))
+    print("%-7s %12s %12s %12s %14s" % ("", "bytes", "encode", "decode",
+                                        "decode inst/s"))
+    for name, encode, decode in (
+            ("codec", encode_modules, decode_modules),
+            ("json", _json_encode, _json_decode),
+            ("pickle", lambda m: pickle.dumps(m, pickle.HIGHEST_PROTOCOL),
+             pickle.loads)):
+        data, enc = _timed(encode, mods)
+        back, dec = _timed(decode, data)
+        assert len(back) == len(mods)
+        print("%-7s %12d %9.0f ms %9.0f ms %14.0f" % (
+            name, len(data), enc * 1e3, dec * 1e3, n / dec))
+        del data, back
+
+
+if __name__ == "__main__":
+    main()
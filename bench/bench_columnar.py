@@ -0,0 +1,89 @@
+"""
+Memory and access cost of columnar instance storage.
+
+Builds a flat top of N instances × P pins (fresh strings per occurrence,
+as the parser produces them) as an InstanceInfo list and as a
+columnar.InstanceTable, and reports tracemalloc bytes per instance,
+build time, and the time of a full hierarchy-style walk (module type
+and instance name of every instance) and a full to_dict() pass.
+
+Usage:
+    python bench/bench_columnar.py [--instances N] [--pins P]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.columnar import InstanceTable  # noqa: E402
+from src.data_model import ConnectionInfo, InstanceInfo  # noqa: E402
+
+
+def _fresh(s):
+    # type: (str) -> str
+    return "".join(list(s))
+
+
+def _rows(n, pins):
+    # type: (int, int) -> list
+    params = {"W": "8", "DEPTH": "16"}
+    for i in range(n):
+        yield InstanceInfo(
+            instance_name="u_cell_%d" % i,
+            module_type=_fresh("std_cell_%d" % (i % 50)),
+            connections=[ConnectionInfo(_fresh("pin_%d" % p),
+                                        "net_%d_%d" % (i, p % 8))
+                         for p in range(pins)],
+            parameters=dict(params),
+        )
+
+
+def _measure(build):
+    gc.collect()
+    t = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - t
+    gc.collect()
+    tracemalloc.start()
+    store = build()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return store, used, elapsed
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--instances", type=int, default=50000)
+    p.add_argument("--pins", type=int, default=30)
+    args = p.parse_args()
+
+    print("%d instances x %d pins" % (args.instances, args.pins))
+    print("%-9s %16s %10s %10s %10s" % ("", "bytes / instance", "build",
+                                        "walk", "to_dict"))
+    for name, build in (
+            ("objects", lambda: list(_rows(args.instances, args.pins))),
+            ("columnar", lambda: InstanceTable(
+                _rows(args.instances, args.pins)))):
+        store, used, built = _measure(build)
+        t = time.perf_counter()
+        for inst in store:
+            inst.module_type, inst.instance_name
+        walk = time.perf_counter() - t
+        t = time.perf_counter()
+        for inst in store:
+            inst.to_dict()
+        to_dict = time.perf_counter() - t
+        print("%-9s %16.0f %8.0f ms %8.0f ms %8.0f ms" % (
+            name, used / float(args.instances), built * 1e3, walk * 1e3,
+            to_dict * 1e3))
+        del store
+
+
+if __name__ == "__main__":
+    main()
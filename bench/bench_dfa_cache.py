@@ -0,0 +1,156 @@
+"""
+Parse latency with and without the persisted parser DFA cache.
+
+ANTLR's adaptive prediction builds its decision DFAs while parsing, so
+the first files of every run are parsed with full ATN simulation.  Each
+sample is a fresh interpreter (grammar load included) measuring either
+the first file of a synthetic corpus or a whole `modules` scan of it:
+
+  no cache   DFAs start empty, as without --dfa-cache
+  cached     DFAs loaded from a cache warmed by one earlier scan
+
+Usage:
+    python bench/bench_dfa_cache.py [--runs N] [--files N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SNIPPET = """
+import sys, time
+t = time.perf_counter()
+from src.verilog_parser import (
+    VerilogFileParser, enable_dfa_cache, grammar, save_dfa_cache,
+)
+if sys.argv[2] == "1":
+    enable_dfa_cache()
+grammar()
+if sys.argv[3] == "first":
+    VerilogFileParser().parse_file(sys.argv[4])
+else:
+    from src.rtl_scan import rtl_scan
+    rtl_scan(directory=sys.argv[1], mode="modules")
+print(time.perf_counter() - t)
+save_dfa_cache()
+"""
+
+_MODULE = """\
+module blk{i} #(parameter W = {w}, parameter DEPTH = {d}) (
+  input                  clk,
+  input                  rst_n,
+  input      [W-1:0]     din,
+  input                  valid,
+  output reg [W-1:0]     dout,
+  output                 ready
+);
+  localparam AW = $clog2(DEPTH);
+  reg  [W-1:0] mem [0:DEPTH-1];
+  reg  [AW-1:0] wp, rp;
+  wire [AW:0]  level = {{1'b0, wp}} - {{1'b0, rp}};
+  assign ready = (level < DEPTH - 1) && !(valid & din[0]);
+
+  always @(posedge clk or negedge rst_n) begin
+    if (!rst_n) begin
+      wp <= {{AW{{1'b0}}}};
+      rp <= 0;
+    end else if (valid && ready) begin
+      mem[wp] <= din ^ {{W{{1'b1}}}};
+      wp <= wp + 1'b1;
+    end
+  end
+
+  always @(*) begin
+    case (rp[1:0])
+      2'b00:   dout = mem[rp];
+      2'b01:   dout = mem[rp] >> 1;
+      default: dout = {{W{{1'b0}}}};
+    endcase
+  end
+
+  genvar g;
+  generate
+    for (g = 0; g < {n}; g = g + 1) begin : lane
+      leaf{j} #(.W(W / {n})) u_leaf (
+        .clk (clk),
+        .d   (din[g*(W/{n}) +: W/{n}]),
+        .q   ()
+      );
+    end
+    if (DEPTH > 8) begin : deep
+      blk_stage u_stage (.clk(clk), .rst_n(rst_n), .en(valid));
+    end
+  endgenerate
+endmodule
+
+module leaf{i} #(parameter W = 4) (input clk, input [W-1:0] d, output reg [W-1:0] q);
+  always @(posedge clk) q <= d;
+endmodule
+"""
+
+
+def _corpus(directory, n):
+    # type: (str, int) -> list
+    paths = []
+    for i in range(n):
+        path = os.path.join(directory, "blk%03d.v" % i)
+        with open(path, "w") as f:
+            f.write(_MODULE.format(i=i, j=(i + 1) % n, w=8 << (i % 3),
+                                   d=4 << (i % 4), n=1 + i % 4))
+        paths.append(path)
+    return paths
+
+
+def _sample(env, corpus, cached, what, first):
+    # type: (dict, str, bool, str, str) -> float
+    out = subprocess.run(
+        [sys.executable, "-c", _SNIPPET, corpus, "1" if cached else "0",
+         what, first],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, check=True,
+        universal_newlines=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--files", type=int, default=40)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "rtl")
+        os.mkdir(corpus)
+        first = _corpus(corpus, args.files)[0]
+        env = dict(os.environ, RTL_SCAN_CACHE_DIR=os.path.join(tmp, "cache"))
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        env.pop("RTL_SCAN_DFA_CACHE", None)
+        _sample(env, corpus, True, "scan", first)    # warm the caches
+
+        print("%-9s %24s %24s" % ("", "first file", "whole scan (%d files)"
+                                  % args.files))
+        medians = {}
+        for name, cached in (("no cache", False), ("cached", True)):
+            row = []
+            for what in ("first", "scan"):
+                samples = [_sample(env, corpus, cached, what, first)
+                           for _ in range(args.runs)]
+                row.append(statistics.median(samples))
+            medians[name] = row
+            print("%-9s median %10.1f ms   median %10.1f ms"
+                  % (name, row[0] * 1e3, row[1] * 1e3))
+        size = sum(os.path.getsize(os.path.join(d, f))
+                   for d, _, fs in os.walk(os.path.join(tmp, "cache", "dfa"))
+                   for f in fs)
+        print("saved: %.1f ms on the first file, %.1f ms on the scan" % (
+            (medians["no cache"][0] - medians["cached"][0]) * 1e3,
+            (medians["no cache"][1] - medians["cached"][1]) * 1e3))
+        print("DFA cache size: %.0f KiB" % (size / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
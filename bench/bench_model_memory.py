@@ -0,0 +1,157 @@
+"""
+Memory per instance / port and derived-view cost of the data model.
+
+Builds a flat module of N instances × P pins, as the parsers do (names
+are fresh strings per occurrence, as ANTLR's getText() returns them),
+once with the previous plain-dataclass model (reproduced below) and once
+with data_model, and reports tracemalloc bytes per instance (with its
+connections) and per port, plus the time of repeated to_dict() /
+classify_ports() calls on a many-port module.
+
+Usage:
+    python bench/bench_model_memory.py [--instances N] [--pins P]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import data_model  # noqa: E402
+from src.port_classify import (  # noqa: E402
+    PortCategory,
+    PortDirection,
+    classify_port,
+)
+
+
+# ---------------------------------------------------------------------------
+# The model before slots / interning / cached views
+# ---------------------------------------------------------------------------
+
+class legacy:
+    @dataclass
+    class PortInfo:
+        name: str
+        direction: PortDirection
+        width: int = 1
+        range_spec: str = ""
+        net_type: str = ""
+        comment: str = ""
+
+        @property
+        def category(self) -> PortCategory:
+            return classify_port(self.name)
+
+    @dataclass
+    class ConnectionInfo:
+        port_name: str
+        signal_expr: str = ""
+
+    @dataclass
+    class InstanceInfo:
+        instance_name: str
+        module_type: str
+        connections: List["legacy.ConnectionInfo"] = field(default_factory=list)
+        parameters: Dict[str, str] = field(default_factory=dict)
+        array_range: str = ""
+        generate: Tuple = ()
+
+    @dataclass
+    class ModuleInfo:
+        name: str
+        ports: List["legacy.PortInfo"] = field(default_factory=list)
+        instances: List["legacy.InstanceInfo"] = field(default_factory=list)
+
+        @property
+        def input_ports(self):
+            return [p for p in self.ports if p.direction == PortDirection.INPUT]
+
+        @property
+        def output_ports(self):
+            return [p for p in self.ports if p.direction == PortDirection.OUTPUT]
+
+        @property
+        def instantiated_modules(self) -> Set[str]:
+            return {inst.module_type for inst in self.instances}
+
+
+def _fresh(s):
+    # type: (str) -> str
+    """An equal but distinct string, like each getText() result."""
+    return "".join(list(s))
+
+
+def _build_instances(model, n, pins):
+    # type: (type, int, int) -> list
+    return [model.InstanceInfo(
+        instance_name="u_cell_%d" % i,
+        module_type=_fresh("std_cell_%d" % (i % 50)),
+        connections=[model.ConnectionInfo(port_name=_fresh("pin_%d" % p),
+                                          signal_expr="net_%d_%d" % (i, p))
+                     for p in range(pins)],
+    ) for i in range(n)]
+
+
+def _build_ports(model, n):
+    # type: (type, int) -> list
+    return [model.PortInfo(name=_fresh("data_%d_i" % i),
+                           direction=PortDirection.INPUT,
+                           width=32, range_spec=_fresh("[31:0]"),
+                           net_type=_fresh("wire"))
+            for i in range(n)]
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, objs
+
+
+def _views(model, mod, rounds):
+    # type: (type, object, int) -> float
+    t = time.perf_counter()
+    for _ in range(rounds):
+        for p in mod.ports:
+            p.category
+        [p.name for p in mod.input_ports]
+        [p.name for p in mod.output_ports]
+        mod.instantiated_modules
+    return time.perf_counter() - t
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--instances", type=int, default=20000)
+    p.add_argument("--pins", type=int, default=30)
+    p.add_argument("--ports", type=int, default=20000)
+    p.add_argument("--rounds", type=int, default=20)
+    args = p.parse_args()
+
+    print("%d instances x %d pins, %d ports" % (args.instances, args.pins,
+                                                args.ports))
+    print("%-8s %18s %14s %22s" % ("", "bytes / instance", "bytes / port",
+                                   "views x%d" % args.rounds))
+    for name, model in (("before", legacy), ("after", data_model)):
+        inst_bytes, insts = _measure(
+            lambda: _build_instances(model, args.instances, args.pins))
+        port_bytes, ports = _measure(lambda: _build_ports(model, args.ports))
+        mod = model.ModuleInfo(name="top", ports=ports, instances=insts)
+        print("%-8s %18.0f %14.0f %19.1f ms" % (
+            name, inst_bytes / float(args.instances),
+            port_bytes / float(args.ports),
+            _views(model, mod, args.rounds) * 1e3))
+        del insts, ports, mod
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of classifying a design's ports.
+
+Generates N port names drawn from D distinct names (the repetition of a
+real netlist, where the same pin names occur on every instance of a
+cell) and times the old four-regex sequence, one uncached match of the
+combined PortRules matcher per name, and the memoized batch
+classify_ports() call, cold and warm.
+
+Usage:
+    python bench/bench_port_classify.py [--ports N] [--distinct D]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import port_classify  # noqa: E402
+from src.port_classify import PortCategory, PortRules  # noqa: E402
+
+_PARTS = ("clk", "rst", "n", "scan", "irq", "data", "addr", "valid",
+          "ready", "wr", "rd", "en", "sel", "core", "io", "tdo", "req")
+
+
+def _names(n, distinct):
+    rnd = random.Random(1)
+    pool = ["_".join(rnd.choice(_PARTS) for _ in range(rnd.randint(1, 4)))
+            + "_%d" % i for i in range(distinct)]
+    return [pool[rnd.randrange(distinct)] for _ in range(n)]
+
+
+def _sequential(names):
+    pats = [(c, re.compile(p, re.IGNORECASE))
+            for c, p in port_classify._DEFAULT_PATTERNS]
+    out = []
+    for name in names:
+        for cat, rx in pats:
+            if rx.search(name):
+                out.append(cat)
+                break
+        else:
+            out.append(PortCategory.DATA)
+    return out
+
+
+def _combined(names):
+    rules = PortRules(port_classify._DEFAULT_PATTERNS)
+    match, groups = rules._matcher.match, rules._groups
+    return [PortCategory.DATA if m is None else groups[m.lastindex]
+            for m in map(match, names)]
+
+
+def _time(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--ports", type=int, default=2000000)
+    p.add_argument("--distinct", type=int, default=20000)
+    args = p.parse_args()
+
+    names = _names(args.ports, args.distinct)
+    print("%d ports, %d distinct names" % (args.ports, args.distinct))
+    want, t = _time(_sequential, names)
+    print("%-24s %8.0f ms" % ("four regexes", t * 1e3))
+    got, t = _time(_combined, names)
+    assert got == want
+    print("%-24s %8.0f ms" % ("combined matcher", t * 1e3))
+    rules = PortRules(port_classify._DEFAULT_PATTERNS)
+    for label in ("classify_ports (cold)", "classify_ports (warm)"):
+        got, t = _time(rules.classify_ports, names)
+        assert got == want
+        print("%-24s %8.0f ms" % (label, t * 1e3))
+
+
+if __name__ == "__main__":
+    main()
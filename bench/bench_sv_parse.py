@@ -0,0 +1,79 @@
+"""
+Structural extraction cost of the SystemVerilog backend against Verilog.
+
+Each sample is a fresh interpreter parsing every file of the bundled
+examples (grammar load excluded) and reporting milliseconds per KiB of
+source:
+
+  verilog        verilog/examples with the Verilog-2005 backend
+  sv cold        systemverilog/examples, DFA cache disabled
+  sv cached      systemverilog/examples, DFAs loaded from a warmed cache
+                 (the default for the SystemVerilog grammar)
+
+Usage:
+    python bench/bench_sv_parse.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SNIPPET = """
+import glob, os, sys, time
+from src.verilog_parser import (
+    VerilogFileParser, grammar, language_for, save_dfa_cache,
+)
+files = sorted(glob.glob(os.path.join(sys.argv[1], "*.*v")))
+grammar(language_for(files[0]))
+size = sum(os.path.getsize(f) for f in files)
+t = time.perf_counter()
+for f in files:
+    VerilogFileParser().parse_file(f)
+print(time.perf_counter() - t, size)
+save_dfa_cache()
+"""
+
+
+def _sample(env, directory):
+    # type: (dict, str) -> float
+    out = subprocess.run([sys.executable, "-c", _SNIPPET, directory],
+                         cwd=ROOT, env=env, stdout=subprocess.PIPE,
+                         check=True, universal_newlines=True).stdout
+    seconds, size = out.strip().splitlines()[-1].split()
+    return float(seconds) * 1e3 / (int(size) / 1024.0)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--runs", type=int, default=3)
+    args = p.parse_args()
+
+    verilog = os.path.join(ROOT, "verilog", "examples")
+    sv = os.path.join(ROOT, "systemverilog", "examples")
+    with tempfile.TemporaryDirectory() as cache:
+        base = dict(os.environ, RTL_SCAN_CACHE_DIR=cache)
+        base.pop("PYTHONDONTWRITEBYTECODE", None)
+        warm = dict(base, RTL_SCAN_DFA_CACHE="1")
+        cold = dict(base, RTL_SCAN_DFA_CACHE="0")
+        _sample(warm, verilog)              # warm the caches
+        _sample(warm, sv)
+
+        rows = (("verilog", warm, verilog), ("sv cold", cold, sv),
+                ("sv cached", warm, sv))
+        medians = {}
+        for name, env, directory in rows:
+            samples = [_sample(env, directory) for _ in range(args.runs)]
+            medians[name] = statistics.median(samples)
+            print("%-10s median %8.2f ms/KiB   min %8.2f ms/KiB"
+                  % (name, medians[name], min(samples)))
+    print("sv cached / verilog: %.2fx" % (medians["sv cached"]
+                                          / medians["verilog"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,8 @@ a = Analysis(
         'src.ast_utils',
         'src.extractors',
         'src.verilog_parser',
+        'src.systemverilog_parser',
+        'src.sv_extractors',
         'src.file_discovery',
         'src.hierarchy',
         'src.rtl_scan',
@@ -35,6 +37,10 @@ a = Analysis(
         'verilog.VerilogLexer',
         'verilog.VerilogParser',
         'verilog.VerilogParserVisitor',
+        'systemverilog',
+        'systemverilog.SystemVerilogLexer',
+        'systemverilog.SystemVerilogParser',
+        'systemverilog.SystemVerilogParserVisitor',
         'antlr4',
     ],
     hookspath=[],
@@ -4,24 +4,95 @@ sv_parser — Verilog/SystemVerilog RTL structure analysis toolkit.
 Modules:
   port_classify   Port direction/category enums and classification
   data_model      Dataclass-based design data structures
+  columnar        Columnar instance storage for instance-heavy modules
+  codec           Compact binary serialization of data_model objects
   preprocessor    `define / `ifdef / `include text preprocessor
+  const_eval      Verilog constant-expression evaluator
   ast_utils       ANTLR range evaluation helpers
   extractors      ANTLR AST extraction functions
   verilog_parser  ANTLR-based parser producing data_model objects
-  file_discovery  RTL file discovery utilities
+  systemverilog_parser  SystemVerilog backend of verilog_parser
+  sv_extractors   ANTLR AST extraction functions for SystemVerilog
+  antlr_cache     On-disk caches of deserialized ANTLR ATNs / learned DFAs
+  file_discovery  RTL file discovery (scandir walk, exclude globs)
+  filelist        Simulator filelist parsing and lazy library resolution
+  module_index    Module-name pre-index and demand-driven parsing
   hierarchy       Hierarchy and dependency analysis
   rtl_scan        Top-level scanning API (file/dir/filelist → dict/JSON)
+  design_db       Hash-indexed in-memory design database
+  connectivity    Cross-hierarchy net graph with integer net ids
+  clock_domains   Clock / reset propagation through the hierarchy
+  session         ScanSession for repeated queries with incremental refresh
+  server          Unix-socket daemon keeping sessions warm, and its client
+  watch           Watch mode: rescan on change and diff the results
+  lsp_server      Language Server Protocol front-end (stdio)
   formatter       Terminal-friendly output formatters
+  elaborate       Parameter-aware elaboration
+  impact          Reverse-dependency index and change impact
+  sqlite_export   Incremental SQLite export of the parsed design
+
+Names exported here are imported from their modules on first access,
+so importing the package (as every ``python -m src`` run does) costs
+nothing beyond src.version.
 """
 
+import importlib
+import sys
+import types
+
 from .version import __version__, __author__, __email__
 
-from .port_classify import PortDirection, PortCategory, classify_port
-from .data_model import (
-    PortInfo, ParameterInfo, ConnectionInfo,
-    InstanceInfo, WireInfo, ModuleInfo,
-)
-from .preprocessor import Preprocessor, PreprocessorError
-from .verilog_parser import VerilogFileParser
-from .rtl_scan import rtl_scan, rtl_scan_json
-from .formatter import format_result, format_inst, format_io
+# exported name → defining module
+_EXPORTS = {
+    "PortDirection": "port_classify",
+    "PortCategory": "port_classify",
+    "PortRules": "port_classify",
+    "classify_port": "port_classify",
+    "classify_ports": "port_classify",
+    "load_port_rules": "port_classify",
+    "set_port_rules": "port_classify",
+    "PortInfo": "data_model",
+    "ParameterInfo": "data_model",
+    "ConnectionInfo": "data_model",
+    "InstanceInfo": "data_model",
+    "WireInfo": "data_model",
+    "ModuleInfo": "data_model",
+    "Preprocessor": "preprocessor",
+    "PreprocessorError": "preprocessor",
+    "VerilogFileParser": "verilog_parser",
+    "iter_scan": "rtl_scan",
+    "rtl_scan": "rtl_scan",
+    "rtl_scan_json": "rtl_scan",
+    "DesignDatabase": "design_db",
+    "scan_design": "design_db",
+    "format_result": "formatter",
+    "format_inst": "formatter",
+    "format_io": "formatter",
+}
+
+__all__ = ["__version__", "__author__", "__email__"] + list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Loading the rtl_scan submodule must not shadow rtl_scan()
+        if (name in _EXPORTS and isinstance(value, types.ModuleType)
+                and value.__name__ == "%s.%s" % (self.__name__, name)):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
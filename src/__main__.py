@@ -7,7 +7,8 @@ Usage:
 Input can be:
     - A single .v / .sv file
     - A directory (scanned recursively)
-    - A filelist via -f option (one file path per line)
+    - A filelist via -f option (simulator .f syntax: +incdir+, +define+,
+      nested -f/-F, -v/-y libraries, $ENV variables)
 
 Examples:
     python -m src ./rtl                          # full scan on directory
@@ -17,12 +18,29 @@ Examples:
     python -m src -f filelist.f -t top_chip      # scan from filelist
     python -m src ./rtl -t top_chip -o result.json
     python -m src ./rtl -D SYNTHESIS -I ./inc
+    python -m src ./rtl -t top_chip -m paths --format ndjson -o paths.ndjson
+    python -m src ./rtl -t top_chip --format ndjson -o result.ndjson
+    python -m src ./rtl --cache scan.cache       # scan and (re)write cache
+    python -m src -m impact --cache scan.cache --changed rtl/fifo_async.v
+    python -m src ./rtl -t top_chip -m elab -G DATA_W=64
+    python -m src ./rtl --exclude 'syn/' --exclude 'vendor/**/sim/' --jobs 8
+    python -m src --serve &                      # warm daemon
+    python -m src ./rtl -t top_chip -m hierarchy --connect
+    python -m src ./rtl -t top_chip -m filelist --watch -j
+    python -m src --lsp                          # language server on stdio
+    python -m src ./rtl --dfa-cache              # reuse learned parser DFAs
+    python -m src ./rtl --language systemverilog # SV backend for .v files too
+    python -m src ./rtl -o design.rtlm --output-format binary
+    python -m src ./rtl --cache scan.cache --sqlite design.db
+    python -m src ./rtl -t top_chip -m ports --port-rules ports.json
 """
 
 import argparse
+import base64
 import json
 import os
 import sys
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Tuple
 
 # Allow running as `python -m src` or as a PyInstaller binary
 if getattr(sys, 'frozen', False):
@@ -32,13 +50,24 @@ else:
 if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
-from src.rtl_scan import rtl_scan
-from src.formatter import format_result, set_color
+# Only what argument parsing needs is imported here; scanning, the
+# daemon, watch mode and the language server import on use, so --help,
+# --version and cache-only runs start fast
+from src.export import EXPORT_FORMATS, SCAN_FORMATS, write_instance_paths
+from src.formatter import format_result, format_watch_diff, set_color
 from src.log import setup_logging
 from src.version import __version__, __author__, __email__
 
+if TYPE_CHECKING:
+    from src.session import ScanSession
 
-_ALL_MODES = ["modules", "hierarchy", "ports", "filelist", "full", "inst", "io"]
+
+_ALL_MODES = ["modules", "hierarchy", "ports", "filelist", "full", "inst", "io",
+              "paths", "impact", "elab"]
+
+# Scan arguments that select a ScanSession (the rest are per query)
+_SESSION_KEYS = ("directory", "file", "filelist", "defines", "include_dirs",
+                 "exclude", "include", "follow_symlinks", "jobs", "language")
 
 
 def _parse_define(s):
@@ -50,24 +79,244 @@ def _parse_define(s):
     return (s.strip(), "")
 
 
-def _read_filelist(path):
-    # type: (str) -> list
-    """Read a filelist file. One path per line, ignoring comments and blanks."""
-    files = []
-    base = os.path.dirname(os.path.abspath(path))
-    with open(path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("//") or line.startswith("#"):
-                continue
-            # Skip +incdir+ / +define+ directives (not file paths)
-            if line.startswith("+"):
-                continue
-            # Resolve relative paths w.r.t. filelist location
-            if not os.path.isabs(line):
-                line = os.path.join(base, line)
-            files.append(os.path.normpath(line))
-    return files
+def _write_paths(result, args):
+    # type: (dict, argparse.Namespace) -> int
+    """Stream flattened instance paths to -o FILE or stdout."""
+    from src.hierarchy import iter_instance_paths
+
+    if "_rows" in result:
+        # Rows streamed by the daemon (--connect)
+        rows = result["_rows"]
+    else:
+        rows = iter_instance_paths(
+            result["top"], result["_modules"],
+            max_depth=args.max_depth,
+            module_filter=args.module_filter or None,
+            counts=result["_counts"],
+        )
+    if args.output:
+        try:
+            with open(args.output, "w", newline="") as f:
+                n = write_instance_paths(f, rows, fmt=args.format)
+        except IOError as e:
+            sys.stderr.write("Error writing output: %s\n" % e)
+            return 1
+        except RuntimeError as e:
+            sys.stderr.write("Error: daemon: %s\n" % e)
+            return 1
+        print("Written %d path(s) to %s" % (n, args.output))
+        return 0
+    try:
+        write_instance_paths(sys.stdout, rows, fmt=args.format)
+    except RuntimeError as e:
+        sys.stderr.write("Error: daemon: %s\n" % e)
+        return 1
+    return 0
+
+
+def _write_result(result, scan_args, args):
+    # type: (Optional[dict], dict, argparse.Namespace) -> int
+    """-o FILE / -j: stream the scan as JSON or NDJSON while it runs, or
+    write the daemon's *result*."""
+    from src.export import write_scan
+
+    if result is not None:
+        events = [("result", result)]  # type: Iterable[Tuple[str, Any]]
+    else:
+        from src.rtl_scan import iter_scan
+        events = iter_scan(**scan_args)
+    if not args.output:
+        write_scan(sys.stdout, events, fmt=args.format)
+        return 0
+    try:
+        with open(args.output, "w") as f:
+            write_scan(f, events, fmt=args.format)
+    except IOError as e:
+        sys.stderr.write("Error writing output: %s\n" % e)
+        return 1
+    print("Written to %s (%d bytes)" % (args.output,
+                                         os.path.getsize(args.output)))
+    return 0
+
+
+def _remote_scan(socket_path, scan_args, args):
+    # type: (str, dict, argparse.Namespace) -> Optional[dict]
+    """Run the scan on a daemon; None if none is listening."""
+    from src.codec import decode_module
+    from src.server import ServerClient, ServerUnavailable
+
+    params = dict(scan_args)
+    # The daemon has its own working directory
+    for key in ("include_dirs", "changed_files"):
+        if params.get(key):
+            params[key] = [os.path.abspath(p) for p in params[key]]
+    if params.get("base_dir"):
+        params["base_dir"] = os.path.abspath(params["base_dir"])
+    params["paths"] = {"max_depth": args.max_depth,
+                       "module_filter": args.module_filter}
+    if args.mode in ("inst", "io"):
+        params["encoding"] = "binary"
+    try:
+        client = ServerClient(socket_path)
+    except ServerUnavailable as e:
+        sys.stderr.write("Warning: %s; scanning locally\n" % e)
+        return None
+    try:
+        result, rows = client.stream("scan", **params)
+    except (ServerUnavailable, RuntimeError) as e:
+        client.close()
+        return {"error": "daemon: %s" % e}
+    if rows is not None:
+        # Paths mode: rows are read off the socket as they are written
+        del result["stream"]
+        result["_rows"] = _stream_rows(client, rows)
+    else:
+        client.close()
+    if "module_rtlm" in result:
+        mod = decode_module(base64.b64decode(result.pop("module_rtlm")))
+        result["module"] = mod.to_full_dict()
+        result["_module_info"] = mod
+    return result
+
+
+def _stream_rows(client, rows):
+    # type: (Any, Iterable[list]) -> Iterable[tuple]
+    """Yield the daemon's streamed rows, closing *client* after them."""
+    with client:
+        for row in rows:
+            yield tuple(row)
+
+
+def _write_modules(scan_args, args):
+    # type: (dict, argparse.Namespace) -> int
+    """--output-format binary: write every parsed module to -o FILE."""
+    from src.codec import ModuleWriter
+
+    session_args = {k: scan_args[k] for k in _SESSION_KEYS}
+    mods = None
+    if args.connect is not None:
+        from src.server import ServerClient, ServerUnavailable
+        params = dict(session_args)
+        if params.get("include_dirs"):
+            params["include_dirs"] = [os.path.abspath(p)
+                                      for p in params["include_dirs"]]
+        try:
+            with ServerClient(args.connect) as client:
+                mods = client.modules(**params)
+        except ServerUnavailable as e:
+            sys.stderr.write("Warning: %s; scanning locally\n" % e)
+        except RuntimeError as e:
+            sys.stderr.write("Error: daemon: %s\n" % e)
+            return 1
+    if mods is None:
+        from src.session import ScanSession
+        session = ScanSession(**session_args)
+        if session.error:
+            sys.stderr.write("Error: %s\n" % session.error)
+            return 1
+        mods = list(session.modules.values())
+    try:
+        with open(args.output, "wb") as f:
+            writer = ModuleWriter(f)
+            for mod in mods:
+                writer.write(mod)
+            size = f.tell()
+    except IOError as e:
+        sys.stderr.write("Error writing output: %s\n" % e)
+        return 1
+    print("Written %d module(s) to %s (%d bytes)" % (len(mods), args.output,
+                                                     size))
+    return 0
+
+
+def _write_sqlite(scan_args, args):
+    # type: (dict, argparse.Namespace) -> int
+    """--sqlite: scan (reusing --cache entries) and sync the database."""
+    from src.rtl_scan import iter_scan
+    from src.sqlite_export import files_of
+
+    mods = []
+    result = {}  # type: dict
+    for kind, value in iter_scan(**dict(scan_args, mode="modules")):
+        if kind == "module":
+            mods.append(value)
+        else:
+            result = value
+    if "error" in result:
+        sys.stderr.write("Error: %s\n" % result["error"])
+        return 1
+    return _sync_sqlite(args.sqlite, files_of(mods), sys.stdout)
+
+
+def _sync_sqlite(path, files, out):
+    # type: (str, dict, Any) -> int
+    import sqlite3
+    from src.sqlite_export import sync_sqlite
+
+    try:
+        diff = sync_sqlite(path, files)
+    except sqlite3.Error as e:
+        sys.stderr.write("Error writing %s: %s\n" % (path, e))
+        return 1
+    out.write("Updated %s: %d added, %d changed, %d removed file(s)\n" % (
+        path, len(diff["added"]), len(diff["changed"]), len(diff["removed"])))
+    out.flush()
+    return 0
+
+
+def _watch(scan_args, args):
+    # type: (dict, argparse.Namespace) -> int
+    """--watch: print the result, then a diff after every change."""
+    from src.session import ScanSession
+    from src.watch import watch
+
+    session = ScanSession(**{k: scan_args[k] for k in _SESSION_KEYS})
+    query = dict(mode=args.mode, top_module=args.top, base_dir=args.base_dir,
+                 top_params=scan_args["top_params"])
+    result = session.query(**query)
+    if session.error:
+        sys.stderr.write("Error: %s\n" % session.error)
+        return 1
+    if args.sqlite and _sync_sqlite(args.sqlite, session.file_modules(),
+                                    sys.stderr):
+        return 1
+
+    def _json(obj):
+        # type: (dict) -> None
+        print(json.dumps(obj, ensure_ascii=False), flush=True)
+
+    if args.json:
+        _json({"result": {k: v for k, v in result.items()
+                          if not k.startswith("_")}})
+    else:
+        print(format_result(result, mode=args.mode))
+        print(_watch_hint(session), flush=True)
+
+    def _emit(diff, new):
+        # type: (dict, dict) -> None
+        if args.sqlite:
+            _sync_sqlite(args.sqlite, session.file_modules(), sys.stderr)
+        if args.json:
+            _json({"diff": diff, "error": new.get("error"),
+                   "parse_errors": new.get("parse_errors", [])})
+            return
+        print()
+        print(format_watch_diff(diff))
+        if "error" in new:
+            print(format_result(new, mode=args.mode))
+        for e in new.get("parse_errors", []):
+            print("  " + e)
+        sys.stdout.flush()
+
+    watch(session, _emit, poll=args.poll, interval=args.poll_interval, **query)
+    return 0
+
+
+def _watch_hint(session):
+    # type: (ScanSession) -> str
+    roots = session.watch_roots()
+    return "\nWatching %d file(s) under %s (Ctrl-C to stop)" % (
+        len(session.files), ", ".join(roots) or "(nothing)")
 
 
 def build_parser():
@@ -86,10 +335,15 @@ modes:
   full       All of the above (default)
   inst       Generate instantiation template (single-file friendly)
   io         Generate port I/O table (single-file friendly)
+  paths      Stream flattened instance paths (CSV / NDJSON)
+  impact     Modules/tops affected by --changed files (uses --cache)
+  elab       Parameter-aware elaboration: unique specializations and
+             concrete port widths
 
 input:
   Positional argument can be a file (.v/.sv) or a directory.
-  Use -f to specify a filelist (one path per line).
+  Use -f to specify a filelist (.f: +incdir+, +define+, nested -f/-F,
+  -v/-y libraries with +libext+; library modules are parsed on demand).
 
 examples:
   %(prog)s ./rtl
@@ -98,6 +352,17 @@ examples:
   %(prog)s -f files.f -m hierarchy -t top_chip
   %(prog)s ./rtl -o result.json
   %(prog)s ./rtl -D SYNTHESIS -D USE_PLL=1 -I ./inc
+  %(prog)s ./rtl -t top_chip -m paths --max-depth 3 -o paths.csv
+  %(prog)s ./rtl --cache scan.cache
+  %(prog)s -m impact --cache scan.cache --changed rtl/fifo_async.v
+  %(prog)s ./rtl -t top_chip -m elab -G DATA_W=64
+  %(prog)s ./rtl --exclude 'syn/' --exclude '*_bb.v' --jobs 8
+  %(prog)s --serve &
+  %(prog)s ./rtl -t top_chip -m inst --connect
+  %(prog)s ./rtl -t top_chip -m filelist --watch
+  %(prog)s ./rtl --cache scan.cache --sqlite design.db
+  %(prog)s ./rtl -t top_chip -m ports --port-rules ports.json
+  %(prog)s --lsp
 """,
     )
 
@@ -105,7 +370,7 @@ examples:
                     help="RTL file (.v/.sv) or directory to scan")
     p.add_argument("-f", "--filelist",
                     default="", metavar="FILE",
-                    help="read file paths from filelist (one per line)")
+                    help="read sources from a simulator filelist (.f)")
     p.add_argument("-t", "--top",
                     default="", metavar="MODULE",
                     help="top module name (auto-detect if omitted)")
@@ -115,6 +380,11 @@ examples:
     p.add_argument("-o", "--output",
                     default="", metavar="FILE",
                     help="write JSON result to file")
+    p.add_argument("--output-format",
+                    default="json", choices=("json", "binary"),
+                    help="-o file format: the JSON result (default), or "
+                         "every parsed module in the compact binary "
+                         "format of src/codec.py (mode is ignored)")
     p.add_argument("-j", "--json",
                     action="store_true",
                     help="JSON output to stdout")
@@ -127,6 +397,92 @@ examples:
     p.add_argument("-I", "--incdir",
                     action="append", default=[], metavar="DIR",
                     help="include search directory (repeatable)")
+    p.add_argument("--language",
+                    default="auto", choices=("auto", "verilog", "systemverilog"),
+                    help="parser backend (default: auto — .sv / .svh files "
+                         "are SystemVerilog, the rest Verilog-2005)")
+    p.add_argument("--format",
+                    default=None, choices=("csv", "json", "ndjson"),
+                    help="paths mode rows: csv (default) or ndjson; other "
+                         "modes with -o / -j: json (default) or ndjson, "
+                         "streamed while the scan runs")
+    p.add_argument("--max-depth",
+                    type=int, default=None, metavar="N",
+                    help="paths mode: do not descend below depth N")
+    p.add_argument("--module-filter",
+                    action="append", default=[], metavar="GLOB",
+                    help="paths mode: only emit rows whose module matches "
+                         "(repeatable)")
+    p.add_argument("-G", "--param",
+                    action="append", default=[], metavar="NAME=VAL",
+                    help="top-level parameter override for elab mode "
+                         "(repeatable)")
+    p.add_argument("--cache",
+                    default="", metavar="FILE",
+                    help="scan cache file: reuse unchanged files and rewrite "
+                         "it; impact mode reads it without parsing")
+    p.add_argument("--sqlite",
+                    default="", metavar="FILE",
+                    help="export every parsed module to a SQLite database, "
+                         "rewriting only the rows of changed files (kept "
+                         "current with --watch)")
+    p.add_argument("--index",
+                    default="", metavar="FILE",
+                    help="module-name index file used (and refreshed) when "
+                         "-t limits parsing to the top's subtree")
+    p.add_argument("--changed",
+                    action="append", default=[], metavar="FILE",
+                    help="impact mode: edited file (repeatable)")
+    p.add_argument("--exclude",
+                    action="append", default=[], metavar="GLOB",
+                    help="directory scan: skip paths matching this "
+                         "gitignore-style glob; 'dir/' prunes a directory "
+                         "(repeatable)")
+    p.add_argument("--include",
+                    action="append", default=[], metavar="GLOB",
+                    help="directory scan: only keep files matching this "
+                         "gitignore-style glob (repeatable)")
+    p.add_argument("--follow-symlinks",
+                    action="store_true",
+                    help="directory scan: descend into symlinked directories")
+    p.add_argument("--jobs",
+                    type=int, default=1, metavar="N",
+                    help="directory scan: walk subtrees on N threads")
+    p.add_argument("--serve",
+                    nargs="?", const="", default=None, metavar="SOCKET",
+                    help="run as a daemon keeping parsed designs warm, on "
+                         "SOCKET (default: $RTL_SCAN_SOCKET or a per-user "
+                         "socket)")
+    p.add_argument("--connect",
+                    nargs="?", const="", default=None, metavar="SOCKET",
+                    help="forward this scan to a running daemon (falls "
+                         "back to a local scan if none is listening)")
+    p.add_argument("--lsp",
+                    action="store_true",
+                    help="run as a Language Server on stdin/stdout "
+                         "(definition, hover, instance completion)")
+    p.add_argument("--watch",
+                    action="store_true",
+                    help="keep running: rescan on every change and print "
+                         "what changed (NDJSON with -j)")
+    p.add_argument("--poll",
+                    action="store_true",
+                    help="watch mode: poll file stats instead of inotify "
+                         "(network file systems)")
+    p.add_argument("--poll-interval",
+                    type=float, default=1.0, metavar="SEC",
+                    help="watch mode: polling period (default 1.0)")
+    p.add_argument("--dfa-cache",
+                    action="store_true",
+                    help="load the parser's learned prediction DFAs from "
+                         "earlier runs and save them on exit (also "
+                         "$RTL_SCAN_DFA_CACHE=1; always on for the "
+                         "SystemVerilog grammar unless set to 0)")
+    p.add_argument("--port-rules",
+                    default="", metavar="FILE",
+                    help="JSON port classification rules checked before "
+                         "the built-in ones (also $RTL_SCAN_PORT_RULES; "
+                         "not sent to a --connect server)")
     p.add_argument("--no-color",
                     action="store_true",
                     help="disable colored terminal output")
@@ -150,21 +506,47 @@ def main(argv=None):
     # Logging
     setup_logging(verbose=args.verbose, quiet=args.quiet)
 
+    if args.dfa_cache:
+        from src.verilog_parser import enable_dfa_cache
+        enable_dfa_cache()
+    if args.port_rules:
+        from src.port_classify import (
+            PortRulesError, load_port_rules, set_port_rules)
+        try:
+            set_port_rules(load_port_rules(args.port_rules))
+        except PortRulesError as e:
+            sys.stderr.write("Error: %s\n" % e)
+            return 1
+    try:
+        return _run(p, args)
+    finally:
+        # Grammars can only have been loaded (and learned DFAs) if the
+        # parser module was imported
+        parser_mod = sys.modules.get("src.verilog_parser")
+        if parser_mod is not None:
+            parser_mod.save_dfa_cache()
+
+
+def _run(p, args):
+    # type: (argparse.ArgumentParser, argparse.Namespace) -> int
+    if args.serve is not None:
+        from src.server import serve
+        return serve(args.serve)
+    if args.lsp:
+        from src.lsp_server import serve_stdio
+        return serve_stdio()
+
     # --- Resolve input ---
     file_arg = ""
-    files_arg = None  # type: list
     dir_arg = ""
+    flist_arg = ""
 
     if args.filelist:
         # -f filelist mode
-        flist_path = os.path.abspath(args.filelist)
-        if not os.path.isfile(flist_path):
+        flist_arg = os.path.abspath(args.filelist)
+        if not os.path.isfile(flist_arg):
             sys.stderr.write("Error: filelist not found: %s\n" % args.filelist)
             return 1
-        files_arg = _read_filelist(flist_path)
-        if not files_arg:
-            sys.stderr.write("Error: no files in filelist: %s\n" % args.filelist)
-            return 1
     elif args.input:
         input_path = os.path.abspath(args.input)
         if os.path.isfile(input_path):
@@ -174,7 +556,8 @@ def main(argv=None):
         else:
             sys.stderr.write("Error: input not found: %s\n" % args.input)
             return 1
-    else:
+    elif not (args.mode == "impact" and args.cache
+              and os.path.isfile(args.cache)):
         p.print_help()
         return 1
 
@@ -184,6 +567,20 @@ def main(argv=None):
         k, v = _parse_define(d)
         defines[k] = v
 
+    top_params = {}
+    for g in args.param:
+        k, v = _parse_define(g)
+        top_params[k] = v
+
+    # Output format
+    formats = EXPORT_FORMATS if args.mode == "paths" else SCAN_FORMATS
+    args.format = args.format or formats[0]
+    if args.format not in formats:
+        sys.stderr.write("Error: --format %s is not available in %s mode "
+                         "(choose from %s)\n"
+                         % (args.format, args.mode, ", ".join(formats)))
+        return 1
+
     # Color control
     is_tty = hasattr(sys.stdout, "isatty") and sys.stdout.isatty()
     if args.no_color or args.json or args.output or not is_tty:
@@ -192,36 +589,46 @@ def main(argv=None):
         set_color(True)
 
     # Run scan
-    result = rtl_scan(
+    scan_args = dict(
         directory=dir_arg,
         file=file_arg,
-        files=files_arg,
+        filelist=flist_arg,
+        module_index=args.index,
         top_module=args.top,
         base_dir=args.base_dir,
         mode=args.mode,
         defines=defines if defines else None,
         include_dirs=args.incdir if args.incdir else None,
+        cache=args.cache,
+        changed_files=args.changed,
+        top_params=top_params if top_params else None,
+        exclude=args.exclude or None,
+        include=args.include or None,
+        follow_symlinks=args.follow_symlinks,
+        jobs=args.jobs,
+        language=args.language,
     )
-
-    # Output
-    if args.output:
-        # Remove non-serializable internal keys
-        out = {k: v for k, v in result.items() if not k.startswith("_")}
-        json_str = json.dumps(out, indent=2, ensure_ascii=False)
-        try:
-            with open(args.output, "w") as f:
-                f.write(json_str)
-                f.write("\n")
-        except IOError as e:
-            sys.stderr.write("Error writing output: %s\n" % e)
+    if args.watch:
+        return _watch(scan_args, args)
+    if args.sqlite:
+        return _write_sqlite(scan_args, args)
+    if args.output_format == "binary":
+        if not args.output:
+            sys.stderr.write("Error: --output-format binary needs -o FILE\n")
             return 1
-        print("Written to %s (%d bytes)" % (args.output, len(json_str)))
-        return 0
+        return _write_modules(scan_args, args)
 
-    if args.json:
-        out = {k: v for k, v in result.items() if not k.startswith("_")}
-        print(json.dumps(out, indent=2, ensure_ascii=False))
-        return 0
+    result = None
+    if args.connect is not None:
+        result = _remote_scan(args.connect, scan_args, args)
+    if args.mode != "paths" and (args.output or args.json):
+        return _write_result(result, scan_args, args)
+    if result is None:
+        from src.rtl_scan import rtl_scan
+        result = rtl_scan(**scan_args)
+
+    if args.mode == "paths" and "error" not in result:
+        return _write_paths(result, args)
 
     # Terminal formatted output
     print(format_result(result, mode=args.mode))
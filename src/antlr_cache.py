@@ -0,0 +1,488 @@
+"""
+On-disk caches of deserialized ANTLR ATNs and learned prediction DFAs.
+
+A generated ANTLR parser / lexer deserializes its serialized ATN when the
+module is imported — in every CLI run, daemon start and worker process.
+For large grammars this is a noticeable part of start-up.  Inside
+cached_atns(), ATNDeserializer.deserialize() first looks for a cached
+copy of the same serialized ATN and only deserializes (and stores the
+result) on a miss.
+
+The ATN object graph is too deep for plain pickling (every transition
+points at its target state), so states are pickled flat: a first pickle
+holds the state classes, a second the ATN and state attributes with
+every state reference replaced by its index.
+
+Cache entries are keyed by a hash of the serialized ATN, the ANTLR
+runtime and the Python version, so a regenerated grammar or upgraded
+runtime simply misses.  Any failure to read or write the cache falls
+back to normal deserialization.
+
+The DFAs a lexer / parser learns while parsing can be saved the same way
+(save_dfa_cache()) and installed in a later process (load_dfa_cache()),
+so its first files are not parsed with full ATN simulation.  They are
+keyed by the recognizer class and its serialized ATN, so a changed
+grammar starts a new cache.
+
+Environment:
+  RTL_SCAN_CACHE_DIR   cache directory (default $XDG_CACHE_HOME/rtl_scan
+                       or ~/.cache/rtl_scan); ATNs go in its atn/ subdir
+  RTL_SCAN_ATN_CACHE   set to 0 to disable the cache
+  RTL_SCAN_DFA_CACHE   set to 1 to load / save learned DFAs, 0 to never
+                       do so (default: only for the SystemVerilog
+                       grammar; see --dfa-cache); they go in dfa/
+
+Provides:
+  - cache_dir()     the cache directory in effect
+  - cached_atns()   context manager enabling the cache
+  - dump_atn()      write an ATN in the flat format
+  - load_atn()      read it back
+  - dfa_cache_enabled()                 RTL_SCAN_DFA_CACHE in effect
+  - dump_dfas() / load_dfas()           learned DFAs of a recognizer class
+  - load_dfa_cache() / save_dfa_cache() the same, through the cache dir
+  - dfa_path() / dfa_size()             cache file, learned state count
+"""
+
+import contextlib
+import gc
+import hashlib
+import io
+import logging
+import os
+import pickle
+import sys
+import threading
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+FORMAT_VERSION = 1
+
+_lock = threading.Lock()
+
+
+def cache_dir():
+    # type: () -> str
+    """Base cache directory for rtl_scan (see module docstring)."""
+    env = os.environ.get("RTL_SCAN_CACHE_DIR")
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "rtl_scan")
+
+
+def _enabled():
+    # type: () -> bool
+    return os.environ.get("RTL_SCAN_ATN_CACHE", "1") not in ("0", "", "no", "off")
+
+
+def _runtime_tag():
+    # type: () -> str
+    """Identifies the ANTLR runtime and interpreter the classes come from."""
+    import antlr4.atn.ATNDeserializer as mod
+    try:
+        mtime = os.stat(mod.__file__).st_mtime_ns
+    except (OSError, TypeError):
+        mtime = 0
+    return "%s:%s:%d:%d" % (sys.implementation.cache_tag,
+                            os.path.dirname(mod.__file__ or ""), mtime,
+                            FORMAT_VERSION)
+
+
+def _key(data):
+    # type: (Any) -> str
+    """Hash of a serialized ATN (str in older runtimes, int list in 4.10+)."""
+    h = hashlib.sha1(_runtime_tag().encode("utf-8"))
+    if isinstance(data, str):
+        h.update(data.encode("utf-8", "surrogatepass"))
+    else:
+        h.update(repr(list(data)).encode("ascii"))
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Flat ATN pickling
+# ---------------------------------------------------------------------------
+
+class _StatePickler(pickle.Pickler):
+    """Pickles ATN states (and the ATN itself) by reference."""
+
+    def __init__(self, f, atn, index):
+        # type: (BinaryIO, Any, Dict[int, int]) -> None
+        pickle.Pickler.__init__(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._atn = atn
+        self._index = index
+
+    def persistent_id(self, obj):
+        if obj is self._atn:
+            return "atn"
+        return self._index.get(id(obj))
+
+
+class _StateUnpickler(pickle.Unpickler):
+
+    def __init__(self, f, atn, states):
+        # type: (BinaryIO, Any, list) -> None
+        pickle.Unpickler.__init__(self, f)
+        self._atn = atn
+        self._states = states
+
+    def persistent_load(self, pid):
+        if pid == "atn":
+            return self._atn
+        return self._states[pid]
+
+
+def dump_atn(atn, f):
+    # type: (Any, BinaryIO) -> None
+    """Write *atn* to the binary file *f*."""
+    states = [s for s in atn.states if s is not None]
+    index = {id(s): i for i, s in enumerate(states)}
+    pickle.dump((type(atn), [type(s) for s in states]), f,
+                protocol=pickle.HIGHEST_PROTOCOL)
+    _StatePickler(f, atn, index).dump(
+        (atn.__dict__, [s.__dict__ for s in states]))
+
+
+def load_atn(f):
+    # type: (BinaryIO) -> Any
+    """Read an ATN written by dump_atn()."""
+    # Thousands of new container objects: cyclic GC passes would only
+    # slow the load down
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_atn(f)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load_atn(f):
+    # type: (BinaryIO) -> Any
+    atn_cls, state_classes = pickle.load(f)
+    atn = atn_cls.__new__(atn_cls)
+    states = [cls.__new__(cls) for cls in state_classes]
+    atn_dict, state_dicts = _StateUnpickler(f, atn, states).load()
+    atn.__dict__.update(atn_dict)
+    for state, d in zip(states, state_dicts):
+        state.__dict__.update(d)
+    return atn
+
+
+# ---------------------------------------------------------------------------
+# Deserializer hook
+# ---------------------------------------------------------------------------
+
+def _load(path):
+    # type: (str) -> Optional[Any]
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        return load_atn(io.BytesIO(data))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug("Ignoring unreadable ATN cache %s: %s", path, e)
+        return None
+
+
+def _store(path, atn):
+    # type: (str, Any) -> None
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            dump_atn(atn, f)
+        os.replace(tmp, path)
+        logger.debug("ATN cached: %s", path)
+    except Exception as e:
+        logger.debug("Cannot write ATN cache %s: %s", path, e)
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+
+
+@contextlib.contextmanager
+def cached_atns(directory=None):
+    # type: (Optional[str]) -> Iterator[None]
+    """Serve ATN deserialization from the on-disk cache while active.
+
+    Wrap the import of generated ANTLR modules::
+
+        with cached_atns():
+            from verilog.VerilogParser import VerilogParser
+    """
+    if not _enabled():
+        yield
+        return
+    from antlr4.atn.ATNDeserializer import ATNDeserializer
+
+    atn_dir = os.path.join(directory or cache_dir(), "atn")
+    real = ATNDeserializer.deserialize
+
+    def deserialize(self, data):
+        path = os.path.join(atn_dir, _key(data) + ".atn")
+        atn = _load(path)
+        if atn is None:
+            atn = real(self, data)
+            _store(path, atn)
+        return atn
+
+    with _lock:
+        ATNDeserializer.deserialize = deserialize
+        try:
+            yield
+        finally:
+            ATNDeserializer.deserialize = real
+
+
+# ---------------------------------------------------------------------------
+# Learned DFA cache
+# ---------------------------------------------------------------------------
+#
+# The prediction DFAs a lexer / parser builds while parsing live in its
+# class-level decisionsToDFA and are shared by every instance, but start
+# out empty in each process.  dump_dfas() / load_dfas() persist them.
+#
+# Like ATNs they are pickled flat: DFA states and prediction contexts
+# (both deeply linked) are written by index, ATN states by state number,
+# and the runtime's singletons (EMPTY context, NONE predicate, ERROR
+# states), which it compares by identity, by name.  Hash codes cached in
+# the objects derive from str hashes, which differ between processes,
+# so they are recomputed after loading.
+
+DFA_FORMAT_VERSION = 1
+
+
+def dfa_cache_enabled(default=False):
+    # type: (bool) -> bool
+    """Whether RTL_SCAN_DFA_CACHE asks for the DFA cache (*default* if unset)."""
+    env = os.environ.get("RTL_SCAN_DFA_CACHE", "")
+    if not env:
+        return default
+    return env not in ("0", "no", "off")
+
+
+def _singletons():
+    # type: () -> Dict[str, Any]
+    from antlr4.PredictionContext import PredictionContext
+    from antlr4.atn.ATNSimulator import ATNSimulator
+    from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+    from antlr4.atn.SemanticContext import SemanticContext
+    return {
+        "empty": PredictionContext.EMPTY,
+        "none": SemanticContext.NONE,
+        "error": ATNSimulator.ERROR,
+        "lexer-error": LexerATNSimulator.ERROR,
+    }
+
+
+def _dfa_states(dfas, singletons):
+    # type: (list, Dict[str, Any]) -> list
+    """All DFA states reachable from *dfas*, in a stable order."""
+    skip = {id(s) for s in singletons.values()}
+    seen = set()  # type: set
+    out = []
+    for dfa in dfas:
+        stack = [dfa.s0] + list(dfa._states)
+        while stack:
+            s = stack.pop()
+            if s is None or id(s) in seen or id(s) in skip:
+                continue
+            seen.add(id(s))
+            out.append(s)
+            if s.edges:
+                stack.extend(s.edges)
+    return out
+
+
+def _contexts(states, singletons):
+    # type: (list, Dict[str, Any]) -> list
+    """Prediction contexts of *states*' configs, parents before children."""
+    skip = {id(s) for s in singletons.values()}
+    seen = set()  # type: set
+    out = []
+    for s in states:
+        for cfg in s.configs:
+            stack = [(cfg.context, False)]
+            while stack:
+                ctx, done = stack.pop()
+                if ctx is None or id(ctx) in skip:
+                    continue
+                if done:
+                    out.append(ctx)
+                    continue
+                if id(ctx) in seen:
+                    continue
+                seen.add(id(ctx))
+                stack.append((ctx, True))
+                parents = getattr(ctx, "parents", None)
+                if parents is None:
+                    parents = [ctx.parentCtx]
+                stack.extend((p, False) for p in parents)
+    return out
+
+
+class _DfaPickler(pickle.Pickler):
+    """Pickles DFA states, contexts, ATN states and singletons by reference."""
+
+    def __init__(self, f, index):
+        # type: (BinaryIO, Dict[int, Any]) -> None
+        pickle.Pickler.__init__(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._index = index
+
+    def persistent_id(self, obj):
+        return self._index.get(id(obj))
+
+
+class _DfaUnpickler(pickle.Unpickler):
+
+    def __init__(self, f, refs):
+        # type: (BinaryIO, Dict[Any, Any]) -> None
+        pickle.Unpickler.__init__(self, f)
+        self._refs = refs
+
+    def persistent_load(self, pid):
+        return self._refs[pid]
+
+
+def dfa_size(recognizer_cls):
+    # type: (type) -> int
+    """Number of DFA states *recognizer_cls* has learned so far."""
+    return sum(len(dfa._states) for dfa in recognizer_cls.decisionsToDFA)
+
+
+def dump_dfas(recognizer_cls, f):
+    # type: (type, BinaryIO) -> None
+    """Write the DFAs learned by a generated lexer / parser class to *f*."""
+    atn = recognizer_cls.atn
+    dfas = recognizer_cls.decisionsToDFA
+    singletons = _singletons()
+    states = _dfa_states(dfas, singletons)
+    contexts = _contexts(states, singletons)
+
+    index = {id(s): ("s", s.stateNumber) for s in atn.states if s is not None}
+    index.update((id(obj), name) for name, obj in singletons.items())
+    index.update((id(s), ("d", i)) for i, s in enumerate(states))
+    index.update((id(c), ("c", i)) for i, c in enumerate(contexts))
+
+    pickle.dump((DFA_FORMAT_VERSION, len(atn.states), len(dfas),
+                 [type(s) for s in states], [type(c) for c in contexts]),
+                f, protocol=pickle.HIGHEST_PROTOCOL)
+    _DfaPickler(f, index).dump((
+        [(dfa.s0, dfa.precedenceDfa, list(dfa._states)) for dfa in dfas],
+        [s.__dict__ for s in states],
+        [c.__dict__ for c in contexts],
+    ))
+
+
+def load_dfas(recognizer_cls, f):
+    # type: (type, BinaryIO) -> list
+    """Read DFAs written by dump_dfas() for the same class.
+
+    Returns a list to replace recognizer_cls.decisionsToDFA with.  Raises
+    ValueError when the data does not match the class's ATN.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_dfas(recognizer_cls, f)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load_dfas(recognizer_cls, f):
+    # type: (type, BinaryIO) -> list
+    from antlr4.PredictionContext import (
+        calculateHashCode, calculateListsHashCode,
+    )
+    from antlr4.dfa.DFA import DFA
+
+    atn = recognizer_cls.atn
+    version, n_states, n_decisions, state_classes, context_classes = pickle.load(f)
+    if (version, n_states, n_decisions) != (DFA_FORMAT_VERSION, len(atn.states),
+                                            len(atn.decisionToState)):
+        raise ValueError("DFA data does not match %s" % recognizer_cls.__name__)
+
+    states = [cls.__new__(cls) for cls in state_classes]
+    contexts = [cls.__new__(cls) for cls in context_classes]
+    refs = dict(_singletons())  # type: Dict[Any, Any]
+    refs.update((("s", s.stateNumber), s) for s in atn.states if s is not None)
+    refs.update((("d", i), s) for i, s in enumerate(states))
+    refs.update((("c", i), c) for i, c in enumerate(contexts))
+    dfa_data, state_dicts, context_dicts = _DfaUnpickler(f, refs).load()
+
+    for c, d in zip(contexts, context_dicts):
+        c.__dict__.update(d)
+        if hasattr(c, "parents"):
+            c.cachedHashCode = calculateListsHashCode(c.parents, c.returnStates)
+        else:
+            c.cachedHashCode = calculateHashCode(c.parentCtx, c.returnState)
+    executors = {}  # type: Dict[int, Any]
+    for s, d in zip(states, state_dicts):
+        s.__dict__.update(d)
+        s.configs.cachedHashCode = -1
+        for obj in [s] + list(s.configs):
+            ex = getattr(obj, "lexerActionExecutor", None)
+            if ex is not None:
+                executors[id(ex)] = ex
+    for ex in executors.values():
+        ex.hashCode = hash("".join(str(la) for la in ex.lexerActions))
+
+    dfas = []
+    for decision, (s0, precedence, members) in enumerate(dfa_data):
+        dfa = DFA(atn.decisionToState[decision], decision)
+        dfa.s0 = s0
+        dfa.precedenceDfa = precedence
+        dfa._states = {s: s for s in members}
+        dfas.append(dfa)
+    return dfas
+
+
+def dfa_path(recognizer_cls, directory=None):
+    # type: (type, Optional[str]) -> str
+    """Cache file for *recognizer_cls*'s DFAs, keyed by its grammar's ATN."""
+    module = sys.modules[recognizer_cls.__module__]
+    return os.path.join(directory or cache_dir(), "dfa",
+                        "%s-%s.dfa" % (recognizer_cls.__name__,
+                                       _key(module.serializedATN())))
+
+
+def load_dfa_cache(recognizer_cls, directory=None):
+    # type: (type, Optional[str]) -> bool
+    """Install cached DFAs into *recognizer_cls*; True if there were any."""
+    path = dfa_path(recognizer_cls, directory)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        dfas = load_dfas(recognizer_cls, io.BytesIO(data))
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.debug("Ignoring unreadable DFA cache %s: %s", path, e)
+        return False
+    recognizer_cls.decisionsToDFA[:] = dfas
+    logger.debug("DFA cache loaded: %s (%d states)", path,
+                 dfa_size(recognizer_cls))
+    return True
+
+
+def save_dfa_cache(recognizer_cls, directory=None):
+    # type: (type, Optional[str]) -> None
+    """Write *recognizer_cls*'s learned DFAs to the cache."""
+    path = dfa_path(recognizer_cls, directory)
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            dump_dfas(recognizer_cls, f)
+        os.replace(tmp, path)
+        logger.debug("DFA cache saved: %s (%d states)", path,
+                     dfa_size(recognizer_cls))
+    except Exception as e:
+        logger.debug("Cannot write DFA cache %s: %s", path, e)
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
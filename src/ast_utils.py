@@ -4,36 +4,76 @@ ANTLR AST utility functions for Verilog parsing.
 Provides range evaluation and width calculation helpers.
 """
 
-import re
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
+from .const_eval import try_evaluate
 
-def try_eval_range(expr_text):
-    # type: (str) -> Optional[int]
+
+def try_eval_range(expr_text, env=None):
+    # type: (str, Optional[Dict[str, Any]]) -> Optional[int]
     """Try to evaluate a constant range expression to an integer.
 
-    Handles: plain numbers, PARAM-1 style, simple arithmetic.
-    Returns None if evaluation fails (parameterized width kept as text).
+    Handles plain and sized literals (``8'hFF``), arithmetic, shifts,
+    comparisons, ternaries and ``$clog2``; identifiers are looked up in
+    *env* (parameter values).  Returns None if evaluation fails
+    (parameterized width kept as text).
     """
     text = expr_text.strip()
-    if not text:
-        return None
     if text.isdigit():
         return int(text)
-    # Simple arithmetic with only digits and +-*/
-    safe = re.sub(r"[0-9+\-*/() ]", "", text)
-    if not safe:
-        try:
-            return int(eval(text))  # safe: only digits and arithmetic ops
-        except Exception:
-            pass
+    return try_evaluate(text, env)
+
+
+def try_eval_expr(expr_text, env=None):
+    # type: (str, Optional[Dict[str, Any]]) -> Optional[int]
+    """Evaluate a constant expression, looking identifiers up in *env*."""
+    return try_evaluate(expr_text, env)
+
+
+def split_range(range_text):
+    # type: (str) -> Optional[Tuple[str, str]]
+    """Split ``"[MSB:LSB]"`` into its (msb, lsb) expression texts."""
+    text = range_text.strip()
+    if not (text.startswith("[") and text.endswith("]")):
+        return None
+    body = text[1:-1]
+    depth = 0
+    for i, ch in enumerate(body):
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        elif ch == ":" and depth == 0:
+            return body[:i], body[i + 1:]
     return None
 
 
-def range_width(range_ctx):
-    # type: (...) -> Tuple[int, str]
+def range_text_width(range_text, env=None):
+    # type: (str, Optional[Dict[str, Any]]) -> Optional[int]
+    """Width of a ``"[MSB:LSB]"`` range text, evaluated against *env*.
+
+    An empty range is one bit wide.  Returns None if either bound cannot
+    be evaluated.
+    """
+    if not range_text:
+        return 1
+    bounds = split_range(range_text)
+    if bounds is None:
+        return None
+    msb = try_eval_range(bounds[0], env)
+    lsb = try_eval_range(bounds[1], env)
+    if msb is None or lsb is None:
+        return None
+    return abs(msb - lsb) + 1
+
+
+def range_width(range_ctx, env=None):
+    # type: (Any, Optional[Dict[str, Any]]) -> Tuple[int, str]
     """Extract width and range_spec from a range_ context.
 
+    Bounds are evaluated against *env* when given; without it only
+    literal ranges produce a width.
+
     Returns (width, range_text).
     """
     if range_ctx is None:
@@ -46,8 +86,8 @@ def range_width(range_ctx):
     if msb_ctx is None or lsb_ctx is None:
         return 1, range_text
 
-    msb_val = try_eval_range(msb_ctx.getText())
-    lsb_val = try_eval_range(lsb_ctx.getText())
+    msb_val = try_eval_range(msb_ctx.getText(), env)
+    lsb_val = try_eval_range(lsb_ctx.getText(), env)
 
     if msb_val is not None and lsb_val is not None:
         width = abs(msb_val - lsb_val) + 1
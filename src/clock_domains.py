@@ -0,0 +1,114 @@
+"""
+Clock and reset propagation through the hierarchy.
+
+Port classification by name (port_classify) labels one module's ports;
+clocks and resets are renamed at every level (``i_clk`` → ``clk_core``
+→ ``ck``), so below the top most of them are classified as data.  This
+pass starts from the top module's name-classified clock and reset ports
+and follows instance connections over the connectivity graph: down
+into child ports, and from a reached output port up to the nets it
+drives in every module instantiating it.  Every port and wire reached
+is labelled with the source it came from.
+
+The graph holds one net per signal of each module definition, so each
+signal is visited once per source however often its module is
+instantiated.  Only instance connections are followed — logic inside a
+module (assigns, clock gates and buffers) is not — and connections
+through expressions other than an identifier or select stop the trace.
+
+Provides:
+  - propagate_clocks()   {"clocks": [...], "resets": [...]} from a top
+"""
+
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from .connectivity import ConnectivityGraph
+from .data_model import ModuleInfo
+from .hierarchy import topo_sort
+from .port_classify import PortDirection
+
+logger = logging.getLogger(__name__)
+
+
+def propagate_clocks(top, modules, graph=None):
+    # type: (str, Dict[str, ModuleInfo], Optional[ConnectivityGraph]) -> Dict[str, Any]
+    """Label the signals the clocks and resets of *top* reach.
+
+    Args:
+        top:     top module name
+        modules: {name: ModuleInfo}
+        graph:   ConnectivityGraph of *modules*, built if not given
+
+    Returns:
+        {"clocks": [{"source", "ports", "wires"}],
+         "resets": [{"source", "active", "ports", "wires"}]}
+        with one entry per classified top port; "ports" and "wires" are
+        "module.signal" names in visiting order, the source excluded.
+    """
+    mod = modules.get(top)
+    if mod is None:
+        return {"clocks": [], "resets": []}
+    if graph is None:
+        graph = ConnectivityGraph(modules)
+    drivers = _output_nets(graph, modules)
+    # Up-steps must not leave the top's hierarchy
+    scope = set(topo_sort(modules, top))
+    scope.update(child for name in list(scope)
+                 for child in modules[name].instantiated_modules)
+
+    cls = mod.classify_ports()
+    out = {"clocks": [], "resets": []}  # type: Dict[str, List[Dict[str, Any]]]
+    for kind, seeds in (("clocks", cls["clocks"]), ("resets", cls["resets"])):
+        for seed in seeds:
+            entry = {"source": seed["port"]}  # type: Dict[str, Any]
+            if "active" in seed:
+                entry["active"] = seed["active"]
+            entry.update(_reach(graph, graph.net(top, seed["port"]),
+                                drivers, scope))
+            out[kind].append(entry)
+    logger.debug("Propagated %d clock(s), %d reset(s) from %s",
+                 len(out["clocks"]), len(out["resets"]), top)
+    return out
+
+
+def _output_nets(graph, modules):
+    # type: (ConnectivityGraph, Dict[str, ModuleInfo]) -> Set[int]
+    """Nets of output / inout ports, which drive their parents' nets."""
+    nets = set()  # type: Set[int]
+    for name, mod in modules.items():
+        for p in mod.ports:
+            if p.direction != PortDirection.INPUT:
+                n = graph.net(name, p.name)
+                if n >= 0:
+                    nets.add(n)
+    return nets
+
+
+def _reach(graph, first, drivers, scope):
+    # type: (ConnectivityGraph, int, Set[int], Set[str]) -> Dict[str, List[str]]
+    ports = []  # type: List[str]
+    wires = []  # type: List[str]
+    if first < 0:
+        return {"ports": ports, "wires": wires}
+    down_start, down = graph.down_start, graph.down
+    up_start, up = graph.up_start, graph.up
+    seen = {first}
+    queue = deque([first])  # type: Deque[int]
+    while queue:
+        n = queue.popleft()
+        nxt = list(down[down_start[n]:down_start[n + 1]])
+        if n in drivers:
+            nxt.extend(up[up_start[n]:up_start[n + 1]])
+        for c in nxt:
+            if c in seen:
+                continue
+            seen.add(c)
+            module, signal = graph.name(c)
+            if module not in scope:
+                continue
+            queue.append(c)
+            (ports if graph.is_port(c) else wires).append(
+                "%s.%s" % (module, signal))
+    return {"ports": ports, "wires": wires}
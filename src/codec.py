@@ -0,0 +1,396 @@
+"""
+Compact binary codec for the design data model.
+
+Serializes ModuleInfo (with its ports, parameters, instances,
+connections, generate scopes and wires) far smaller and faster than
+to_full_dict() + JSON or pickle: every string is stored once in a string
+table shared by all modules of a stream, and everything else is a flat
+array of small unsigned integers decoded with one C-level copy.  Unlike
+to_full_dict() the encoding is lossless (port comments are kept).
+
+Layout (little-endian)::
+
+    stream := MAGIC u32:version record*
+    record := u32:n_strings u32:text_bytes u32:n_values
+              u8:length_size u8:value_size
+              char_length[n_strings] text(UTF-8) value[n_values]
+
+*char_length* and *value* are unsigned integers of 1, 2 or 4 bytes, the
+smallest size holding the largest of the record.
+
+Each record is one module.  Its *text* holds the strings first used by
+that module; string indices continue across the records of a stream, so
+a reader decodes modules one at a time, in order.  Signed integers are
+zigzag-coded and offset by one; large ones are stored as 0 followed by
+the index of their decimal text.  Within a module,
+identical instance parameter dicts and generate-scope chains are stored
+once and referenced after that.
+
+Provides:
+  - CODEC_VERSION, CodecError
+  - ModuleWriter       write modules to a binary stream one at a time
+  - iter_modules()     decode modules from a binary stream one at a time
+  - encode_modules() / decode_modules()   list <-> bytes
+  - encode_module() / decode_module()     one self-contained module
+"""
+
+import io
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import (
+    IO, Any, Callable, Container, Dict, Iterable, Iterator, List, Optional,
+    Tuple,
+)
+
+from .columnar import InstanceTable, columnar_threshold
+from .data_model import (
+    ConnectionInfo,
+    GenerateScope,
+    InstanceInfo,
+    ModuleInfo,
+    ParameterInfo,
+    PortInfo,
+    WireInfo,
+)
+from .port_classify import PortDirection
+
+MAGIC = b"RTLM"
+# Bump on any layout change; readers reject other versions
+CODEC_VERSION = 1
+
+_HEADER = struct.Struct("<4sI")
+_RECORD = struct.Struct("<IIIBB")
+_TYPECODES = {1: "B", 2: "H", 4: "I"}
+_LIMIT = 1 << 30
+_SWAP = sys.byteorder == "big"
+
+_DIRECTIONS = tuple(PortDirection)
+_DIRECTION_CODE = {d: i for i, d in enumerate(_DIRECTIONS)}
+
+
+class CodecError(ValueError):
+    """Malformed, truncated or incompatible binary data."""
+
+
+def _words(values):
+    # type: (List[int]) -> Tuple[int, bytes]
+    """(item size, bytes) of *values* in the narrowest unsigned type."""
+    top = max(values, default=0)
+    size = 1 if top < 0x100 else 2 if top < 0x10000 else 4
+    words = array(_TYPECODES[size], values)
+    if _SWAP:
+        words.byteswap()
+    return size, words.tobytes()
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+def _instance_rows(instances):
+    # type: (Any) -> Iterator[Tuple[str, str, str, Dict[str, str], Tuple[GenerateScope, ...], List[Tuple[str, str]]]]
+    """(name, module, array range, parameters, generate, [(port, signal)])
+    per instance; columnar tables are read straight from their columns."""
+    if not isinstance(instances, InstanceTable):
+        for inst in instances:
+            yield (inst.instance_name, inst.module_type, inst.array_range,
+                   inst.parameters, inst.generate,
+                   [(c.port_name, c.signal_expr) for c in inst.connections])
+        return
+    t = instances
+    s = t.strings.strings
+    start = t._conn_start
+    for row in range(len(t)):
+        a, b = start[row], start[row + 1]
+        yield (s[t._name[row]], s[t._module[row]], s[t._range[row]],
+               t._param_sets[t._params[row]],
+               t._scope_sets[t._generate[row]],
+               [(s[p], s[g]) for p, g in zip(t._conn_port[a:b],
+                                              t._conn_signal[a:b])])
+
+
+class ModuleWriter:
+    """
+    Writes modules to a binary stream, one record per module.
+
+    Usage::
+
+        with open("design.rtlm", "wb") as f:
+            writer = ModuleWriter(f)
+            for mod in modules:
+                writer.write(mod)
+    """
+
+    def __init__(self, stream):
+        # type: (IO[bytes]) -> None
+        self._stream = stream
+        self._index = {"": 0}  # type: Dict[str, int]
+        self.count = 0
+        stream.write(_HEADER.pack(MAGIC, CODEC_VERSION))
+
+    def write(self, mod):
+        # type: (ModuleInfo) -> None
+        index = self._index
+        new = []  # type: List[str]
+        v = []  # type: List[int]
+        put = v.append
+
+        def S(text):
+            # type: (str) -> int
+            i = index.get(text)
+            if i is None:
+                i = index[text] = len(index)
+                new.append(text)
+            return i
+
+        def I(n):
+            # type: (int) -> None
+            if -_LIMIT < n < _LIMIT:
+                put(((n << 1) ^ (n >> 31)) + 1)
+            else:
+                put(0)
+                put(S(str(n)))
+
+        try:
+            self._encode(mod, S, I, v)
+        except Exception:
+            # Keep the table in step with what the stream holds
+            for text in new:
+                del index[text]
+            raise
+
+        text = "".join(new).encode("utf-8")
+        length_size, lengths = _words([len(x) for x in new])
+        value_size, values = _words(v)
+        self._stream.write(b"".join((
+            _RECORD.pack(len(new), len(text), len(v), length_size,
+                         value_size),
+            lengths, text, values)))
+        self.count += 1
+
+    @staticmethod
+    def _encode(mod, S, I, v):
+        # type: (ModuleInfo, Callable[[str], int], Callable[[int], None], List[int]) -> None
+        put = v.append
+        put(S(mod.name))
+        put(S(mod.file_path))
+        put(S(mod.kind))
+        I(mod.line_number)
+
+        ports = mod.ports
+        put(len(ports))
+        for p in ports:
+            put(S(p.name))
+            put(_DIRECTION_CODE[p.direction])
+            I(p.width)
+            v.extend((S(p.range_spec), S(p.net_type), S(p.comment)))
+
+        put(len(mod.parameters))
+        for prm in mod.parameters:
+            v.extend((S(prm.name), S(prm.value), S(prm.param_type)))
+            if prm.resolved is None:
+                put(0)
+            else:
+                put(1)
+                I(prm.resolved)
+
+        # Parameter dicts / scope chains: 0 = empty, else their number in
+        # order of first use; a new one is written out where first used
+        param_ids = {}  # type: Dict[Tuple[Tuple[str, str], ...], int]
+        scope_ids = {}  # type: Dict[Tuple[GenerateScope, ...], int]
+        instances = mod.instances
+        put(len(instances))
+        for name, module, rng, params, scopes, conns in \
+                _instance_rows(instances):
+            v.extend((S(name), S(module), S(rng)))
+            if not params:
+                put(0)
+            else:
+                key = tuple(params.items())
+                ref = param_ids.get(key)
+                if ref is not None:
+                    put(ref)
+                else:
+                    put(param_ids.setdefault(key, len(param_ids) + 1))
+                    put(len(key))
+                    for k, val in key:
+                        put(S(k))
+                        put(S(val))
+            if not scopes:
+                put(0)
+            else:
+                scopes = tuple(scopes)
+                ref = scope_ids.get(scopes)
+                if ref is not None:
+                    put(ref)
+                else:
+                    put(scope_ids.setdefault(scopes, len(scope_ids) + 1))
+                    put(len(scopes))
+                    for g in scopes:
+                        v.extend((S(g.kind), S(g.cond), S(g.name),
+                                  S(g.genvar), S(g.init), S(g.step),
+                                  int(g.negate), len(g.labels)))
+                        v.extend(S(x) for x in g.labels)
+                        put(len(g.others))
+                        v.extend(S(x) for x in g.others)
+            put(len(conns))
+            for port, signal in conns:
+                put(S(port))
+                put(S(signal))
+
+        put(len(mod.wires))
+        for w in mod.wires:
+            put(S(w.name))
+            I(w.width)
+            put(S(w.range_spec))
+
+
+def encode_modules(modules):
+    # type: (Iterable[ModuleInfo]) -> bytes
+    """Encode *modules* as one stream."""
+    buf = io.BytesIO()
+    writer = ModuleWriter(buf)
+    for mod in modules:
+        writer.write(mod)
+    return buf.getvalue()
+
+
+def encode_module(mod):
+    # type: (ModuleInfo) -> bytes
+    """Encode one module as a self-contained stream."""
+    return encode_modules((mod,))
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+def _read(stream, n):
+    # type: (IO[bytes], int) -> bytes
+    data = stream.read(n)
+    if len(data) != n:
+        raise CodecError("Truncated module stream")
+    return data
+
+
+def _read_words(stream, n, size):
+    # type: (IO[bytes], int, int) -> array
+    typecode = _TYPECODES.get(size)
+    if typecode is None:
+        raise CodecError("Corrupt module record")
+    words = array(typecode)
+    words.frombytes(_read(stream, size * n))
+    if _SWAP:
+        words.byteswap()
+    return words
+
+
+def _decode_body(values, s, threshold):
+    # type: (array, List[str], int) -> ModuleInfo
+    nx = iter(values).__next__
+
+    def I():
+        # type: () -> int
+        n = nx() - 1
+        if n < 0:
+            return int(s[nx()])
+        return (n >> 1) ^ -(n & 1)
+
+    dirs = _DIRECTIONS
+    name, file_path, kind = s[nx()], s[nx()], s[nx()]
+    line = I()
+    ports = [PortInfo(s[nx()], dirs[nx()], I(), s[nx()], s[nx()], s[nx()])
+             for _ in range(nx())]
+    params = [ParameterInfo(s[nx()], s[nx()], s[nx()], I() if nx() else None)
+              for _ in range(nx())]
+
+    param_sets = [{}]  # type: List[Dict[str, str]]
+    scope_sets = [()]  # type: List[Tuple[GenerateScope, ...]]
+
+    def instance():
+        # type: () -> InstanceInfo
+        inst_name, module, rng = s[nx()], s[nx()], s[nx()]
+        ref = nx()
+        if ref == len(param_sets):
+            param_sets.append({s[nx()]: s[nx()] for _ in range(nx())})
+        scopes_ref = nx()
+        if scopes_ref == len(scope_sets):
+            scope_sets.append(tuple(GenerateScope(
+                s[nx()], s[nx()], s[nx()], s[nx()], s[nx()], s[nx()],
+                bool(nx()), tuple(s[nx()] for _ in range(nx())),
+                tuple(s[nx()] for _ in range(nx())))
+                for _ in range(nx())))
+        conns = [ConnectionInfo(s[nx()], s[nx()]) for _ in range(nx())]
+        return InstanceInfo(inst_name, module, conns,
+                            dict(param_sets[ref]) if ref else {},
+                            rng, scope_sets[scopes_ref])
+
+    n = nx()
+    rows = (instance() for _ in range(n))
+    # Instance-heavy modules are decoded straight into columnar storage
+    instances = (InstanceTable(rows) if 0 < threshold <= n
+                 else list(rows))  # type: Any
+    wires = [WireInfo(s[nx()], I(), s[nx()]) for _ in range(nx())]
+    return ModuleInfo(name=name, file_path=file_path, line_number=line,
+                      ports=ports, parameters=params, instances=instances,
+                      wires=wires, kind=kind)
+
+
+def iter_modules(stream, names=None):
+    # type: (IO[bytes], Optional[Container[str]]) -> Iterator[ModuleInfo]
+    """Decode the modules of a binary stream lazily, in order.
+
+    Args:
+        stream: binary file object positioned at the stream header
+        names:  if given, only modules with these names are built; the
+                others are read past without creating any objects
+
+    Raises:
+        CodecError on a bad header, another codec version or truncation.
+    """
+    magic, version = _HEADER.unpack(_read(stream, _HEADER.size))
+    if magic != MAGIC:
+        raise CodecError("Not a module stream")
+    if version != CODEC_VERSION:
+        raise CodecError("Module stream version %d, expected %d"
+                         % (version, CODEC_VERSION))
+    strings = [""]
+    threshold = columnar_threshold()
+    while True:
+        head = stream.read(_RECORD.size)
+        if not head:
+            return
+        if len(head) != _RECORD.size:
+            raise CodecError("Truncated module stream")
+        n_strings, n_bytes, n_values, length_size, value_size = \
+            _RECORD.unpack(head)
+        ends = list(accumulate(_read_words(stream, n_strings, length_size)))
+        try:
+            text = _read(stream, n_bytes).decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise CodecError("Corrupt string table: %s" % e)
+        strings.extend(text[a:b] for a, b in zip([0] + ends, ends))
+        values = _read_words(stream, n_values, value_size)
+        if names is not None and strings[values[0]] not in names:
+            continue
+        try:
+            yield _decode_body(values, strings, threshold)
+        except (StopIteration, IndexError, RuntimeError):
+            raise CodecError("Corrupt module record")
+
+
+def decode_modules(data, names=None):
+    # type: (bytes, Optional[Container[str]]) -> List[ModuleInfo]
+    """Decode a stream produced by encode_modules()."""
+    return list(iter_modules(io.BytesIO(data), names))
+
+
+def decode_module(data):
+    # type: (bytes) -> ModuleInfo
+    """Decode the single module of encode_module() output."""
+    mods = decode_modules(data)
+    if len(mods) != 1:
+        raise CodecError("Expected one module, found %d" % len(mods))
+    return mods[0]
@@ -0,0 +1,402 @@
+"""
+Columnar storage for the instances of instance-heavy modules.
+
+A flat SoC top with hundreds of thousands of instances holds millions of
+InstanceInfo / ConnectionInfo objects.  InstanceTable stores the same
+data as integer-index arrays into a shared string table: one row per
+instance, one entry per connection, with parameter dicts and generate
+scopes deduplicated (all instances of one statement share them).
+
+It is a drop-in replacement for ``ModuleInfo.instances``: a mutable
+sequence whose items are InstanceView objects — InstanceInfo subclasses
+reading (and writing) their row — so existing consumers work unchanged.
+The parsers switch a module to it once its instance count reaches
+COLUMNAR_THRESHOLD (see compact_instances()); ModuleInfo.from_full_dict
+does the same.
+
+Views are live for their scalar fields; *connections* is returned as a
+tuple and *parameters* as a read-only mapping of the shared dict, so
+edit them by assigning the attribute.
+
+Provides:
+  - StringTable          interned string ↔ index table
+  - InstanceTable        columnar instance / connection store
+  - InstanceView         InstanceInfo reading one InstanceTable row
+  - COLUMNAR_THRESHOLD   instance count from which modules go columnar
+  - compact_instances()  switch a module to columnar storage
+"""
+
+import os
+from array import array
+from types import MappingProxyType
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple,
+)
+
+from .data_model import ConnectionInfo, GenerateScope, InstanceInfo, ModuleInfo
+
+# Modules with at least this many instances are stored columnar;
+# $RTL_SCAN_COLUMNAR_THRESHOLD overrides it (0 disables)
+COLUMNAR_THRESHOLD = 4096
+
+
+def columnar_threshold():
+    # type: () -> int
+    """COLUMNAR_THRESHOLD, or $RTL_SCAN_COLUMNAR_THRESHOLD if set."""
+    env = os.environ.get("RTL_SCAN_COLUMNAR_THRESHOLD", "")
+    return int(env) if env.isdigit() else COLUMNAR_THRESHOLD
+
+
+# ---------------------------------------------------------------------------
+# String table
+# ---------------------------------------------------------------------------
+
+class StringTable:
+    """Append-only table mapping strings to dense integer indices."""
+
+    __slots__ = ("strings", "_index")
+
+    def __init__(self):
+        # type: () -> None
+        self.strings = [""]  # type: List[str]
+        self._index = {"": 0}  # type: Dict[str, int]
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.strings)
+
+    def add(self, s):
+        # type: (str) -> int
+        idx = self._index.get(s)
+        if idx is None:
+            idx = self._index[s] = len(self.strings)
+            self.strings.append(s)
+        return idx
+
+    def __getstate__(self):
+        return self.strings
+
+    def __setstate__(self, strings):
+        self.strings = strings
+        self._index = {s: i for i, s in enumerate(strings)}
+
+
+# ---------------------------------------------------------------------------
+# Instance table
+# ---------------------------------------------------------------------------
+
+class InstanceView(InstanceInfo):
+    """InstanceInfo backed by one row of an InstanceTable.
+
+    *connections* and *parameters* are read-only (a tuple and a mapping
+    proxy); assign the attribute to change them.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        # type: (InstanceTable, int) -> None
+        self._table = table
+        self._row = row
+
+    def _column(name):
+        # type: (str) -> property
+        def get(self):
+            t = self._table
+            return t.strings.strings[getattr(t, name)[self._row]]
+
+        def set(self, value):
+            t = self._table
+            getattr(t, name)[self._row] = t.strings.add(value)
+            t._changed()
+        return property(get, set)
+
+    instance_name = _column("_name")
+    module_type = _column("_module")
+    array_range = _column("_range")
+    del _column
+
+    @property
+    def connections(self):
+        # type: () -> Tuple[ConnectionInfo, ...]
+        return self._table._connections(self._row)
+
+    @connections.setter
+    def connections(self, value):
+        # type: (Iterable[ConnectionInfo]) -> None
+        self._table._set_connections(self._row, list(value))
+
+    @property
+    def parameters(self):
+        # type: () -> Mapping[str, str]
+        t = self._table
+        return MappingProxyType(t._param_sets[t._params[self._row]])
+
+    @parameters.setter
+    def parameters(self, value):
+        # type: (Dict[str, str]) -> None
+        t = self._table
+        t._params[self._row] = t._add_params(value)
+        t._changed()
+
+    @property
+    def generate(self):
+        # type: () -> Tuple[GenerateScope, ...]
+        t = self._table
+        return t._scope_sets[t._generate[self._row]]
+
+    @generate.setter
+    def generate(self, value):
+        # type: (Tuple[GenerateScope, ...]) -> None
+        t = self._table
+        t._generate[self._row] = t._add_scopes(value)
+        t._changed()
+
+    def _values(self):
+        # type: () -> Tuple[Any, ...]
+        # Compare like the InstanceInfo this row was built from
+        return (self.instance_name, self.module_type, list(self.connections),
+                dict(self.parameters), self.array_range, self.generate)
+
+    def to_dict(self):
+        # type: () -> Dict[str, Any]
+        """InstanceInfo.to_dict() straight from the columns."""
+        t, row = self._table, self._row
+        s = t.strings.strings
+        d = {
+            "instance": s[t._name[row]],
+            "module": s[t._module[row]],
+        }  # type: Dict[str, Any]
+        params = t._param_sets[t._params[row]]
+        if params:
+            d["parameters"] = dict(params)
+        start, end = t._conn_start[row], t._conn_start[row + 1]
+        if end > start:
+            d["connections"] = [
+                {"port": s[p], "signal": s[g]} for p, g in zip(
+                    t._conn_port[start:end], t._conn_signal[start:end])]
+        if t._range[row]:
+            d["array"] = s[t._range[row]]
+        scopes = t._scope_sets[t._generate[row]]
+        if scopes:
+            d["generate"] = [g.to_dict() for g in scopes]
+        return d
+
+    def __repr__(self):
+        # type: () -> str
+        return "InstanceInfo(%s)" % ", ".join(
+            "%s=%r" % (f, getattr(self, f)) for f in self._fields)
+
+
+class InstanceTable:
+    """Columnar, list-like store of InstanceInfo rows.
+
+    Row columns index into *strings* (names, module types, ranges) or
+    into the deduplicated parameter dicts and generate-scope tuples;
+    connections of row ``i`` are entries ``_conn_start[i]`` up to
+    ``_conn_start[i + 1]`` of the port / signal columns.
+    """
+
+    __slots__ = ("strings", "_name", "_module", "_range", "_params",
+                 "_generate", "_conn_start", "_conn_port", "_conn_signal",
+                 "_param_sets", "_param_index", "_scope_sets", "_scope_index",
+                 "_owner")
+
+    def __init__(self, instances=(), strings=None):
+        # type: (Iterable[InstanceInfo], Optional[StringTable]) -> None
+        self.strings = strings if strings is not None else StringTable()
+        self._owner = None  # type: Optional[ModuleInfo]
+        self._reset()
+        self.extend(instances)
+
+    def _reset(self):
+        # type: () -> None
+        self._name = array("i")
+        self._module = array("i")
+        self._range = array("i")
+        self._params = array("i")
+        self._generate = array("i")
+        self._conn_start = array("i", [0])
+        self._conn_port = array("i")
+        self._conn_signal = array("i")
+        self._param_sets = [{}]  # type: List[Dict[str, str]]
+        self._param_index = {(): 0}  # type: Dict[tuple, int]
+        self._scope_sets = [()]  # type: List[Tuple[GenerateScope, ...]]
+        self._scope_index = {(): 0}  # type: Dict[tuple, int]
+
+    # --- encoding ---
+
+    def _add_params(self, params):
+        # type: (Dict[str, str]) -> int
+        key = tuple(params.items())
+        idx = self._param_index.get(key)
+        if idx is None:
+            idx = self._param_index[key] = len(self._param_sets)
+            self._param_sets.append(dict(params))
+        return idx
+
+    def _add_scopes(self, scopes):
+        # type: (Tuple[GenerateScope, ...]) -> int
+        scopes = tuple(scopes)
+        idx = self._scope_index.get(scopes)
+        if idx is None:
+            idx = self._scope_index[scopes] = len(self._scope_sets)
+            self._scope_sets.append(scopes)
+        return idx
+
+    def _connections(self, row):
+        # type: (int) -> Tuple[ConnectionInfo, ...]
+        s = self.strings.strings
+        start, end = self._conn_start[row], self._conn_start[row + 1]
+        return tuple(ConnectionInfo(s[p], s[g]) for p, g in zip(
+            self._conn_port[start:end], self._conn_signal[start:end]))
+
+    def _set_connections(self, row, connections):
+        # type: (int, List[ConnectionInfo]) -> None
+        start, end = self._conn_start[row], self._conn_start[row + 1]
+        add = self.strings.add
+        self._conn_port[start:end] = array(
+            "i", [add(c.port_name) for c in connections])
+        self._conn_signal[start:end] = array(
+            "i", [add(c.signal_expr) for c in connections])
+        delta = len(connections) - (end - start)
+        if delta:
+            for i in range(row + 1, len(self._conn_start)):
+                self._conn_start[i] += delta
+        self._changed()
+
+    def _changed(self):
+        # type: () -> None
+        if self._owner is not None:
+            self._owner.invalidate()
+
+    def _adopt(self, owner):
+        # type: (ModuleInfo) -> InstanceTable
+        """The table to store as *owner*'s instances (see ModuleInfo)."""
+        table = self
+        if self._owner is not None and self._owner is not owner:
+            table = InstanceTable(self, self.strings)
+        table._owner = owner
+        return table
+
+    # --- sequence API ---
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._name)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [InstanceView(self, i)
+                    for i in range(*index.indices(len(self)))]
+        n = len(self._name)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("instance index out of range")
+        return InstanceView(self, index)
+
+    def __iter__(self):
+        # type: () -> Iterator[InstanceView]
+        for i in range(len(self._name)):
+            yield InstanceView(self, i)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, InstanceTable)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self):
+        # type: () -> str
+        return "InstanceTable(%d instances, %d connections, %d strings)" % (
+            len(self), len(self._conn_port), len(self.strings))
+
+    def append(self, inst):
+        # type: (InstanceInfo) -> None
+        add = self.strings.add
+        self._name.append(add(inst.instance_name))
+        self._module.append(add(inst.module_type))
+        self._range.append(add(inst.array_range))
+        self._params.append(self._add_params(inst.parameters)
+                            if inst.parameters else 0)
+        self._generate.append(self._add_scopes(inst.generate)
+                              if inst.generate else 0)
+        for c in inst.connections:
+            self._conn_port.append(add(c.port_name))
+            self._conn_signal.append(add(c.signal_expr))
+        self._conn_start.append(len(self._conn_port))
+        self._changed()
+
+    def extend(self, instances):
+        # type: (Iterable[InstanceInfo]) -> None
+        if instances is self:
+            instances = list(self)
+        for inst in instances:
+            self.append(inst)
+
+    def __iadd__(self, instances):
+        self.extend(instances)
+        return self
+
+    # Rare edits rebuild the columns from materialized rows
+    def _edit(self, op):
+        rows = [InstanceInfo(v.instance_name, v.module_type,
+                             list(v.connections), dict(v.parameters),
+                             v.array_range, v.generate)
+                for v in self]
+        result = op(rows)
+        self._reset()
+        self.extend(rows)
+        return result
+
+    def __setitem__(self, index, value):
+        self._edit(lambda rows: rows.__setitem__(index, value))
+
+    def __delitem__(self, index):
+        self._edit(lambda rows: rows.__delitem__(index))
+
+    def insert(self, index, inst):
+        # type: (int, InstanceInfo) -> None
+        self._edit(lambda rows: rows.insert(index, inst))
+
+    def pop(self, index=-1):
+        # type: (int) -> InstanceInfo
+        return self._edit(lambda rows: rows.pop(index))
+
+    def remove(self, inst):
+        # type: (InstanceInfo) -> None
+        self._edit(lambda rows: rows.remove(inst))
+
+    def clear(self):
+        # type: () -> None
+        self._reset()
+        self._changed()
+
+    def sort(self, key=None, reverse=False):
+        # type: (Any, bool) -> None
+        self._edit(lambda rows: rows.sort(key=key, reverse=reverse))
+
+    def reverse(self):
+        # type: () -> None
+        self._edit(lambda rows: rows.reverse())
+
+
+# ---------------------------------------------------------------------------
+# Selection
+# ---------------------------------------------------------------------------
+
+def compact_instances(mod, threshold=None):
+    # type: (ModuleInfo, Optional[int]) -> bool
+    """Store *mod*'s instances columnar if there are at least *threshold*
+    (default: columnar_threshold()) of them.  True if it is columnar."""
+    if isinstance(mod.instances, InstanceTable):
+        return True
+    if threshold is None:
+        threshold = columnar_threshold()
+    if threshold <= 0 or len(mod.instances) < threshold:
+        return False
+    mod.instances = InstanceTable(mod.instances)
+    return True
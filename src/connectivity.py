@@ -0,0 +1,293 @@
+"""
+Cross-hierarchy signal connectivity graph.
+
+InstanceInfo.connections hold the expression text connected to each
+child port; this module resolves the simple ones — an identifier,
+optionally with bit / part selects — into a graph of nets.  A net is one
+signal (port or internal wire) of one module definition, numbered with
+an integer id; an edge runs from a parent's net to the child port net
+it is connected to, once per instance pin.  The graph is not flattened:
+a module instantiated many times has its nets once, so it stays as
+small as the source.
+
+Adjacency is stored as compact arrays (compressed sparse rows): the
+children of net *n* are ``down[down_start[n]:down_start[n + 1]]``, its
+parents likewise in ``up``.  Net ids are allocated bottom-up (a child
+module's nets before its parents'), so per-net totals over the flattened
+design are one ascending pass.
+
+    graph = ConnectivityGraph(modules)
+    graph.leaf_ports("chip_top", "clk_sys")     # [(module, port)]
+    graph.leaf_fanout()[graph.net("chip_top", "clk_sys")]
+    for path in graph.iter_pin_paths("chip_top", "clk_sys"):
+        ...                                     # chip_top.u_core.u_rf.ck
+
+Connections to other expressions (concatenations, operators, literals)
+are not followed; a select connects the whole vector.  Positional pins
+are matched to the child's port list, ``.*`` to same-named signals.
+
+Provides:
+  - ConnectivityGraph   net graph over a {name: ModuleInfo} dict
+  - simple_signal()     base identifier of a simple connection expression
+"""
+
+import logging
+import re
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from .data_model import ModuleInfo
+
+logger = logging.getLogger(__name__)
+
+
+_RE_SIMPLE = re.compile(r"\s*([A-Za-z_][\w$]*)\s*(?:\[[^\[\]]*\]\s*)*$")
+
+
+def simple_signal(expr):
+    # type: (str) -> str
+    """The identifier *expr* connects — ``clk``, ``d[3]``, ``bus[7:0]``
+    — or "" for any other expression."""
+    m = _RE_SIMPLE.match(expr)
+    return m.group(1) if m else ""
+
+
+def _bottom_up(modules):
+    # type: (Dict[str, ModuleInfo]) -> List[str]
+    """Every module name, children before the modules instantiating
+    them (recursive instantiation is cut where it is found)."""
+    order = []  # type: List[str]
+    done = set()  # type: Set[str]
+    for root in modules:
+        if root in done:
+            continue
+        done.add(root)
+        stack = [(root, iter(modules[root].instantiated_modules))]
+        while stack:
+            name, it = stack[-1]
+            child = next(it, None)
+            if child is None:
+                stack.pop()
+                order.append(name)
+            elif child in modules and child not in done:
+                done.add(child)
+                stack.append((child, iter(modules[child].instantiated_modules)))
+    return order
+
+
+class ConnectivityGraph:
+    """
+    Net graph of a module dict (last definition of each name, as
+    rtl_scan() uses).  Instances of undefined modules get a net per
+    connected pin, with no further children.
+
+    Attributes:
+        down_start, down   CSR children (array('i'))
+        up_start, up       CSR parents (array('i'))
+        n_nets             number of nets
+        unresolved         instance pins whose expression is not simple
+    """
+
+    def __init__(self, modules):
+        # type: (Dict[str, ModuleInfo]) -> None
+        self._ids = {}  # type: Dict[str, Dict[str, int]]
+        self._module = []  # type: List[str]
+        self._signal = []  # type: List[str]
+        self._port = bytearray()
+        self.unresolved = 0
+        simple = {}  # type: Dict[str, str]
+        src = array("i")
+        dst = array("i")
+        inst_names = []  # type: List[str]
+
+        for name in _bottom_up(modules):
+            mod = modules[name]
+            ids = self._ids.setdefault(name, {})
+            for p in mod.ports:
+                self._add(name, ids, p.name, True)
+            for w in mod.wires:
+                if w.name not in ids:
+                    self._add(name, ids, w.name, False)
+            for inst in mod.instances:
+                child = modules.get(inst.module_type)
+                child_ids = self._ids.setdefault(inst.module_type, {})
+                for port, expr in self._pins(inst.connections, child, ids):
+                    sig = simple.get(expr)
+                    if sig is None:
+                        sig = simple[expr] = simple_signal(expr)
+                    if not sig or not port:
+                        if expr:
+                            self.unresolved += 1
+                        continue
+                    cid = child_ids.get(port)
+                    if cid is None:
+                        if child is not None:
+                            continue        # not a port of the child
+                        cid = self._add(inst.module_type, child_ids, port, True)
+                    pid = ids.get(sig)
+                    if pid is None:
+                        pid = self._add(name, ids, sig, False)
+                    src.append(pid)
+                    dst.append(cid)
+                    inst_names.append(inst.instance_name)
+
+        n = self.n_nets = len(self._signal)
+        self.down_start, self.down, order = _csr(n, src, dst)
+        self._edge_inst = [inst_names[e] for e in order]
+        self.up_start, self.up, _ = _csr(n, dst, src)
+        self._leaf_fanout = None  # type: Optional[array]
+        logger.debug("Connectivity: %d nets, %d edges, %d unresolved pins",
+                     n, len(self.down), self.unresolved)
+
+    def _add(self, module, ids, signal, is_port):
+        # type: (str, Dict[str, int], str, bool) -> int
+        nid = ids[signal] = len(self._signal)
+        self._module.append(module)
+        self._signal.append(signal)
+        self._port.append(is_port)
+        return nid
+
+    @staticmethod
+    def _pins(connections, child, ids):
+        # type: (List, Optional[ModuleInfo], Dict[str, int]) -> Iterator[Tuple[str, str]]
+        """(child port, expression) of an instance's connections."""
+        named = set()  # type: Set[str]
+        wildcard = False
+        for c in connections:
+            port = c.port_name
+            if port == ".*":
+                wildcard = True
+                continue
+            if port.startswith("#"):
+                if child is None:
+                    continue
+                idx = int(port[1:])
+                port = child.ports[idx].name if idx < len(child.ports) else ""
+            named.add(port)
+            yield port, c.signal_expr
+        if wildcard and child is not None:
+            for p in child.ports:
+                if p.name not in named and p.name in ids:
+                    yield p.name, p.name
+
+    # ---- nets ----
+
+    def net(self, module, signal):
+        # type: (str, str) -> int
+        """Id of *signal* in *module*, or -1."""
+        return self._ids.get(module, {}).get(signal, -1)
+
+    def name(self, net):
+        # type: (int) -> Tuple[str, str]
+        """(module, signal) of *net*."""
+        return self._module[net], self._signal[net]
+
+    def is_port(self, net):
+        # type: (int) -> bool
+        return bool(self._port[net])
+
+    def children(self, net):
+        # type: (int) -> array
+        """Child port nets *net* is connected to, one per instance pin."""
+        return self.down[self.down_start[net]:self.down_start[net + 1]]
+
+    def parents(self, net):
+        # type: (int) -> array
+        """Parent nets connected to port net *net*, one per instance pin."""
+        return self.up[self.up_start[net]:self.up_start[net + 1]]
+
+    def fanout(self, net):
+        # type: (int) -> int
+        """Number of instance pins *net* connects to directly."""
+        return self.down_start[net + 1] - self.down_start[net]
+
+    # ---- hierarchy queries ----
+
+    def leaf_fanout(self):
+        # type: () -> array
+        """Per net: the number of leaf pins (pins of nets that go no
+        further down) it reaches in the flattened design, counting every
+        instance path.  One pass over the edges; cached."""
+        if self._leaf_fanout is None:
+            start, down = self.down_start, self.down
+            total = array("q", bytes(8 * self.n_nets))
+            for n in range(self.n_nets):
+                s = 0
+                for e in range(start[n], start[n + 1]):
+                    c = down[e]
+                    s += total[c] if start[c] != start[c + 1] else 1
+                total[n] = s
+            self._leaf_fanout = total
+        return self._leaf_fanout
+
+    def trace(self, module, signal):
+        # type: (str, str) -> List[int]
+        """Nets reachable downward from *signal* of *module*, itself
+        included, each once, breadth-first."""
+        first = self.net(module, signal)
+        if first < 0:
+            return []
+        start, down = self.down_start, self.down
+        seen = {first}
+        out = [first]
+        queue = deque([first])  # type: Deque[int]
+        while queue:
+            n = queue.popleft()
+            for e in range(start[n], start[n + 1]):
+                c = down[e]
+                if c not in seen:
+                    seen.add(c)
+                    out.append(c)
+                    queue.append(c)
+        return out
+
+    def leaf_ports(self, module, signal):
+        # type: (str, str) -> List[Tuple[str, str]]
+        """(module, port) of the ports *signal* reaches that go no
+        further down, each once."""
+        start = self.down_start
+        return [self.name(n) for n in self.trace(module, signal)[1:]
+                if start[n] == start[n + 1] and self._port[n]]
+
+    def iter_pin_paths(self, top, signal, separator="."):
+        # type: (str, str, str) -> Iterator[str]
+        """Hierarchical paths of the leaf pins *signal* of *top* reaches
+        in the flattened design (instance arrays counted once)."""
+        first = self.net(top, signal)
+        if first < 0:
+            return
+        start, down, names = self.down_start, self.down, self._edge_inst
+        signals = self._signal
+        # Each frame: (path prefix, iterator over the net's edges)
+        stack = [(top, iter(range(start[first], start[first + 1])))]
+        while stack:
+            path, edges = stack[-1]
+            e = next(edges, None)
+            if e is None:
+                stack.pop()
+                continue
+            c = down[e]
+            child_path = path + separator + names[e]
+            if start[c] == start[c + 1]:
+                yield child_path + separator + signals[c]
+            else:
+                stack.append((child_path, iter(range(start[c], start[c + 1]))))
+
+def _csr(n, src, dst):
+    # type: (int, array, array) -> Tuple[array, array, List[int]]
+    """Counting sort of edges by *src*: (start, targets, edge order)."""
+    start = array("i", bytes(4 * (n + 1)))
+    for s in src:
+        start[s + 1] += 1
+    for i in range(n):
+        start[i + 1] += start[i]
+    fill = array("i", start)
+    targets = array("i", bytes(4 * len(dst)))
+    order = [0] * len(dst)
+    for e, s in enumerate(src):
+        pos = fill[s]
+        fill[s] = pos + 1
+        targets[pos] = dst[e]
+        order[pos] = e
+    return start, targets, order
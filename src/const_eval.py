@@ -0,0 +1,489 @@
+"""
+Verilog constant-expression evaluator.
+
+Safe replacement for Python ``eval`` on range / parameter expressions.
+Expressions are tokenized and parsed into a small tuple-based AST, which
+is memoized per expression string, then evaluated against an optional
+parameter environment {NAME: int}.
+
+Supports:
+  - decimal and based literals: 42, 8'hFF, 'd10, 4'b1010, 32'sd5, 1_000
+  - parameter identifiers looked up in the environment
+  - unary   + - ! ~ & ~& | ~| ^ ~^
+  - binary  ** * / % + - << >> <<< >>> < <= > >= == != === !==
+            & ^ ~^ ^~ | && ||
+  - ternary ?:
+  - concatenation {a, b} and replication {n{a}} of sized operands
+  - system functions $clog2, $signed, $unsigned
+
+Integer arithmetic follows Verilog rules where it matters for widths:
+division truncates toward zero and comparisons yield 0/1.  Shifts,
+powers, replications and literal sizes that would produce values wider
+than MAX_BITS are rejected instead of exhausting memory.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ConstEvalError(ValueError):
+    """Expression cannot be evaluated to a constant integer."""
+
+
+MAX_BITS = 1 << 16
+
+
+def _check_bits(bits):
+    # type: (int) -> None
+    if bits > MAX_BITS:
+        raise ConstEvalError("Constant wider than %d bits" % MAX_BITS)
+
+
+# ---------------------------------------------------------------------------
+# Tokenizer
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<based>(?:\d[\d_]*)?\s*'[sS]?[bBoOdDhH]\s*[0-9a-fA-F_xXzZ?]+)
+  | (?P<real>\d[\d_]*\.\d[\d_]*(?:[eE][+-]?\d+)?)
+  | (?P<dec>\d[\d_]*)
+  | (?P<unbased>'[01xXzZ])
+  | (?P<sysid>\$[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<id>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<op>===|!==|<<<|>>>|\*\*|<<|>>|<=|>=|==|!=|&&|\|\||~&|~\||~\^|\^~
+          |[-+*/%<>!~&|^?:(),{}])
+""", re.VERBOSE)
+
+_BASES = {"b": 2, "o": 8, "d": 10, "h": 16}
+
+
+def _based_value(text):
+    # type: (str) -> Tuple[int, Optional[int]]
+    """Value and width (None if unsized) of a based literal."""
+    size_txt, rest = text.split("'", 1)
+    size_txt = size_txt.strip().replace("_", "")
+    signed = rest[:1] in ("s", "S")
+    if signed:
+        rest = rest[1:]
+    base = _BASES[rest[0].lower()]
+    digits = rest[1:].strip().replace("_", "")
+    if any(c in "xXzZ?" for c in digits):
+        raise ConstEvalError("x/z digits in constant: %s" % text)
+    try:
+        value = int(digits, base)
+    except ValueError:
+        raise ConstEvalError("Bad digit in constant: %s" % text)
+    if not size_txt:
+        return value, None
+    width = int(size_txt)
+    _check_bits(width)
+    value &= (1 << width) - 1
+    if signed and width and value >> (width - 1):
+        value -= 1 << width
+    return value, width
+
+
+def _tokenize(text):
+    # type: (str) -> List[Tuple[str, Any]]
+    tokens = []  # type: List[Tuple[str, Any]]
+    pos = 0
+    n = len(text)
+    while pos < n:
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            raise ConstEvalError("Unexpected character %r in %r" % (text[pos], text))
+        pos = m.end()
+        kind = m.lastgroup
+        tok = m.group(kind)
+        if kind == "ws":
+            continue
+        if kind == "based":
+            tokens.append(("sized",) + _based_value(tok))
+        elif kind == "dec":
+            tokens.append(("num", int(tok.replace("_", ""))))
+        elif kind == "real":
+            raise ConstEvalError("Real constant not supported: %s" % tok)
+        elif kind == "unbased":
+            if tok[1] != "0":
+                raise ConstEvalError("Unsized fill literal not supported: %s" % tok)
+            tokens.append(("num", 0))
+        else:
+            tokens.append((kind, tok))
+    return tokens
+
+
+# ---------------------------------------------------------------------------
+# Parser (precedence climbing)
+# ---------------------------------------------------------------------------
+
+# Binary operator precedence, loosest first (IEEE 1364-2005 table 5-4).
+_BINARY_PREC = {
+    "||": 1,
+    "&&": 2,
+    "|": 3,
+    "^": 4, "~^": 4, "^~": 4,
+    "&": 5,
+    "==": 6, "!=": 6, "===": 6, "!==": 6,
+    "<": 7, "<=": 7, ">": 7, ">=": 7,
+    "<<": 8, ">>": 8, "<<<": 8, ">>>": 8,
+    "+": 9, "-": 9,
+    "*": 10, "/": 10, "%": 10,
+    "**": 11,
+}
+_RIGHT_ASSOC = {"**"}
+_UNARY_OPS = {"+", "-", "!", "~", "&", "~&", "|", "~|", "^", "~^", "^~"}
+
+
+class _Parser:
+    def __init__(self, tokens, text):
+        # type: (List[Tuple[str, Any]], str) -> None
+        self.toks = tokens
+        self.pos = 0
+        self.text = text
+
+    def peek(self):
+        # type: () -> Optional[Tuple[str, Any]]
+        return self.toks[self.pos] if self.pos < len(self.toks) else None
+
+    def take(self):
+        # type: () -> Tuple[str, Any]
+        tok = self.peek()
+        if tok is None:
+            raise ConstEvalError("Unexpected end of expression: %r" % self.text)
+        self.pos += 1
+        return tok
+
+    def expect(self, op):
+        # type: (str) -> None
+        tok = self.take()
+        if tok != ("op", op):
+            raise ConstEvalError("Expected %r in %r" % (op, self.text))
+
+    def parse(self):
+        # type: () -> tuple
+        node = self.ternary()
+        if self.peek() is not None:
+            raise ConstEvalError("Trailing tokens in %r" % self.text)
+        return node
+
+    def ternary(self):
+        # type: () -> tuple
+        cond = self.binary(1)
+        if self.peek() == ("op", "?"):
+            self.take()
+            a = self.ternary()
+            self.expect(":")
+            b = self.ternary()
+            return ("?", cond, a, b)
+        return cond
+
+    def binary(self, min_prec):
+        # type: (int) -> tuple
+        lhs = self.unary()
+        while True:
+            tok = self.peek()
+            if tok is None or tok[0] != "op":
+                return lhs
+            prec = _BINARY_PREC.get(tok[1])
+            if prec is None or prec < min_prec:
+                return lhs
+            self.take()
+            nxt = prec if tok[1] in _RIGHT_ASSOC else prec + 1
+            lhs = ("bin", tok[1], lhs, self.binary(nxt))
+
+    def unary(self):
+        # type: () -> tuple
+        tok = self.take()
+        kind, val = tok[0], tok[1]
+        if kind == "op" and val in _UNARY_OPS:
+            return ("un", val, self.unary())
+        if kind == "op" and val == "(":
+            node = self.ternary()
+            self.expect(")")
+            return node
+        if kind == "op" and val == "{":
+            return self.concat()
+        if kind == "num":
+            return ("num", val)
+        if kind == "sized":
+            return ("num", val, tok[2]) if tok[2] is not None else ("num", val)
+        if kind == "id":
+            return ("id", val)
+        if kind == "sysid":
+            self.expect("(")
+            args = [self.ternary()]
+            while self.peek() == ("op", ","):
+                self.take()
+                args.append(self.ternary())
+            self.expect(")")
+            return ("call", val, tuple(args))
+        raise ConstEvalError("Unexpected token %r in %r" % (val, self.text))
+
+    def concat(self):
+        # type: () -> tuple
+        """Parse after '{': concatenation or replication."""
+        first = self.ternary()
+        if self.peek() == ("op", "{"):
+            self.take()
+            inner = self.concat()
+            self.expect("}")
+            return ("rep", first, inner)
+        items = [first]
+        while self.peek() == ("op", ","):
+            self.take()
+            items.append(self.ternary())
+        self.expect("}")
+        return ("cat", tuple(items))
+
+
+@lru_cache(maxsize=65536)
+def _parse_cached(text):
+    # type: (str) -> Tuple[Optional[tuple], Optional[str]]
+    try:
+        return _Parser(_tokenize(text), text).parse(), None
+    except (ConstEvalError, RecursionError) as e:
+        return None, str(e) or "Expression too deeply nested"
+
+
+def parse_expr(text):
+    # type: (str) -> tuple
+    """Parse *text* into an AST.
+
+    Results — including failures — are memoized per expression string,
+    so repeated range texts like ``WIDTH-1`` are tokenized once.
+    """
+    node, err = _parse_cached(text)
+    if node is None:
+        raise ConstEvalError(err)
+    return node
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def _div(a, b):
+    # type: (int, int) -> int
+    if b == 0:
+        raise ConstEvalError("Division by zero")
+    q = abs(a) // abs(b)
+    return q if (a >= 0) == (b >= 0) else -q
+
+
+def _mod(a, b):
+    # type: (int, int) -> int
+    if b == 0:
+        raise ConstEvalError("Modulo by zero")
+    return a - b * _div(a, b)
+
+
+def _pow(a, b):
+    # type: (int, int) -> int
+    if b < 0:
+        raise ConstEvalError("Negative exponent")
+    if abs(a) > 1:
+        _check_bits(b * (abs(a).bit_length() - 1))
+    return a ** b
+
+
+def _shl(a, b):
+    # type: (int, int) -> int
+    if b < 0:
+        raise ConstEvalError("Negative shift amount")
+    _check_bits(b)
+    return a << b
+
+
+def _shr(a, b):
+    # type: (int, int) -> int
+    if b < 0:
+        raise ConstEvalError("Negative shift amount")
+    return a >> b
+
+
+def _reduce_and(v):
+    # type: (int) -> int
+    return int(v != 0 and v & (v + 1) == 0) if v >= 0 else int(v == -1)
+
+
+def _reduce_xor(v):
+    # type: (int) -> int
+    if v < 0:
+        raise ConstEvalError("Reduction XOR of negative value")
+    return bin(v).count("1") & 1
+
+
+_BINOPS = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": _div,
+    "%": _mod,
+    "**": _pow,
+    "<<": _shl,
+    "<<<": _shl,
+    ">>": _shr,
+    ">>>": _shr,
+    "<": lambda a, b: int(a < b),
+    "<=": lambda a, b: int(a <= b),
+    ">": lambda a, b: int(a > b),
+    ">=": lambda a, b: int(a >= b),
+    "==": lambda a, b: int(a == b),
+    "!=": lambda a, b: int(a != b),
+    "===": lambda a, b: int(a == b),
+    "!==": lambda a, b: int(a != b),
+    "&": lambda a, b: a & b,
+    "|": lambda a, b: a | b,
+    "^": lambda a, b: a ^ b,
+    "~^": lambda a, b: ~(a ^ b),
+    "^~": lambda a, b: ~(a ^ b),
+}
+
+_UNOPS = {
+    "+": lambda v: v,
+    "-": lambda v: -v,
+    "!": lambda v: int(v == 0),
+    "~": lambda v: ~v,
+    "|": lambda v: int(v != 0),
+    "~|": lambda v: int(v == 0),
+    "&": _reduce_and,
+    "~&": lambda v: 1 - _reduce_and(v),
+    "^": _reduce_xor,
+    "~^": lambda v: 1 - _reduce_xor(v),
+    "^~": lambda v: 1 - _reduce_xor(v),
+}
+
+
+def _clog2(v):
+    # type: (int) -> int
+    return 0 if v <= 1 else (v - 1).bit_length()
+
+
+_SYSFUNCS = {
+    "$clog2": _clog2,
+    "$signed": lambda v: v,
+    "$unsigned": lambda v: v,
+}
+
+
+def eval_ast(node, env=None):
+    # type: (tuple, Optional[Dict[str, Any]]) -> int
+    """Evaluate a parsed AST against *env*.  Raises ConstEvalError."""
+    kind = node[0]
+    if kind == "num":
+        return node[1]
+    if kind == "id":
+        val = env.get(node[1]) if env else None
+        if not isinstance(val, int):
+            raise ConstEvalError("Unknown or unresolved identifier: %s" % node[1])
+        return val
+    if kind == "bin":
+        op = node[1]
+        if op == "&&":
+            return int(bool(eval_ast(node[2], env)) and bool(eval_ast(node[3], env)))
+        if op == "||":
+            return int(bool(eval_ast(node[2], env)) or bool(eval_ast(node[3], env)))
+        return _BINOPS[op](eval_ast(node[2], env), eval_ast(node[3], env))
+    if kind == "un":
+        return _UNOPS[node[1]](eval_ast(node[2], env))
+    if kind == "?":
+        return eval_ast(node[2] if eval_ast(node[1], env) else node[3], env)
+    if kind == "call":
+        fn = _SYSFUNCS.get(node[1])
+        if fn is None or len(node[2]) != 1:
+            raise ConstEvalError("Unsupported system function: %s" % node[1])
+        return fn(eval_ast(node[2][0], env))
+    if kind == "cat":
+        return _eval_concat(node, env)[0]
+    if kind == "rep":
+        return _eval_concat(node, env)[0]
+    raise ConstEvalError("Bad AST node: %r" % (node,))
+
+
+def _eval_concat(node, env):
+    # type: (tuple, Optional[Dict[str, Any]]) -> Tuple[int, Optional[int]]
+    """(value, width) of a concatenation operand.
+
+    A single-element concatenation is its operand's value; wider ones
+    need every operand's width, which only sized literals carry.
+    """
+    kind = node[0]
+    if kind == "num":
+        return node[1], (node[2] if len(node) > 2 else None)
+    if kind == "cat":
+        if len(node[1]) == 1:
+            return _eval_concat(node[1][0], env)
+        value, total = 0, 0
+        for item in node[1]:
+            v, w = _eval_concat(item, env)
+            if w is None:
+                raise ConstEvalError("Unsized operand in concatenation")
+            value = (value << w) | (v & ((1 << w) - 1))
+            total += w
+        return value, total
+    if kind == "rep":
+        count = eval_ast(node[1], env)
+        v, w = _eval_concat(node[2], env)
+        if w is None or count < 0:
+            raise ConstEvalError("Unsized operand in replication")
+        _check_bits(w * count)
+        value = 0
+        for _ in range(count):
+            value = (value << w) | (v & ((1 << w) - 1))
+        return value, w * count
+    return eval_ast(node, env), None
+
+
+def identifiers(text):
+    # type: (str) -> List[str]
+    """Names referenced by expression *text* (empty if unparsable)."""
+    try:
+        node = parse_expr(text)
+    except ConstEvalError:
+        return []
+    out = []  # type: List[str]
+    todo = [node]
+    while todo:
+        n = todo.pop()
+        if n[0] == "id":
+            out.append(n[1])
+        elif n[0] in ("bin", "un"):
+            todo.extend(n[2:])
+        elif n[0] == "?":
+            todo.extend(n[1:])
+        elif n[0] in ("call", "cat"):
+            todo.extend(n[-1])
+        elif n[0] == "rep":
+            todo.extend(n[1:])
+    return out
+
+
+@lru_cache(maxsize=65536)
+def _eval_literal(text):
+    # type: (str) -> Optional[int]
+    try:
+        return eval_ast(parse_expr(text))
+    except (ConstEvalError, RecursionError):
+        return None
+
+
+def evaluate(text, env=None):
+    # type: (str, Optional[Dict[str, Any]]) -> int
+    """Evaluate constant expression *text*.  Raises ConstEvalError."""
+    return eval_ast(parse_expr(text.strip()), env)
+
+
+def try_evaluate(text, env=None):
+    # type: (str, Optional[Dict[str, Any]]) -> Optional[int]
+    """Evaluate *text*, returning None instead of raising."""
+    text = text.strip()
+    if not text:
+        return None
+    if not env:
+        return _eval_literal(text)
+    try:
+        return eval_ast(parse_expr(text), env)
+    except (ConstEvalError, RecursionError):
+        return None
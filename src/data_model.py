@@ -1,12 +1,21 @@
 """
 Dataclass-based design data structures for RTL analysis.
 
-Provides: PortInfo, ParameterInfo, ConnectionInfo, InstanceInfo,
-           WireInfo, ModuleInfo.
+The per-port / per-instance / per-pin records (PortInfo, ConnectionInfo,
+InstanceInfo, WireInfo) exist in the millions on large designs, so they
+are compact ``__slots__`` classes with dataclass-style constructors,
+equality and repr, and their repeated name strings (port names, module
+types, types and ranges) are interned.  ModuleInfo caches its derived
+views (direction-filtered ports, instantiated module set) until its
+port or instance list changes.
+
+Provides: PortInfo, ParameterInfo, ConnectionInfo, GenerateScope,
+           InstanceInfo, WireInfo, ModuleInfo.
 """
 
+import sys
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from .port_classify import (
     PortCategory,
@@ -16,17 +25,51 @@ from .port_classify import (
 )
 
 
-@dataclass
-class PortInfo:
-    name: str
-    direction: PortDirection
-    width: int = 1
-    range_spec: str = ""      # original range text, e.g. "[31:0]"
-    net_type: str = ""        # wire / reg / logic / signed …
-    comment: str = ""
+_intern = sys.intern
+
+
+class _Record:
+    """Base of the slotted records: value equality and a dataclass-style
+    repr over the fields named in *_fields*."""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, f) for f in self._fields)
+
+    def __eq__(self, other: Any) -> bool:
+        # Subclasses (columnar.InstanceView) compare equal to their base
+        if not isinstance(other, _Record) or other._fields != self._fields:
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None  # type: ignore  # mutable, like a dataclass
+
+    def __repr__(self) -> str:
+        return "%s(%s)" % (type(self).__name__, ", ".join(
+            "%s=%r" % (f, getattr(self, f)) for f in self._fields))
+
+
+class PortInfo(_Record):
+    _fields = ("name", "direction", "width", "range_spec", "net_type",
+               "comment")
+    __slots__ = _fields
+
+    def __init__(self, name: str, direction: PortDirection, width: int = 1,
+                 range_spec: str = "",    # original range text, e.g. "[31:0]"
+                 net_type: str = "",      # wire / reg / logic / signed …
+                 comment: str = ""):
+        self.name = _intern(name)
+        self.direction = direction
+        self.width = width
+        self.range_spec = _intern(range_spec)
+        self.net_type = _intern(net_type)
+        self.comment = comment
 
     @property
     def category(self) -> PortCategory:
+        # Memoized by name in the active port_classify rule set
         return classify_port(self.name)
 
     def to_dict(self) -> Dict[str, Any]:
@@ -41,32 +84,118 @@ class PortInfo:
             d["type"] = self.net_type
         return d
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "PortInfo":
+        return cls(
+            name=d["name"],
+            direction=PortDirection(d["direction"]),
+            width=d.get("width", 1),
+            range_spec=d.get("range", ""),
+            net_type=d.get("type", ""),
+        )
+
 
 @dataclass
 class ParameterInfo:
     name: str
     value: str = ""
     param_type: str = "parameter"   # parameter | localparam
+    resolved: Optional[int] = None  # default value, if constant
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"name": self.name, "value": self.value, "type": self.param_type}
+        d: Dict[str, Any] = {
+            "name": self.name, "value": self.value, "type": self.param_type}
+        if self.resolved is not None:
+            d["resolved"] = self.resolved
+        return d
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ParameterInfo":
+        return cls(name=d["name"], value=d.get("value", ""),
+                   param_type=d.get("type", "parameter"),
+                   resolved=d.get("resolved"))
 
-@dataclass
-class ConnectionInfo:
-    port_name: str
-    signal_expr: str = ""     # expression text connected to port
+
+class ConnectionInfo(_Record):
+    _fields = ("port_name", "signal_expr")
+    __slots__ = _fields
+
+    def __init__(self, port_name: str,
+                 signal_expr: str = ""):  # expression text connected to port
+        self.port_name = _intern(port_name)
+        self.signal_expr = signal_expr
 
     def to_dict(self) -> Dict[str, Any]:
         return {"port": self.port_name, "signal": self.signal_expr}
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ConnectionInfo":
+        return cls(port_name=d["port"], signal_expr=d.get("signal", ""))
+
+
+@dataclass(frozen=True)
+class GenerateScope:
+    """One enclosing generate construct of an instance.
+
+    kind "for":  genvar loop — *genvar*, *init*, *cond*, *step* (the
+                 right-hand side of the iteration assignment)
+    kind "if":   *cond*; *negate* is True for the else branch
+    kind "case": *cond* is the case expression; *labels* are this item's
+                 expressions, empty for default, which instead lists all
+                 other items' labels in *others*
+    """
+    kind: str
+    cond: str = ""
+    name: str = ""            # generate block label
+    genvar: str = ""
+    init: str = ""
+    step: str = ""
+    negate: bool = False
+    labels: Tuple[str, ...] = ()
+    others: Tuple[str, ...] = ()
 
-@dataclass
-class InstanceInfo:
-    instance_name: str
-    module_type: str
-    connections: List[ConnectionInfo] = field(default_factory=list)
-    parameters: Dict[str, str] = field(default_factory=dict)
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"kind": self.kind, "cond": self.cond}
+        if self.name:
+            d["name"] = self.name
+        if self.kind == "for":
+            d.update(genvar=self.genvar, init=self.init, step=self.step)
+        elif self.kind == "if":
+            d["negate"] = self.negate
+        else:
+            d["labels"] = list(self.labels)
+            if not self.labels:
+                d["others"] = list(self.others)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "GenerateScope":
+        return cls(
+            kind=d["kind"], cond=d.get("cond", ""), name=d.get("name", ""),
+            genvar=d.get("genvar", ""), init=d.get("init", ""),
+            step=d.get("step", ""), negate=d.get("negate", False),
+            labels=tuple(d.get("labels", ())),
+            others=tuple(d.get("others", ())),
+        )
+
+
+class InstanceInfo(_Record):
+    _fields = ("instance_name", "module_type", "connections", "parameters",
+               "array_range", "generate")
+    __slots__ = _fields
+
+    def __init__(self, instance_name: str, module_type: str,
+                 connections: Optional[List[ConnectionInfo]] = None,
+                 parameters: Optional[Dict[str, str]] = None,
+                 array_range: str = "",  # instance array range, e.g. "[7:0]"
+                 # enclosing generate scopes, outermost first
+                 generate: Tuple[GenerateScope, ...] = ()):
+        self.instance_name = instance_name
+        self.module_type = _intern(module_type)
+        self.connections = [] if connections is None else connections
+        self.parameters = {} if parameters is None else parameters
+        self.array_range = array_range
+        self.generate = generate
 
     def to_dict(self) -> Dict[str, Any]:
         d: Dict[str, Any] = {
@@ -77,14 +206,34 @@ class InstanceInfo:
             d["parameters"] = self.parameters
         if self.connections:
             d["connections"] = [c.to_dict() for c in self.connections]
+        if self.array_range:
+            d["array"] = self.array_range
+        if self.generate:
+            d["generate"] = [g.to_dict() for g in self.generate]
         return d
 
-
-@dataclass
-class WireInfo:
-    name: str
-    width: int = 1
-    range_spec: str = ""
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "InstanceInfo":
+        return cls(
+            instance_name=d["instance"],
+            module_type=d["module"],
+            connections=[ConnectionInfo.from_dict(c)
+                         for c in d.get("connections", [])],
+            parameters=dict(d.get("parameters", {})),
+            array_range=d.get("array", ""),
+            generate=tuple(GenerateScope.from_dict(g)
+                           for g in d.get("generate", ())),
+        )
+
+
+class WireInfo(_Record):
+    _fields = ("name", "width", "range_spec")
+    __slots__ = _fields
+
+    def __init__(self, name: str, width: int = 1, range_spec: str = ""):
+        self.name = name
+        self.width = width
+        self.range_spec = _intern(range_spec)
 
     def to_dict(self) -> Dict[str, Any]:
         d: Dict[str, Any] = {"name": self.name, "width": self.width}
@@ -92,10 +241,66 @@ class WireInfo:
             d["range"] = self.range_spec
         return d
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "WireInfo":
+        return cls(name=d["name"], width=d.get("width", 1),
+                   range_spec=d.get("range", ""))
+
+
+_MUTATORS = ("append", "extend", "insert", "remove", "pop", "clear",
+             "sort", "reverse", "__setitem__", "__delitem__", "__iadd__",
+             "__imul__")
+
+
+class _ObservedList(list):
+    """List that drops its owner's derived views whenever it changes."""
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, items: Any = (), owner: Any = None):
+        list.__init__(self, items)
+        self._owner = owner
+
+    def _adopt(self, owner: Any) -> "_ObservedList":
+        """The list to store as *owner*'s attribute: this one, or a copy
+        if it belongs to another module."""
+        if self._owner is None or self._owner is owner:
+            self._owner = owner
+            return self
+        return _ObservedList(self, owner)
+
+
+def _observed(name: str) -> Callable[..., Any]:
+    base = getattr(list, name)
+
+    def method(self: _ObservedList, *args: Any) -> Any:
+        result = base(self, *args)
+        owner = getattr(self, "_owner", None)  # unset while unpickling
+        if owner is not None:
+            owner.invalidate()
+        return result
+    method.__name__ = name
+    return method
+
+
+for _name in _MUTATORS:
+    setattr(_ObservedList, _name, _observed(_name))
+del _name
+
 
 @dataclass
 class ModuleInfo:
-    """Complete information about one Verilog/SystemVerilog module."""
+    """Complete information about one Verilog/SystemVerilog module.
+
+    *instances* of instance-heavy modules is a columnar.InstanceTable
+    rather than a list (same sequence API).
+
+    The derived views below are computed once and cached; assigning or
+    mutating *ports* / *instances* drops the cache.  Changing a port's
+    direction or an instance's module type in place does not — call
+    invalidate() afterwards.  Returned lists and sets are shared: treat
+    them as read-only.
+    """
     name: str
     file_path: str = ""
     line_number: int = 0
@@ -103,28 +308,59 @@ class ModuleInfo:
     parameters: List[ParameterInfo] = field(default_factory=list)
     instances: List[InstanceInfo] = field(default_factory=list)
     wires: List[WireInfo] = field(default_factory=list)
+    kind: str = "module"      # module | interface | program (SystemVerilog)
+    _derived: Dict[str, Any] = field(default_factory=dict, init=False,
+                                     repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ("ports", "instances"):
+            # Observed lists (and columnar.InstanceTable) are adopted,
+            # plain sequences wrapped
+            adopt = getattr(value, "_adopt", None)
+            value = (adopt(self) if adopt is not None
+                     else _ObservedList(value, self))
+            self.invalidate()
+        object.__setattr__(self, name, value)
+
+    def invalidate(self) -> None:
+        """Drop the cached derived views."""
+        derived = self.__dict__.get("_derived")
+        if derived:
+            derived.clear()
+
+    def _view(self, key: str, build: Callable[[], Any]) -> Any:
+        views = self._derived
+        value = views.get(key)
+        if value is None:
+            value = views[key] = build()
+        return value
 
     # --- derived helpers ---
 
     @property
     def port_names(self) -> List[str]:
-        return [p.name for p in self.ports]
+        return self._view("names", lambda: [p.name for p in self.ports])
+
+    def _ports_of(self, direction: PortDirection) -> List[PortInfo]:
+        return self._view(direction.value, lambda: [
+            p for p in self.ports if p.direction == direction])
 
     @property
     def input_ports(self) -> List[PortInfo]:
-        return [p for p in self.ports if p.direction == PortDirection.INPUT]
+        return self._ports_of(PortDirection.INPUT)
 
     @property
     def output_ports(self) -> List[PortInfo]:
-        return [p for p in self.ports if p.direction == PortDirection.OUTPUT]
+        return self._ports_of(PortDirection.OUTPUT)
 
     @property
     def inout_ports(self) -> List[PortInfo]:
-        return [p for p in self.ports if p.direction == PortDirection.INOUT]
+        return self._ports_of(PortDirection.INOUT)
 
     @property
     def instantiated_modules(self) -> Set[str]:
-        return {inst.module_type for inst in self.instances}
+        return self._view("instantiated", lambda: {
+            inst.module_type for inst in self.instances})
 
     def classify_ports(self) -> Dict[str, Any]:
         """Classify ports by naming convention."""
@@ -170,18 +406,22 @@ class ModuleInfo:
         }
 
     def to_dict(self) -> Dict[str, Any]:
+        """Summary dict; "type" is only set for non-module units."""
         d: Dict[str, Any] = {
             "name": self.name,
             "file": self.file_path,
             "line": self.line_number,
-            "type": "module",
+        }
+        if self.kind != "module":
+            d["type"] = self.kind
+        d.update({
             "parameters": [p.name for p in self.parameters],
             "ports": {
                 "inputs": [p.name for p in self.input_ports],
                 "outputs": [p.name for p in self.output_ports],
                 "inouts": [p.name for p in self.inout_ports],
             },
-        }
+        })
         return d
 
     def to_full_dict(self) -> Dict[str, Any]:
@@ -193,3 +433,23 @@ class ModuleInfo:
         if self.wires:
             d["wires"] = [w.to_dict() for w in self.wires]
         return d
+
+    @classmethod
+    def from_full_dict(cls, d: Dict[str, Any]) -> "ModuleInfo":
+        """Inverse of to_full_dict().  Instance-heavy modules get
+        columnar instance storage, as when parsed."""
+        from .columnar import compact_instances
+        mod = cls(
+            name=d["name"],
+            file_path=d.get("file", ""),
+            line_number=d.get("line", 0),
+            ports=[PortInfo.from_dict(p) for p in d.get("ports_detail", [])],
+            parameters=[ParameterInfo.from_dict(p)
+                        for p in d.get("parameters_detail", [])],
+            instances=[InstanceInfo.from_dict(i)
+                       for i in d.get("instances", [])],
+            wires=[WireInfo.from_dict(w) for w in d.get("wires", [])],
+            kind=d.get("type", "module"),
+        )
+        compact_instances(mod)
+        return mod
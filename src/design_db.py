@@ -0,0 +1,254 @@
+"""
+In-memory design database with hash indexes over the parsed modules.
+
+rtl_scan() answers whole-design questions with result dicts; service
+code that asks many small ones — which modules have port ``irq_o``,
+who instantiates ``fifo_async``, what is connected to ``clk_core`` —
+would otherwise walk every module, port and pin list per question.
+A DesignDatabase holds the ModuleInfo objects of one scan (duplicate
+definitions included) and answers those lookups from dict indexes::
+
+    from src.design_db import scan_design
+    db = scan_design(directory="/path/to/rtl")
+    db.module("chip_top")                 # last definition wins
+    db.modules_with_port("irq_o")         # [(ModuleInfo, PortInfo)]
+    db.instances_of("fifo_async")         # [(parent, InstanceInfo)]
+    db.connections_to("clk_core")         # [(parent, instance, connection)]
+    db.modules_in_file("/path/to/rtl/fifo.v")
+    db.connectivity()                     # connectivity.ConnectivityGraph
+
+Each index is built on its first query, in one pass over the modules,
+and kept; the database is a snapshot, so rebuild it (or use
+ScanSession.database()) after the modules change.
+
+Provides:
+  - DesignDatabase   indexed view of a set of modules
+  - scan_design()    rtl_scan() arguments → DesignDatabase
+  - signal_names()   identifiers an expression refers to
+"""
+
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .data_model import ConnectionInfo, InstanceInfo, ModuleInfo, PortInfo
+from .port_classify import PortDirection
+
+logger = logging.getLogger(__name__)
+
+
+# Identifiers of an expression; the look-behind skips the digits of
+# based literals (8'hff) and system / macro names
+_RE_IDENT = re.compile(r"(?<![\w$'`\\])[A-Za-z_][\w$]*")
+
+
+def signal_names(expr):
+    # type: (str) -> List[str]
+    """Identifiers referenced by *expr*, in order, without repeats."""
+    return list(OrderedDict.fromkeys(_RE_IDENT.findall(expr)))
+
+
+class DesignDatabase:
+    """
+    Hash-indexed view of a set of modules.
+
+    Args:
+        modules: ModuleInfo objects in scan order — a {name: module}
+                 dict, or an iterable that may hold several definitions
+                 of one name (the last one is the module's definition)
+
+    Query results are lists shared with the index: treat them as
+    read-only.  Lookups of a name that is not in the design return [].
+    """
+
+    def __init__(self, modules):
+        # type: (Any) -> None
+        if isinstance(modules, dict):
+            modules = modules.values()
+        self._all = list(modules)  # type: List[ModuleInfo]
+        self.modules = {}  # type: Dict[str, ModuleInfo]
+        for mod in self._all:
+            self.modules[mod.name] = mod
+        self.error = ""
+        self.parse_errors = []  # type: List[str]
+        self._index = {}  # type: Dict[str, Dict[str, List[Any]]]
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.modules)
+
+    def __contains__(self, name):
+        # type: (str) -> bool
+        return name in self.modules
+
+    def __iter__(self):
+        # type: () -> Iterator[ModuleInfo]
+        return iter(self.modules.values())
+
+    def __repr__(self):
+        # type: () -> str
+        return "DesignDatabase(%d modules, %d files)" % (
+            len(self.modules), len(self._get("file")))
+
+    # ---- indexes ----
+
+    def _get(self, kind):
+        # type: (str) -> Dict[str, List[Any]]
+        index = self._index.get(kind)
+        if index is None:
+            index = self._index[kind] = getattr(self, "_build_" + kind)()
+            logger.debug("Design index %s: %d keys", kind, len(index))
+        return index
+
+    def _build_name(self):
+        # type: () -> Dict[str, List[ModuleInfo]]
+        index = {}  # type: Dict[str, List[ModuleInfo]]
+        for mod in self._all:
+            index.setdefault(mod.name, []).append(mod)
+        return index
+
+    def _build_file(self):
+        # type: () -> Dict[str, List[ModuleInfo]]
+        index = OrderedDict()  # type: Dict[str, List[ModuleInfo]]
+        for mod in self._all:
+            index.setdefault(mod.file_path, []).append(mod)
+        return index
+
+    def _build_port(self):
+        # type: () -> Dict[str, List[Tuple[ModuleInfo, PortInfo]]]
+        index = {}  # type: Dict[str, List[Tuple[ModuleInfo, PortInfo]]]
+        for mod in self.modules.values():
+            for port in mod.ports:
+                index.setdefault(port.name, []).append((mod, port))
+        return index
+
+    def _build_type(self):
+        # type: () -> Dict[str, List[Tuple[ModuleInfo, InstanceInfo]]]
+        index = {}  # type: Dict[str, List[Tuple[ModuleInfo, InstanceInfo]]]
+        for mod in self.modules.values():
+            for inst in mod.instances:
+                index.setdefault(inst.module_type, []).append((mod, inst))
+        return index
+
+    def _build_signal(self):
+        # type: () -> Dict[str, List[Tuple[ModuleInfo, InstanceInfo, ConnectionInfo]]]
+        # Keyed by the expression text and by every identifier in it
+        index = {}  # type: Dict[str, List[Any]]
+        names = {}  # type: Dict[str, List[str]]
+        for mod in self.modules.values():
+            for inst in mod.instances:
+                for conn in inst.connections:
+                    expr = conn.signal_expr
+                    if not expr:
+                        continue
+                    keys = names.get(expr)
+                    if keys is None:
+                        keys = signal_names(expr)
+                        if expr not in keys:
+                            keys.append(expr)
+                        names[expr] = keys
+                    hit = (mod, inst, conn)
+                    for key in keys:
+                        index.setdefault(key, []).append(hit)
+        return index
+
+    # ---- queries ----
+
+    def module(self, name):
+        # type: (str) -> Optional[ModuleInfo]
+        """The definition of *name* the scan uses, or None."""
+        return self.modules.get(name)
+
+    def definitions(self, name):
+        # type: (str) -> List[ModuleInfo]
+        """Every definition of *name*, in scan order."""
+        return self._get("name").get(name, [])
+
+    def duplicates(self):
+        # type: () -> Dict[str, List[ModuleInfo]]
+        """{name: definitions} of the names defined more than once."""
+        return {name: mods for name, mods in self._get("name").items()
+                if len(mods) > 1}
+
+    @property
+    def files(self):
+        # type: () -> List[str]
+        """Files that define modules, in scan order."""
+        return list(self._get("file"))
+
+    def modules_in_file(self, path):
+        # type: (str) -> List[ModuleInfo]
+        """Modules defined in *path* (as scanned, or any path to it)."""
+        index = self._get("file")
+        found = index.get(path)
+        if found is None:
+            found = index.get(os.path.abspath(path), [])
+        return found
+
+    def modules_with_port(self, name, direction=None):
+        # type: (str, Optional[PortDirection]) -> List[Tuple[ModuleInfo, PortInfo]]
+        """(module, port) of every module with a port called *name*,
+        optionally only those with the given direction."""
+        hits = self._get("port").get(name, [])
+        if direction is not None:
+            hits = [h for h in hits if h[1].direction == direction]
+        return hits
+
+    def instances_of(self, module_type):
+        # type: (str) -> List[Tuple[ModuleInfo, InstanceInfo]]
+        """(parent, instance) of every instantiation of *module_type*."""
+        return self._get("type").get(module_type, [])
+
+    def parents(self, module_type):
+        # type: (str) -> List[ModuleInfo]
+        """Modules that instantiate *module_type*, each once."""
+        seen = OrderedDict()  # type: Dict[int, ModuleInfo]
+        for parent, _ in self.instances_of(module_type):
+            seen.setdefault(id(parent), parent)
+        return list(seen.values())
+
+    def connectivity(self):
+        # type: () -> Any
+        """The ConnectivityGraph of the design (built once)."""
+        graph = self._index.get("connectivity")
+        if graph is None:
+            from .connectivity import ConnectivityGraph
+            graph = self._index["connectivity"] = ConnectivityGraph(
+                self.modules)
+        return graph
+
+    def connections_to(self, signal):
+        # type: (str) -> List[Tuple[ModuleInfo, InstanceInfo, ConnectionInfo]]
+        """(parent, instance, connection) of every instance pin connected
+        to *signal*: an identifier matches any expression that refers to
+        it (``data`` matches ``data[3]`` and ``{data, ready}``), other
+        text matches the exact expression."""
+        return self._get("signal").get(signal, [])
+
+
+def scan_design(**kwargs):
+    # type: (**Any) -> DesignDatabase
+    """Scan a design and index it.
+
+    Takes rtl_scan()'s input arguments (directory, file, files, filelist,
+    defines, include_dirs, cache, exclude, ...; not *mode*).  Every
+    parsed module is kept, duplicates included.  A scan error is left in
+    the database's *error*, parser errors in *parse_errors*.
+    """
+    from .rtl_scan import iter_scan
+
+    modules = []  # type: List[ModuleInfo]
+    result = {}  # type: Dict[str, Any]
+    for kind, item in iter_scan(mode="modules", **kwargs):
+        if kind == "module":
+            modules.append(item)
+        else:
+            result = item
+    db = DesignDatabase(modules)
+    if not modules:
+        db.error = result.get("error", "")
+    db.parse_errors = list(result.get("parse_errors", []))
+    return db
+
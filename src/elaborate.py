@@ -0,0 +1,312 @@
+"""
+Parameter-aware elaboration of the module hierarchy.
+
+Propagates parameter overrides from the top down, evaluates each
+module's parameters per instance, and memoizes every unique
+(module, resolved-parameter-set) specialization.  Identical instances —
+e.g. large arrays of the same cell with the same overrides — map to one
+specialization and are elaborated once.
+
+Generate loops, generate if/case branches and instance arrays are
+evaluated per specialization (see generate.py): an edge to a child
+carries its multiplicity, and instances in branches that are not taken
+are pruned.
+
+Provides:
+  - module_env()           resolved parameter environment for one module
+  - instance_overrides()   per-instance overrides in the parent's scope
+  - elaborate()            specialization graph rooted at a top module
+  - elaboration_summary()  JSON-friendly report of the above
+  - live_view()            module dict with pruned generate branches removed
+"""
+
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .ast_utils import range_text_width, try_eval_expr
+from .data_model import InstanceInfo, ModuleInfo
+from .generate import GenerateEvalError, expand_instance
+
+logger = logging.getLogger(__name__)
+
+
+# A specialization key: (module name, ((param, value), ...)) — values are
+# ints when resolved, else the unevaluated expression text.
+SpecKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+@dataclass
+class Specialization:
+    """One module elaborated with one concrete parameter set."""
+    module: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    env: Dict[str, Any] = field(default_factory=dict)
+    port_widths: List[Tuple[str, str, Optional[int]]] = field(default_factory=list)
+    children: List[Tuple[str, SpecKey, int]] = field(default_factory=list)
+    unresolved: List[InstanceInfo] = field(default_factory=list)
+    # Copies of each of the module's instances, aligned with
+    # ModuleInfo.instances: 0 = pruned branch, None = not evaluable
+    multiplicity: List[Optional[int]] = field(default_factory=list)
+    count: int = 0            # occurrences in the flattened hierarchy
+
+    @property
+    def label(self) -> str:
+        if not self.parameters:
+            return self.module
+        return "%s#(%s)" % (self.module, ",".join(
+            "%s=%s" % kv for kv in self.parameters.items()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "module": self.module,
+            "label": self.label,
+            "parameters": dict(self.parameters),
+            "instances": self.count,
+            "ports": [
+                {"name": n, "direction": d, "width": w}
+                for n, d, w in self.port_widths
+            ],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Parameter environments
+# ---------------------------------------------------------------------------
+
+def module_env(mod, overrides=None):
+    # type: (ModuleInfo, Optional[Dict[str, Any]]) -> Dict[str, Any]
+    """Resolve all parameters of *mod* in declaration order.
+
+    *overrides* maps parameter names to already-evaluated values and
+    replaces the defaults of `parameter` (never `localparam`) entries.
+    Parameters that cannot be evaluated keep their expression text.
+    """
+    overrides = overrides or {}
+    env = {}  # type: Dict[str, Any]
+    for p in mod.parameters:
+        if p.param_type == "parameter" and p.name in overrides:
+            env[p.name] = overrides[p.name]
+            continue
+        if not overrides and p.resolved is not None:
+            # Default environment: reuse the value computed at parse time
+            env[p.name] = p.resolved
+            continue
+        val = try_eval_expr(p.value, env) if p.value else None
+        env[p.name] = val if val is not None else p.value
+    return env
+
+
+def instance_overrides(inst, child, parent_env):
+    # type: (InstanceInfo, ModuleInfo, Dict[str, Any]) -> Dict[str, Any]
+    """Evaluate *inst*'s parameter overrides in the parent's environment.
+
+    Ordered overrides (``#0``, ``#1`` …) map onto *child*'s `parameter`
+    declarations in order.
+    """
+    if not inst.parameters:
+        return {}
+    ordered = [p.name for p in child.parameters if p.param_type == "parameter"]
+    out = {}  # type: Dict[str, Any]
+    for key, expr in inst.parameters.items():
+        if key.startswith("#"):
+            idx = int(key[1:])
+            if idx >= len(ordered):
+                logger.debug("%s: extra ordered parameter %s", inst.instance_name, key)
+                continue
+            key = ordered[idx]
+        elif key not in ordered:
+            logger.debug("%s: %s has no parameter %s",
+                         inst.instance_name, child.name, key)
+            continue
+        val = try_eval_expr(expr, parent_env)
+        out[key] = val if val is not None else expr
+    return out
+
+
+def _spec_key(mod, env):
+    # type: (ModuleInfo, Dict[str, Any]) -> SpecKey
+    return (mod.name, tuple(
+        (p.name, env.get(p.name))
+        for p in mod.parameters if p.param_type == "parameter"))
+
+
+# ---------------------------------------------------------------------------
+# Elaboration
+# ---------------------------------------------------------------------------
+
+def elaborate(top, modules, top_params=None):
+    # type: (str, Dict[str, ModuleInfo], Optional[Dict[str, Any]]) -> Dict[SpecKey, Specialization]
+    """Elaborate the hierarchy under *top*.
+
+    Each unique specialization is elaborated once; its ``count`` is the
+    number of times it occurs in the flattened hierarchy.
+
+    Args:
+        top:        top module name
+        modules:    {name: ModuleInfo}
+        top_params: parameter overrides for the top (values or text)
+
+    Returns:
+        {SpecKey: Specialization}, in first-visit (depth-first) order.
+    """
+    specs = {}  # type: Dict[SpecKey, Specialization]
+    top_mod = modules.get(top)
+    if top_mod is None:
+        return specs
+
+    overrides = {}  # type: Dict[str, Any]
+    for k, v in (top_params or {}).items():
+        if isinstance(v, str):
+            ev = try_eval_expr(v)
+            v = ev if ev is not None else v
+        overrides[k] = v
+
+    on_stack = set()  # type: Set[str]
+    # (child, overrides) → SpecKey, so repeated expansions of one instance
+    # skip re-evaluating the child's parameter environment
+    resolved = {}  # type: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], SpecKey]
+
+    def _child_key(child, over):
+        # type: (ModuleInfo, Dict[str, Any]) -> SpecKey
+        memo = (child.name, tuple(sorted(over.items())))
+        key = resolved.get(memo)
+        if key is None:
+            key = resolved[memo] = _visit(child, over)
+        return key
+
+    def _visit(mod, over):
+        # type: (ModuleInfo, Dict[str, Any]) -> SpecKey
+        env = module_env(mod, over)
+        key = _spec_key(mod, env)
+        if key in specs:
+            return key
+
+        spec = Specialization(
+            module=mod.name,
+            parameters=dict(key[1]),
+            env=env,
+            port_widths=[
+                (p.name, p.direction.value, range_text_width(p.range_spec, env))
+                for p in mod.ports
+            ],
+        )
+        specs[key] = spec
+        on_stack.add(mod.name)
+
+        for inst in mod.instances:
+            expansions = _expansions(inst, env)
+            if expansions is None:
+                spec.multiplicity.append(None)
+                expansions = [(env, 1)]
+            else:
+                spec.multiplicity.append(sum(w for _e, w in expansions))
+                if not expansions:
+                    continue    # pruned generate branch
+
+            child = modules.get(inst.module_type)
+            if child is None:
+                spec.unresolved.append(inst)
+                continue
+            if child.name in on_stack:
+                logger.warning("Circular instantiation: %s -> %s",
+                               mod.name, child.name)
+                continue
+
+            weights = {}  # type: Dict[SpecKey, int]
+            for local, weight in expansions:
+                ckey = _child_key(child, instance_overrides(inst, child, local))
+                weights[ckey] = weights.get(ckey, 0) + weight
+            for ckey, weight in weights.items():
+                spec.children.append((inst.instance_name, ckey, weight))
+
+        on_stack.discard(mod.name)
+        return key
+
+    root = _visit(top_mod, overrides)
+    _propagate_counts(specs, root)
+    return specs
+
+
+def _expansions(inst, env):
+    # type: (InstanceInfo, Dict[str, Any]) -> Optional[List[Tuple[Dict[str, Any], int]]]
+    """Generate/array expansions of *inst*, or None if not evaluable."""
+    if not inst.generate and not inst.array_range:
+        return [(env, 1)]
+    try:
+        return [(e, w) for e, w in expand_instance(inst, env) if w]
+    except GenerateEvalError as e:
+        logger.debug("%s: cannot evaluate %s", inst.instance_name, e)
+        return None
+
+
+def _propagate_counts(specs, root):
+    # type: (Dict[SpecKey, Specialization], SpecKey) -> None
+    """Fill in flattened occurrence counts, parents before children."""
+    order = []  # type: List[SpecKey]
+    seen = set()  # type: Set[SpecKey]
+
+    def _post(key):
+        # type: (SpecKey) -> None
+        seen.add(key)
+        for _name, ckey, _mult in specs[key].children:
+            if ckey not in seen:
+                _post(ckey)
+        order.append(key)
+
+    _post(root)
+    specs[root].count = 1
+    for key in reversed(order):
+        spec = specs[key]
+        for _name, ckey, mult in spec.children:
+            specs[ckey].count += spec.count * mult
+
+
+def live_view(modules, specs):
+    # type: (Dict[str, ModuleInfo], Dict[SpecKey, Specialization]) -> Tuple[Dict[str, ModuleInfo], Dict[str, List[Optional[int]]]]
+    """Drop instances that are pruned in every specialization.
+
+    Modules not reached by the elaboration are passed through unchanged.
+
+    Returns:
+        (modules view, {module: instance counts aligned with the view's
+        instance list — the largest count over specializations, None if
+        unknown})
+    """
+    by_module = {}  # type: Dict[str, List[Specialization]]
+    for spec in specs.values():
+        by_module.setdefault(spec.module, []).append(spec)
+
+    view = dict(modules)
+    counts = {}  # type: Dict[str, List[Optional[int]]]
+    for name, mod_specs in by_module.items():
+        mod = modules[name]
+        live = []      # type: List[InstanceInfo]
+        live_counts = []  # type: List[Optional[int]]
+        for idx, inst in enumerate(mod.instances):
+            mults = [s.multiplicity[idx] for s in mod_specs]
+            if all(m == 0 for m in mults):
+                continue
+            known = [m for m in mults if m is not None]
+            live.append(inst)
+            live_counts.append(
+                max(known) if known and len(known) == len(mults) else None)
+        counts[name] = live_counts
+        if len(live) != len(mod.instances):
+            view[name] = replace(mod, instances=live)
+    return view, counts
+
+
+def elaboration_summary(top, modules, top_params=None):
+    # type: (str, Dict[str, ModuleInfo], Optional[Dict[str, Any]]) -> Dict[str, Any]
+    """Elaborate and return a JSON-friendly summary."""
+    specs = elaborate(top, modules, top_params)
+    unresolved = sorted({
+        inst.module_type for s in specs.values() for inst in s.unresolved})
+    return {
+        "top": top,
+        "unique_specializations": len(specs),
+        "total_instances": sum(s.count for s in specs.values()),
+        "specializations": [s.to_dict() for s in specs.values()],
+        "unresolved": unresolved,
+    }
@@ -0,0 +1,199 @@
+"""
+Streaming exporters for large scan results.
+
+Writes rows to a text stream as they are produced instead of building
+the whole result in memory first.
+
+Instance paths (write_instance_paths):
+  - csv     header line + one row per record
+  - ndjson  one JSON object per line
+
+Scan results (write_scan, fed by rtl_scan.iter_scan):
+  - json    the indented JSON document, written section by section;
+            each module as soon as it is parsed
+  - ndjson  one record per module / instance edge / file, with a
+            "record" field giving its kind
+"""
+
+import csv
+import json
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+EXPORT_FORMATS = ("csv", "ndjson")
+SCAN_FORMATS = ("json", "ndjson")
+
+_PATH_COLUMNS = ("path", "module", "depth", "count")
+
+
+def write_instance_paths(stream, rows, fmt="csv"):
+    # type: (IO[str], Iterable[Tuple[str, str, int, Optional[int]]], str) -> int
+    """Write ``(path, module, depth, count)`` rows to *stream*.
+
+    *rows* is typically ``hierarchy.iter_instance_paths(...)``; it is
+    consumed lazily, one row at a time.  An unknown count is written as
+    an empty csv field / JSON null.
+
+    Returns:
+        Number of rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError("Unknown export format: %s" % fmt)
+
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(_PATH_COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for path, module, depth, copies in rows:
+            stream.write(json.dumps(
+                {"path": path, "module": module, "depth": depth,
+                 "count": copies},
+                ensure_ascii=False))
+            stream.write("\n")
+            count += 1
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Scan results
+# ---------------------------------------------------------------------------
+
+_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
+def _json_chunks(value, level):
+    # type: (Any, int) -> Iterator[str]
+    """Indented JSON of *value* nested *level* deep, in pieces.  Line
+    breaks only occur between tokens (strings escape theirs)."""
+    pad = "\n" + "  " * level
+    for chunk in _ENCODER.iterencode(value):
+        yield chunk.replace("\n", pad)
+
+
+def _write_json(stream, events):
+    # type: (IO[str], Iterable[Tuple[str, Any]]) -> int
+    write = stream.write
+    sep = "{"
+    count = 0
+    in_modules = False
+    for kind, value in events:
+        if kind == "module":
+            write(sep + '\n  "modules": [' if not in_modules else ",")
+            write("\n    ")
+            for chunk in _json_chunks(value.to_dict(), 2):
+                write(chunk)
+            count += 1
+            sep = ","
+            in_modules = True
+            continue
+        if in_modules:
+            write("\n  ]")
+            in_modules = False
+        for key, section in value.items():
+            if key.startswith("_"):
+                continue
+            write("%s\n  %s: " % (sep, json.dumps(key, ensure_ascii=False)))
+            for chunk in _json_chunks(section, 1):
+                write(chunk)
+            sep = ","
+    if in_modules:
+        write("\n  ]")
+    write("{}\n" if sep == "{" else "\n}\n")
+    return count
+
+
+def _hierarchy_edges(hierarchy):
+    # type: (Dict[str, Any]) -> Iterator[Dict[str, Any]]
+    """One record per instance of every module in a build_hierarchy()
+    tree, each module once, depth-first."""
+    seen = set()
+    stack = list(reversed(list(hierarchy.items())))
+    while stack:
+        name, node = stack.pop()
+        if name in seen or "instances" not in node:
+            continue
+        seen.add(name)
+        for entry in node["instances"]:
+            yield dict(record="instance", parent=name, **entry)
+        stack.extend(reversed([(k, v) for k, v in node.items()
+                               if k not in ("file", "instances")]))
+
+
+def _result_records(result):
+    # type: (Dict[str, Any]) -> Iterator[Dict[str, Any]]
+    for key, value in result.items():
+        if key.startswith("_"):
+            continue
+        if key == "modules":
+            for d in value:
+                yield dict(d, record="module")
+        elif key == "top":
+            yield {"record": "top", "module": value}
+        elif key == "hierarchy":
+            for edge in _hierarchy_edges(value):
+                yield edge
+        elif key == "unresolved":
+            for name in value:
+                yield {"record": "unresolved", "module": name}
+        elif key == "filelist_info":
+            for entry in value["filelist"]:
+                yield {"record": "file", "entry": entry}
+            for path in value["excluded"]:
+                yield {"record": "excluded", "file": path}
+        elif key == "parse_errors":
+            for msg in value:
+                yield {"record": "parse_error", "message": msg}
+        elif key == "error":
+            yield {"record": "error", "message": value}
+        else:
+            yield {"record": key, "data": value}
+
+
+def _write_ndjson(stream, events):
+    # type: (IO[str], Iterable[Tuple[str, Any]]) -> int
+    count = 0
+    for kind, value in events:
+        records = ([dict(value.to_dict(), record="module")]
+                   if kind == "module" else _result_records(value))
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False))
+            stream.write("\n")
+            count += 1
+    return count
+
+
+def write_scan(stream, events, fmt="json"):
+    # type: (IO[str], Iterable[Tuple[str, Any]], str) -> int
+    """Write a scan to *stream* while it runs.
+
+    *events* is ``rtl_scan.iter_scan(...)`` — each module is written as
+    soon as its file is parsed — or ``[("result", result)]`` for a
+    finished result dict.  Keys starting with "_" are skipped.
+
+    With fmt "json" the text equals ``json.dumps(result, indent=2)`` of
+    the matching rtl_scan() result (plus a newline) as long as module
+    names are unique.  Modules are written as they are parsed, so a
+    module defined twice is listed twice, in parse order; rtl_scan()
+    keeps the last definition at the position of the first.  Sections
+    are encoded piecewise, never as one string.
+
+    With fmt "ndjson" the records are, by "record" field: module
+    (module fields as in "modules"; written as parsed, so a module
+    defined twice has two records and the last one wins), top, instance (one per instance of
+    every module under the top: parent, instance, module[, count]),
+    unresolved, file (filelist entries in order), excluded,
+    parse_error, error, and {"record": key, "data": ...} for the
+    remaining sections.
+
+    Returns:
+        Number of modules (json) or records (ndjson) written.
+    """
+    if fmt == "json":
+        return _write_json(stream, events)
+    if fmt == "ndjson":
+        return _write_ndjson(stream, events)
+    raise ValueError("Unknown scan format: %s" % fmt)
@@ -5,11 +5,12 @@ Standalone functions that take ANTLR parse tree contexts and return
 data_model objects.  Used by the module visitor.
 """
 
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from .ast_utils import range_width
+from .ast_utils import range_width, try_eval_range
 from .data_model import (
     ConnectionInfo,
+    GenerateScope,
     InstanceInfo,
     ParameterInfo,
     PortInfo,
@@ -22,17 +23,32 @@ from .port_classify import PortDirection
 # Parameter extraction
 # ---------------------------------------------------------------------------
 
-def extract_parameters(param_list_ctx):
-    # type: (...) -> List[ParameterInfo]
+def _make_param(name, value, ptype, env):
+    # type: (str, str, str, Optional[Dict[str, Any]]) -> ParameterInfo
+    """Build a ParameterInfo, resolving its default value against *env*.
+
+    *env* accumulates the module's parameters in declaration order, so a
+    default may refer to earlier parameters.
+    """
+    resolved = None
+    if env is not None:
+        resolved = try_eval_range(value, env) if value else None
+        env[name] = resolved if resolved is not None else value
+    return ParameterInfo(name=name, value=value, param_type=ptype,
+                         resolved=resolved)
+
+
+def extract_parameters(param_list_ctx, env=None):
+    # type: (Any, Optional[Dict[str, Any]]) -> List[ParameterInfo]
     """Extract parameters from module_parameter_port_list."""
     params = []  # type: List[ParameterInfo]
     for param_decl in (param_list_ctx.parameter_declaration() or []):
-        params.extend(extract_param_assignments(param_decl, "parameter"))
+        params.extend(extract_param_assignments(param_decl, "parameter", env))
     return params
 
 
-def extract_param_assignments(ctx, ptype="parameter"):
-    # type: (...) -> List[ParameterInfo]
+def extract_param_assignments(ctx, ptype="parameter", env=None):
+    # type: (Any, str, Optional[Dict[str, Any]]) -> List[ParameterInfo]
     """Extract parameter assignments from a parameter_declaration."""
     params = []  # type: List[ParameterInfo]
     assign_list = ctx.list_of_param_assignments()
@@ -43,32 +59,15 @@ def extract_param_assignments(ctx, ptype="parameter"):
         if pid is None:
             continue
         val_ctx = pa.constant_mintypmax_expression()
-        params.append(ParameterInfo(
-            name=pid.getText(),
-            value=val_ctx.getText() if val_ctx else "",
-            param_type=ptype,
-        ))
+        params.append(_make_param(
+            pid.getText(), val_ctx.getText() if val_ctx else "", ptype, env))
     return params
 
 
-def extract_localparams(ctx):
-    # type: (...) -> List[ParameterInfo]
+def extract_localparams(ctx, env=None):
+    # type: (Any, Optional[Dict[str, Any]]) -> List[ParameterInfo]
     """Extract localparams from local_parameter_declaration."""
-    params = []  # type: List[ParameterInfo]
-    assign_list = ctx.list_of_param_assignments()
-    if assign_list is None:
-        return params
-    for pa in (assign_list.param_assignment() or []):
-        pid = pa.parameter_identifier()
-        if pid is None:
-            continue
-        val_ctx = pa.constant_mintypmax_expression()
-        params.append(ParameterInfo(
-            name=pid.getText(),
-            value=val_ctx.getText() if val_ctx else "",
-            param_type="localparam",
-        ))
-    return params
+    return extract_param_assignments(ctx, "localparam", env)
 
 
 # ---------------------------------------------------------------------------
@@ -204,6 +203,7 @@ def extract_instances(mi_ctx):
             continue
         inst_id = nomi.module_instance_identifier()
         inst_name = inst_id.getText() if inst_id else nomi.getText()
+        array_ctx = nomi.range_()
 
         connections = _extract_connections(mi)
 
@@ -212,6 +212,7 @@ def extract_instances(mi_ctx):
             module_type=module_type,
             connections=connections,
             parameters=dict(params),
+            array_range=array_ctx.getText() if array_ctx else "",
         ))
     return instances
 
@@ -241,6 +242,84 @@ def _extract_connections(mi_ctx):
     return connections
 
 
+# ---------------------------------------------------------------------------
+# Generate construct extraction
+# ---------------------------------------------------------------------------
+
+def _generate_block_name(block_ctx):
+    # type: (Any) -> str
+    """Label of a generate_block (``begin : name``), or ""."""
+    if block_ctx is None:
+        return ""
+    name_ctx = block_ctx.generate_block_name()
+    if name_ctx is None:
+        return ""
+    ident = name_ctx.generate_block_identifier()
+    return ident.getText() if ident else ""
+
+
+def extract_loop_generate(ctx):
+    # type: (Any) -> Tuple[GenerateScope, Any]
+    """Scope and body generate_block of a loop_generate_construct."""
+    init = ctx.genvar_initialization()
+    it = ctx.genvar_iteration()
+    cond = ctx.genvar_expression()
+    block = ctx.generate_block()
+    scope = GenerateScope(
+        kind="for",
+        genvar=init.genvar_identifier().getText() if init else "",
+        init=init.constant_expression().getText() if init else "",
+        cond=cond.getText() if cond else "",
+        step=it.genvar_expression().getText() if it else "",
+        name=_generate_block_name(block),
+    )
+    return scope, block
+
+
+def extract_if_generate(ctx):
+    # type: (Any) -> List[Tuple[GenerateScope, Any]]
+    """(scope, generate_block) per branch of an if_generate_construct.
+
+    Null branches (``;``) are omitted.
+    """
+    cond_ctx = ctx.constant_expression()
+    cond = cond_ctx.getText() if cond_ctx else ""
+    branches = []  # type: List[Tuple[GenerateScope, Any]]
+    for idx, bon in enumerate(ctx.generate_block_or_null() or []):
+        block = bon.generate_block()
+        if block is None:
+            continue
+        branches.append((GenerateScope(
+            kind="if", cond=cond, negate=idx > 0,
+            name=_generate_block_name(block),
+        ), block))
+    return branches
+
+
+def extract_case_generate(ctx):
+    # type: (Any) -> List[Tuple[GenerateScope, Any]]
+    """(scope, generate_block) per item of a case_generate_construct."""
+    expr_ctx = ctx.constant_expression()
+    cond = expr_ctx.getText() if expr_ctx else ""
+    items = []  # type: List[Tuple[Tuple[str, ...], Any]]
+    for item in (ctx.case_generate_item() or []):
+        labels = tuple(e.getText() for e in (item.constant_expression() or []))
+        items.append((labels, item.generate_block_or_null()))
+    all_labels = tuple(l for labels, _ in items for l in labels)
+
+    branches = []  # type: List[Tuple[GenerateScope, Any]]
+    for labels, bon in items:
+        block = bon.generate_block() if bon else None
+        if block is None:
+            continue
+        branches.append((GenerateScope(
+            kind="case", cond=cond, labels=labels,
+            others=() if labels else all_labels,
+            name=_generate_block_name(block),
+        ), block))
+    return branches
+
+
 # ---------------------------------------------------------------------------
 # Wire / reg extraction
 # ---------------------------------------------------------------------------
@@ -3,11 +3,28 @@ RTL file discovery utilities.
 
 Recursively finds Verilog/SystemVerilog files, with optional
 testbench exclusion.
+
+The walk is built on os.scandir (one stat-free directory read per
+directory) and supports gitignore-style include/exclude globs.  Excluded
+directories are pruned — never opened — so version-control metadata,
+synthesis run directories and vendor model trees cost nothing.
+Symlinked directories are followed only on request, and then each
+physical directory is visited once, which also breaks symlink loops.
+Top-level subtrees can be walked on a thread pool, which pays off on
+network file systems where directory reads dominate.
+
+Provides:
+  - GlobMatcher           compiled gitignore-style pattern list
+  - is_testbench()        testbench file-name heuristic
+  - discover_rtl_files()  recursive RTL file discovery
 """
 
 import logging
 import os
-from typing import List
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Pattern, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -17,23 +34,264 @@ RTL_EXTENSIONS = {".v", ".sv", ".vh", ".svh"}
 # Patterns that suggest a file is a testbench
 TB_PATTERNS = {"_tb", "testbench", "tb_", "test_", "_test"}
 
+_TB_RE = re.compile("|".join(re.escape(p) for p in sorted(TB_PATTERNS)))
+
+# Directories that never hold design sources; pruned unless re-included
+# with a negated pattern (e.g. "!.git/")
+DEFAULT_EXCLUDES = (".git/", ".svn/", ".hg/", "__pycache__/")
+
+
+def is_testbench(path):
+    # type: (str) -> bool
+    """True if the base name of *path* looks like a testbench."""
+    return _TB_RE.search(os.path.basename(path).lower()) is not None
+
+
+# ---------------------------------------------------------------------------
+# Gitignore-style globs
+# ---------------------------------------------------------------------------
+
+def _glob_to_regex(glob):
+    # type: (str) -> str
+    """Translate one glob (without ``!`` or trailing ``/``) to a regex.
+
+    ``*`` and ``?`` do not cross ``/``; ``**`` does.  A pattern without
+    a ``/`` matches at any depth, otherwise it is anchored at the root.
+    """
+    anchored = "/" in glob
+    glob = glob.lstrip("/")
+    out = []  # type: List[str]
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = glob.find("]", i + 2)
+            if j < 0:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = glob[i + 1:j]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[%s]" % body.replace("\\", "\\\\"))
+            i = j + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return prefix + "".join(out)
+
+
+class GlobMatcher:
+    """
+    Ordered list of gitignore-style patterns.
+
+    Patterns are matched against ``/``-separated paths relative to the
+    scan root.  A trailing ``/`` restricts a pattern to directories, a
+    leading ``!`` negates it, and the last matching pattern wins.
+
+    Without negations all patterns are folded into one regex per kind
+    (files / directories), so a path costs one match call regardless of
+    the number of patterns.
+    """
+
+    def __init__(self, patterns=()):
+        # type: (Iterable[str]) -> None
+        self.patterns = []  # type: List[str]
+        # (regex, negate, dir_only) in pattern order
+        self._rules = []  # type: List[Tuple[Pattern, bool, bool]]
+        for pat in patterns:
+            pat = pat.strip()
+            if not pat or pat.startswith("#"):
+                continue
+            self.patterns.append(pat)
+            negate = pat.startswith("!")
+            if negate:
+                pat = pat[1:]
+            dir_only = pat.endswith("/")
+            pat = pat.rstrip("/")
+            if not pat:
+                continue
+            self._rules.append(
+                (re.compile(_glob_to_regex(pat) + r"\Z"), negate, dir_only))
+
+        self._any = None  # type: Optional[Tuple[Optional[Pattern], Optional[Pattern]]]
+        if not any(neg for _r, neg, _d in self._rules):
+            self._any = (self._fold(False), self._fold(True))
+
+    def _fold(self, is_dir):
+        # type: (bool) -> Optional[Pattern]
+        alts = ["(?:%s)" % r.pattern[:-2] for r, _n, d in self._rules
+                if is_dir or not d]
+        if not alts:
+            return None
+        return re.compile("(?:%s)\\Z" % "|".join(alts))
 
-def discover_rtl_files(directory, exclude_tb=True):
-    # type: (str, bool) -> List[str]
+    def __bool__(self):
+        # type: () -> bool
+        return bool(self._rules)
+
+    def match(self, relpath, is_dir=False):
+        # type: (str, bool) -> bool
+        """True if *relpath* is selected by the pattern list."""
+        if self._any is not None:
+            regex = self._any[1 if is_dir else 0]
+            return regex is not None and regex.match(relpath) is not None
+        for regex, negate, dir_only in reversed(self._rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath):
+                return not negate
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Directory walk
+# ---------------------------------------------------------------------------
+
+class _Walk:
+    """State shared by all workers of one discovery run."""
+
+    def __init__(self, root, extensions, exclude_tb, include, exclude,
+                 follow_symlinks):
+        # type: (str, Set[str], bool, GlobMatcher, GlobMatcher, bool) -> None
+        self.root = root
+        self.extensions = extensions
+        self.exclude_tb = exclude_tb
+        self.include = include
+        self.exclude = exclude
+        self.follow_symlinks = follow_symlinks
+        self._visited = set()  # type: Set[Tuple[int, int]]
+        self._lock = threading.Lock()
+
+    def first_visit(self, path):
+        # type: (str) -> bool
+        """Record the physical directory behind *path*; False if seen."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        key = (st.st_dev, st.st_ino)
+        with self._lock:
+            if key in self._visited:
+                return False
+            self._visited.add(key)
+        return True
+
+    def want_file(self, name, rel):
+        # type: (str, str) -> bool
+        if os.path.splitext(name)[1].lower() not in self.extensions:
+            return False
+        if self.exclude_tb and is_testbench(name):
+            return False
+        if self.exclude and self.exclude.match(rel):
+            return False
+        if self.include and not self.include.match(rel):
+            return False
+        return True
+
+    def scan_dir(self, path, rel):
+        # type: (str, str) -> Tuple[List[str], List[Tuple[str, str]]]
+        """Read one directory: (matching files, [(subdir path, rel)]).
+
+        Both lists are sorted by name.
+        """
+        files = []    # type: List[str]
+        subdirs = []  # type: List[Tuple[str, str]]
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning("Cannot read directory %s: %s", path, e)
+            return files, subdirs
+        for entry in entries:
+            erel = rel + "/" + entry.name if rel else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=self.follow_symlinks)
+            except OSError:
+                continue
+            if is_dir:
+                if self.exclude and self.exclude.match(erel, is_dir=True):
+                    logger.debug("Pruned %s", entry.path)
+                    continue
+                if self.follow_symlinks and not self.first_visit(entry.path):
+                    logger.debug("Skipping revisited directory %s", entry.path)
+                    continue
+                subdirs.append((entry.path, erel))
+            elif self.want_file(entry.name, erel):
+                files.append(entry.path)
+        return files, subdirs
+
+    def walk(self, path, rel):
+        # type: (str, str) -> List[str]
+        """Pre-order walk: a directory's files, then its subdirectories."""
+        out = []  # type: List[str]
+        stack = [(path, rel)]
+        while stack:
+            dpath, drel = stack.pop()
+            files, subdirs = self.scan_dir(dpath, drel)
+            out.extend(files)
+            stack.extend(reversed(subdirs))
+        return out
+
+
+def discover_rtl_files(directory, exclude_tb=True, include=None, exclude=None,
+                       follow_symlinks=False, jobs=1,
+                       extensions=None):
+    # type: (str, bool, Optional[Iterable[str]], Optional[Iterable[str]], bool, int, Optional[Iterable[str]]) -> List[str]
     """Recursively find Verilog/SV files in *directory*.
 
     If *exclude_tb* is True, files whose base name contains typical
     testbench patterns are excluded.
+
+    Args:
+        directory:       scan root
+        exclude_tb:      skip testbench-looking file names
+        include:         gitignore-style globs; if given, a file's path
+                         relative to *directory* must match one of them
+        exclude:         gitignore-style globs of files/directories to
+                         skip; matched directories are not descended.
+                         Added to DEFAULT_EXCLUDES.
+        follow_symlinks: descend into symlinked directories (each
+                         physical directory is visited once)
+        jobs:            walk top-level subdirectories on this many
+                         threads
+        extensions:      file extensions to collect (default
+                         RTL_EXTENSIONS)
+
+    Returns:
+        File paths in a stable order: each directory's files sorted by
+        name, followed by its subdirectories in name order.
     """
-    rtl_files = []  # type: List[str]
-    for root, _dirs, files in os.walk(directory):
-        for f in sorted(files):
-            ext = os.path.splitext(f)[1].lower()
-            if ext not in RTL_EXTENSIONS:
-                continue
-            if exclude_tb:
-                lower = f.lower()
-                if any(p in lower for p in TB_PATTERNS):
-                    continue
-            rtl_files.append(os.path.join(root, f))
+    state = _Walk(
+        root=directory,
+        extensions=set(e.lower() for e in (extensions or RTL_EXTENSIONS)),
+        exclude_tb=exclude_tb,
+        include=GlobMatcher(include or ()),
+        exclude=GlobMatcher(list(DEFAULT_EXCLUDES) + list(exclude or ())),
+        follow_symlinks=follow_symlinks,
+    )
+    if follow_symlinks:
+        state.first_visit(directory)
+
+    if jobs <= 1:
+        return state.walk(directory, "")
+
+    rtl_files, subdirs = state.scan_dir(directory, "")
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        parts = pool.map(lambda sd: state.walk(sd[0], sd[1]), subdirs)
+        for part in parts:
+            rtl_files.extend(part)
     return rtl_files
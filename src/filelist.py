@@ -0,0 +1,361 @@
+"""
+Simulator-style filelist (.f) parsing and lazy library resolution.
+
+Supported filelist syntax (VCS / Xcelium / Questa common subset):
+  - source files, one or more per line
+  - ``//`` and ``#`` line comments, ``/* ... */`` block comments
+  - ``$VAR``, ``${VAR}`` and ``$(VAR)`` environment variables
+  - ``-f FILE``   nested filelist, paths relative to the outer context
+  - ``-F FILE``   nested filelist, paths relative to FILE's directory
+  - ``-v FILE``   library file: modules are parsed only when needed
+  - ``-y DIR``    library directory: ``DIR/<module><libext>``
+  - ``+libext+.v+.sv``         extensions for -y lookups
+  - ``+incdir+DIR[+DIR...]``   include directories (also ``-incdir DIR``)
+  - ``+define+A[=V][+B...]``   macro definitions (also ``-define A=V``)
+Other options are ignored.
+
+Relative paths in a top-level filelist resolve against the filelist's
+own directory.
+
+Library sources are never parsed up front.  After the design files are
+parsed, resolve_libraries() looks up each unresolved module name in the
+-v / -y sources (in command-line order), parses only what defines it,
+and repeats for the names those modules introduce.  A -v file is
+preprocessed and split into module regions once, and only the regions
+of needed modules are handed to the parser.
+
+Provides:
+  - Filelist              parsed filelist contents
+  - FilelistError         unreadable / cyclic filelist
+  - parse_filelist()      read a .f file (with nested -f / -F)
+  - Library               -v / -y lookup with lazy indexing
+  - resolve_libraries()   parse library modules for unresolved names
+"""
+
+import logging
+import os
+import re
+import shlex
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .data_model import ModuleInfo
+from .hierarchy import find_unresolved
+from .module_index import module_regions
+from .scan_cache import _stat_sig
+
+logger = logging.getLogger(__name__)
+
+
+# Extensions tried for -y lookups when no +libext+ is given
+DEFAULT_LIBEXT = (".v", ".sv")
+
+
+class FilelistError(Exception):
+    """A filelist cannot be read or includes itself."""
+
+
+@dataclass
+class Filelist:
+    """Contents of a filelist, nested filelists flattened in order."""
+    files: List[str] = field(default_factory=list)
+    include_dirs: List[str] = field(default_factory=list)
+    defines: Dict[str, str] = field(default_factory=dict)
+    # Library sources in command-line order: ("-v", file) / ("-y", dir)
+    libraries: List[Tuple[str, str]] = field(default_factory=list)
+    libext: List[str] = field(default_factory=list)
+    ignored: List[str] = field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# Filelist parsing
+# ---------------------------------------------------------------------------
+
+_RE_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_RE_ENV = re.compile(r"\$(?:\{(\w+)\}|\((\w+)\)|(\w+))")
+
+# Options followed by one argument that is not a path we use
+_SKIP_ARG_OPTIONS = frozenset({
+    "-l", "-o", "-top", "-timescale", "-work", "-L", "-Mdir",
+})
+
+
+def _expand_env(token, env):
+    # type: (str, Dict[str, str]) -> str
+    def _repl(m):
+        name = m.group(1) or m.group(2) or m.group(3)
+        if name in env:
+            return env[name]
+        logger.warning("Undefined environment variable in filelist: $%s", name)
+        return m.group(0)
+    return _RE_ENV.sub(_repl, token)
+
+
+def _tokenize(text):
+    # type: (str) -> List[str]
+    """Split filelist text into whitespace-separated, unquoted tokens."""
+    text = _RE_BLOCK_COMMENT.sub(" ", text)
+    tokens = []  # type: List[str]
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        pos = line.find("//")
+        if pos >= 0:
+            line = line[:pos]
+        try:
+            tokens.extend(shlex.split(line, posix=True))
+        except ValueError:
+            tokens.extend(line.split())
+    return tokens
+
+
+def _plus_args(token, prefix):
+    # type: (str, str) -> List[str]
+    """``+incdir+a+b`` → ["a", "b"]."""
+    return [a for a in token[len(prefix):].split("+") if a]
+
+
+def parse_filelist(path, env=None, base_dir=None):
+    # type: (str, Optional[Dict[str, str]], Optional[str]) -> Filelist
+    """Parse the filelist at *path*, including nested -f / -F files.
+
+    Args:
+        path:     filelist path
+        env:      variables for ``$VAR`` expansion (default os.environ)
+        base_dir: directory relative entries resolve against
+                  (default: the filelist's directory)
+
+    Raises:
+        FilelistError if a filelist is missing or nests itself.
+    """
+    out = Filelist()
+    env = dict(os.environ) if env is None else env
+    _parse_into(out, os.path.abspath(path), env, base_dir, [])
+    return out
+
+
+def _parse_into(out, path, env, base_dir, stack):
+    # type: (Filelist, str, Dict[str, str], Optional[str], List[str]) -> None
+    if path in stack:
+        raise FilelistError("Filelist includes itself: %s"
+                            % " -> ".join(stack + [path]))
+    try:
+        with open(path, "r", errors="replace") as f:
+            text = f.read()
+    except (IOError, OSError) as e:
+        raise FilelistError("Cannot read filelist %s: %s" % (path, e))
+
+    base = base_dir or os.path.dirname(path)
+    stack = stack + [path]
+
+    def _path(p):
+        # type: (str) -> str
+        if not os.path.isabs(p):
+            p = os.path.join(base, p)
+        return os.path.normpath(p)
+
+    tokens = [_expand_env(t, env) for t in _tokenize(text)]
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        i += 1
+        arg = tokens[i] if i < len(tokens) else ""
+
+        if tok in ("-f", "-F"):
+            if not arg:
+                logger.warning("%s: %s without a file", path, tok)
+                continue
+            i += 1
+            nested = _path(arg)
+            # -F: entries relative to the nested file; -f: to our context
+            _parse_into(out, nested, env,
+                        None if tok == "-F" else base, stack)
+        elif tok == "-v":
+            i += 1
+            out.libraries.append(("-v", _path(arg)))
+        elif tok == "-y":
+            i += 1
+            out.libraries.append(("-y", _path(arg)))
+        elif tok == "-incdir":
+            i += 1
+            out.include_dirs.append(_path(arg))
+        elif tok == "-define":
+            i += 1
+            name, _, value = arg.partition("=")
+            out.defines[name] = value
+        elif tok.startswith("+incdir+"):
+            out.include_dirs.extend(_path(d) for d in _plus_args(tok, "+incdir+"))
+        elif tok.startswith("+define+"):
+            for d in _plus_args(tok, "+define+"):
+                name, _, value = d.partition("=")
+                out.defines[name] = value
+        elif tok.startswith("+libext+"):
+            for ext in _plus_args(tok, "+libext+"):
+                if ext not in out.libext:
+                    out.libext.append(ext)
+        elif tok in _SKIP_ARG_OPTIONS:
+            i += 1
+            out.ignored.extend([tok, arg])
+        elif tok.startswith("-") or tok.startswith("+"):
+            out.ignored.append(tok)
+        else:
+            out.files.append(_path(tok))
+
+    if out.ignored:
+        logger.debug("%s: ignored options %s", path, " ".join(out.ignored))
+
+
+# ---------------------------------------------------------------------------
+# Library resolution
+# ---------------------------------------------------------------------------
+
+class Library:
+    """
+    -v files and -y directories, searched in command-line order.
+
+    Nothing is read until a module is looked up: -y directories are
+    listed once on first use, -v files are preprocessed and split into
+    module regions once on first use.  Lookups are memoized, so a
+    Library can be reused across rescans of the same design; changed()
+    tells when the files and directories it read differ on disk, and
+    reset() drops the memos.
+    """
+
+    def __init__(self, sources, libext=None):
+        # type: (List[Tuple[str, str]], Optional[List[str]]) -> None
+        self.sources = list(sources)
+        self.libext = list(libext or DEFAULT_LIBEXT)
+        self._dir_listing = {}  # type: Dict[str, Set[str]]
+        # -v file → (preprocessed text, {module: (start, end)})
+        self._file_index = {}  # type: Dict[str, Tuple[str, Dict[str, Tuple[int, int]]]]
+        self._file_modules = {}  # type: Dict[str, List[ModuleInfo]]
+        self._loaded = {}  # type: Dict[str, List[ModuleInfo]]
+        # file or directory read → stat signature when it was read
+        self._sigs = {}  # type: Dict[str, Optional[List[int]]]
+        self.used_files = []  # type: List[str]
+
+    def __bool__(self):
+        # type: () -> bool
+        return bool(self.sources)
+
+    def changed(self):
+        # type: () -> List[str]
+        """Library files and -y directories read so far whose stat
+        signature changed since (a directory's changes when a file is
+        added to or removed from it)."""
+        return [p for p, sig in self._sigs.items() if _stat_sig(p) != sig]
+
+    def reset(self):
+        # type: () -> None
+        """Forget everything read, so the next lookups re-read it."""
+        self._dir_listing.clear()
+        self._file_index.clear()
+        self._file_modules.clear()
+        self._loaded.clear()
+        self._sigs.clear()
+        self.used_files = []
+
+    def _listing(self, d):
+        # type: (str) -> Set[str]
+        names = self._dir_listing.get(d)
+        if names is None:
+            self._sigs[d] = _stat_sig(d)
+            try:
+                names = set(os.listdir(d))
+            except OSError as e:
+                logger.warning("Cannot read library directory %s: %s", d, e)
+                names = set()
+            self._dir_listing[d] = names
+        return names
+
+    def _index(self, parser, path):
+        # type: (Any, str) -> Tuple[str, Dict[str, Tuple[int, int]]]
+        entry = self._file_index.get(path)
+        if entry is None:
+            self._sigs[path] = _stat_sig(path)
+            try:
+                text = parser.preprocessor.process_file(path)
+            except Exception as e:
+                msg = "Preprocess error: %s: %s" % (path, e)
+                logger.warning(msg)
+                parser.errors.append(msg)
+                text = ""
+            entry = self._file_index[path] = (text, module_regions(text))
+            logger.debug("Indexed library %s: %d module(s)",
+                         path, len(entry[1]))
+        return entry
+
+    def load(self, parser, name):
+        # type: (Any, str) -> List[ModuleInfo]
+        """Parse and return the library modules that define *name*.
+
+        Returns an empty list if no library source defines it.
+        """
+        mods = self._loaded.get(name)
+        if mods is None:
+            mods = self._loaded[name] = self._load(parser, name)
+        return mods
+
+    def _load(self, parser, name):
+        # type: (Any, str) -> List[ModuleInfo]
+        for kind, src in self.sources:
+            if kind == "-y":
+                listing = self._listing(src)
+                for ext in self.libext:
+                    fname = name + ext
+                    if fname not in listing:
+                        continue
+                    path = os.path.join(src, fname)
+                    mods = self._file_modules.get(path)
+                    if mods is None:
+                        self._sigs[path] = _stat_sig(path)
+                        self.used_files.append(path)
+                        mods = self._file_modules[path] = parser.parse_file(path)
+                    return mods
+            else:
+                text, regions = self._index(parser, src)
+                span = regions.get(name)
+                if span is None:
+                    continue
+                if src not in self.used_files:
+                    self.used_files.append(src)
+                start, end = span
+                return parser.parse_preprocessed(
+                    text[start:end], src,
+                    line_offset=text.count("\n", 0, start))
+        return []
+
+
+def resolve_libraries(parser, modules, library):
+    # type: (Any, Dict[str, ModuleInfo], Library) -> List[ModuleInfo]
+    """Add library modules for unresolved names to *modules*, in place.
+
+    Repeats until no new name resolves, so library cells that instantiate
+    other library cells are pulled in as well.
+
+    Returns:
+        The library modules added, in load order.
+    """
+    added = []  # type: List[ModuleInfo]
+    if not library:
+        return added
+    tried = set()  # type: Set[str]
+    while True:
+        missing = [n for n in find_unresolved(modules) if n not in tried]
+        if not missing:
+            break
+        progress = False
+        for name in missing:
+            tried.add(name)
+            for mod in library.load(parser, name):
+                if mod.name not in modules:
+                    modules[mod.name] = mod
+                    added.append(mod)
+                    progress = True
+        if not progress:
+            break
+    if added:
+        logger.info("Resolved %d module(s) from %d library file(s)",
+                    len(added), len(library.used_files))
+    return added
@@ -129,6 +129,8 @@ def format_hierarchy(result):
             inst_name = inst.get("instance", "?")
             mod_name = inst.get("module", "?")
             label = "%s (%s)" % (_green(inst_name), _cyan(mod_name))
+            if "count" in inst:
+                label += _dim(" x%s" % inst["count"])
             lines.append(prefix + connector + label)
 
             # Recurse into child if hierarchy data exists
@@ -198,6 +200,17 @@ def format_ports(result):
             lines.append("    outputs: " + ", ".join(data_out))
         lines.append("")
 
+    # Clocks / resets as propagated through the hierarchy
+    prop = result.get("clock_propagation") or {}
+    rows = [[e["source"], kind[:-1], str(len(e["ports"])), str(len(e["wires"])),
+             ", ".join(e["ports"][:4]) + (" ..." if len(e["ports"]) > 4 else "")]
+            for kind in ("clocks", "resets") for e in prop.get(kind, [])]
+    if rows:
+        lines.append("  " + _cyan("Propagation"))
+        lines.append(_table(["Source", "Kind", "Ports", "Wires", "Reaches"],
+                            rows, indent=4))
+        lines.append("")
+
     return "\n".join(lines)
 
 
@@ -232,6 +245,115 @@ def format_filelist(result):
     return "\n".join(lines)
 
 
+def format_impact(result):
+    # type: (Dict[str, Any]) -> str
+    """Format change-impact analysis."""
+    imp = result.get("impact")
+    if not imp:
+        return ""
+
+    lines = [_bold("Change Impact"), ""]
+    lines.append("  " + _cyan("Changed files (%d)" % len(imp["changed_files"])))
+    for f in imp["changed_files"]:
+        lines.append("    " + f)
+    lines.append("")
+
+    tops = imp.get("affected_tops", [])
+    lines.append("  " + _cyan("Affected tops (%d)" % len(tops)))
+    if tops:
+        lines.append("    " + ", ".join(_green(t) for t in tops))
+    lines.append("")
+
+    mods = imp.get("affected_modules", [])
+    changed = set(imp.get("changed_modules", []))
+    lines.append("  " + _cyan("Affected modules (%d)" % len(mods)))
+    for m in mods:
+        lines.append("    " + (m + _dim("  (changed)") if m in changed else m))
+
+    files = imp.get("affected_files", [])
+    if files:
+        lines.append("")
+        lines.append("  " + _cyan("Affected files (%d)" % len(files)))
+        for f in files:
+            lines.append("    " + f)
+
+    unknown = imp.get("unknown_files", [])
+    if unknown:
+        lines.append("")
+        lines.append("  " + _yellow("Not in scan: %s" % ", ".join(unknown)))
+
+    return "\n".join(lines)
+
+
+def format_watch_diff(diff):
+    # type: (Dict[str, Any]) -> str
+    """Format one watch-mode update (see watch.result_diff)."""
+    files = diff.get("files", {})
+    counts = ", ".join("%d %s" % (len(files[k]), k)
+                       for k in ("changed", "added", "removed") if files.get(k))
+    lines = [_bold("Update") + _dim("  (%s)" % (counts or "no file changes"))]
+    for k in ("changed", "added", "removed"):
+        for f in files.get(k, []):
+            lines.append("  %s %s" % (k[0].upper(), f))
+
+    def _section(title, d, keys):
+        entries = [(k, n) for k in keys for n in d.get(k, [])]
+        if not entries:
+            return
+        lines.append("  " + _cyan(title))
+        for k, n in entries:
+            mark = {"added": _green("+"), "removed": _red("-")}.get(k, _yellow("~"))
+            lines.append("    %s %s" % (mark, n))
+
+    _section("Modules", diff.get("modules", {}), ("added", "removed", "changed"))
+    _section("Instances", diff.get("instances", {}), ("added", "removed"))
+    _section("Unresolved", diff.get("unresolved", {}), ("added", "removed"))
+    _section("Filelist", diff.get("filelist", {}), ("added", "removed"))
+    if diff.get("filelist", {}).get("reordered"):
+        lines.append("  " + _cyan("Filelist") + " reordered")
+    if "top" in diff:
+        lines.append("  " + _cyan("Top") + " " + _green(diff["top"] or "(none)"))
+    return "\n".join(lines)
+
+
+def format_elaboration(result):
+    # type: (Dict[str, Any]) -> str
+    """Format elaborated specializations with concrete port widths."""
+    elab = result.get("elaboration")
+    if not elab:
+        return ""
+
+    specs = elab.get("specializations", [])
+    lines = [_bold("Elaboration (top: %s) — %d unique specialization(s), "
+                   "%d instance(s)" % (_cyan(elab.get("top", "")),
+                                       elab.get("unique_specializations", 0),
+                                       elab.get("total_instances", 0))), ""]
+
+    rows = [[s["label"], str(s["instances"]), str(len(s["ports"]))]
+            for s in specs]
+    lines.append(_table(["Specialization", "Count", "Ports"], rows, indent=2))
+
+    for s in specs:
+        ports = s["ports"]
+        if not ports:
+            continue
+        lines.append("")
+        lines.append("  " + _cyan(s["label"]))
+        prows = []
+        for pt in ports:
+            w = pt["width"]
+            prows.append([pt["name"], pt["direction"],
+                          str(w) if w is not None else _yellow("?")])
+        lines.append(_table(["Port", "Dir", "Width"], prows, indent=4))
+
+    unresolved = elab.get("unresolved", [])
+    if unresolved:
+        lines.append("")
+        lines.append("  " + _yellow("Unresolved: %s" % ", ".join(unresolved)))
+
+    return "\n".join(lines)
+
+
 def format_errors(result):
     # type: (Dict[str, Any]) -> str
     """Format parse errors."""
@@ -393,6 +515,12 @@ def format_result(result, mode="full"):
         return format_inst(result)
     if mode == "io":
         return format_io(result)
+    if mode == "elab":
+        return "\n\n".join(
+            s for s in (format_elaboration(result), format_errors(result)) if s)
+    if mode == "impact":
+        return "\n\n".join(
+            s for s in (format_impact(result), format_errors(result)) if s)
 
     sections.append(format_modules_summary(result))
 
@@ -0,0 +1,158 @@
+"""
+Generate-construct and instance-array multiplicity.
+
+Instances carry the chain of enclosing generate scopes (for / if / case)
+and an optional instance-array range.  Given a module's parameter
+environment, this module counts how many times each instance exists
+without unrolling it: genvar loops whose variable is not used further
+in are counted arithmetically, and only genvars that do matter (inner
+conditions, array bounds, parameter overrides) are enumerated.
+
+Provides:
+  - expand_instance()       (env, weight) pairs for one instance
+  - instance_multiplicity() total count of one instance, or None
+"""
+
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .ast_utils import range_text_width, split_range
+from .const_eval import identifiers, try_evaluate
+from .data_model import GenerateScope, InstanceInfo
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bound on iterations of a single genvar loop; beyond this the
+# bounds are treated as unknown rather than spinning.
+MAX_LOOP_ITERATIONS = 1 << 20
+
+
+class GenerateEvalError(ValueError):
+    """A generate condition, loop bound or array range is not constant."""
+
+
+def _loop_values(scope, env):
+    # type: (GenerateScope, Dict[str, Any]) -> List[int]
+    """Genvar values of a for-generate loop under *env*."""
+    value = try_evaluate(scope.init, env)
+    if value is None:
+        raise GenerateEvalError(scope.init)
+    values = []  # type: List[int]
+    local = dict(env)
+    while True:
+        local[scope.genvar] = value
+        cond = try_evaluate(scope.cond, local)
+        if cond is None:
+            raise GenerateEvalError(scope.cond)
+        if not cond:
+            return values
+        values.append(value)
+        if len(values) > MAX_LOOP_ITERATIONS:
+            raise GenerateEvalError("loop bound of %s" % scope.genvar)
+        nxt = try_evaluate(scope.step, local)
+        if nxt is None or nxt == value:
+            raise GenerateEvalError(scope.step)
+        value = nxt
+
+
+def _branch_taken(scope, env):
+    # type: (GenerateScope, Dict[str, Any]) -> bool
+    cond = try_evaluate(scope.cond, env)
+    if cond is None:
+        raise GenerateEvalError(scope.cond)
+    if scope.kind == "if":
+        return bool(cond) != scope.negate
+    # case: match own labels, or default when no other label matches
+    labels = scope.labels if scope.labels else scope.others
+    for label in labels:
+        val = try_evaluate(label, env)
+        if val is None:
+            raise GenerateEvalError(label)
+        if val == cond:
+            return bool(scope.labels)
+    return not scope.labels
+
+
+def _names_used(inst):
+    # type: (InstanceInfo) -> List[Set[str]]
+    """Identifiers used at or below each scope level of *inst*.
+
+    Element ``i`` holds the names referenced by scopes ``i+1 ..`` plus the
+    array range and parameter overrides — i.e. whatever a genvar bound at
+    level ``i`` could influence.
+    """
+    tail = set()  # type: Set[str]
+    bounds = split_range(inst.array_range) if inst.array_range else None
+    for expr in (bounds or ()):
+        tail.update(identifiers(expr))
+    for expr in inst.parameters.values():
+        tail.update(identifiers(expr))
+    used = [set() for _ in inst.generate]  # type: List[Set[str]]
+    for i in range(len(inst.generate) - 1, -1, -1):
+        used[i] = set(tail)
+        s = inst.generate[i]
+        for expr in (s.cond, s.init, s.step) + s.labels + s.others:
+            if expr:
+                tail.update(identifiers(expr))
+    return used
+
+
+def expand_instance(inst, env):
+    # type: (InstanceInfo, Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], int]]
+    """Yield ``(env, weight)`` pairs covering every copy of *inst*.
+
+    Each yielded env binds the genvars that inner scopes, the array range
+    or parameter overrides depend on; *weight* multiplies in the trip
+    counts of loops whose genvar is not referenced further in.  The
+    instance-array size is included in the weight.
+
+    Raises GenerateEvalError if a condition or bound cannot be evaluated.
+    """
+    scopes = inst.generate
+    used = _names_used(inst) if scopes else []
+
+    def _walk(i, local, weight):
+        # type: (int, Dict[str, Any], int) -> Iterator[Tuple[Dict[str, Any], int]]
+        if i == len(scopes):
+            size = range_text_width(inst.array_range, local)
+            if size is None:
+                raise GenerateEvalError(inst.array_range)
+            yield local, weight * size
+            return
+        scope = scopes[i]
+        if scope.kind != "for":
+            if _branch_taken(scope, local):
+                for item in _walk(i + 1, local, weight):
+                    yield item
+            return
+        values = _loop_values(scope, local)
+        if not values:
+            return
+        if scope.genvar not in used[i]:
+            for item in _walk(i + 1, local, weight * len(values)):
+                yield item
+            return
+        for v in values:
+            inner = dict(local)
+            inner[scope.genvar] = v
+            for item in _walk(i + 1, inner, weight):
+                yield item
+
+    return _walk(0, env, 1)
+
+
+def instance_multiplicity(inst, env):
+    # type: (InstanceInfo, Dict[str, Any]) -> Optional[int]
+    """Number of copies of *inst* under *env* (0 if in a dead branch).
+
+    Returns None if a generate condition, loop bound or array range
+    cannot be evaluated.
+    """
+    if not inst.generate and not inst.array_range:
+        return 1
+    try:
+        return sum(w for _env, w in expand_instance(inst, env))
+    except GenerateEvalError as e:
+        logger.debug("%s: cannot evaluate %s", inst.instance_name, e)
+        return None
@@ -7,12 +7,14 @@ Provides:
   - Unresolved module detection
   - Topological sort for compilation order
   - Filelist generation
+  - Streaming flattened instance-path walk
 """
 
+import fnmatch
 import os
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
-from .data_model import ModuleInfo
+from .data_model import InstanceInfo, ModuleInfo
 from .file_discovery import discover_rtl_files
 
 
@@ -25,9 +27,14 @@ def find_top_modules(modules):
     return [name for name in modules if name not in instantiated]
 
 
-def build_hierarchy(top, modules, visited=None):
-    # type: (str, Dict[str, ModuleInfo], Optional[Set[str]]) -> Dict[str, Any]
-    """Build a hierarchy dict rooted at *top*."""
+def build_hierarchy(top, modules, visited=None, counts=None):
+    # type: (str, Dict[str, ModuleInfo], Optional[Set[str]], Optional[Dict[str, List[Optional[int]]]]) -> Dict[str, Any]
+    """Build a hierarchy dict rooted at *top*.
+
+    *counts* optionally gives per-module instance multiplicities aligned
+    with each module's instance list (generate loops / instance arrays);
+    entries other than 1 are reported as ``"count"`` (None → ``"?"``).
+    """
     if visited is None:
         visited = set()
 
@@ -44,20 +51,103 @@ def build_hierarchy(top, modules, visited=None):
         "instances": [],
     }  # type: Dict[str, Any]
 
-    for inst in mod.instances:
-        node["instances"].append({
+    mod_counts = (counts or {}).get(top)
+    for idx, inst in enumerate(mod.instances):
+        entry = {
             "module": inst.module_type,
             "instance": inst.instance_name,
-        })
+        }
+        if mod_counts is not None and mod_counts[idx] != 1:
+            n = mod_counts[idx]
+            entry["count"] = n if n is not None else "?"
+        node["instances"].append(entry)
 
     for inst in mod.instances:
         child = inst.module_type
         if child in modules and child not in visited:
-            node[child] = build_hierarchy(child, modules, visited)
+            node[child] = build_hierarchy(child, modules, visited, counts)
 
     return node
 
 
+def iter_instance_paths(top, modules, max_depth=None, module_filter=None,
+                        separator=".", counts=None):
+    # type: (str, Dict[str, ModuleInfo], Optional[int], Optional[List[str]], str, Optional[Dict[str, List[Optional[int]]]]) -> Iterator[Tuple[str, str, int, Optional[int]]]
+    """Yield ``(path, module_type, depth, count)`` for every instance below
+    *top*.
+
+    Walks the module graph depth-first with an explicit stack holding one
+    instance iterator per level, so memory grows with hierarchy depth, not
+    with the number of rows.  The top itself is yielded first at depth 0.
+
+    An instance array or generate loop is one row: *count* is the number
+    of copies the row stands for in the flattened design — the product
+    of the multiplicities along its path (None if one is unknown).
+
+    Args:
+        max_depth:     do not descend below this depth (None → unlimited)
+        module_filter: glob patterns on the module type; only matching rows
+                       are yielded, but the walk still descends through
+                       non-matching modules
+        separator:     hierarchy separator used to build paths
+        counts:        per-module instance multiplicities aligned with each
+                       module's instance list, as for build_hierarchy()
+    """
+    def _wanted(module_type):
+        # type: (str) -> bool
+        if not module_filter:
+            return True
+        return any(fnmatch.fnmatchcase(module_type, pat)
+                   for pat in module_filter)
+
+    if _wanted(top):
+        yield (top, top, 0, 1)
+
+    mod = modules.get(top)
+    if mod is None or max_depth == 0:
+        return
+
+    counts = counts or {}
+    # Each frame: (path prefix, module name, copies of it, iterator over
+    # (instance, multiplicity))
+    stack = [(top, top, 1, _with_counts(mod, counts))]  # type: List[Tuple[str, str, Optional[int], Iterator[Tuple[InstanceInfo, Optional[int]]]]]
+    on_stack = {top}  # type: Set[str]
+
+    while stack:
+        prefix, name, copies, it = stack[-1]
+        inst, mult = next(it, (None, None))
+        if inst is None:
+            stack.pop()
+            on_stack.discard(name)
+            continue
+
+        depth = len(stack)
+        child = inst.module_type
+        path = prefix + separator + inst.instance_name
+        total = copies * mult if copies is not None and mult is not None \
+            else None
+        if _wanted(child):
+            yield (path, child, depth, total)
+
+        child_mod = modules.get(child)
+        if child_mod is None or not child_mod.instances or child in on_stack:
+            continue
+        if max_depth is not None and depth >= max_depth:
+            continue
+        stack.append((path, child, total, _with_counts(child_mod, counts)))
+        on_stack.add(child)
+
+
+def _with_counts(mod, counts):
+    # type: (ModuleInfo, Dict[str, List[Optional[int]]]) -> Iterator[Tuple[InstanceInfo, Optional[int]]]
+    """``(instance, multiplicity)`` pairs of *mod*; 1 where *counts* has
+    no entry for it."""
+    mod_counts = counts.get(mod.name)
+    if mod_counts is None:
+        return ((inst, 1) for inst in mod.instances)
+    return zip(mod.instances, mod_counts)
+
+
 def find_unresolved(modules):
     # type: (Dict[str, ModuleInfo]) -> List[str]
     """Find module types that are instantiated but not defined."""
@@ -86,9 +176,16 @@ def topo_sort(modules, top):
     return order
 
 
-def generate_filelist(modules, top, base_dir="", rtl_dir=""):
-    # type: (Dict[str, ModuleInfo], str, str, str) -> Dict[str, Any]
-    """Generate ordered filelist for compilation."""
+def generate_filelist(modules, top, base_dir="", rtl_dir="", discovery=None,
+                      rtl_files=None):
+    # type: (Dict[str, ModuleInfo], str, str, str, Optional[Dict[str, Any]], Optional[List[str]]) -> Dict[str, Any]
+    """Generate ordered filelist for compilation.
+
+    Files under *rtl_dir* that are not needed by *top* are reported as
+    excluded.  *rtl_files* is the already-discovered inventory of that
+    directory (testbenches included); without it the directory is walked
+    again, with extra discover_rtl_files() options from *discovery*.
+    """
     sorted_names = topo_sort(modules, top)
     unresolved = find_unresolved(modules)
 
@@ -127,11 +224,11 @@ def generate_filelist(modules, top, base_dir="", rtl_dir=""):
         incdir_entries.append("+incdir+%s" % d)
 
     excluded = []  # type: List[str]
-    if rtl_dir:
-        all_files = set(
-            os.path.abspath(f)
-            for f in discover_rtl_files(rtl_dir, exclude_tb=False)
-        )
+    if rtl_files is None and rtl_dir:
+        rtl_files = discover_rtl_files(
+            rtl_dir, **dict(discovery or {}, exclude_tb=False))
+    if rtl_files:
+        all_files = set(os.path.abspath(f) for f in rtl_files)
         used_files = set(os.path.abspath(f) for f in seen_files)
         for ef in sorted(all_files - used_files):
             if base_dir:
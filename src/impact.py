@@ -0,0 +1,117 @@
+"""
+Reverse-dependency index and change-impact analysis.
+
+Provides:
+  - Reverse instantiation index (module → modules that instantiate it)
+  - File index (file → modules defined in it)
+  - Impact query: changed files → affected modules / tops / files
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .data_model import ModuleInfo
+from .hierarchy import find_top_modules
+
+
+def build_reverse_index(modules):
+    # type: (Dict[str, ModuleInfo]) -> Dict[str, Set[str]]
+    """Map each module type to the set of modules that instantiate it.
+
+    Unresolved module types are included as keys as well.
+    """
+    rindex = {}  # type: Dict[str, Set[str]]
+    for mod in modules.values():
+        for child in mod.instantiated_modules:
+            rindex.setdefault(child, set()).add(mod.name)
+    return rindex
+
+
+def build_file_index(modules):
+    # type: (Dict[str, ModuleInfo]) -> Dict[str, List[str]]
+    """Map each source file to the modules defined in it."""
+    findex = {}  # type: Dict[str, List[str]]
+    for mod in modules.values():
+        if mod.file_path:
+            findex.setdefault(os.path.abspath(mod.file_path), []).append(mod.name)
+    return findex
+
+
+def _includers(include_graph):
+    # type: (Dict[str, List[str]]) -> Dict[str, Set[str]]
+    """Invert {file: [included]} into {included: {files including it}}."""
+    inv = {}  # type: Dict[str, Set[str]]
+    for fp, incs in include_graph.items():
+        for inc in incs:
+            inv.setdefault(os.path.abspath(inc), set()).add(os.path.abspath(fp))
+    return inv
+
+
+def impact_analysis(modules, changed_files, include_graph=None, tops=None):
+    # type: (Dict[str, ModuleInfo], Iterable[str], Optional[Dict[str, List[str]]], Optional[List[str]]) -> Dict[str, Any]
+    """Compute what is affected by editing *changed_files*.
+
+    A changed file directly changes the modules it defines, and those of
+    every file that `include-s it (per *include_graph*, as recorded by
+    the preprocessor / scan cache).  Affected modules are everything
+    upward-reachable from those through the reverse instantiation index.
+
+    Args:
+        modules:       {name: ModuleInfo} of the scanned design
+        changed_files: edited file paths
+        include_graph: {file: [transitively included files]}
+        tops:          top modules to check (default: auto-detected tops)
+
+    Returns:
+        Dict with changed_modules, affected_modules, affected_tops,
+        affected_files and unknown_files (changed files not in the scan).
+    """
+    findex = build_file_index(modules)
+    rindex = build_reverse_index(modules)
+    includers = _includers(include_graph or {})
+
+    changed = []        # type: List[str]
+    unknown = []        # type: List[str]
+    touched = set()     # type: Set[str]
+    for cf in changed_files:
+        cf = os.path.abspath(cf)
+        changed.append(cf)
+        hit = False
+        if cf in findex:
+            touched.add(cf)
+            hit = True
+        for fp in includers.get(cf, ()):
+            touched.add(fp)
+            hit = True
+        if not hit:
+            unknown.append(cf)
+
+    changed_modules = set()  # type: Set[str]
+    for fp in touched:
+        changed_modules.update(findex.get(fp, []))
+
+    # Upward reachability through the reverse index
+    affected = set(changed_modules)  # type: Set[str]
+    todo = list(changed_modules)
+    while todo:
+        for parent in rindex.get(todo.pop(), ()):
+            if parent not in affected:
+                affected.add(parent)
+                todo.append(parent)
+
+    if tops is None:
+        tops = find_top_modules(modules)
+    affected_tops = sorted(t for t in tops if t in affected)
+
+    affected_files = sorted(set(
+        os.path.abspath(modules[m].file_path)
+        for m in affected if modules[m].file_path))
+
+    return {
+        "changed_files": changed,
+        "changed_modules": sorted(changed_modules),
+        "affected_modules": sorted(affected),
+        "affected_tops": affected_tops,
+        "affected_files": affected_files,
+        "unknown_files": unknown,
+    }
@@ -0,0 +1,519 @@
+"""
+Language Server Protocol front-end (stdio).
+
+Features:
+  - go to definition of module names
+  - hover on a module name: its port table (as printed by -m io)
+  - completion of module names with the instantiation template (as
+    printed by -m inst)
+
+The workspace is scanned once into a ScanSession at ``initialize``; saved
+files are picked up by the session's stat-based refresh.  Open buffers
+overlay the workspace: each is split into module/endmodule regions with
+the lexical scan of module_index, and an edit re-parses only the regions
+whose text changed.  Regions that merely moved get their line numbers
+shifted.  If a directive outside every region changed (a `define, for
+instance), all regions of the buffer are re-parsed.
+
+Lookups see the open buffers' modules over the workspace modules; the
+workspace part is only rebuilt when the session refreshes or a buffer
+is opened or closed.  Completion items are built once per module
+object, so a keystroke only costs the items of regions it re-parsed.
+
+Positions are taken as code points, which matches UTF-16 for the ASCII
+sources Verilog almost always is.
+
+Provides:
+  - LspServer      message handler holding the workspace state
+  - serve_stdio()  run the server on stdin / stdout
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+import sys
+from collections import ChainMap
+from typing import Any, BinaryIO, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+from .data_model import ModuleInfo
+from .formatter import format_inst, format_io, set_color
+from .module_index import module_regions
+from .preprocessor import Preprocessor
+from .session import ScanSession
+from .verilog_parser import VerilogFileParser
+from .version import __version__
+
+logger = logging.getLogger(__name__)
+
+
+_RE_WORD = re.compile(r"[A-Za-z_][\w$]*")
+
+# Characters whose insertion or removal can change the lexical structure
+# around a region (comments, strings, directives)
+_LEXICAL_CHARS = "/*\"`"
+
+# LSP constants
+_SYNC_INCREMENTAL = 2
+_COMPLETION_MODULE = 9
+_METHOD_NOT_FOUND = -32601
+_INTERNAL_ERROR = -32603
+
+
+def path_to_uri(path):
+    # type: (str) -> str
+    return "file://" + quote(os.path.abspath(path))
+
+
+def uri_to_path(uri):
+    # type: (str) -> str
+    return os.path.abspath(unquote(urlparse(uri).path))
+
+
+def _offset(text, line, character):
+    # type: (str, int, int) -> int
+    """Offset of an LSP position in *text*."""
+    pos = 0
+    for _ in range(line):
+        nl = text.find("\n", pos)
+        if nl < 0:
+            return len(text)
+        pos = nl + 1
+    end = text.find("\n", pos)
+    if end < 0:
+        end = len(text)
+    return min(pos + character, end)
+
+
+# ---------------------------------------------------------------------------
+# Open documents
+# ---------------------------------------------------------------------------
+
+class _Region:
+    """One parsed module/endmodule span of a buffer."""
+
+    __slots__ = ("text", "line", "modules")
+
+    def __init__(self, text, line, modules):
+        # type: (str, int, List[ModuleInfo]) -> None
+        self.text = text
+        self.line = line          # 0-based line of the region start
+        self.modules = modules
+
+
+class Document:
+    """
+    An open buffer split into module regions.
+
+    update() re-parses only regions whose text changed; ``reparsed``
+    counts the regions parsed by the last update.  An edit strictly
+    inside one region that cannot open or close a comment, string or
+    directive only rescans that region's boundaries; anything else
+    rescans the whole buffer.
+    """
+
+    def __init__(self, uri, text, parser):
+        # type: (str, str, VerilogFileParser) -> None
+        self.uri = uri
+        self.path = uri_to_path(uri)
+        self.text = text
+        self.parser = parser
+        self.regions = {}  # type: Dict[str, _Region]
+        # [(name, start, end)] in text order; None: rescan on next update
+        self._spans = None  # type: Optional[List[Tuple[str, int, int]]]
+        self._outside = None  # type: Optional[str]
+        self.reparsed = 0
+        self.update()
+
+    @property
+    def modules(self):
+        # type: () -> List[ModuleInfo]
+        return [m for r in self.regions.values() for m in r.modules]
+
+    def apply_change(self, change):
+        # type: (Dict[str, Any]) -> None
+        """Apply one TextDocumentContentChangeEvent (without re-parsing)."""
+        rng = change.get("range")
+        new = change["text"]
+        if rng is None:
+            self.text = new
+            self._spans = None
+            return
+        start = _offset(self.text, rng["start"]["line"], rng["start"]["character"])
+        end = _offset(self.text, rng["end"]["line"], rng["end"]["character"])
+        removed = self.text[start:end]
+        self.text = self.text[:start] + new + self.text[end:]
+        if self._spans is not None and not self._local_edit(
+                start, end, len(new) - len(removed), removed + new):
+            self._spans = None
+
+    def _local_edit(self, start, end, delta, edited):
+        # type: (int, int, int, str) -> bool
+        """Update the spans for an edit inside one region, if safe."""
+        if any(c in edited for c in _LEXICAL_CHARS):
+            return False
+        for i, (name, s, e) in enumerate(self._spans):
+            if s < start and end < e:
+                break
+        else:
+            return False
+        body = self.text[s:e + delta]
+        found = list(module_regions(body).items())
+        if len(found) != 1 or found[0][1] != (0, len(body)):
+            return False
+        self._spans[i] = (found[0][0], s, e + delta)
+        for j in range(i + 1, len(self._spans)):
+            n, s2, e2 = self._spans[j]
+            self._spans[j] = (n, s2 + delta, e2 + delta)
+        return True
+
+    def update(self, text=None):
+        # type: (Optional[str]) -> None
+        """Re-split the buffer and re-parse changed regions."""
+        if text is not None:
+            self.text = text
+            self._spans = None
+        text = self.text
+        old = self.regions
+        if self._spans is None:
+            spans = sorted(module_regions(text).items(), key=lambda kv: kv[1][0])
+            self._spans = [(name, s, e) for name, (s, e) in spans]
+            outside, pos = [], 0
+            for _, start, end in self._spans:
+                outside.append(text[pos:start])
+                pos = end
+            outside.append(text[pos:])
+            # Only directive lines outside the regions can affect them
+            directives = "\n".join(ln for ln in "\n".join(outside).split("\n")
+                                   if "`" in ln)
+            if directives != self._outside:
+                # Macros may have changed: replay them, re-parse everything
+                self._outside = directives
+                try:
+                    self.parser.preprocessor.process_text(directives, self.path)
+                except Exception as e:
+                    logger.debug("Preprocess of %s failed: %s", self.path, e)
+                old = {}
+
+        self.reparsed = 0
+        regions = {}  # type: Dict[str, _Region]
+        line = pos = 0
+        for name, start, end in self._spans:
+            line += text.count("\n", pos, start)
+            pos = start
+            region = old.get(name)
+            if region is not None and len(region.text) == end - start \
+                    and text.startswith(region.text, start):
+                if region.line != line:
+                    for mod in region.modules:
+                        mod.line_number += line - region.line
+                    region.line = line
+            else:
+                body = text[start:end]
+                region = _Region(body, line, self._parse(body, line))
+                self.reparsed += 1
+            regions[name] = region
+        self.regions = regions
+
+    def _parse(self, body, line):
+        # type: (str, int) -> List[ModuleInfo]
+        mods = self.parser.parse_text(body, self.path)
+        for mod in mods:
+            mod.line_number += line
+        return mods
+
+    def word_at(self, line, character):
+        # type: (int, int) -> str
+        """Identifier under an LSP position ("" if none)."""
+        start = _offset(self.text, line, 0)
+        end = self.text.find("\n", start)
+        text = self.text[start:end if end >= 0 else len(self.text)]
+        for m in _RE_WORD.finditer(text):
+            if m.start() <= character <= m.end():
+                return m.group(0)
+        return ""
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class LspServer:
+    """
+    LSP message handler.
+
+    handle() takes one decoded JSON-RPC message and returns the response
+    to send (None for notifications); serve_stdio() adds the transport.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.session = None  # type: Optional[ScanSession]
+        self.docs = {}  # type: Dict[str, Document]
+        self.running = True
+        self._shutdown = False
+        # Workspace modules not in open buffers, for _base_key
+        # (session generation, open paths), and their completion items
+        self._base = {}  # type: Dict[str, ModuleInfo]
+        self._base_key = None  # type: Optional[Tuple[int, FrozenSet[str]]]
+        self._base_items = None  # type: Optional[List[Tuple[str, Dict[str, Any]]]]
+        # Modules of the open buffers, and completion items by module id
+        self._overlay = None  # type: Optional[Dict[str, ModuleInfo]]
+        self._items = {}  # type: Dict[int, Tuple[ModuleInfo, Dict[str, Any]]]
+        self._include_dirs = []  # type: List[str]
+        self._language = "auto"
+        # Output goes to an editor, never to a terminal
+        set_color(False)
+
+    # ---- dispatch ----
+
+    def handle(self, msg):
+        # type: (Dict[str, Any]) -> Optional[Dict[str, Any]]
+        method = msg.get("method", "")
+        req_id = msg.get("id")
+        handler = getattr(self, "on_" + method.replace("/", "_").replace("$", "_"),
+                          None)
+        if handler is None:
+            if req_id is None:
+                return None
+            return {"jsonrpc": "2.0", "id": req_id, "error": {
+                "code": _METHOD_NOT_FOUND, "message": "Unknown method: %s" % method}}
+        try:
+            result = handler(msg.get("params") or {})
+        except Exception as e:
+            logger.exception("%s failed", method)
+            if req_id is None:
+                return None
+            return {"jsonrpc": "2.0", "id": req_id, "error": {
+                "code": _INTERNAL_ERROR, "message": str(e)}}
+        if req_id is None:
+            return None
+        return {"jsonrpc": "2.0", "id": req_id, "result": result}
+
+    # ---- lifecycle ----
+
+    def on_initialize(self, params):
+        # type: (Dict[str, Any]) -> Dict[str, Any]
+        root = params.get("rootUri")
+        root = uri_to_path(root) if root else params.get("rootPath") or ""
+        opts = params.get("initializationOptions") or {}
+        self._include_dirs = list(opts.get("include_dirs") or [])
+        self._language = opts.get("language") or "auto"
+        if root and os.path.isdir(root):
+            self.session = ScanSession(
+                directory=root,
+                defines=opts.get("defines"),
+                include_dirs=self._include_dirs,
+                exclude=opts.get("exclude"),
+                language=opts.get("language") or "auto",
+            )
+            if self.session.error:
+                logger.warning("Workspace scan: %s", self.session.error)
+            else:
+                logger.info("Workspace %s: %d module(s)", root,
+                            len(self.session.modules))
+        return {
+            "capabilities": {
+                "textDocumentSync": {"openClose": True,
+                                     "change": _SYNC_INCREMENTAL,
+                                     "save": True},
+                "definitionProvider": True,
+                "hoverProvider": True,
+                "completionProvider": {"resolveProvider": False},
+            },
+            "serverInfo": {"name": "rtl_scan", "version": __version__},
+        }
+
+    def on_initialized(self, params):
+        # type: (Dict[str, Any]) -> None
+        pass
+
+    def on_shutdown(self, params):
+        # type: (Dict[str, Any]) -> None
+        self._shutdown = True
+
+    def on_exit(self, params):
+        # type: (Dict[str, Any]) -> None
+        self.running = False
+
+    # ---- documents ----
+
+    def _parser(self):
+        # type: () -> VerilogFileParser
+        pp = Preprocessor()
+        if self.session is not None and self.session.preprocessor is not None:
+            pp.add_defines(self.session.preprocessor.macros)
+        pp.add_include_dirs(self._include_dirs)
+        return VerilogFileParser(preprocessor=pp, language=self._language)
+
+    def on_textDocument_didOpen(self, params):
+        # type: (Dict[str, Any]) -> None
+        td = params["textDocument"]
+        self.docs[td["uri"]] = Document(td["uri"], td["text"], self._parser())
+        self._overlay = None
+
+    def on_textDocument_didChange(self, params):
+        # type: (Dict[str, Any]) -> None
+        doc = self.docs.get(params["textDocument"]["uri"])
+        if doc is None:
+            return
+        for change in params["contentChanges"]:
+            doc.apply_change(change)
+        doc.update()
+        self._overlay = None
+
+    def on_textDocument_didClose(self, params):
+        # type: (Dict[str, Any]) -> None
+        self.docs.pop(params["textDocument"]["uri"], None)
+        self._overlay = None
+
+    def on_textDocument_didSave(self, params):
+        # type: (Dict[str, Any]) -> None
+        if self.session is not None:
+            self.session.refresh()
+
+    def on_workspace_didChangeWatchedFiles(self, params):
+        # type: (Dict[str, Any]) -> None
+        if self.session is not None:
+            self.session.refresh(rediscover=True)
+
+    # ---- index ----
+
+    def _workspace(self):
+        # type: () -> Dict[str, ModuleInfo]
+        """Workspace modules outside the open buffers."""
+        open_paths = frozenset(d.path for d in self.docs.values())
+        key = (self.session.generation if self.session else 0, open_paths)
+        if key != self._base_key:
+            base = {}  # type: Dict[str, ModuleInfo]
+            if self.session is not None:
+                for name, mod in self.session.modules.items():
+                    if os.path.abspath(mod.file_path) not in open_paths:
+                        base[name] = mod
+            self._base, self._base_key = base, key
+            self._base_items = None
+        return self._base
+
+    def modules(self):
+        # type: () -> ChainMap
+        """Workspace modules with open buffers overlaid (read-only)."""
+        if self._overlay is None:
+            overlay = {}  # type: Dict[str, ModuleInfo]
+            for doc in self.docs.values():
+                for mod in doc.modules:
+                    overlay[mod.name] = mod
+            self._overlay = overlay
+        return ChainMap(self._overlay, self._workspace())
+
+    def _lookup(self, params):
+        # type: (Dict[str, Any]) -> Tuple[Optional[ModuleInfo], str]
+        doc = self.docs.get(params["textDocument"]["uri"])
+        if doc is None:
+            return None, ""
+        pos = params["position"]
+        word = doc.word_at(pos["line"], pos["character"])
+        return self.modules().get(word), word
+
+    # ---- features ----
+
+    def on_textDocument_definition(self, params):
+        # type: (Dict[str, Any]) -> Optional[Dict[str, Any]]
+        mod, _ = self._lookup(params)
+        if mod is None or not mod.file_path:
+            return None
+        line = max(mod.line_number - 1, 0)
+        return {"uri": path_to_uri(mod.file_path),
+                "range": {"start": {"line": line, "character": 0},
+                          "end": {"line": line, "character": 0}}}
+
+    def on_textDocument_hover(self, params):
+        # type: (Dict[str, Any]) -> Optional[Dict[str, Any]]
+        mod, _ = self._lookup(params)
+        if mod is None:
+            return None
+        text = format_io({"_module_info": mod})
+        return {"contents": {"kind": "markdown",
+                             "value": "```\n%s\n```" % text}}
+
+    def on_textDocument_completion(self, params):
+        # type: (Dict[str, Any]) -> List[Dict[str, Any]]
+        overlay = self.modules().maps[0]
+        if self._base_items is None:
+            self._base_items = [(name, _completion_item(mod))
+                                for name, mod in sorted(self._base.items())]
+        items = {}  # type: Dict[int, Tuple[ModuleInfo, Dict[str, Any]]]
+        for mod in overlay.values():
+            hit = self._items.get(id(mod))
+            items[id(mod)] = hit if hit is not None and hit[0] is mod \
+                else (mod, _completion_item(mod))
+        self._items = items
+        merged = heapq.merge(
+            [(n, item) for n, item in self._base_items if n not in overlay],
+            sorted((n, items[id(mod)][1]) for n, mod in overlay.items()),
+            key=lambda pair: pair[0])
+        return [item for _, item in merged]
+
+
+def _completion_item(mod):
+    # type: (ModuleInfo) -> Dict[str, Any]
+    template = format_inst({"_module_info": mod})
+    # Insert the instance itself; wire declarations go in the docs
+    instance = template.split("\n\n")[-1] if mod.ports else mod.name
+    return {
+        "label": mod.name,
+        "kind": _COMPLETION_MODULE,
+        "detail": "%d port(s) — %s" % (
+            len(mod.ports), os.path.basename(mod.file_path)),
+        "documentation": {"kind": "markdown",
+                          "value": "```verilog\n%s\n```" % template},
+        "insertText": instance,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Transport
+# ---------------------------------------------------------------------------
+
+def read_message(rfile):
+    # type: (BinaryIO) -> Optional[Dict[str, Any]]
+    """Read one Content-Length framed message; None at end of input."""
+    length = None
+    while True:
+        line = rfile.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        key, _, value = line.decode("ascii").partition(":")
+        if key.lower() == "content-length":
+            length = int(value)
+    if length is None:
+        return None
+    return json.loads(rfile.read(length).decode("utf-8"))
+
+
+def write_message(wfile, msg):
+    # type: (BinaryIO, Dict[str, Any]) -> None
+    body = json.dumps(msg, ensure_ascii=False).encode("utf-8")
+    wfile.write(b"Content-Length: %d\r\n\r\n" % len(body))
+    wfile.write(body)
+    wfile.flush()
+
+
+def serve_stdio(rfile=None, wfile=None):
+    # type: (Optional[BinaryIO], Optional[BinaryIO]) -> int
+    """Serve LSP on stdin / stdout until ``exit``."""
+    rfile = rfile or sys.stdin.buffer
+    wfile = wfile or sys.stdout.buffer
+    server = LspServer()
+    while server.running:
+        msg = read_message(rfile)
+        if msg is None:
+            break
+        response = server.handle(msg)
+        if response is not None:
+            write_message(wfile, response)
+    return 0 if server._shutdown else 1
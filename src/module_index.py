@@ -0,0 +1,296 @@
+"""
+Module-name pre-index and demand-driven parsing.
+
+The pre-index maps module names to the files that define them using a
+lexical scan (comments and strings skipped, no preprocessing, no ANTLR).
+It is a superset of the real definitions — both branches of an `ifdef
+are indexed — so a candidate file is confirmed by parsing it.  Files
+whose module names come from macros cannot be indexed and are kept as
+"opaque" fallbacks.  Entries carry the file's stat signature, so the
+index can be saved and reused across runs, rescanning only files that
+changed.
+
+With a known top, parse_from_top() parses only the files reachable from
+it, following instances as they are discovered; a single-module lookup
+stops as soon as the defining file is parsed.
+
+Provides:
+  - module_regions()   {module: (start, end)} spans of a source text
+  - scan_source()      lexical summary of one source text
+  - ModuleIndex        persistent {module: [files]} index
+  - parse_from_top()   demand-driven parse of the files a top needs
+"""
+
+import json
+import logging
+import os
+import re
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .data_model import ModuleInfo
+from .scan_cache import _stat_sig
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_VERSION = 2
+
+
+# ---------------------------------------------------------------------------
+# Lexical scan
+# ---------------------------------------------------------------------------
+
+_RE_REGION = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"'
+    r"|\b(?P<end>endmodule|endinterface|endprogram)\b"
+    r"|\bvirtual\s+interface\b"
+    r"|\b(?:(?:macro)?module|(?P<sv>interface|program))"
+    r"\s+(?:(?:static|automatic)\s+)?"
+    r"(?:(?P<name>[A-Za-z_]\w*)|(?P<macro>`))"
+    r"|^[ \t]*(?P<define>`define)\b",
+    re.S | re.M)
+
+
+# What may follow a SystemVerilog interface / program name in its header;
+# anything else (``interface class``, an ``interface`` port) is not a unit
+_RE_SV_HEADER = re.compile(r"\s*(?:[#(;]|import\b)")
+
+
+def _unit_name(m):
+    # type: (Any) -> str
+    """Design-unit name of a _RE_REGION match, or ""."""
+    name = m.group("name")
+    if name and m.group("sv") and (
+            name == "class"
+            or not _RE_SV_HEADER.match(m.string, m.end())):
+        return ""
+    return name or ""
+
+
+def module_regions(text):
+    # type: (str) -> Dict[str, Tuple[int, int]]
+    """Map module (and SystemVerilog interface / program) names to
+    ``(start, end)`` offsets of their source span.
+
+    A lexical scan (comments and strings skipped) — no parsing.  A later
+    definition of the same name wins, as in a full parse.
+    """
+    regions = {}  # type: Dict[str, Tuple[int, int]]
+    start, name = -1, ""
+    for m in _RE_REGION.finditer(text):
+        if m.group("end"):
+            if start >= 0:
+                regions[name] = (start, m.end())
+            start = -1
+        elif _unit_name(m):
+            start, name = m.start(), m.group("name")
+    return regions
+
+
+def scan_source(text):
+    # type: (str) -> Dict[str, Any]
+    """Lexical summary of a source text.
+
+    Returns:
+        {"modules": [names in order], "opaque": True if a module name is
+        a macro, "defines": True if the file has `define directives}
+    """
+    names = []  # type: List[str]
+    opaque = defines = False
+    for m in _RE_REGION.finditer(text):
+        if _unit_name(m):
+            names.append(m.group("name"))
+        elif m.group("macro"):
+            opaque = True
+        elif m.group("define"):
+            defines = True
+    return {"modules": names, "opaque": opaque, "defines": defines}
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+class ModuleIndex:
+    """
+    {module name: [defining files]} over an ordered file set.
+
+    Usage::
+
+        index = ModuleIndex.load("scan.index.json")
+        index.update(files)
+        files_for_top = index.files_defining("chip_top")
+        index.save("scan.index.json")
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.files = OrderedDict()  # type: Dict[str, Dict[str, Any]]
+        self._by_name = None  # type: Optional[Dict[str, List[str]]]
+        self.rescanned = 0
+
+    # ---- persistence ----
+
+    @classmethod
+    def load(cls, path):
+        # type: (str) -> ModuleIndex
+        """Load an index file; an empty index if missing or unreadable."""
+        index = cls()
+        if not path or not os.path.isfile(path):
+            return index
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning("Ignoring unreadable module index %s: %s", path, e)
+            return index
+        if data.get("index_version") != INDEX_VERSION:
+            logger.info("Module index %s has an old format, ignoring", path)
+            return index
+        index.files.update(data.get("files", {}))
+        return index
+
+    def save(self, path):
+        # type: (str) -> None
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"index_version": INDEX_VERSION, "files": self.files},
+                      f, ensure_ascii=False)
+        os.replace(tmp, path)
+        logger.info("Module index written: %s (%d file(s))", path, len(self.files))
+
+    # ---- building ----
+
+    def update(self, filepaths):
+        # type: (List[str]) -> None
+        """Index *filepaths* (in this order), rescanning changed files and
+        dropping files no longer in the set."""
+        old = self.files
+        self.files = OrderedDict()
+        for fp in filepaths:
+            fp = os.path.abspath(fp)
+            sig = _stat_sig(fp)
+            entry = old.get(fp)
+            if entry is None or entry.get("stat") != sig:
+                entry = self._scan(fp, sig)
+                self.rescanned += 1
+            self.files[fp] = entry
+        self._by_name = None
+        logger.info("Module index: %d file(s), %d rescanned",
+                    len(self.files), self.rescanned)
+
+    @staticmethod
+    def _scan(fp, sig):
+        # type: (str, Optional[List[int]]) -> Dict[str, Any]
+        try:
+            with open(fp, "r", errors="replace") as f:
+                entry = scan_source(f.read())
+        except (IOError, OSError) as e:
+            logger.warning("Cannot index %s: %s", fp, e)
+            entry = {"modules": [], "opaque": False, "defines": False}
+        entry["stat"] = sig
+        return entry
+
+    # ---- queries ----
+
+    def files_defining(self, name):
+        # type: (str) -> List[str]
+        """Files whose text declares module *name*, in file order."""
+        if self._by_name is None:
+            by_name = {}  # type: Dict[str, List[str]]
+            for fp, entry in self.files.items():
+                for mod in entry["modules"]:
+                    lst = by_name.setdefault(mod, [])
+                    if not lst or lst[-1] != fp:
+                        lst.append(fp)
+            self._by_name = by_name
+        return self._by_name.get(name, [])
+
+    def opaque_files(self):
+        # type: () -> List[str]
+        """Files with macro-named modules, which the index cannot see."""
+        return [fp for fp, e in self.files.items() if e.get("opaque")]
+
+    def define_files(self):
+        # type: () -> List[str]
+        """Files containing `define directives."""
+        return [fp for fp, e in self.files.items() if e.get("defines")]
+
+
+# ---------------------------------------------------------------------------
+# Demand-driven parsing
+# ---------------------------------------------------------------------------
+
+def parse_from_top(parse_file, preprocessor, index, top, single=False):
+    # type: (Callable[[str], List[ModuleInfo]], Any, ModuleIndex, str, bool) -> Dict[str, ModuleInfo]
+    """Parse only the files needed to elaborate *top*.
+
+    Starting at *top*, each needed module name is looked up in *index*
+    and its defining file parsed; the instances found there queue further
+    names.  If a name is declared in several files the last one is
+    parsed first, matching last-definition-wins of a full scan.
+
+    Before a file is parsed, every earlier file that has `define
+    directives is run through *preprocessor*, so macro state matches a
+    full in-order scan as far as it can.
+
+    Args:
+        parse_file:   callable parsing one file into ModuleInfo objects
+        preprocessor: the Preprocessor *parse_file* uses
+        index:        module index over the scan's file set
+        top:          module to start from
+        single:       stop once *top* itself is parsed (inst / io)
+
+    Returns:
+        {name: ModuleInfo} of every module in the parsed files.
+    """
+    order = {fp: i for i, fp in enumerate(index.files)}
+    define_files = index.define_files()
+    opaque = deque(index.opaque_files())  # type: Deque[str]
+    parsed = set()  # type: Set[str]
+    primed = set()  # type: Set[str]   define files already preprocessed
+    modules = {}  # type: Dict[str, ModuleInfo]
+
+    def _parse(fp):
+        # type: (str) -> None
+        pos = order[fp]
+        for df in define_files:
+            if order[df] >= pos:
+                break
+            if df not in primed and df not in parsed:
+                primed.add(df)
+                try:
+                    preprocessor.process_file(df)
+                except Exception as e:
+                    logger.debug("Preprocess of %s for defines failed: %s", df, e)
+        parsed.add(fp)
+        for mod in parse_file(fp):
+            modules[mod.name] = mod
+
+    queue = deque([top])  # type: Deque[str]
+    requested = {top}  # type: Set[str]
+    while queue:
+        name = queue.popleft()
+        for fp in reversed(index.files_defining(name)):
+            if name in modules:
+                break
+            if fp not in parsed:
+                _parse(fp)
+        while name not in modules and opaque:
+            fp = opaque.popleft()
+            if fp not in parsed:
+                _parse(fp)
+        mod = modules.get(name)
+        if mod is None:
+            continue
+        if single and name == top:
+            break
+        for child in sorted(mod.instantiated_modules):
+            if child not in requested:
+                requested.add(child)
+                queue.append(child)
+
+    logger.info("Demand-driven parse from %s: %d of %d file(s)",
+                top, len(parsed), len(index.files))
+    return modules
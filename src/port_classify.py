@@ -3,10 +3,43 @@ Port classification by naming convention.
 
 Provides enums and regex-based classification for clock, reset, DFT,
 interrupt, and data ports.
+
+The rules are an ordered list of (category, pattern); a name gets the
+category of the first rule whose pattern it contains.  A PortRules set
+compiles them into one matcher and memoizes results by name, so a
+design's millions of ports cost one regex call per distinct name.
+Projects with other naming conventions load their own rules from a JSON
+file (--port-rules, or $RTL_SCAN_PORT_RULES)::
+
+    {
+      "rules": [
+        {"category": "clock", "pattern": "^ck_|_ck$"},
+        {"category": "data",  "pattern": "^clk_en$"}
+      ],
+      "defaults": true,
+      "active_low": "(_n|_b|resetn|rstn)$",
+      "ignore_case": true
+    }
+
+Project rules are checked before the built-in ones ("defaults": false
+drops those); a "data" rule exempts names the later rules would match.
+
+Provides:
+  - PortDirection, PortCategory
+  - PortRules, PortRulesError, DEFAULT_RULES
+  - load_port_rules(), set_port_rules(), port_rules()
+  - classify_port(), classify_ports(), detect_reset_active_low()
 """
 
+import hashlib
+import json
+import logging
+import os
 import re
 from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 class PortDirection(Enum):
@@ -24,41 +57,200 @@ class PortCategory(Enum):
     DATA = "data"
 
 
+class PortRulesError(ValueError):
+    """Invalid port classification rules or rules file."""
+
+
 # ---------------------------------------------------------------------------
-# Classification regex patterns
+# Built-in rules, in priority order
 # ---------------------------------------------------------------------------
 
-_CLK_RE = re.compile(
-    r'(^|_)(clk|clock|pclk|hclk|aclk|fclk|tck|sclk|mclk|gclk|rclk)($|_|\d)',
-    re.IGNORECASE,
-)
-_RST_RE = re.compile(
-    r'(^|_)(rst|reset|presetn|hresetn|aresetn)($|_|n\b)',
-    re.IGNORECASE,
-)
-_DFT_RE = re.compile(
-    r'(^|_)(scan|dft|jtag|tms|tdi|tdo|trst|bist|mbist)($|_)',
-    re.IGNORECASE,
-)
-_IRQ_RE = re.compile(
-    r'(^|_)(intr|irq|interrupt)($|_)|int_req',
-    re.IGNORECASE,
+_DEFAULT_PATTERNS = (
+    (PortCategory.CLOCK,
+     r'(^|_)(clk|clock|pclk|hclk|aclk|fclk|tck|sclk|mclk|gclk|rclk)($|_|\d)'),
+    (PortCategory.RESET,
+     r'(^|_)(rst|reset|presetn|hresetn|aresetn)($|_|n\b)'),
+    (PortCategory.DFT,
+     r'(^|_)(scan|dft|jtag|tms|tdi|tdo|trst|bist|mbist)($|_)'),
+    (PortCategory.INTERRUPT,
+     r'(^|_)(intr|irq|interrupt)($|_)|int_req'),
 )
 
+_DEFAULT_ACTIVE_LOW = r'(_n|resetn|rstn)$'
+
+# Memoized names per rule set before the memo is started afresh
+_MEMO_LIMIT = 1 << 18
+
+
+class PortRules:
+    """
+    An ordered classification rule set compiled into one matcher.
+
+    Args:
+        rules:       (category, pattern) pairs, highest priority first;
+                     categories may be PortCategory or their values
+        active_low:  pattern of active-low reset names
+        ignore_case: match patterns case-insensitively
+
+    *signature* is a digest of the patterns and options, equal for rule
+    sets that classify alike.
+
+    Raises:
+        PortRulesError: unknown category or invalid pattern
+    """
+
+    def __init__(self, rules, active_low=_DEFAULT_ACTIVE_LOW,
+                 ignore_case=True):
+        # type: (Iterable[Tuple[Any, str]], str, bool) -> None
+        flags = re.IGNORECASE if ignore_case else 0
+        self.rules = []  # type: List[Tuple[PortCategory, str]]
+        # The first alternative whose pattern occurs anywhere in the name
+        # matches; the empty group closing it tells which one
+        alternatives = []  # type: List[str]
+        self._groups = {}  # type: Dict[int, PortCategory]
+        group = 0
+        for category, pattern in rules:
+            try:
+                category = PortCategory(category)
+            except ValueError:
+                raise PortRulesError("Unknown port category %r" % (category,))
+            try:
+                group += re.compile(pattern, flags).groups + 1
+            except re.error as e:
+                raise PortRulesError("Bad pattern %r: %s" % (pattern, e))
+            self.rules.append((category, pattern))
+            alternatives.append("(?=.*?(?:%s))()" % pattern)
+            self._groups[group] = category
+        try:
+            self._matcher = re.compile("|".join(alternatives) or "(?!)", flags)
+            self._active_low = re.compile(active_low, flags)
+        except re.error as e:
+            raise PortRulesError("Bad port rules: %s" % e)
+        self.active_low = active_low
+        self.ignore_case = ignore_case
+        self.signature = hashlib.sha1(json.dumps(
+            [[(c.value, p) for c, p in self.rules], active_low, ignore_case]
+        ).encode("utf-8")).hexdigest()
+        self._memo = {}  # type: Dict[str, PortCategory]
+
+    def __repr__(self):
+        # type: () -> str
+        return "PortRules(%d rules)" % len(self.rules)
+
+    def classify(self, name):
+        # type: (str) -> PortCategory
+        """Category of port *name*."""
+        category = self._memo.get(name)
+        if category is None:
+            m = self._matcher.match(name)
+            category = PortCategory.DATA if m is None \
+                else self._groups[m.lastindex]
+            if len(self._memo) >= _MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[name] = category
+        return category
+
+    def classify_ports(self, names):
+        # type: (Iterable[str]) -> List[PortCategory]
+        """Categories of *names*, in order; each distinct name is
+        matched once."""
+        memo = self._memo
+        classify = self.classify
+        out = []  # type: List[PortCategory]
+        append = out.append
+        for name in names:
+            category = memo.get(name)
+            append(category if category is not None else classify(name))
+        return out
+
+    def is_active_low(self, name):
+        # type: (str) -> bool
+        return self._active_low.search(name) is not None
+
+
+DEFAULT_RULES = PortRules(_DEFAULT_PATTERNS)
+
+
+def load_port_rules(path):
+    # type: (str) -> PortRules
+    """Read a JSON rules file (format in the module docstring).
+
+    Raises:
+        PortRulesError: unreadable file or invalid rules
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (IOError, OSError, ValueError) as e:
+        raise PortRulesError("Cannot read port rules %s: %s" % (path, e))
+    if not isinstance(config, dict):
+        raise PortRulesError("Port rules %s: expected a JSON object" % path)
+    rules = []  # type: List[Tuple[Any, str]]
+    for rule in config.get("rules", []):
+        if not isinstance(rule, dict) or "category" not in rule \
+                or "pattern" not in rule:
+            raise PortRulesError("Port rules %s: each rule needs "
+                                 "\"category\" and \"pattern\"" % path)
+        rules.append((rule["category"], rule["pattern"]))
+    if config.get("defaults", True):
+        rules.extend(_DEFAULT_PATTERNS)
+    try:
+        return PortRules(rules,
+                         active_low=config.get("active_low",
+                                               _DEFAULT_ACTIVE_LOW),
+                         ignore_case=config.get("ignore_case", True))
+    except PortRulesError as e:
+        raise PortRulesError("Port rules %s: %s" % (path, e))
+
+
+# ---------------------------------------------------------------------------
+# Active rule set
+# ---------------------------------------------------------------------------
+
+_active = None  # type: Optional[PortRules]
+_env_rules = ("", DEFAULT_RULES)  # type: Tuple[str, PortRules]
+
+
+def set_port_rules(rules):
+    # type: (Optional[PortRules]) -> None
+    """Use *rules* for classify_port() and friends; None restores the
+    default (built-in rules, or $RTL_SCAN_PORT_RULES if set)."""
+    global _active
+    _active = rules
+
+
+def port_rules():
+    # type: () -> PortRules
+    """The rule set in use."""
+    global _env_rules
+    if _active is not None:
+        return _active
+    path = os.environ.get("RTL_SCAN_PORT_RULES", "")
+    if not path:
+        return DEFAULT_RULES
+    if _env_rules[0] != path:
+        try:
+            rules = load_port_rules(path)
+        except PortRulesError as e:
+            logger.warning("%s; using the built-in rules", e)
+            rules = DEFAULT_RULES
+        _env_rules = (path, rules)
+    return _env_rules[1]
+
 
 def classify_port(name):
+    # type: (str) -> PortCategory
     """Classify a port by naming convention."""
-    if _CLK_RE.search(name):
-        return PortCategory.CLOCK
-    if _RST_RE.search(name):
-        return PortCategory.RESET
-    if _DFT_RE.search(name):
-        return PortCategory.DFT
-    if _IRQ_RE.search(name):
-        return PortCategory.INTERRUPT
-    return PortCategory.DATA
+    return port_rules().classify(name)
+
+
+def classify_ports(names):
+    # type: (Iterable[str]) -> List[PortCategory]
+    """Classify many port names in one call (see PortRules)."""
+    return port_rules().classify_ports(names)
 
 
 def detect_reset_active_low(name):
+    # type: (str) -> bool
     """True if the reset signal is active-low (ends with _n / n)."""
-    return bool(re.search(r'(_n|resetn|rstn)$', name, re.IGNORECASE))
+    return port_rules().is_active_low(name)
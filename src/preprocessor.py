@@ -44,6 +44,7 @@ class Preprocessor:
         self._macros: Dict[str, str] = {}
         self._include_dirs: List[str] = []
         self._included_files: Set[str] = set()  # guard against circular include
+        self._include_graph: Dict[str, Set[str]] = {}  # file → direct includes
         self._max_include_depth = 64
 
     # ---- public configuration ----
@@ -56,6 +57,11 @@ class Preprocessor:
         """Add multiple macro definitions."""
         self._macros.update(defines)
 
+    def remove_defines(self, names: List[str]):
+        """Remove macro definitions (like `undef), ignoring unknown names."""
+        for name in names:
+            self._macros.pop(name, None)
+
     def add_include_dir(self, path: str):
         """Add an include search directory."""
         if path not in self._include_dirs:
@@ -70,6 +76,22 @@ class Preprocessor:
         """Current macro definitions (read-only copy)."""
         return dict(self._macros)
 
+    @property
+    def include_graph(self) -> Dict[str, Set[str]]:
+        """Direct `include dependencies seen so far {file: {included}}."""
+        return {k: set(v) for k, v in self._include_graph.items()}
+
+    def includes_of(self, filepath: str) -> List[str]:
+        """All files transitively included by *filepath* (sorted)."""
+        seen: Set[str] = set()
+        todo = [os.path.abspath(filepath)]
+        while todo:
+            for inc in self._include_graph.get(todo.pop(), ()):
+                if inc not in seen:
+                    seen.add(inc)
+                    todo.append(inc)
+        return sorted(seen)
+
     # ---- main API ----
 
     def process_file(self, filepath: str) -> str:
@@ -272,6 +294,8 @@ class Preprocessor:
             return [f"// [preprocessor] include not found: {inc_name}"]
 
         abs_path = os.path.abspath(inc_path)
+        self._include_graph.setdefault(
+            os.path.abspath(filename), set()).add(abs_path)
         if abs_path in self._included_files:
             return [f"// [preprocessor] already included: {inc_name}"]
         self._included_files.add(abs_path)
@@ -1,18 +1,24 @@
 """
 rtl_scan — Top-level RTL structural analysis API.
 
-Supports three input modes:
+Supports four input modes:
   - Single file:  rtl_scan(file="top.v")
   - File list:    rtl_scan(files=["a.v", "b.v"])
   - Directory:    rtl_scan(directory="/path/to/rtl")
+  - Filelist:     rtl_scan(filelist="design.f")   (+incdir+, +define+,
+                  nested -f/-F, lazily resolved -v/-y libraries)
 
 Produces:
   - Module declarations with ports and parameters
   - Hierarchy / dependency graph
-  - Port classification (clock, reset, DFT, data, interrupt)
+  - Port classification (clock, reset, DFT, data, interrupt), with the
+    top's clocks and resets propagated through the hierarchy
   - Ordered filelist for compilation
   - Instantiation template (inst mode)
   - Port I/O table (io mode)
+  - Flattened instance paths, streamed by the caller (paths mode)
+  - Change-impact analysis, optionally off a cached scan (impact mode)
+  - Parameter-aware elaboration with memoized specializations (elab mode)
 
 Usage::
 
@@ -20,24 +26,37 @@ Usage::
     result = rtl_scan(directory="/path/to/rtl", mode="full")
     result = rtl_scan(file="top.v", mode="inst")
     result = rtl_scan(files=["a.v", "b.v"], mode="modules")
+
+    # Incremental: modules as they are parsed, then the rest
+    for kind, value in iter_scan(directory="/path/to/rtl"):
+        ...
 """
 
+import functools
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+from .clock_domains import propagate_clocks
 from .data_model import ModuleInfo
-from .file_discovery import discover_rtl_files
+from .file_discovery import discover_rtl_files, is_testbench
+from .filelist import FilelistError, Library, parse_filelist, resolve_libraries
 from .hierarchy import (
     build_hierarchy,
     find_top_modules,
     find_unresolved,
     generate_filelist,
 )
+from .elaborate import elaborate, elaboration_summary, live_view
+from .impact import impact_analysis
+from .module_index import ModuleIndex, parse_from_top
 from .preprocessor import Preprocessor
+from .scan_cache import (
+    ScanCache, cache_key, iter_files_cached, parse_file_cached,
+)
 from .verilog_parser import VerilogFileParser
 
 
@@ -54,11 +73,22 @@ def rtl_scan(
     mode="full",
     defines=None,
     include_dirs=None,
+    cache="",
+    changed_files=None,
+    top_params=None,
+    exclude=None,
+    include=None,
+    follow_symlinks=False,
+    jobs=1,
+    filelist="",
+    module_index="",
+    language="auto",
 ):
-    # type: (str, str, Optional[List[str]], str, str, str, Optional[Dict[str, str]], Optional[List[str]]) -> Dict[str, Any]
+    # type: (str, str, Optional[List[str]], str, str, str, Optional[Dict[str, str]], Optional[List[str]], str, Optional[List[str]], Optional[Dict[str, str]], Optional[List[str]], Optional[List[str]], bool, int, str, str, str) -> Dict[str, Any]
     """Scan RTL source(s) and return structured analysis dict.
 
-    Exactly one of *directory*, *file*, or *files* should be provided.
+    Exactly one of *directory*, *file*, *files* or *filelist* should be
+    provided.
 
     Args:
         directory:    RTL source directory to scan recursively
@@ -74,17 +104,138 @@ def rtl_scan(
                       "full"      : all of the above (default)
                       "inst"      : instantiation template
                       "io"        : port I/O table
+                      "paths"     : flattened instance paths (streamed
+                                    via hierarchy.iter_instance_paths)
+                      "impact"    : modules/tops affected by *changed_files*
+                      "elab"      : parameter-aware elaboration summary
         defines:      Extra `define macros {NAME: VALUE}
         include_dirs: Extra +incdir+ search paths
+        cache:        Scan cache file.  Unchanged files are loaded from it
+                      and the cache is rewritten after the scan.  In impact
+                      mode an existing cache is used as-is, without input
+                      files and without parsing.
+        changed_files: Edited files for impact mode
+        top_params:   Parameter overrides for the top {NAME: VALUE}
+                      (elab mode)
+        exclude:      Gitignore-style globs skipped by directory discovery;
+                      matching directories are not descended
+        include:      Gitignore-style globs a discovered file must match
+        follow_symlinks: Descend into symlinked directories
+        jobs:         Threads used to walk top-level subdirectories
+        filelist:     Simulator filelist (.f).  Its +incdir+ / +define+
+                      entries are added to *include_dirs* / *defines*
+                      (explicit *defines* win); -v / -y library modules
+                      are parsed only for names left unresolved.
+        module_index: Module-name index file, reused and rewritten.  With
+                      *top_module* set, modes that only need the top's
+                      subtree (inst, io, paths, elab) parse just the
+                      files the index says it needs; the index is built
+                      in memory when no file is given.
+        language:     Parser backend — "verilog", "systemverilog", or
+                      "auto" (default: by extension, .sv / .svh are
+                      SystemVerilog)
 
     Returns:
         Dict with analysis results.
     """
+    modules = {}  # type: Dict[str, ModuleInfo]
+    result = {}  # type: Dict[str, Any]
+    for kind, value in iter_scan(
+        directory=directory,
+        file=file,
+        files=files,
+        top_module=top_module,
+        base_dir=base_dir,
+        mode=mode,
+        defines=defines,
+        include_dirs=include_dirs,
+        cache=cache,
+        changed_files=changed_files,
+        top_params=top_params,
+        exclude=exclude,
+        include=include,
+        follow_symlinks=follow_symlinks,
+        jobs=jobs,
+        filelist=filelist,
+        module_index=module_index,
+        language=language,
+    ):
+        if kind == "module":
+            modules[value.name] = value   # last definition wins
+        else:
+            result = value
+    if modules:
+        result = dict(modules=[mod.to_dict() for mod in modules.values()],
+                      **result)
+    return result
+
+
+def iter_scan(
+    directory="",
+    file="",
+    files=None,
+    top_module="",
+    base_dir="",
+    mode="full",
+    defines=None,
+    include_dirs=None,
+    cache="",
+    changed_files=None,
+    top_params=None,
+    exclude=None,
+    include=None,
+    follow_symlinks=False,
+    jobs=1,
+    filelist="",
+    module_index="",
+    language="auto",
+):
+    # type: (str, str, Optional[List[str]], str, str, str, Optional[Dict[str, str]], Optional[List[str]], str, Optional[List[str]], Optional[Dict[str, str]], Optional[List[str]], Optional[List[str]], bool, int, str, str, str) -> Iterator[Tuple[str, Any]]
+    """Incremental rtl_scan(): same arguments, but the scan is yielded
+    as it happens, so output can start while files are still parsed.
+
+    Yields:
+        ("module", ModuleInfo)  in the modes whose result lists modules
+                                (modules, hierarchy, ports, filelist,
+                                full): every parsed module, as soon as
+                                its file is done — duplicates included
+        ("result", dict)        last: the rtl_scan() result, without the
+                                "modules" list of those modes
+    """
+    if mode == "impact" and cache and os.path.isfile(cache):
+        yield "result", _impact_from_cache(cache, top_module,
+                                           changed_files or [])
+        return
+
+    library = None  # type: Optional[Library]
+    if filelist:
+        try:
+            fl = parse_filelist(filelist)
+        except FilelistError as e:
+            logger.error(str(e))
+            yield "result", {"error": str(e)}
+            return
+        files = list(files or []) + fl.files
+        if not files:
+            yield "result", {"error": "No files in filelist: %s" % filelist}
+            return
+        defines = dict(fl.defines, **(defines or {}))
+        include_dirs = fl.include_dirs + list(include_dirs or [])
+        library = Library(fl.libraries, fl.libext)
+
     # --- resolve input files ---
-    resolved_files, rtl_dir, err = _resolve_input(directory, file, files)
+    discovery = {
+        "exclude": exclude,
+        "include": include,
+        "follow_symlinks": follow_symlinks,
+        "jobs": jobs,
+    }
+    resolved_files, rtl_dir, inventory, err = _resolve_input(
+        directory, file, files, discovery)
     if err:
         logger.error(err)
-        return {"error": err}
+        yield "result", {"error": err}
+        return
 
     logger.info("Scanning %d file(s)", len(resolved_files))
 
@@ -98,33 +249,74 @@ def rtl_scan(
         pp.add_include_dir(rtl_dir)
 
     # --- parse ---
-    parser = VerilogFileParser(preprocessor=pp)
-    all_modules = parser.parse_files(resolved_files)
-
-    if not all_modules:
+    parser = VerilogFileParser(preprocessor=pp, language=language)
+    scan_cache = None  # type: Optional[ScanCache]
+    if cache:
+        scan_cache = ScanCache.load(
+            cache, key=cache_key(defines, include_dirs, language))
+
+    modules = None  # type: Optional[Dict[str, ModuleInfo]]
+    if top_module and mode in _DEMAND_MODES and len(resolved_files) > 1:
+        modules = _parse_demand(parser, resolved_files, scan_cache,
+                                top_module, mode in _SINGLE_MODES,
+                                module_index)
+    stream = mode in _LIST_MODES
+    if modules is None:
+        if scan_cache is not None:
+            parsed = iter_files_cached(parser, resolved_files, scan_cache)
+        else:
+            parsed = (mod for fp in resolved_files
+                      for mod in parser.parse_file(fp))
+        # Build module dict (last definition wins for duplicates)
+        modules = {}
+        for mod in parsed:
+            modules[mod.name] = mod
+            if stream:
+                yield "module", mod
+
+    if scan_cache is not None:
+        try:
+            scan_cache.save(cache)
+        except (IOError, OSError) as e:
+            logger.warning("Cannot write scan cache %s: %s", cache, e)
+
+    if library:
+        for mod in resolve_libraries(parser, modules, library):
+            if stream:
+                yield "module", mod
+
+    if not modules:
         logger.warning("No modules found in %d file(s)", len(resolved_files))
         result = {"error": "No modules found"}  # type: Dict[str, Any]
         if parser.errors:
             result["parse_errors"] = parser.errors
-        return result
-
-    # Build module dict (last definition wins for duplicates)
-    modules = {}  # type: Dict[str, ModuleInfo]
-    for mod in all_modules:
-        modules[mod.name] = mod
+        yield "result", result
+        return
 
     logger.info("Found %d module(s)", len(modules))
 
+    if mode == "impact":
+        include_graph = {fp: pp.includes_of(fp) for fp in resolved_files}
+        result = _impact_result(modules, top_module, changed_files or [],
+                                include_graph)
+        if parser.errors:
+            result["parse_errors"] = parser.errors
+        yield "result", result
+        return
+
     # --- detect top module ---
     top = _resolve_top(modules, top_module)
 
     # --- build result based on mode ---
-    result = _build_result(modules, top, mode, rtl_dir or "", base_dir)
+    result = _build_result(modules, top, mode, rtl_dir or "", base_dir,
+                           top_params=top_params, discovery=discovery,
+                           rtl_files=inventory, list_modules=False)
 
     if parser.errors:
         result["parse_errors"] = parser.errors
 
-    return result
+    yield "result", result
+
 
 
 def rtl_scan_json(
@@ -136,8 +328,18 @@ def rtl_scan_json(
     mode="full",
     defines=None,
     include_dirs=None,
+    cache="",
+    changed_files=None,
+    top_params=None,
+    exclude=None,
+    include=None,
+    follow_symlinks=False,
+    jobs=1,
+    filelist="",
+    module_index="",
+    language="auto",
 ):
-    # type: (str, str, Optional[List[str]], str, str, str, Optional[Dict[str, str]], Optional[List[str]]) -> str
+    # type: (str, str, Optional[List[str]], str, str, str, Optional[Dict[str, str]], Optional[List[str]], str, Optional[List[str]], Optional[Dict[str, str]], Optional[List[str]], Optional[List[str]], bool, int, str, str, str) -> str
     """Same as rtl_scan() but returns a JSON string."""
     result = rtl_scan(
         directory=directory,
@@ -148,6 +350,16 @@ def rtl_scan_json(
         mode=mode,
         defines=defines,
         include_dirs=include_dirs,
+        cache=cache,
+        changed_files=changed_files,
+        top_params=top_params,
+        exclude=exclude,
+        include=include,
+        follow_symlinks=follow_symlinks,
+        jobs=jobs,
+        filelist=filelist,
+        module_index=module_index,
+        language=language,
     )
     return json.dumps(result, indent=2, ensure_ascii=False)
 
@@ -156,41 +368,109 @@ def rtl_scan_json(
 # Internal helpers
 # ---------------------------------------------------------------------------
 
-def _resolve_input(directory, file, files):
-    # type: (str, str, Optional[List[str]]) -> tuple
+# Modes that only look at the top's subtree, so a known top lets the scan
+# parse just the files reachable from it; inst / io need the top alone
+_DEMAND_MODES = ("inst", "io", "paths", "elab")
+_SINGLE_MODES = ("inst", "io")
+# Modes whose result lists every module (streamed by iter_scan())
+_LIST_MODES = ("modules", "hierarchy", "ports", "filelist", "full")
+
+def _resolve_input(directory, file, files, discovery=None):
+    # type: (str, str, Optional[List[str]], Optional[Dict[str, Any]]) -> tuple
     """Resolve input to a list of file paths and an RTL directory.
 
+    *discovery* holds extra discover_rtl_files() options for directories.
+    A directory is walked once; testbenches are filtered from the parse
+    list but kept in the inventory (for the filelist's excluded list).
+
     Returns:
-        (resolved_files, rtl_dir, error_msg)
+        (resolved_files, rtl_dir, inventory or None, error_msg)
     """
     if file:
         file = os.path.abspath(file)
         if not os.path.isfile(file):
-            return ([], "", "File not found: %s" % file)
-        return ([file], os.path.dirname(file), "")
+            return ([], "", None, "File not found: %s" % file)
+        return ([file], os.path.dirname(file), None, "")
 
     if files:
         resolved = []
         for f in files:
             f = os.path.abspath(f)
             if not os.path.isfile(f):
-                return ([], "", "File not found: %s" % f)
+                return ([], "", None, "File not found: %s" % f)
             resolved.append(f)
         if not resolved:
-            return ([], "", "No files provided")
+            return ([], "", None, "No files provided")
         # Use directory of first file as rtl_dir
-        return (resolved, os.path.dirname(resolved[0]), "")
+        return (resolved, os.path.dirname(resolved[0]), None, "")
 
     if directory:
         directory = os.path.abspath(directory)
         if not os.path.isdir(directory):
-            return ([], "", "Directory not found: %s" % directory)
-        found = discover_rtl_files(directory)
+            return ([], "", None, "Directory not found: %s" % directory)
+        options = dict(discovery or {})
+        exclude_tb = options.pop("exclude_tb", True)
+        inventory = discover_rtl_files(directory, exclude_tb=False, **options)
+        found = [f for f in inventory
+                 if not (exclude_tb and is_testbench(f))]
         if not found:
-            return ([], directory, "No RTL files found in: %s" % directory)
-        return (found, directory, "")
+            return ([], directory, inventory,
+                    "No RTL files found in: %s" % directory)
+        return (found, directory, inventory, "")
+
+    return ([], "", None, "No input specified (use file, files, or directory)")
 
-    return ([], "", "No input specified (use file, files, or directory)")
+
+def _parse_demand(parser, files, scan_cache, top, single, index_path):
+    # type: (VerilogFileParser, List[str], Optional[ScanCache], str, bool, str) -> Optional[Dict[str, ModuleInfo]]
+    """Demand-driven parse from *top* via the module-name index.
+
+    Returns None (→ full parse) if the index cannot locate *top*.
+    """
+    index = ModuleIndex.load(index_path)
+    index.update(files)
+    if index_path and index.rescanned:
+        try:
+            index.save(index_path)
+        except (IOError, OSError) as e:
+            logger.warning("Cannot write module index %s: %s", index_path, e)
+    if not index.files_defining(top) and not index.opaque_files():
+        logger.info("Top '%s' not in module index, parsing all files", top)
+        return None
+
+    parse_one = parser.parse_file  # type: Callable[[str], List[ModuleInfo]]
+    if scan_cache is not None:
+        parse_one = functools.partial(parse_file_cached, parser,
+                                      cache=scan_cache)
+    return parse_from_top(parse_one, parser.preprocessor, index, top,
+                          single=single)
+
+
+def _impact_from_cache(cache, top_module, changed_files):
+    # type: (str, str, List[str]) -> Dict[str, Any]
+    """Impact analysis straight off a scan cache — no parsing."""
+    scan_cache = ScanCache.load(cache)
+    modules = {}  # type: Dict[str, ModuleInfo]
+    for mod in scan_cache.modules():
+        modules[mod.name] = mod
+    if not modules:
+        return {"error": "Scan cache is empty or unreadable: %s" % cache}
+    logger.info("Loaded %d module(s) from scan cache %s", len(modules), cache)
+    return _impact_result(modules, top_module, changed_files,
+                          scan_cache.include_graph())
+
+
+def _impact_result(modules, top_module, changed_files, include_graph):
+    # type: (Dict[str, ModuleInfo], str, List[str], Dict[str, List[str]]) -> Dict[str, Any]
+    """Build the impact-mode result dict."""
+    if not changed_files:
+        return {"error": "No changed files given for impact analysis"}
+    impact = impact_analysis(
+        modules, changed_files,
+        include_graph=include_graph,
+        tops=[top_module] if top_module else None,
+    )
+    return {"impact": impact}
 
 
 def _resolve_top(modules, top_module):
@@ -215,9 +495,25 @@ def _resolve_top(modules, top_module):
     return list(modules.keys())[0] if modules else ""
 
 
-def _build_result(modules, top, mode, directory, base_dir):
-    # type: (Dict[str, ModuleInfo], str, str, str, str) -> Dict[str, Any]
-    """Build the result dict based on mode."""
+def _has_generate(modules):
+    # type: (Dict[str, ModuleInfo]) -> bool
+    """True if any instance sits in a generate construct or is an array."""
+    return any(inst.generate or inst.array_range
+               for mod in modules.values() for inst in mod.instances)
+
+
+def _top_not_found(top):
+    # type: (Optional[str]) -> str
+    if not top:
+        return "No top module found"
+    return "Top module '%s' not found" % top
+
+
+def _build_result(modules, top, mode, directory, base_dir, top_params=None,
+                  discovery=None, rtl_files=None, list_modules=True):
+    # type: (Dict[str, ModuleInfo], str, str, str, str, Optional[Dict[str, str]], Optional[Dict[str, Any]], Optional[List[str]], bool) -> Dict[str, Any]
+    """Build the result dict based on mode.  *list_modules* False leaves
+    out the "modules" list (iter_scan() streams it)."""
     result = {}  # type: Dict[str, Any]
 
     # inst / io modes: detailed module info for the target module
@@ -239,27 +535,56 @@ def _build_result(modules, top, mode, directory, base_dir):
         result["_module_info"] = target
         return result
 
+    if mode == "elab":
+        if top not in modules:
+            return {"error": _top_not_found(top)}
+        result["top"] = top
+        result["elaboration"] = elaboration_summary(top, modules, top_params)
+        return result
+
+    # Hierarchy, filelist, paths and clock propagation see generate-pruned
+    # instance lists
+    graph, counts = modules, None
+    if mode in ("hierarchy", "filelist", "full", "paths", "ports") \
+            and top in modules and _has_generate(modules):
+        graph, counts = live_view(modules, elaborate(top, modules, top_params))
+
+    # paths mode: the caller streams rows from the module graph
+    if mode == "paths":
+        if top not in modules:
+            return {"error": _top_not_found(top)}
+        result["top"] = top
+        # Raw module dict and instance multiplicities for
+        # hierarchy.iter_instance_paths (not serialized)
+        result["_modules"] = graph
+        result["_counts"] = counts
+        return result
+
     # Always include modules
-    result["modules"] = [mod.to_dict() for mod in modules.values()]
+    if list_modules:
+        result["modules"] = [mod.to_dict() for mod in modules.values()]
 
     if mode in ("hierarchy", "filelist", "full"):
         hierarchy = {}  # type: Dict[str, Any]
         if top:
-            hierarchy = build_hierarchy(top, modules)
+            hierarchy = build_hierarchy(top, graph, counts=counts)
         result["top"] = top
         result["hierarchy"] = {top: hierarchy} if top else {}
-        result["unresolved"] = find_unresolved(modules)
+        result["unresolved"] = find_unresolved(graph)
 
     if mode in ("ports", "full"):
         if top and top in modules:
             result["port_classification"] = modules[top].classify_ports()
+            result["clock_propagation"] = propagate_clocks(top, graph)
 
     if mode in ("filelist", "full"):
         if top:
             result["filelist_info"] = generate_filelist(
-                modules, top,
+                graph, top,
                 base_dir=base_dir or directory,
                 rtl_dir=directory,
+                discovery=discovery,
+                rtl_files=rtl_files,
             )
 
     return result
@@ -0,0 +1,262 @@
+"""
+Persistent per-file scan cache.
+
+Stores the parse result of every scanned file together with the stat
+signature of the file and of everything it `include-s, plus a digest of
+the macro table coming into the file, so a later run can reuse unchanged
+files and offline queries (impact analysis) can run
+without re-parsing the tree.
+
+The cache is keyed by the preprocessor configuration (defines, include
+directories) and the tool version; a mismatch discards the whole cache.
+
+File layout: MAGIC, a u32 format version and a u32 length, a JSON header
+({key, files: {path: {stat, includes, macros_in, defines, undefs,
+modules: [offset, size]}}}),
+then one codec stream per file holding its modules.  Entries keep their
+modules encoded and decode them only when a file is actually reused.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from .codec import CodecError, decode_modules, encode_modules
+from .data_model import ModuleInfo
+from .version import __version__
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"RTLSCAN\0"
+CACHE_VERSION = 3
+
+_HEADER = struct.Struct("<8sII")
+
+
+def _stat_sig(path):
+    # type: (str) -> Optional[List[int]]
+    """(mtime_ns, size) signature of *path*, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def macro_digest(macros):
+    # type: (Dict[str, str]) -> str
+    """Hash of a preprocessor macro table."""
+    blob = json.dumps(sorted(macros.items()))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def cache_key(defines=None, include_dirs=None, language="auto"):
+    # type: (Optional[Dict[str, str]], Optional[List[str]], str) -> str
+    """Hash of the options that influence parse results."""
+    blob = json.dumps({
+        "version": __version__,
+        "language": language,
+        "defines": sorted((defines or {}).items()),
+        "include_dirs": [os.path.abspath(d) for d in (include_dirs or [])],
+    }, sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class ScanCache:
+    """
+    In-memory view of the on-disk scan cache.
+
+    Usage::
+
+        cache = ScanCache.load("scan.cache", key=cache_key(defines))
+        modules = parse_files_cached(parser, files, cache)
+        cache.save("scan.cache")
+    """
+
+    def __init__(self, key=""):
+        # type: (str) -> None
+        self.key = key
+        self.files = OrderedDict()  # type: Dict[str, Dict[str, Any]]
+        self.hits = 0
+        self.misses = 0
+
+    # ---- persistence ----
+
+    @classmethod
+    def load(cls, path, key=None):
+        # type: (str, Optional[str]) -> ScanCache
+        """Load a cache file.  Returns an empty cache if it is missing,
+        unreadable, or was written with a different *key*."""
+        if not path or not os.path.isfile(path):
+            return cls(key or "")
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            magic, version, size = _HEADER.unpack_from(blob)
+            if magic != MAGIC or version != CACHE_VERSION:
+                logger.info("Scan cache %s has an old format, ignoring", path)
+                return cls(key or "")
+            start = _HEADER.size + size
+            data = json.loads(blob[_HEADER.size:start].decode("utf-8"))
+        except (IOError, ValueError, struct.error) as e:
+            logger.warning("Ignoring unreadable scan cache %s: %s", path, e)
+            return cls(key or "")
+
+        if key is not None and data.get("key") != key:
+            logger.info("Scan cache %s built with other options, ignoring", path)
+            return cls(key)
+
+        cache = cls(data.get("key", ""))
+        for fp, entry in data.get("files", {}).items():
+            offset, length = entry["modules"]
+            entry["modules"] = blob[start + offset:start + offset + length]
+            cache.files[fp] = entry
+        return cache
+
+    def save(self, path):
+        # type: (str) -> None
+        files = OrderedDict()  # type: Dict[str, Dict[str, Any]]
+        offset = 0
+        for fp, entry in self.files.items():
+            size = len(entry["modules"])
+            files[fp] = dict(entry, modules=[offset, size])
+            offset += size
+        header = json.dumps({"key": self.key, "files": files},
+                            ensure_ascii=False).encode("utf-8")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, CACHE_VERSION, len(header)))
+            f.write(header)
+            for entry in self.files.values():
+                f.write(entry["modules"])
+        os.replace(tmp, path)
+        logger.info("Scan cache written: %s (%d file(s))", path, len(self.files))
+
+    # ---- entries ----
+
+    def lookup(self, filepath, macros_in=None):
+        # type: (str, Optional[str]) -> Optional[Dict[str, Any]]
+        """Return the entry for *filepath* if it and all of its includes
+        are unchanged on disk, else None.  With *macros_in* (a
+        macro_digest()) the entry must also have been parsed under the
+        same incoming macro table."""
+        entry = self.files.get(filepath)
+        if entry is None or entry.get("stat") != _stat_sig(filepath):
+            return None
+        if macros_in is not None and entry.get("macros_in") != macros_in:
+            return None
+        for inc, sig in entry.get("includes", {}).items():
+            if _stat_sig(inc) != sig:
+                return None
+        return entry
+
+    def store(self, filepath, modules, includes=None, defines=None,
+              undefs=None, macros_in=None):
+        # type: (str, List[ModuleInfo], Optional[List[str]], Optional[Dict[str, str]], Optional[List[str]], Optional[str]) -> None
+        self.files[filepath] = {
+            "stat": _stat_sig(filepath),
+            "modules": encode_modules(modules),
+            "includes": {inc: _stat_sig(inc) for inc in (includes or [])},
+            "macros_in": macros_in,
+            "defines": dict(defines or {}),
+            "undefs": sorted(undefs or []),
+        }
+
+    def retain(self, filepaths):
+        # type: (List[str]) -> None
+        """Drop entries for files not in *filepaths*."""
+        keep = set(filepaths)
+        for fp in list(self.files):
+            if fp not in keep:
+                del self.files[fp]
+
+    def modules(self):
+        # type: () -> List[ModuleInfo]
+        """All cached modules, in scan order."""
+        out = []  # type: List[ModuleInfo]
+        for fp in list(self.files):
+            out.extend(self.entry_modules(fp))
+        return out
+
+    def entry_modules(self, filepath):
+        # type: (str) -> List[ModuleInfo]
+        """Decode the cached modules of *filepath*; a corrupt entry is
+        dropped and yields no modules."""
+        try:
+            return decode_modules(self.files[filepath]["modules"])
+        except CodecError as e:
+            logger.warning("Dropping corrupt scan cache entry %s: %s",
+                           filepath, e)
+            del self.files[filepath]
+            return []
+
+    def include_graph(self):
+        # type: () -> Dict[str, List[str]]
+        """{file: [transitively included files]} for every cached file."""
+        return {fp: sorted(e.get("includes", {}))
+                for fp, e in self.files.items()}
+
+
+def parse_file_cached(parser, filepath, cache):
+    # type: (Any, str, ScanCache) -> List[ModuleInfo]
+    """Parse one file with *parser*, or load it from *cache* if unchanged.
+
+    An entry is reused only if the macro table coming into the file is
+    the one it was parsed under.  Macros a cached file defined or
+    `undef-ed are replayed into the parser's preprocessor so later files
+    see the same `define state as in a full run.  Files that produced
+    errors are not cached.
+    """
+    pp = parser.preprocessor
+    fp = os.path.abspath(filepath)
+    before = pp.macros
+    macros_in = macro_digest(before)
+    entry = cache.lookup(fp, macros_in)
+    if entry is not None:
+        try:
+            mods = decode_modules(entry["modules"])
+        except CodecError as e:
+            logger.warning("Re-parsing %s, corrupt scan cache entry: %s", fp, e)
+        else:
+            cache.hits += 1
+            pp.add_defines(entry.get("defines", {}))
+            pp.remove_defines(entry.get("undefs", []))
+            return mods
+
+    cache.misses += 1
+    n_errors = len(parser.errors)
+    mods = parser.parse_file(fp)
+    if len(parser.errors) > n_errors:
+        cache.files.pop(fp, None)
+        return mods
+    after = pp.macros
+    defined = {k: v for k, v in after.items() if before.get(k) != v}
+    undefs = [k for k in before if k not in after]
+    cache.store(fp, mods, pp.includes_of(fp), defined, undefs, macros_in)
+    return mods
+
+
+def iter_files_cached(parser, filepaths, cache):
+    # type: (Any, List[str], ScanCache) -> Iterator[ModuleInfo]
+    """Parse *filepaths* with *parser*, reusing unchanged cache entries,
+    and yield each file's modules as soon as it is done.
+
+    See parse_file_cached().  Once exhausted, entries for files not in
+    *filepaths* are dropped.
+    """
+    for fp in filepaths:
+        for mod in parse_file_cached(parser, fp, cache):
+            yield mod
+    cache.retain([os.path.abspath(fp) for fp in filepaths])
+    logger.info("Scan cache: %d hit(s), %d miss(es)", cache.hits, cache.misses)
+
+
+def parse_files_cached(parser, filepaths, cache):
+    # type: (Any, List[str], ScanCache) -> List[ModuleInfo]
+    """List form of iter_files_cached()."""
+    return list(iter_files_cached(parser, filepaths, cache))
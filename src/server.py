@@ -0,0 +1,434 @@
+"""
+Persistent scan daemon on a Unix domain socket.
+
+The daemon keeps one ScanSession per scan configuration (input, defines,
+include dirs, discovery options) warm in memory.  Each request refreshes
+the session — re-parsing only files whose mtime/size changed — and
+answers from the parsed design, so repeated queries skip interpreter
+start-up, ANTLR import and re-parsing.
+
+Protocol: line-delimited JSON over a stream socket.  One request per
+line, one response per line, any number of requests per connection::
+
+    → {"id": 1, "method": "scan", "params": {"directory": "/rtl", "mode": "hierarchy"}}
+    ← {"id": 1, "result": {...}}
+    ← {"id": 2, "error": {"message": "..."}}
+
+Results that carry a "stream" key are followed by one line per row and
+a terminating record, so large answers never sit in memory whole::
+
+    ← {"id": 3, "result": {"top": "top", ..., "stream": "paths"}}
+    ← {"id": 3, "row": ["top.u0", "leaf", 1, 1]}
+    ← {"id": 3, "end": {"count": 1}}
+
+A request failing mid-stream ends with an "error" line instead.
+
+Methods:
+  ping      → {"version", "pid"}
+  scan      params: rtl_scan() keyword arguments, plus "paths" options
+            ({"max_depth", "module_filter"}) for paths mode, whose
+            instance paths are streamed as [path, module, depth, count]
+            rows, and
+            "encoding": "binary" to get inst / io mode's module as
+            "module_rtlm" (base64 codec stream) instead of "module"
+  modules   params: session arguments, "names" (optional list)
+            → {"count", "data"}: the parsed modules as a base64 codec
+            stream (see codec.py)
+  refresh   params: {"rediscover": bool} → {"sessions", "changed"}
+  stats     → per-session file / module counts
+  shutdown  stop the daemon
+
+Provides:
+  - default_socket_path()  per-user default socket location
+  - ScanServer             the daemon
+  - serve()                run a daemon until shutdown
+  - ServerClient           client for the protocol
+  - ServerUnavailable      no daemon is listening
+"""
+
+import base64
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .codec import decode_modules, encode_module, encode_modules
+from .data_model import ModuleInfo
+from .hierarchy import iter_instance_paths
+from .session import ScanSession
+from .version import __version__
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds after which a session's input directory is walked again to
+# pick up added / removed files; edits to known files are seen at once
+REDISCOVER_INTERVAL = 30.0
+
+# rtl_scan() arguments that select the session (the rest are per query)
+_SESSION_ARGS = ("directory", "file", "files", "filelist", "defines",
+                 "include_dirs", "exclude", "include", "follow_symlinks",
+                 "jobs", "language")
+_QUERY_ARGS = ("mode", "top_module", "base_dir", "top_params",
+               "changed_files")
+
+
+class ServerUnavailable(OSError):
+    """No daemon is listening on the socket."""
+
+
+def default_socket_path():
+    # type: () -> str
+    """$RTL_SCAN_SOCKET, else a per-user socket in the runtime dir."""
+    env = os.environ.get("RTL_SCAN_SOCKET")
+    if env:
+        return env
+    base = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(base, "rtl_scan-%d.sock" % os.getuid())
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class _Session:
+    """A ScanSession and when its directory was last walked."""
+
+    def __init__(self, session):
+        # type: (ScanSession) -> None
+        self.session = session
+        self.discovered = time.monotonic()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    # Buffer streamed rows; each response is flushed once it is complete
+    wbufsize = 1 << 16
+
+    def handle(self):
+        # type: () -> None
+        for raw in self.rfile:
+            line = raw.strip()
+            if not line:
+                continue
+            for response in self.server.dispatch(line):
+                self.wfile.write(json.dumps(response, ensure_ascii=False)
+                                 .encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if self.server.stopping:
+                break
+
+
+class ScanServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Line-delimited JSON server holding warm ScanSessions.
+
+    Connections are served on threads; requests are executed one at a
+    time under a lock, since sessions are not thread-safe.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        # type: (str) -> None
+        self.socket_path = socket_path
+        self.sessions = {}  # type: Dict[str, _Session]
+        self.stopping = False
+        self._lock = threading.Lock()
+        _claim_socket(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+    # ---- dispatch ----
+
+    def dispatch(self, line):
+        # type: (bytes) -> Iterator[Dict[str, Any]]
+        """Response lines for one request line.
+
+        Streamed rows are produced under the lock too: they are read
+        from the live session, which the next request may refresh.
+        """
+        req_id = None
+        try:
+            req = json.loads(line.decode("utf-8"))
+            req_id = req.get("id")
+            method = req.get("method", "")
+            params = req.get("params") or {}
+            handler = getattr(self, "rpc_" + method, None)
+            if handler is None:
+                raise ValueError("Unknown method: %s" % method)
+            with self._lock:
+                result = handler(**params)
+                rows = result.pop("_rows", None)
+                yield {"id": req_id, "result": result}
+                if rows is not None:
+                    count = 0
+                    for row in rows:
+                        yield {"id": req_id, "row": list(row)}
+                        count += 1
+                    yield {"id": req_id, "end": {"count": count}}
+        except (ValueError, TypeError) as e:
+            logger.info("Bad request: %s", e)
+            yield {"id": req_id, "error": {"message": str(e)}}
+        except Exception as e:
+            logger.exception("Request failed")
+            yield {"id": req_id, "error": {"message": str(e)}}
+
+    # ---- methods ----
+
+    def rpc_ping(self):
+        # type: () -> Dict[str, Any]
+        return {"version": __version__, "pid": os.getpid()}
+
+    def rpc_scan(self, paths=None, encoding="json", **kwargs):
+        # type: (Optional[Dict[str, Any]], str, Any) -> Dict[str, Any]
+        _check_args(kwargs, _QUERY_ARGS + ("cache", "module_index"))
+        if encoding not in ("json", "binary"):
+            raise ValueError("Unknown encoding: %s" % encoding)
+        session = self._session({k: kwargs[k] for k in _SESSION_ARGS
+                                 if kwargs.get(k) is not None})
+        query = {k: kwargs[k] for k in _QUERY_ARGS if kwargs.get(k) is not None}
+        result = session.query(**query)
+
+        out = {k: v for k, v in result.items() if not k.startswith("_")}
+        if encoding == "binary" and "_module_info" in result:
+            del out["module"]
+            out["module_rtlm"] = _b64(encode_module(result["_module_info"]))
+        if query.get("mode") == "paths" and "error" not in out:
+            paths = paths or {}
+            out["stream"] = "paths"
+            out["_rows"] = iter_instance_paths(
+                result["top"], result["_modules"],
+                max_depth=paths.get("max_depth"),
+                module_filter=paths.get("module_filter") or None,
+                counts=result["_counts"],
+            )
+        return out
+
+    def rpc_modules(self, names=None, **kwargs):
+        # type: (Optional[List[str]], Any) -> Dict[str, Any]
+        _check_args(kwargs, ())
+        session = self._session({k: v for k, v in kwargs.items()
+                                 if v is not None})
+        mods = list(session.modules.values())
+        if names is not None:
+            wanted = set(names)
+            mods = [m for m in mods if m.name in wanted]
+        return {"count": len(mods), "data": _b64(encode_modules(mods))}
+
+    def rpc_refresh(self, rediscover=False):
+        # type: (bool) -> Dict[str, Any]
+        changed = 0
+        for entry in self.sessions.values():
+            diff = entry.session.refresh(rediscover=rediscover)
+            changed += sum(len(v) for v in diff.values())
+            if rediscover:
+                entry.discovered = time.monotonic()
+        return {"sessions": len(self.sessions), "changed": changed}
+
+    def rpc_stats(self):
+        # type: () -> Dict[str, Any]
+        return {"sessions": [
+            {"key": json.loads(key),
+             "files": len(e.session.files),
+             "modules": len(e.session.modules),
+             "generation": e.session.generation}
+            for key, e in self.sessions.items()]}
+
+    def rpc_shutdown(self):
+        # type: () -> Dict[str, Any]
+        self.stopping = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return {"stopping": True}
+
+    # ---- sessions ----
+
+    def _session(self, config):
+        # type: (Dict[str, Any]) -> ScanSession
+        """Session for *config*, created on first use and refreshed."""
+        key = json.dumps(config, sort_keys=True)
+        entry = self.sessions.get(key)
+        if entry is None:
+            logger.info("New session: %s", key)
+            session = ScanSession(**config)
+            if not session.error:
+                # Failed inputs are retried from scratch next time
+                self.sessions[key] = _Session(session)
+            return session
+        now = time.monotonic()
+        rediscover = now - entry.discovered >= REDISCOVER_INTERVAL
+        entry.session.refresh(rediscover=rediscover)
+        if rediscover:
+            entry.discovered = now
+        return entry.session
+
+    def server_close(self):
+        # type: () -> None
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def _check_args(kwargs, extra):
+    # type: (Dict[str, Any], tuple) -> None
+    unknown = set(kwargs) - set(_SESSION_ARGS) - set(extra)
+    if unknown:
+        raise TypeError("Unknown argument(s): %s" % ", ".join(sorted(unknown)))
+
+
+def _b64(data):
+    # type: (bytes) -> str
+    return base64.b64encode(data).decode("ascii")
+
+
+def _claim_socket(path):
+    # type: (str) -> None
+    """Remove a stale socket file; refuse if a daemon answers on it."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise OSError("A daemon is already listening on %s" % path)
+
+
+def serve(socket_path=""):
+    # type: (str) -> int
+    """Run a daemon on *socket_path* until a shutdown request or Ctrl-C."""
+    socket_path = socket_path or default_socket_path()
+    try:
+        server = ScanServer(socket_path)
+    except OSError as e:
+        logger.error("Cannot start daemon: %s", e)
+        return 1
+    logger.warning("rtl_scan daemon listening on %s", socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class ServerClient:
+    """
+    Blocking client for the daemon protocol.
+
+    Usage::
+
+        with ServerClient() as client:
+            result = client.call("scan", directory="/rtl", mode="hierarchy")
+    """
+
+    def __init__(self, socket_path="", timeout=None):
+        # type: (str, Optional[float]) -> None
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError as e:
+            self._sock.close()
+            raise ServerUnavailable("No rtl_scan daemon on %s: %s"
+                                    % (self.socket_path, e))
+        self._file = self._sock.makefile("rwb")
+        self._next_id = 0
+        self._rows = None  # type: Optional[Iterator[list]]
+
+    def call(self, method, **params):
+        # type: (str, Any) -> Any
+        """Send one request and return its result.
+
+        Streamed rows are collected into a list under the key the
+        result's "stream" entry names; use stream() to read them one
+        at a time instead.
+
+        Raises:
+            RuntimeError with the daemon's message if the request failed.
+        """
+        result, rows = self.stream(method, **params)
+        if rows is not None:
+            result[result.pop("stream")] = list(rows)
+        return result
+
+    def stream(self, method, **params):
+        # type: (str, Any) -> Tuple[Any, Optional[Iterator[list]]]
+        """Send one request; return its result and, if the daemon
+        streams rows after it, an iterator reading them off the socket
+        (else None).  Unread rows are skipped by the next request.
+
+        Raises:
+            RuntimeError with the daemon's message if the request failed,
+            from the iterator if it failed mid-stream.
+        """
+        if self._rows is not None:
+            for _ in self._rows:
+                pass
+        self._next_id += 1
+        self._file.write(json.dumps(
+            {"id": self._next_id, "method": method, "params": params},
+            ensure_ascii=False).encode("utf-8") + b"\n")
+        self._file.flush()
+        result = self._read()["result"]
+        if isinstance(result, dict) and "stream" in result:
+            self._rows = self._iter_rows()
+        return result, self._rows
+
+    def _iter_rows(self):
+        # type: () -> Iterator[list]
+        try:
+            while True:
+                response = self._read()
+                if "end" in response:
+                    return
+                yield response["row"]
+        finally:
+            self._rows = None
+
+    def _read(self):
+        # type: () -> Dict[str, Any]
+        line = self._file.readline()
+        if not line:
+            raise ServerUnavailable("Daemon closed the connection")
+        response = json.loads(line.decode("utf-8"))
+        if "error" in response:
+            raise RuntimeError(response["error"].get("message", "daemon error"))
+        return response
+
+    def modules(self, names=None, **params):
+        # type: (Optional[List[str]], Any) -> List[ModuleInfo]
+        """The parsed modules of the session selected by *params*
+        (rtl_scan() input arguments), transferred in binary."""
+        result = self.call("modules", names=names, **params)
+        return decode_modules(base64.b64decode(result["data"]))
+
+    def close(self):
+        # type: () -> None
+        try:
+            self._file.close()
+        finally:
+            self._sock.close()
+
+    def __enter__(self):
+        # type: () -> ServerClient
+        return self
+
+    def __exit__(self, *exc):
+        # type: (Any) -> None
+        self.close()
@@ -0,0 +1,329 @@
+"""
+In-process scan session for repeated queries on one design.
+
+rtl_scan() discovers, preprocesses and parses the whole input on every
+call.  A ScanSession does that once and keeps the file inventory, the
+per-file parse results (with the macros each file defined or removed
+and the stat signatures of the files it includes) and the module graph.
+Queries for any mode / top are answered from memory; refresh() re-stats
+the files and library sources and re-parses only what changed.
+
+Usage::
+
+    from src.session import ScanSession
+    session = ScanSession(directory="/path/to/rtl", defines={"SYNTHESIS": ""})
+    session.query(mode="hierarchy", top_module="chip_top")
+    session.query(mode="inst", top_module="fifo_async")
+    session.refresh()             # after edits: re-parse changed files only
+    session.refresh(rediscover=True)   # also pick up added/removed files
+    session.database().instances_of("fifo_async")   # indexed lookups
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .data_model import ModuleInfo
+from .design_db import DesignDatabase
+from .filelist import FilelistError, Library, parse_filelist, resolve_libraries
+from .preprocessor import Preprocessor
+from .rtl_scan import _build_result, _impact_result, _resolve_input, _resolve_top
+from .scan_cache import _stat_sig
+from .verilog_parser import VerilogFileParser
+
+logger = logging.getLogger(__name__)
+
+
+class ScanSession:
+    """
+    Parsed design state that survives between queries.
+
+    Construction scans the input (same arguments as rtl_scan()); see
+    refresh() and query().  Result dicts are memoized until the next
+    refresh that changes something, so treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        directory="",
+        file="",
+        files=None,
+        filelist="",
+        defines=None,
+        include_dirs=None,
+        exclude=None,
+        include=None,
+        follow_symlinks=False,
+        jobs=1,
+        language="auto",
+    ):
+        # type: (str, str, Optional[List[str]], str, Optional[Dict[str, str]], Optional[List[str]], Optional[List[str]], Optional[List[str]], bool, int, str) -> None
+        self._input = (directory, file, list(files or []))
+        self._language = language
+        self._defines = dict(defines or {})
+        self._include_dirs = list(include_dirs or [])
+        self._discovery = {
+            "exclude": exclude,
+            "include": include,
+            "follow_symlinks": follow_symlinks,
+            "jobs": jobs,
+        }
+        self._library = None  # type: Optional[Library]
+        self.error = ""
+
+        if filelist:
+            try:
+                fl = parse_filelist(filelist)
+            except FilelistError as e:
+                self.error = str(e)
+            else:
+                self._input = (directory, file, self._input[2] + fl.files)
+                self._defines = dict(fl.defines, **self._defines)
+                self._include_dirs = fl.include_dirs + self._include_dirs
+                self._library = Library(fl.libraries, fl.libext)
+
+        self.files = []        # type: List[str]
+        self.inventory = None  # type: Optional[List[str]]
+        self.rtl_dir = ""
+        self.modules = {}      # type: Dict[str, ModuleInfo]
+        self.preprocessor = None  # type: Optional[Preprocessor]
+        self.parse_errors = []  # type: List[str]
+        self.generation = 0
+        # file → {"stat", "includes": {inc: stat}, "defines", "undefs",
+        #         "modules", "errors"}
+        self._entries = OrderedDict()  # type: Dict[str, Dict[str, Any]]
+        self._results = {}  # type: Dict[Tuple, Dict[str, Any]]
+        self._database = None  # type: Optional[DesignDatabase]
+
+        if not self.error:
+            self.refresh(rediscover=True)
+
+    # ---- scanning ----
+
+    def refresh(self, rediscover=False):
+        # type: (bool) -> Dict[str, List[str]]
+        """Bring the session up to date with the file system.
+
+        Files whose (mtime, size) — or that of a file they include —
+        changed are re-parsed; unchanged files are reused and the macros
+        they define or `undef replayed, so later files see the same
+        `define state as a full scan.  If a re-parsed, added or removed
+        file changes different macros, every file after it is re-parsed
+        too.  If a -v file or -y directory read for library modules
+        changed, the library is re-read and listed as changed.
+
+        Args:
+            rediscover: walk the input directory again to pick up added
+                        and removed files
+
+        Returns:
+            {"added": [...], "removed": [...], "changed": [...]}
+        """
+        diff = {"added": [], "removed": [], "changed": []}  # type: Dict[str, List[str]]
+        if self.error:
+            return diff
+
+        if rediscover or not self.files:
+            directory, file, files = self._input
+            resolved, rtl_dir, inventory, err = _resolve_input(
+                directory, file, files, self._discovery)
+            if err:
+                self.error = err
+                return diff
+            self.files, self.rtl_dir, self.inventory = resolved, rtl_dir, inventory
+
+        pp = Preprocessor()
+        pp.add_defines(self._defines)
+        pp.add_include_dirs(self._include_dirs)
+        if self.rtl_dir:
+            pp.add_include_dir(self.rtl_dir)
+        parser = VerilogFileParser(preprocessor=pp, language=self._language)
+        self.preprocessor = pp
+
+        old = self._entries
+        self._entries = OrderedDict()
+        current = set(self.files)
+        # A removed file that defined macros may change every other file
+        macros_changed = any(e["defines"] or e["undefs"]
+                             for fp, e in old.items() if fp not in current)
+        for fp in self.files:
+            entry = old.get(fp)
+            if entry is not None and not macros_changed and _unchanged(fp, entry):
+                pp.add_defines(entry["defines"])
+                pp.remove_defines(entry["undefs"])
+            else:
+                new = _parse_entry(parser, fp)
+                if entry is None:
+                    diff["added"].append(fp)
+                elif _unchanged(fp, entry):
+                    pass                # re-parsed for new macro state only
+                else:
+                    diff["changed"].append(fp)
+                if (new["defines"] != (entry or {}).get("defines", {})
+                        or new["undefs"] != (entry or {}).get("undefs", [])):
+                    macros_changed = True
+                entry = new
+            self._entries[fp] = entry
+        diff["removed"] = [fp for fp in old if fp not in self._entries]
+
+        if self._library:
+            stale = self._library.changed()
+            if stale or macros_changed:
+                self._library.reset()
+            diff["changed"].extend(stale)
+
+        if any(diff.values()) or macros_changed or not self.generation:
+            self._rebuild(parser)
+        logger.info("Session refresh: %d added, %d changed, %d removed",
+                    len(diff["added"]), len(diff["changed"]),
+                    len(diff["removed"]))
+        return diff
+
+    def _rebuild(self, parser):
+        # type: (VerilogFileParser) -> None
+        """Recompute the module graph from the per-file entries."""
+        modules = {}  # type: Dict[str, ModuleInfo]
+        errors = []  # type: List[str]
+        for entry in self._entries.values():
+            for mod in entry["modules"]:
+                modules[mod.name] = mod   # last definition wins
+            errors.extend(entry["errors"])
+        if self._library:
+            n_errors = len(parser.errors)
+            resolve_libraries(parser, modules, self._library)
+            errors.extend(parser.errors[n_errors:])
+        self.modules = modules
+        self.parse_errors = errors
+        self.generation += 1
+        self._results.clear()
+        self._database = None
+
+    def file_modules(self):
+        # type: () -> Dict[str, List[ModuleInfo]]
+        """{file: [modules it defines]} in scan order, duplicate module
+        names included, then the library files modules were loaded from."""
+        out = OrderedDict((fp, list(e["modules"]))
+                          for fp, e in self._entries.items())
+        for mod in self.modules.values():
+            if mod.file_path not in self._entries:
+                out.setdefault(mod.file_path, []).append(mod)
+        return out
+
+    def include_graph(self):
+        # type: () -> Dict[str, List[str]]
+        """{file: [transitively included files]} for every scanned file."""
+        return {fp: sorted(e["includes"]) for fp, e in self._entries.items()}
+
+    def dependencies(self):
+        # type: () -> List[str]
+        """Every file the current state was built from: the scanned files,
+        the files they include and the -v library files."""
+        out = OrderedDict()  # type: Dict[str, None]
+        for fp, entry in self._entries.items():
+            out[fp] = None
+            for inc in entry["includes"]:
+                out[inc] = None
+        if self._library:
+            for kind, src in self._library.sources:
+                if kind == "-v":
+                    out[src] = None
+        return list(out)
+
+    def watch_roots(self):
+        # type: () -> List[str]
+        """Directories to watch for changes: the input directory (or the
+        directories of explicit files), include and -y library dirs."""
+        directory, file, files = self._input
+        roots = [directory] if directory else []
+        roots.extend(os.path.dirname(os.path.abspath(fp))
+                     for fp in ([file] if file else []) + files)
+        roots.extend(self._include_dirs)
+        if self._library:
+            roots.extend(src if kind == "-y" else os.path.dirname(src)
+                         for kind, src in self._library.sources)
+        out = []  # type: List[str]
+        for r in roots:
+            r = os.path.abspath(r)
+            if r not in out and os.path.isdir(r):
+                out.append(r)
+        return out
+
+    # ---- queries ----
+
+    def database(self):
+        # type: () -> DesignDatabase
+        """Indexed DesignDatabase of the current state, every definition
+        included; rebuilt after a refresh that changes something."""
+        db = self._database
+        if db is None:
+            db = DesignDatabase(mod for mods in self.file_modules().values()
+                                for mod in mods)
+            db.error = self.error
+            db.parse_errors = list(self.parse_errors)
+            self._database = db
+        return db
+
+    def query(self, mode="full", top_module="", base_dir="", top_params=None,
+              changed_files=None):
+        # type: (str, str, str, Optional[Dict[str, str]], Optional[List[str]]) -> Dict[str, Any]
+        """Answer an rtl_scan() query from the session state.
+
+        Takes the query-side arguments of rtl_scan(); the result has the
+        same shape.
+        """
+        if self.error:
+            return {"error": self.error}
+        if not self.modules:
+            result = {"error": "No modules found"}  # type: Dict[str, Any]
+            if self.parse_errors:
+                result["parse_errors"] = list(self.parse_errors)
+            return result
+
+        if mode == "impact":
+            return _impact_result(self.modules, top_module, changed_files or [],
+                                  self.include_graph())
+
+        key = (mode, top_module, base_dir,
+               tuple(sorted((top_params or {}).items())))
+        result = self._results.get(key)
+        if result is None:
+            top = _resolve_top(self.modules, top_module)
+            result = _build_result(self.modules, top, mode, self.rtl_dir or "",
+                                   base_dir, top_params=top_params,
+                                   discovery=self._discovery,
+                                   rtl_files=self.inventory)
+            if self.parse_errors:
+                result["parse_errors"] = list(self.parse_errors)
+            self._results[key] = result
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Per-file entries
+# ---------------------------------------------------------------------------
+
+def _unchanged(fp, entry):
+    # type: (str, Dict[str, Any]) -> bool
+    if _stat_sig(fp) != entry["stat"]:
+        return False
+    return all(_stat_sig(inc) == sig for inc, sig in entry["includes"].items())
+
+
+def _parse_entry(parser, fp):
+    # type: (VerilogFileParser, str) -> Dict[str, Any]
+    """Parse *fp* and record what later refreshes need to reuse it."""
+    pp = parser.preprocessor
+    before = pp.macros
+    n_errors = len(parser.errors)
+    sig = _stat_sig(fp)
+    mods = parser.parse_file(fp)
+    after = pp.macros
+    return {
+        "stat": sig,
+        "includes": {inc: _stat_sig(inc) for inc in pp.includes_of(os.path.abspath(fp))},
+        "defines": {k: v for k, v in after.items() if before.get(k) != v},
+        "undefs": [k for k in before if k not in after],
+        "modules": mods,
+        "errors": parser.errors[n_errors:],
+    }
@@ -0,0 +1,313 @@
+"""
+SQLite export of a scanned design, updated incrementally.
+
+Writes every parsed module — duplicates included — into indexed tables
+so dashboards can query the design in SQL instead of re-scanning::
+
+    -- modules with more than 500 ports
+    SELECT name, n_ports FROM modules WHERE n_ports > 500;
+    -- every instantiation of fifo_async, with its parameters
+    SELECT m.name, i.name, i.parameters FROM instances i
+      JOIN modules m ON m.id = i.module_id WHERE i.module_type = 'fifo_async';
+    -- module names defined in more than one file
+    SELECT * FROM duplicate_modules;
+
+Rows are owned by the file that defines them.  Each file row stores a
+digest of its modules' binary encoding (see codec.py) and of the active
+port rules, which the ports' category depends on; a sync rewrites
+only the rows of files whose digest changed and deletes removed files,
+in one transaction, so the database can be refreshed after every scan.
+
+Tables (child rows are deleted with their parent):
+  files        path, digest, n_modules
+  modules      file_id, name, kind, line, n_ports, n_parameters,
+               n_instances
+  ports        module_id, position, name, direction, width, range_spec,
+               net_type, category
+  parameters   module_id, position, name, value, type, resolved
+  instances    module_id, position, name, module_type, array_range,
+               parameters (JSON object), generate_scopes (JSON list)
+  connections  instance_id, position, port, signal
+  edges        module_id, child, instances — one per instantiated type
+View: duplicate_modules (name, definitions, files).
+
+Provides:
+  - SCHEMA_VERSION
+  - sync_sqlite()  bring a database in line with {file: [modules]}
+  - files_of()     group modules by the file defining them
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List
+
+from .codec import encode_modules
+from .data_model import ModuleInfo
+from .port_classify import port_rules
+
+logger = logging.getLogger(__name__)
+
+
+# Bump on any schema change; an older database is rebuilt from scratch
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    n_modules INTEGER NOT NULL
+);
+CREATE TABLE modules (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    n_ports INTEGER NOT NULL,
+    n_parameters INTEGER NOT NULL,
+    n_instances INTEGER NOT NULL
+);
+CREATE TABLE ports (
+    module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    width INTEGER,
+    range_spec TEXT NOT NULL,
+    net_type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (module_id, position)
+) WITHOUT ROWID;
+CREATE TABLE parameters (
+    module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    type TEXT NOT NULL,
+    resolved INTEGER,
+    PRIMARY KEY (module_id, position)
+) WITHOUT ROWID;
+CREATE TABLE instances (
+    id INTEGER PRIMARY KEY,
+    module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    module_type TEXT NOT NULL,
+    array_range TEXT NOT NULL,
+    parameters TEXT,
+    generate_scopes TEXT
+);
+CREATE TABLE connections (
+    instance_id INTEGER NOT NULL REFERENCES instances(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    port TEXT NOT NULL,
+    signal TEXT NOT NULL,
+    PRIMARY KEY (instance_id, position)
+) WITHOUT ROWID;
+CREATE TABLE edges (
+    module_id INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    child TEXT NOT NULL,
+    instances INTEGER NOT NULL,
+    PRIMARY KEY (module_id, child)
+) WITHOUT ROWID;
+
+CREATE INDEX modules_name ON modules(name);
+CREATE INDEX modules_file ON modules(file_id);
+CREATE INDEX modules_ports ON modules(n_ports);
+CREATE INDEX ports_name ON ports(name);
+CREATE INDEX parameters_name ON parameters(name);
+CREATE INDEX instances_module ON instances(module_id);
+CREATE INDEX instances_type ON instances(module_type);
+CREATE INDEX connections_signal ON connections(signal);
+CREATE INDEX edges_child ON edges(child);
+
+CREATE VIEW duplicate_modules AS
+    SELECT m.name AS name, COUNT(*) AS definitions,
+           GROUP_CONCAT(f.path, char(10)) AS files
+    FROM modules m JOIN files f ON f.id = m.file_id
+    GROUP BY m.name HAVING COUNT(*) > 1;
+"""
+
+_INT64 = 1 << 63
+
+
+def files_of(modules):
+    # type: (Iterable[ModuleInfo]) -> Dict[str, List[ModuleInfo]]
+    """{file_path: [modules]} in first-seen order."""
+    out = OrderedDict()  # type: Dict[str, List[ModuleInfo]]
+    for mod in modules:
+        out.setdefault(mod.file_path, []).append(mod)
+    return out
+
+
+def _digest(modules, rules):
+    # type: (List[ModuleInfo], str) -> str
+    h = hashlib.sha1(encode_modules(modules))
+    h.update(rules.encode("ascii"))
+    return h.hexdigest()
+
+
+def _sql_int(n):
+    # SQLite integers are 64-bit; wider constants are kept as text
+    if n is None or -_INT64 <= n < _INT64:
+        return n
+    return str(n)
+
+
+# ---------------------------------------------------------------------------
+# Connection
+# ---------------------------------------------------------------------------
+
+def _connect(path):
+    # type: (str) -> sqlite3.Connection
+    """Open *path*, (re)creating the schema if it is missing or old."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema'"
+                           ).fetchone()
+    except sqlite3.DatabaseError:
+        row = None
+    if row is not None and row[0] == str(SCHEMA_VERSION):
+        return conn
+    if row is not None:
+        logger.info("Design database %s has an old schema, rebuilding", path)
+    names = conn.execute(
+        "SELECT type, name FROM sqlite_master "
+        "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    with conn:
+        conn.execute("PRAGMA foreign_keys = OFF")
+        for kind, name in names:
+            conn.execute('DROP %s IF EXISTS "%s"' % (kind.upper(), name))
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT INTO meta VALUES ('schema', ?)",
+                     (str(SCHEMA_VERSION),))
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+class _Rows:
+    """Insert batches for the rows of the files being (re)written."""
+
+    def __init__(self, conn):
+        # type: (sqlite3.Connection) -> None
+        self.module_id = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM modules").fetchone()[0]
+        self.instance_id = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM instances").fetchone()[0]
+        self.modules = []      # type: List[tuple]
+        self.ports = []        # type: List[tuple]
+        self.parameters = []   # type: List[tuple]
+        self.instances = []    # type: List[tuple]
+        self.connections = []  # type: List[tuple]
+        self.edges = []        # type: List[tuple]
+
+    def add(self, file_id, mod):
+        # type: (int, ModuleInfo) -> None
+        self.module_id += 1
+        mid = self.module_id
+        self.modules.append((mid, file_id, mod.name, mod.kind,
+                             mod.line_number, len(mod.ports),
+                             len(mod.parameters), len(mod.instances)))
+        self.ports.extend(
+            (mid, i, p.name, p.direction.value, _sql_int(p.width),
+             p.range_spec, p.net_type, p.category.value)
+            for i, p in enumerate(mod.ports))
+        self.parameters.extend(
+            (mid, i, p.name, p.value, p.param_type, _sql_int(p.resolved))
+            for i, p in enumerate(mod.parameters))
+        types = Counter()  # type: Counter
+        for i, inst in enumerate(mod.instances):
+            self.instance_id += 1
+            iid = self.instance_id
+            types[inst.module_type] += 1
+            params = inst.parameters
+            scopes = inst.generate
+            self.instances.append((
+                iid, mid, i, inst.instance_name, inst.module_type,
+                inst.array_range,
+                json.dumps(dict(params), ensure_ascii=False)
+                if params else None,
+                json.dumps([g.to_dict() for g in scopes], ensure_ascii=False)
+                if scopes else None))
+            self.connections.extend(
+                (iid, j, c.port_name, c.signal_expr)
+                for j, c in enumerate(inst.connections))
+        self.edges.extend((mid, child, n) for child, n in types.items())
+
+    def flush(self, conn):
+        # type: (sqlite3.Connection) -> None
+        for table, rows in (("modules", self.modules),
+                            ("ports", self.ports),
+                            ("parameters", self.parameters),
+                            ("instances", self.instances),
+                            ("connections", self.connections),
+                            ("edges", self.edges)):
+            if rows:
+                conn.executemany("INSERT INTO %s VALUES (%s)" % (
+                    table, ", ".join("?" * len(rows[0]))), rows)
+
+
+def sync_sqlite(path, files):
+    # type: (str, Dict[str, List[ModuleInfo]]) -> Dict[str, List[str]]
+    """Make the database at *path* hold exactly *files*.
+
+    Args:
+        path:  database file, created if missing
+        files: {file path: modules defined in it}, e.g. files_of() of
+               every parsed module or ScanSession.file_modules()
+
+    Only files that are new, whose modules changed, or that are gone
+    are rewritten or deleted; a change of the active port rules
+    rewrites every file.
+
+    Returns:
+        {"added": [...], "changed": [...], "removed": [...]} file paths
+    """
+    diff = {"added": [], "changed": [], "removed": []}  # type: Dict[str, List[str]]
+    rules = port_rules().signature
+    conn = _connect(path)
+    try:
+        stored = {fp: (fid, digest) for fid, fp, digest in conn.execute(
+            "SELECT id, path, digest FROM files")}
+        with conn:
+            rows = _Rows(conn)
+            for fp in stored:
+                if fp not in files:
+                    conn.execute("DELETE FROM files WHERE id = ?",
+                                 (stored[fp][0],))
+                    diff["removed"].append(fp)
+            for fp, mods in files.items():
+                digest = _digest(mods, rules)
+                old = stored.get(fp)
+                if old is not None:
+                    if old[1] == digest:
+                        continue
+                    conn.execute("DELETE FROM files WHERE id = ?", (old[0],))
+                    diff["changed"].append(fp)
+                else:
+                    diff["added"].append(fp)
+                file_id = conn.execute(
+                    "INSERT INTO files (path, digest, n_modules) "
+                    "VALUES (?, ?, ?)", (fp, digest, len(mods))).lastrowid
+                for mod in mods:
+                    rows.add(file_id, mod)
+            rows.flush(conn)
+    finally:
+        conn.close()
+    logger.info("Design database %s: %d added, %d changed, %d removed file(s)",
+                os.path.basename(path), len(diff["added"]),
+                len(diff["changed"]), len(diff["removed"]))
+    return diff
@@ -0,0 +1,511 @@
+"""
+ANTLR AST extraction functions for SystemVerilog constructs.
+
+The SystemVerilog counterpart of extractors: standalone functions that
+take SystemVerilogParser contexts and return the same data_model objects
+as the Verilog backend.  Used by systemverilog_parser's visitor.
+
+Provides:
+  - type_info()                     type text, width and range of a declaration
+  - extract_parameter_port_list()   #( ... ) header parameters
+  - extract_param_declaration()     parameter / localparam declarations
+  - extract_ansi_ports()            ANSI header ports (with inheritance)
+  - extract_port_declaration()      body input / output / inout / ref /
+                                    interface port declarations
+  - extract_sv_instances()          module / interface / program instances
+  - extract_sv_loop_generate(), extract_sv_if_generate(),
+    extract_sv_case_generate()      generate scopes
+  - extract_sv_net_decl(), extract_sv_data_decl()   wires / variables
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ast_utils import range_text_width
+from .data_model import (
+    ConnectionInfo,
+    GenerateScope,
+    InstanceInfo,
+    ParameterInfo,
+    PortInfo,
+    WireInfo,
+)
+from .extractors import _make_param
+from .port_classify import PortDirection
+
+
+_DIRECTIONS = {
+    "input": PortDirection.INPUT,
+    "output": PortDirection.OUTPUT,
+    "inout": PortDirection.INOUT,
+    "ref": PortDirection.INOUT,
+}
+
+# Bits of the fixed-width integer atom and real types
+_ATOM_WIDTHS = {
+    "byte": 8, "shortint": 16, "int": 32, "longint": 64, "integer": 32,
+    "time": 64, "shortreal": 32, "real": 64, "realtime": 64,
+}
+
+
+def _rule(ctx):
+    # type: (Any) -> str
+    return ctx.parser.ruleNames[ctx.getRuleIndex()]
+
+
+# ---------------------------------------------------------------------------
+# Data types
+# ---------------------------------------------------------------------------
+
+def _type_parts(ctx, parts, dims):
+    # type: (Any, List[str], List[Any]) -> Optional[int]
+    """Collect type keywords / names into *parts* and packed dimensions
+    into *dims*; returns the width of one element (0 if unknown)."""
+    rule = _rule(ctx)
+    if rule == "data_type_or_implicit":
+        inner = ctx.data_type() or ctx.implicit_data_type()
+        return _type_parts(inner, parts, dims)
+    if rule == "var_data_type":
+        inner = ctx.data_type() or ctx.data_type_or_implicit()
+        return _type_parts(inner, parts, dims) if inner else 1
+    if rule == "variable_port_type":
+        return _type_parts(ctx.var_data_type(), parts, dims)
+    if rule == "net_port_type":
+        base = 1
+        if ctx.net_type():
+            parts.append(ctx.net_type().getText())
+        elif ctx.INTERCONNECT():
+            parts.append("interconnect")
+        inner = ctx.data_type_or_implicit() or ctx.implicit_data_type()
+        if inner:
+            base = _type_parts(inner, parts, dims)
+        return base
+    if rule == "implicit_data_type":
+        if ctx.signing():
+            parts.append(ctx.signing().getText())
+        dims.extend(ctx.packed_dimension())
+        return 1
+
+    # data_type
+    if ctx.integer_vector_type():
+        parts.append(ctx.integer_vector_type().getText())
+        if ctx.signing():
+            parts.append(ctx.signing().getText())
+        dims.extend(ctx.packed_dimension())
+        return 1
+    atom = ctx.integer_atom_type() or ctx.non_integer_type()
+    if atom:
+        parts.append(atom.getText())
+        if ctx.signing():
+            parts.append(ctx.signing().getText())
+        return _ATOM_WIDTHS.get(atom.getText(), 0)
+    if ctx.struct_union():
+        parts.append(ctx.struct_union().getText())
+    elif ctx.ENUM():
+        parts.append("enum")
+    elif ctx.type_identifier():
+        parts.append(("$unit::" if ctx.DLUNIT() else "")
+                     + ctx.type_identifier().getText())
+    elif ctx.class_type():
+        parts.append(ctx.class_type().getText())
+    else:
+        parts.append(ctx.getText())
+    dims.extend(ctx.packed_dimension())
+    return 0
+
+
+def type_info(*ctxs):
+    # type: (Any) -> Tuple[str, int, str]
+    """(type text, width, range text) of a declaration's type contexts.
+
+    *ctxs* are the net_type / data_type / implicit_data_type / ... parts
+    of one declaration; None entries are skipped.  The width is the
+    product of the packed dimensions' sizes times the element width, or
+    0 if a bound is not a literal or the type's width is not known
+    (e.g. a typedef or struct).
+    """
+    parts = []  # type: List[str]
+    dims = []  # type: List[Any]
+    base = 1
+    for ctx in ctxs:
+        if ctx is None:
+            continue
+        if _rule(ctx) == "net_type":
+            parts.append(ctx.getText())
+        else:
+            base = _type_parts(ctx, parts, dims)
+    range_spec = "".join(d.getText() for d in dims)
+    width = base or 0
+    for d in dims:
+        size = range_text_width(d.getText()) if d.constant_range() else None
+        if size is None:
+            width = 0
+            break
+        width *= size
+    return " ".join(parts), width, range_spec
+
+
+# ---------------------------------------------------------------------------
+# Parameters
+# ---------------------------------------------------------------------------
+
+def _param_assignments(ctx, ptype, env):
+    # type: (Any, str, Optional[Dict[str, Any]]) -> List[ParameterInfo]
+    """Parameters of a list_of_param_assignments / list_of_type_assignments."""
+    params = []  # type: List[ParameterInfo]
+    if ctx is None:
+        return params
+    if _rule(ctx) == "list_of_type_assignments":
+        for ta in ctx.type_assignment():
+            dt = ta.data_type()
+            params.append(_make_param(ta.type_identifier().getText(),
+                                      dt.getText() if dt else "", ptype, env))
+        return params
+    for pa in ctx.param_assignment():
+        val = pa.constant_param_expression()
+        params.append(_make_param(pa.parameter_identifier().getText(),
+                                  val.getText() if val else "", ptype, env))
+    return params
+
+
+def extract_param_declaration(ctx, ptype="parameter", env=None):
+    # type: (Any, str, Optional[Dict[str, Any]]) -> List[ParameterInfo]
+    """Extract a parameter_declaration / local_parameter_declaration."""
+    return _param_assignments(
+        ctx.list_of_param_assignments() or ctx.list_of_type_assignments(),
+        ptype, env)
+
+
+def extract_parameter_port_list(ctx, env=None):
+    # type: (Any, Optional[Dict[str, Any]]) -> List[ParameterInfo]
+    """Extract the parameters of a ``#( ... )`` parameter_port_list."""
+    params = _param_assignments(ctx.list_of_param_assignments(),
+                                "parameter", env)
+    for ppd in ctx.parameter_port_declaration():
+        if ppd.parameter_declaration():
+            params.extend(extract_param_declaration(
+                ppd.parameter_declaration(), "parameter", env))
+        elif ppd.local_parameter_declaration():
+            params.extend(extract_param_declaration(
+                ppd.local_parameter_declaration(), "localparam", env))
+        else:
+            params.extend(_param_assignments(
+                ppd.list_of_param_assignments() or ppd.list_of_type_assignments(),
+                "parameter", env))
+    return params
+
+
+# ---------------------------------------------------------------------------
+# Ports
+# ---------------------------------------------------------------------------
+
+def _direction(ctx):
+    # type: (Any) -> Tuple[Optional[PortDirection], str]
+    """Direction of a port_direction context, and "ref" for ref ports."""
+    if ctx is None:
+        return None, ""
+    text = ctx.getText()
+    return _DIRECTIONS[text], "ref" if text == "ref" else ""
+
+
+def _interface_type(ctx):
+    # type: (Any) -> str
+    """``intf.modport`` / ``interface.modport`` text of an interface port."""
+    name = ctx.interface_identifier().getText() if ctx.interface_identifier() \
+        else "interface"
+    mp = ctx.modport_identifier()
+    return name + ("." + mp.getText() if mp else "")
+
+
+def _bare(a):
+    # type: (Any) -> bool
+    """True if an ansi_port_declaration is just a (non-ANSI) port name."""
+    return not (a.port_direction() or a.INTERFACE() or a.interface_identifier()
+                or a.net_type() or a.data_type_or_implicit() or a.data_type()
+                or a.implicit_data_type() or a.VAR() or a.INTERCONNECT())
+
+
+def extract_ansi_ports(ctx):
+    # type: (Any) -> List[PortInfo]
+    """Extract ports from an ANSI list_of_port_declarations.
+
+    A port without a direction inherits the previous port's direction
+    (inout for the first); one without a direction or type inherits the
+    previous port's type as well.  Interface ports are recorded as inout
+    with the interface (and modport) as their type.
+
+    A list whose first port has neither direction nor type is a non-ANSI
+    port list; those ports come from the body declarations instead.
+    """
+    ports = []  # type: List[PortInfo]
+    prev = None  # type: Optional[PortInfo]
+    for pd in ctx.port_decl():
+        a = pd.ansi_port_declaration()
+        name = a.port_identifier().getText()
+        if prev is None and _bare(a):
+            return []
+        if a.INTERFACE() or a.interface_identifier():
+            port = PortInfo(name=name, direction=PortDirection.INOUT,
+                            width=0, net_type=_interface_type(a))
+        else:
+            direction, ref = _direction(a.port_direction())
+            typed = [c for c in (a.net_type(), a.data_type_or_implicit(),
+                                 a.data_type(), a.implicit_data_type())
+                     if c is not None]
+            if (direction is None and not typed and not a.VAR()
+                    and not a.INTERCONNECT() and prev is not None):
+                port = PortInfo(name=name, direction=prev.direction,
+                                width=prev.width, range_spec=prev.range_spec,
+                                net_type=prev.net_type)
+            else:
+                type_str, width, range_spec = type_info(*typed)
+                if a.INTERCONNECT():
+                    type_str = ("interconnect " + type_str).strip()
+                if a.expression() is not None or a.LP():
+                    width = 0       # explicit port expression .name(expr)
+                port = PortInfo(
+                    name=name,
+                    direction=direction or (prev.direction if prev
+                                            else PortDirection.INOUT),
+                    width=width, range_spec=range_spec,
+                    net_type=" ".join(filter(None, [ref, type_str])))
+        ports.append(port)
+        prev = port
+    return ports
+
+
+def _port_names(ctx):
+    # type: (Any) -> List[str]
+    """Names in a list_of_port_identifiers / list_of_variable_identifiers /
+    list_of_variable_port_identifiers / list_of_interface_identifiers."""
+    if ctx is None:
+        return []
+    rule = _rule(ctx)
+    if rule == "list_of_port_identifiers":
+        return [p.port_identifier().getText() for p in ctx.port_id()]
+    if rule == "list_of_variable_identifiers":
+        return [v.variable_identifier().getText() for v in ctx.var_id()]
+    if rule == "list_of_variable_port_identifiers":
+        return [v.port_identifier().getText() for v in ctx.var_port_id()]
+    return [i.interface_identifier().getText() for i in ctx.interface_id()]
+
+
+def extract_port_declaration(ctx):
+    # type: (Any) -> List[PortInfo]
+    """Extract ports from a (non-ANSI, module body) port_declaration."""
+    decl = (ctx.input_declaration() or ctx.output_declaration()
+            or ctx.inout_declaration() or ctx.ref_declaration())
+    if decl is None:
+        ipd = ctx.interface_port_declaration()
+        if ipd is None:
+            return []
+        return [PortInfo(name=n, direction=PortDirection.INOUT, width=0,
+                         net_type=_interface_type(ipd))
+                for n in _port_names(ipd.list_of_interface_identifiers())]
+
+    rule = _rule(decl)
+    if rule == "ref_declaration":
+        direction = PortDirection.INOUT
+        type_str, width, range_spec = type_info(decl.variable_port_type())
+        type_str = ("ref " + type_str).strip()
+        names = _port_names(decl.list_of_variable_identifiers())
+    elif rule == "inout_declaration":
+        direction = PortDirection.INOUT
+        type_str, width, range_spec = type_info(decl.net_port_type())
+        names = _port_names(decl.list_of_port_identifiers())
+    else:
+        direction = (PortDirection.INPUT if rule == "input_declaration"
+                     else PortDirection.OUTPUT)
+        type_str, width, range_spec = type_info(
+            decl.net_type(), decl.implicit_data_type(),
+            decl.data_type_or_implicit(), decl.data_type())
+        names = _port_names(
+            decl.list_of_port_identifiers()
+            or (decl.list_of_variable_identifiers()
+                if rule == "input_declaration"
+                else decl.list_of_variable_port_identifiers()))
+
+    return [PortInfo(name=n, direction=direction, width=width,
+                     range_spec=range_spec, net_type=type_str)
+            for n in names]
+
+
+# ---------------------------------------------------------------------------
+# Instances
+# ---------------------------------------------------------------------------
+
+def _array_range(dims):
+    # type: (List[Any]) -> str
+    """Instance-array range text; ``[N]`` is written out as ``[0:N-1]``."""
+    if len(dims) == 1 and dims[0].constant_range() is None:
+        size = dims[0].constant_expression().getText()
+        if size.isdigit():
+            return "[0:%d]" % (int(size) - 1)
+        return "[0:%s-1]" % size
+    return "".join(d.getText() for d in dims)
+
+
+def extract_sv_instances(ctx):
+    # type: (Any) -> List[InstanceInfo]
+    """Extract instances from a module_program_interface_instantiation."""
+    module_type = ctx.instance_identifier().getText()
+
+    params = {}  # type: Dict[str, str]
+    pva = ctx.parameter_value_assignment()
+    lpa = pva.list_of_parameter_assignments() if pva else None
+    if lpa:
+        for npa in lpa.named_parameter_assignment():
+            expr = npa.param_expression()
+            params[npa.parameter_identifier().getText()] = \
+                expr.getText() if expr else ""
+        for idx, opa in enumerate(lpa.ordered_parameter_assignment()):
+            params["#%d" % idx] = opa.param_expression().getText()
+
+    instances = []  # type: List[InstanceInfo]
+    for hi in ctx.hierarchical_instance():
+        noi = hi.name_of_instance()
+        instances.append(InstanceInfo(
+            instance_name=noi.instance_identifier().getText(),
+            module_type=module_type,
+            connections=_sv_connections(hi.list_of_port_connections()),
+            parameters=dict(params),
+            array_range=_array_range(noi.unpacked_dimension()),
+        ))
+    return instances
+
+
+def _sv_connections(ctx):
+    # type: (Any) -> List[ConnectionInfo]
+    """Port connections; ``.name`` connects the same-named signal and
+    ``.*`` is kept as a connection of port ".*"."""
+    connections = []  # type: List[ConnectionInfo]
+    if ctx is None:
+        return connections
+    for npc in ctx.named_port_connection():
+        if npc.DTAS():
+            connections.append(ConnectionInfo(port_name=".*"))
+            continue
+        name = npc.port_identifier().getText()
+        pa = npc.port_assign()
+        if pa is None:
+            signal = name
+        else:
+            signal = pa.expression().getText() if pa.expression() else ""
+        connections.append(ConnectionInfo(port_name=name, signal_expr=signal))
+    for idx, opc in enumerate(ctx.ordered_port_connection()):
+        expr = opc.expression()
+        connections.append(ConnectionInfo(
+            port_name="#%d" % idx, signal_expr=expr.getText() if expr else ""))
+    return connections
+
+
+# ---------------------------------------------------------------------------
+# Generate constructs
+# ---------------------------------------------------------------------------
+
+def _sv_block_name(block):
+    # type: (Any) -> str
+    """Label of a generate_block (``label : begin`` or ``begin : name``)."""
+    if block is None:
+        return ""
+    label = block.generate_block_label()
+    if label:
+        return label.generate_block_identifier().getText()
+    names = block.generate_block_name()
+    return names[0].generate_block_identifier().getText() if names else ""
+
+
+def _step_expr(it):
+    # type: (Any) -> str
+    """Next genvar value of a genvar_iteration, as an expression text."""
+    var = it.genvar_identifier().getText()
+    if it.inc_or_dec_operator():
+        return var + ("+1" if it.inc_or_dec_operator().getText() == "++"
+                      else "-1")
+    rhs = it.genvar_expression().getText()
+    op = it.assignment_operator().getText()
+    if op == "=":
+        return rhs
+    if not rhs.replace("_", "").isalnum():
+        rhs = "(%s)" % rhs
+    return var + op[:-1] + rhs
+
+
+def extract_sv_loop_generate(ctx):
+    # type: (Any) -> Tuple[GenerateScope, Any]
+    """Scope and body generate_block of a loop_generate_construct."""
+    init = ctx.genvar_initialization()
+    block = ctx.generate_block()
+    scope = GenerateScope(
+        kind="for",
+        genvar=init.genvar_identifier().getText(),
+        init=init.constant_expression().getText(),
+        cond=ctx.genvar_expression().getText(),
+        step=_step_expr(ctx.genvar_iteration()),
+        name=_sv_block_name(block),
+    )
+    return scope, block
+
+
+def extract_sv_if_generate(ctx):
+    # type: (Any) -> List[Tuple[GenerateScope, Any]]
+    """(scope, generate_block) per branch of an if_generate_construct."""
+    cond = ctx.constant_expression().getText()
+    return [(GenerateScope(kind="if", cond=cond, negate=idx > 0,
+                           name=_sv_block_name(block)), block)
+            for idx, block in enumerate(ctx.generate_block())]
+
+
+def extract_sv_case_generate(ctx):
+    # type: (Any) -> List[Tuple[GenerateScope, Any]]
+    """(scope, generate_block) per item of a case_generate_construct."""
+    cond = ctx.constant_expression().getText()
+    items = [(tuple(e.getText() for e in item.constant_expression()),
+              item.generate_block())
+             for item in ctx.case_generate_item()]
+    all_labels = tuple(l for labels, _ in items for l in labels)
+    return [(GenerateScope(kind="case", cond=cond, labels=labels,
+                           others=() if labels else all_labels,
+                           name=_sv_block_name(block)), block)
+            for labels, block in items]
+
+
+# ---------------------------------------------------------------------------
+# Nets / variables
+# ---------------------------------------------------------------------------
+
+def extract_sv_net_decl(ctx):
+    # type: (Any) -> List[WireInfo]
+    """Extract nets from a net_declaration."""
+    _, width, range_spec = type_info(
+        ctx.data_type_or_implicit() or ctx.implicit_data_type())
+    if ctx.list_of_net_decl_assignments():
+        names = [a.net_identifier().getText() for a in
+                 ctx.list_of_net_decl_assignments().net_decl_assignment()]
+    else:
+        names = [n.net_identifier().getText() for n in ctx.net_id()]
+    return [WireInfo(name=n, width=width, range_spec=range_spec)
+            for n in names]
+
+
+def extract_sv_data_decl(ctx):
+    # type: (Any) -> List[WireInfo]
+    """Extract logic / reg / bit (and implicitly typed var) variables
+    from a data_declaration; other data types are not signals."""
+    dt = ctx.data_type()
+    if dt is None:
+        dt = ctx.data_type_or_implicit()
+        if dt is None and not ctx.VAR():
+            return []           # typedef, import, nettype
+    inner = dt.data_type() if dt is not None and \
+        _rule(dt) == "data_type_or_implicit" else dt
+    if inner is not None and _rule(inner) == "data_type" \
+            and inner.integer_vector_type() is None:
+        return []
+    _, width, range_spec = type_info(dt)
+    wires = []  # type: List[WireInfo]
+    for vda in ctx.list_of_variable_decl_assignments().variable_decl_assignment():
+        vid = vda.variable_identifier()
+        if vid is not None:
+            wires.append(WireInfo(name=vid.getText(), width=width,
+                                  range_spec=range_spec))
+    return wires
@@ -0,0 +1,284 @@
+"""
+SystemVerilog parsing backend.
+
+Parses with the generated SystemVerilogLexer / SystemVerilogParser
+(``make gen language=systemverilog``) and produces the same ModuleInfo
+objects as the Verilog backend.  Modules, interfaces and programs each
+become a ModuleInfo (``kind`` tells them apart); packages, classes and
+procedural code are parsed but not collected.
+
+VerilogFileParser selects this backend per file (see
+verilog_parser.language_for); nothing here is used directly.
+
+The SystemVerilog grammar is large and ambiguous enough that ANTLR's
+adaptive prediction dominates parsing:
+
+  - a cold parse spends most of its time building the decision DFAs, so
+    this grammar keeps its learned DFAs in the on-disk cache by default
+    (see antlr_cache);
+  - full-context (LL) prediction is never cached, so files are parsed in
+    SLL mode first and only re-parsed with full LL if that fails.
+
+Provides:
+  - SvGrammar   the generated SystemVerilog lexer / parser / visitor
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from .antlr_cache import cached_atns
+from .columnar import columnar_threshold, compact_instances
+from .data_model import GenerateScope, ModuleInfo
+from .sv_extractors import (
+    extract_ansi_ports,
+    extract_param_declaration,
+    extract_parameter_port_list,
+    extract_port_declaration,
+    extract_sv_case_generate,
+    extract_sv_data_decl,
+    extract_sv_if_generate,
+    extract_sv_instances,
+    extract_sv_loop_generate,
+    extract_sv_net_decl,
+)
+from .verilog_parser import SYSTEMVERILOG, _Grammar
+
+logger = logging.getLogger(__name__)
+
+
+class SvGrammar(_Grammar):
+    """The generated SystemVerilog lexer / parser / visitor."""
+
+    language = SYSTEMVERILOG
+    dfa_cache_default = True
+
+    def _load(self):
+        # type: () -> None
+        with cached_atns():
+            from systemverilog.SystemVerilogLexer import SystemVerilogLexer
+            from systemverilog.SystemVerilogParser import SystemVerilogParser
+        from systemverilog.SystemVerilogParserVisitor import (
+            SystemVerilogParserVisitor,
+        )
+
+        from antlr4.atn.PredictionMode import PredictionMode
+        from antlr4.error.ErrorStrategy import (
+            BailErrorStrategy,
+            DefaultErrorStrategy,
+        )
+        from antlr4.error.Errors import ParseCancellationException
+
+        self.PredictionMode = PredictionMode
+        self.BailErrorStrategy = BailErrorStrategy
+        self.DefaultErrorStrategy = DefaultErrorStrategy
+        self.ParseCancellationException = ParseCancellationException
+        self.Lexer = SystemVerilogLexer
+        self.Parser = SystemVerilogParser
+        self.Collector = type("SvModuleCollector",
+                              (_SvModuleCollector, SystemVerilogParserVisitor),
+                              {})
+
+    def parse(self, text):
+        # type: (str) -> Any
+        """Two-stage parse: SLL, then full LL if SLL hits an error.
+
+        A successful SLL parse is the tree LL would build; SLL can only
+        fail valid input on context-sensitive ambiguities, which the LL
+        pass then resolves (or it reports the genuine error).
+        """
+        stream = self.CommonTokenStream(self.Lexer(self.InputStream(text)))
+        parser = self.Parser(stream)
+        parser.removeErrorListeners()
+        parser._interp.predictionMode = self.PredictionMode.SLL
+        parser._errHandler = self.BailErrorStrategy()
+        try:
+            return parser.source_text()
+        except self.ParseCancellationException:
+            logger.debug("SLL parse failed; re-parsing with full LL")
+        stream.seek(0)
+        parser.reset()
+        parser._interp.predictionMode = self.PredictionMode.LL
+        parser._errHandler = self.DefaultErrorStrategy()
+        return parser.source_text()
+
+
+# ---------------------------------------------------------------------------
+# AST Visitor
+# ---------------------------------------------------------------------------
+
+def _skip(self, ctx):
+    """Subtrees that cannot declare ports, parameters, instances or
+    module-level signals are not descended into."""
+    return None
+
+
+class _SvModuleCollector:
+    """Single-pass visitor collecting modules, interfaces and programs.
+
+    Mixed into the generated SystemVerilogParserVisitor by SvGrammar.
+    """
+
+    def __init__(self, file_path=""):
+        # type: (str) -> None
+        self.modules = []  # type: List[ModuleInfo]
+        self._file_path = file_path
+        self._current = None  # type: Optional[ModuleInfo]
+        self._env = {}  # type: Dict[str, Any]  # parameter values so far
+        self._gen_stack = []  # type: List[GenerateScope]
+        self._gen_scopes = ()  # type: tuple  # shared by instances in a block
+        self._columnar = columnar_threshold()
+
+    # --- design units ---
+
+    def visitModule_declaration(self, ctx):
+        if ctx.EXTERN():
+            return None
+        header = ctx.module_header()
+        ident = header.module_identifier() if header else ctx.module_identifier()
+        return self._visit_unit(ctx, "module", header, ident, ctx.module_item())
+
+    def visitInterface_declaration(self, ctx):
+        if ctx.EXTERN():
+            return None
+        header = ctx.interface_header()
+        ident = (header.interface_identifier() if header
+                 else ctx.interface_identifier())
+        return self._visit_unit(ctx, "interface", header, ident,
+                                ctx.interface_item())
+
+    def visitProgram_declaration(self, ctx):
+        if ctx.EXTERN():
+            return None
+        header = ctx.program_header()
+        ident = (header.program_identifier() if header
+                 else ctx.program_identifier())
+        return self._visit_unit(ctx, "program", header, ident,
+                                ctx.program_item())
+
+    def _visit_unit(self, ctx, kind, header, ident, items):
+        # type: (Any, str, Any, Any, list) -> None
+        if ident is None:
+            return None
+        outer = (self._current, self._env, self._gen_stack, self._gen_scopes)
+        mod = ModuleInfo(
+            name=ident.getText(),
+            file_path=self._file_path,
+            line_number=ctx.start.line if ctx.start else 0,
+            kind=kind,
+        )
+        self._current = mod
+        self._env = {}
+        self._gen_stack = []
+        self._gen_scopes = ()
+        try:
+            if header is not None:
+                ppl = header.parameter_port_list()
+                if ppl:
+                    mod.parameters.extend(
+                        extract_parameter_port_list(ppl, self._env))
+                lpd = header.list_of_port_declarations()
+                if lpd:
+                    mod.ports.extend(extract_ansi_ports(lpd))
+            for item in items:
+                self.visit(item)
+        finally:
+            self._current, self._env, self._gen_stack, self._gen_scopes = outer
+        self.modules.append(mod)
+        return None
+
+    # --- declarations ---
+
+    def visitPort_declaration(self, ctx):
+        if self._current is not None:
+            self._current.ports.extend(extract_port_declaration(ctx))
+        return None
+
+    def visitParameter_declaration(self, ctx):
+        if self._current is not None:
+            self._current.parameters.extend(
+                extract_param_declaration(ctx, "parameter", self._env))
+        return None
+
+    def visitLocal_parameter_declaration(self, ctx):
+        if self._current is not None:
+            self._current.parameters.extend(
+                extract_param_declaration(ctx, "localparam", self._env))
+        return None
+
+    def visitNet_declaration(self, ctx):
+        if self._current is not None:
+            self._current.wires.extend(extract_sv_net_decl(ctx))
+        return None
+
+    def visitData_declaration(self, ctx):
+        if self._current is not None:
+            self._current.wires.extend(extract_sv_data_decl(ctx))
+        return None
+
+    # --- instances ---
+
+    def visitModule_program_interface_instantiation(self, ctx):
+        if self._current is None:
+            return None
+        instances = extract_sv_instances(ctx)
+        if self._gen_scopes:
+            for inst in instances:
+                inst.generate = self._gen_scopes
+        self._current.instances.extend(instances)
+        compact_instances(self._current, self._columnar)
+        return None
+
+    # --- generate constructs ---
+
+    def visitLoop_generate_construct(self, ctx):
+        if self._current is None:
+            return None
+        scope, block = extract_sv_loop_generate(ctx)
+        self._visit_generate_block(scope, block)
+        return None
+
+    def visitIf_generate_construct(self, ctx):
+        if self._current is None:
+            return None
+        for scope, block in extract_sv_if_generate(ctx):
+            self._visit_generate_block(scope, block)
+        return None
+
+    def visitCase_generate_construct(self, ctx):
+        if self._current is None:
+            return None
+        for scope, block in extract_sv_case_generate(ctx):
+            self._visit_generate_block(scope, block)
+        return None
+
+    def _visit_generate_block(self, scope, block):
+        # type: (GenerateScope, object) -> None
+        """Visit *block* with *scope* pushed on the generate stack."""
+        self._gen_stack.append(scope)
+        self._gen_scopes = tuple(self._gen_stack)
+        try:
+            self.visitChildren(block)
+        finally:
+            self._gen_stack.pop()
+            self._gen_scopes = tuple(self._gen_stack)
+
+    # --- not collected ---
+
+    visitPackage_declaration = _skip
+    visitClass_declaration = _skip
+    visitInterface_class_declaration = _skip
+    visitFunction_declaration = _skip
+    visitTask_declaration = _skip
+    visitAlways_construct = _skip
+    visitInitial_construct = _skip
+    visitFinal_construct = _skip
+    visitContinuous_assign = _skip
+    visitAssertion_item = _skip
+    visitAssertion_item_declaration = _skip
+    visitCovergroup_declaration = _skip
+    visitChecker_declaration = _skip
+    visitClocking_declaration = _skip
+    visitModport_declaration = _skip
+    visitSpecify_block = _skip
+    visitBind_directive = _skip
+    visitDpi_import_export = _skip
@@ -3,30 +3,26 @@ ANTLR-based Verilog parser that produces data_model objects.
 
 Pipeline:  source text  →  Preprocessor  →  ANTLR Lexer/Parser  →  AST Visitors  →  ModuleInfo list
 
-Supports Verilog-2005 (VerilogParser) grammars.
+Supports Verilog-2005 (VerilogParser) grammars, and SystemVerilog through
+the backend in systemverilog_parser, chosen per file by extension.  The
+ANTLR runtime and the generated grammars are imported on the first
+parse, not on import.
 """
 
 import logging
 import os
+from typing import Any, Dict, List, Optional
 
-logger = logging.getLogger(__name__)
-from typing import List, Optional
-
-from antlr4 import CommonTokenStream, InputStream
-
-from verilog.VerilogLexer import VerilogLexer
-from verilog.VerilogParser import VerilogParser  # noqa: E501
-from verilog.VerilogParserVisitor import VerilogParserVisitor
-
-# Shorthand for typed rule context list accessors (avoids Pylance issues
-# with ANTLR's overloaded methods that return Union[List[T], T]).
-_ModItemCtx = VerilogParser.Module_itemContext
-_PortDeclCtx = VerilogParser.Port_declarationContext
-
-from .data_model import ModuleInfo
+from . import antlr_cache
+from .antlr_cache import cached_atns, dfa_cache_enabled, dfa_size
+from .columnar import columnar_threshold, compact_instances
+from .data_model import GenerateScope, ModuleInfo
 from .extractors import (
+    extract_case_generate,
+    extract_if_generate,
     extract_instances,
     extract_localparams,
+    extract_loop_generate,
     extract_param_assignments,
     extract_parameters,
     extract_ports_from_declaration,
@@ -35,19 +31,170 @@ from .extractors import (
 )
 from .preprocessor import Preprocessor
 
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Grammar loading
+# ---------------------------------------------------------------------------
+
+VERILOG = "verilog"
+SYSTEMVERILOG = "systemverilog"
+LANGUAGES = ("auto", VERILOG, SYSTEMVERILOG)
+
+# Parsed with the SystemVerilog grammar when the language is "auto"
+SV_EXTENSIONS = (".sv", ".svh")
+
+
+def language_for(filename, language="auto"):
+    # type: (str, str) -> str
+    """Grammar to parse *filename* with: *language*, or by extension."""
+    if language != "auto":
+        return language
+    ext = os.path.splitext(filename)[1].lower()
+    return SYSTEMVERILOG if ext in SV_EXTENSIONS else VERILOG
+
+
+class _Grammar:
+    """
+    The ANTLR runtime and the generated Verilog lexer / parser / visitor.
+
+    Importing them takes most of a parse-free run's start-up time (the
+    generated parser alone deserializes a large ATN), so they are loaded
+    on the first parse only; see grammar().  ATN deserialization is
+    served from the on-disk cache of antlr_cache.
+
+    With the DFA cache enabled (enable_dfa_cache(), or by default for
+    grammars setting *dfa_cache_default*), the prediction DFAs learned in
+    earlier runs are loaded with the grammar, and save_dfa_cache() writes
+    back what this run has added.
+    """
+
+    language = VERILOG
+    dfa_cache_default = False
+
+    def __init__(self):
+        # type: () -> None
+        from antlr4 import CommonTokenStream, InputStream
+        self.InputStream = InputStream
+        self.CommonTokenStream = CommonTokenStream
+        self._load()
+        self.dfa_cache = False  # learned DFAs loaded from / saved to disk
+        self._dfa_sizes = {}  # type: Dict[str, int]  # states when loaded / saved
+
+    def _load(self):
+        # type: () -> None
+        with cached_atns():
+            from verilog.VerilogLexer import VerilogLexer
+            from verilog.VerilogParser import VerilogParser
+        from verilog.VerilogParserVisitor import VerilogParserVisitor
+
+        self.Lexer = VerilogLexer
+        self.Parser = VerilogParser
+        self.Collector = type("ModuleCollector",
+                              (_ModuleCollector, VerilogParserVisitor), {
+            # Typed rule context list accessors (avoids Pylance issues
+            # with ANTLR's overloaded methods returning Union[List[T], T])
+            "_mod_item_ctx": VerilogParser.Module_itemContext,
+            "_port_decl_ctx": VerilogParser.Port_declarationContext,
+        })
+
+    def parse(self, text):
+        # type: (str) -> Any
+        """Lex and parse *text* into a source_text tree."""
+        parser = self.Parser(self.CommonTokenStream(
+            self.Lexer(self.InputStream(text))))
+        parser.removeErrorListeners()
+        return parser.source_text()
+
+    def load_dfa(self, directory=None):
+        # type: (Optional[str]) -> None
+        """Install the DFAs cached by earlier runs."""
+        for cls in (self.Lexer, self.Parser):
+            antlr_cache.load_dfa_cache(cls, directory)
+            self._dfa_sizes[cls.__name__] = dfa_size(cls)
+        self.dfa_cache = True
+
+    def save_dfa(self, directory=None):
+        # type: (Optional[str]) -> None
+        """Write the learned DFAs to the cache if they have grown."""
+        for cls in (self.Lexer, self.Parser):
+            size = dfa_size(cls)
+            if size > self._dfa_sizes.get(cls.__name__, 0):
+                antlr_cache.save_dfa_cache(cls, directory)
+                self._dfa_sizes[cls.__name__] = size
+
+
+_GRAMMARS = {}  # type: Dict[str, _Grammar]
+_DFA_CACHE = False
+
+
+def grammar(language=VERILOG):
+    # type: (str) -> _Grammar
+    """The grammar for *language*, imported on first use.
+
+    If the SystemVerilog grammar has not been generated, the Verilog
+    grammar stands in for it (with a warning).
+    """
+    g = _GRAMMARS.get(language)
+    if g is None:
+        if language == SYSTEMVERILOG:
+            try:
+                from .systemverilog_parser import SvGrammar
+                g = SvGrammar()
+            except ImportError as e:
+                logger.warning("SystemVerilog grammar unavailable (%s); "
+                               "parsing .sv files as Verilog", e)
+                g = grammar(VERILOG)
+        else:
+            g = _Grammar()
+        if not g.dfa_cache and (_DFA_CACHE
+                                or dfa_cache_enabled(g.dfa_cache_default)):
+            g.load_dfa()
+        _GRAMMARS[language] = g
+    return g
+
+
+def enable_dfa_cache():
+    # type: () -> None
+    """Persist learned parser DFAs across runs (see save_dfa_cache())."""
+    global _DFA_CACHE
+    _DFA_CACHE = True
+    for g in _GRAMMARS.values():
+        if not g.dfa_cache:
+            g.load_dfa()
+
+
+def save_dfa_cache():
+    # type: () -> None
+    """Save the learned DFAs of loaded grammars that use the cache."""
+    for g in set(_GRAMMARS.values()):
+        if g.dfa_cache:
+            g.save_dfa()
+
 
 # ---------------------------------------------------------------------------
 # AST Visitor — thin orchestrator delegating to extractors
 # ---------------------------------------------------------------------------
 
-class _ModuleCollector(VerilogParserVisitor):
-    """Single-pass visitor that collects all module information."""
+class _ModuleCollector:
+    """Single-pass visitor that collects all module information.
+
+    Mixed into the generated VerilogParserVisitor by _Grammar.
+    """
+
+    _mod_item_ctx = None  # type: Any
+    _port_decl_ctx = None  # type: Any
 
     def __init__(self, file_path=""):
         # type: (str) -> None
         self.modules = []  # type: List[ModuleInfo]
         self._file_path = file_path
         self._current = None  # type: Optional[ModuleInfo]
+        self._env = {}  # type: Dict[str, Any]  # parameter values so far
+        self._gen_stack = []  # type: List[GenerateScope]
+        self._gen_scopes = ()  # type: tuple  # shared by instances in a block
+        self._columnar = columnar_threshold()
 
     def visitModule_declaration(self, ctx):
         ident = ctx.module_identifier()
@@ -60,20 +207,21 @@ class _ModuleCollector(VerilogParserVisitor):
             line_number=ctx.start.line if ctx.start else 0,
         )
         self._current = mod
+        self._env = {}
 
         # parameters from module_parameter_port_list
         param_list = ctx.module_parameter_port_list()
         if param_list:
-            mod.parameters.extend(extract_parameters(param_list))
+            mod.parameters.extend(extract_parameters(param_list, self._env))
 
         # ports from list_of_port_declarations (ANSI style)
         port_list = ctx.list_of_port_declarations()
         if port_list:
-            for pd in port_list.getTypedRuleContexts(_PortDeclCtx):
+            for pd in port_list.getTypedRuleContexts(self._port_decl_ctx):
                 mod.ports.extend(extract_ports_from_declaration(pd))
 
         # visit module body for instances, non-ANSI ports, wires
-        for item in ctx.getTypedRuleContexts(_ModItemCtx):
+        for item in ctx.getTypedRuleContexts(self._mod_item_ctx):
             self.visit(item)
 
         self.modules.append(mod)
@@ -93,7 +241,7 @@ class _ModuleCollector(VerilogParserVisitor):
         param_decl = ctx.parameter_declaration()
         if param_decl:
             mod.parameters.extend(
-                extract_param_assignments(param_decl, "parameter"))
+                extract_param_assignments(param_decl, "parameter", self._env))
             return None
 
         return self.visitChildren(ctx)
@@ -105,12 +253,32 @@ class _ModuleCollector(VerilogParserVisitor):
 
         lp = ctx.local_parameter_declaration()
         if lp:
-            mod.parameters.extend(extract_localparams(lp))
+            mod.parameters.extend(extract_localparams(lp, self._env))
             return None
 
         mi = ctx.module_instantiation()
         if mi:
-            mod.instances.extend(extract_instances(mi))
+            instances = extract_instances(mi)
+            if self._gen_scopes:
+                for inst in instances:
+                    inst.generate = self._gen_scopes
+            mod.instances.extend(instances)
+            compact_instances(mod, self._columnar)
+            return None
+
+        lg = ctx.loop_generate_construct()
+        if lg:
+            scope, block = extract_loop_generate(lg)
+            self._visit_generate_block(scope, block)
+            return None
+
+        cg = ctx.conditional_generate_construct()
+        if cg:
+            ig = cg.if_generate_construct()
+            branches = (extract_if_generate(ig) if ig
+                        else extract_case_generate(cg.case_generate_construct()))
+            for scope, block in branches:
+                self._visit_generate_block(scope, block)
             return None
 
         mgid = ctx.module_or_generate_item_declaration()
@@ -126,6 +294,17 @@ class _ModuleCollector(VerilogParserVisitor):
 
         return self.visitChildren(ctx)
 
+    def _visit_generate_block(self, scope, block):
+        # type: (GenerateScope, object) -> None
+        """Visit *block* with *scope* pushed on the generate stack."""
+        self._gen_stack.append(scope)
+        self._gen_scopes = tuple(self._gen_stack)
+        try:
+            self.visitChildren(block)
+        finally:
+            self._gen_stack.pop()
+            self._gen_scopes = tuple(self._gen_stack)
+
 
 # ---------------------------------------------------------------------------
 # Public API
@@ -133,14 +312,20 @@ class _ModuleCollector(VerilogParserVisitor):
 
 class VerilogFileParser:
     """
-    Parse one or more Verilog files into ModuleInfo objects.
+    Parse one or more Verilog / SystemVerilog files into ModuleInfo objects.
 
-    Integrates preprocessor + ANTLR parsing in a single pipeline.
+    Integrates preprocessor + ANTLR parsing in a single pipeline.  Each
+    file is parsed with the grammar *language* names, or with "auto"
+    (default) by its extension: SystemVerilog for .sv / .svh, Verilog
+    otherwise.
     """
 
-    def __init__(self, preprocessor=None):
-        # type: (Optional[Preprocessor]) -> None
+    def __init__(self, preprocessor=None, language="auto"):
+        # type: (Optional[Preprocessor], str) -> None
+        if language not in LANGUAGES:
+            raise ValueError("Unknown language: %r" % language)
         self.preprocessor = preprocessor or Preprocessor()
+        self.language = language
         self.errors = []  # type: List[str]
 
     def parse_file(self, filepath):
@@ -170,6 +355,17 @@ class VerilogFileParser:
 
         return self._parse_text(text, filename)
 
+    def parse_preprocessed(self, text, filename, line_offset=0):
+        # type: (str, str, int) -> List[ModuleInfo]
+        """Parse already-preprocessed *text*, e.g. one module region cut
+        out of a larger file.  Module line numbers are shifted by
+        *line_offset*."""
+        modules = self._parse_text(text, filename)
+        if line_offset:
+            for mod in modules:
+                mod.line_number += line_offset
+        return modules
+
     def parse_files(self, filepaths):
         # type: (List[str]) -> List[ModuleInfo]
         """Parse multiple files. Returns all modules found."""
@@ -181,15 +377,11 @@ class VerilogFileParser:
     def _parse_text(self, text, filename):
         # type: (str, str) -> List[ModuleInfo]
         """Run ANTLR lexer + parser + visitor."""
+        g = grammar(language_for(filename, self.language))
         try:
-            lexer = VerilogLexer(InputStream(text))
-            stream = CommonTokenStream(lexer)
-            parser = VerilogParser(stream)
-            parser.removeErrorListeners()
-
-            tree = parser.source_text()
+            tree = g.parse(text)
 
-            visitor = _ModuleCollector(file_path=filename)
+            visitor = g.Collector(file_path=filename)
             visitor.visit(tree)
 
             return visitor.modules
@@ -0,0 +1,358 @@
+"""
+Watch mode: rescan on every save and report what changed.
+
+A ScanSession holds the parsed design; each batch of file-system events
+refreshes it, which re-parses only the changed files and the files that
+`include them.  The hierarchy / filelist are then recomputed from the
+in-memory graph and compared with the previous result.
+
+Change detection uses inotify (via ctypes, Linux) when available and
+falls back to polling stat signatures of the scanned files, their
+includes and the watched directories.  Polling is also the choice for
+network file systems, where inotify does not see remote writes.
+
+Provides:
+  - InotifyWatcher   inotify-based recursive directory watcher
+  - PollingWatcher   stat-polling fallback
+  - make_watcher()   inotify if possible, else polling
+  - result_diff()    JSON-friendly diff of two scan results
+  - watch()          event loop driving a ScanSession
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .file_discovery import DEFAULT_EXCLUDES
+from .scan_cache import _stat_sig
+from .session import ScanSession
+
+logger = logging.getLogger(__name__)
+
+
+# Quiet period that ends a burst of events (editors write in steps)
+DEBOUNCE = 0.1
+
+_SKIP_DIRS = frozenset(p.rstrip("/") for p in DEFAULT_EXCLUDES)
+
+
+def _walk_dirs(roots):
+    # type: (Iterable[str]) -> List[str]
+    """All directories under *roots* (VCS metadata skipped)."""
+    out = []  # type: List[str]
+    seen = set()  # type: Set[str]
+    stack = [os.path.abspath(r) for r in roots if os.path.isdir(r)]
+    while stack:
+        d = stack.pop()
+        if d in seen:
+            continue
+        seen.add(d)
+        out.append(d)
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.name not in _SKIP_DIRS and e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+        except OSError:
+            continue
+    return out
+
+
+# ---------------------------------------------------------------------------
+# inotify
+# ---------------------------------------------------------------------------
+
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF)
+# Events that add or remove files rather than rewrite them
+_STRUCTURAL = _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Recursive directory watcher on Linux inotify.
+
+    Raises OSError if inotify is not available.
+    """
+
+    def __init__(self, roots):
+        # type: (Iterable[str]) -> None
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify not available")
+        self._libc = libc
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._wd = {}  # type: Dict[int, str]
+        for d in _walk_dirs(roots):
+            self._add(d)
+
+    def _add(self, path):
+        # type: (str) -> None
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            logger.warning("Cannot watch %s: %s", path,
+                           os.strerror(ctypes.get_errno()))
+            return
+        self._wd[wd] = path
+
+    def wait(self, timeout=None):
+        # type: (Optional[float]) -> Tuple[Set[str], bool]
+        """Block until events arrive (or *timeout*), then drain a burst.
+
+        Returns:
+            (changed paths, structural) — *structural* is True if files
+            or directories were created, deleted or moved.
+        """
+        changed = set()  # type: Set[str]
+        structural = False
+        wait = timeout
+        while True:
+            ready, _, _ = select.select([self._fd], [], [], wait)
+            if not ready:
+                return changed, structural
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            off = 0
+            while off < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, off)
+                off += _EVENT.size
+                name = buf[off:off + length].rstrip(b"\0")
+                off += length
+                if mask & _IN_Q_OVERFLOW:
+                    structural = True
+                    continue
+                base = self._wd.get(wd)
+                if base is None:
+                    continue
+                path = os.path.join(base, os.fsdecode(name)) if name else base
+                changed.add(path)
+                if mask & _STRUCTURAL:
+                    structural = True
+                if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    for d in _walk_dirs([path]):
+                        self._add(d)
+                if mask & _IN_DELETE_SELF:
+                    self._wd.pop(wd, None)
+            wait = DEBOUNCE
+
+    def close(self):
+        # type: () -> None
+        os.close(self._fd)
+
+
+# ---------------------------------------------------------------------------
+# Polling
+# ---------------------------------------------------------------------------
+
+class PollingWatcher:
+    """
+    Stat-polling watcher.
+
+    *files_fn* returns the files to watch (the scanned files and their
+    includes); directories under *roots* are polled too, since their
+    mtime changes when entries are added or removed.
+    """
+
+    def __init__(self, roots, files_fn, interval=1.0):
+        # type: (Iterable[str], Callable[[], Iterable[str]], float) -> None
+        self.roots = list(roots)
+        self.files_fn = files_fn
+        self.interval = interval
+        self._dirs = _walk_dirs(self.roots)
+        self._snap = self._snapshot()
+
+    def _snapshot(self):
+        # type: () -> Dict[str, Optional[List[int]]]
+        snap = {d: _stat_sig(d) for d in self._dirs}
+        for fp in self.files_fn():
+            snap[fp] = _stat_sig(fp)
+        return snap
+
+    def wait(self, timeout=None):
+        # type: (Optional[float]) -> Tuple[Set[str], bool]
+        """Poll until something changed (or *timeout*); see InotifyWatcher."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snap = self._snapshot()
+            changed = set(p for p in set(snap) | set(self._snap)
+                          if snap.get(p) != self._snap.get(p))
+            if changed:
+                structural = any(p in self._dirs or snap.get(p) is None
+                                 for p in changed)
+                if structural:
+                    self._dirs = _walk_dirs(self.roots)
+                    snap = self._snapshot()
+                self._snap = snap
+                return changed, structural
+            if deadline is not None and time.monotonic() >= deadline:
+                return set(), False
+            time.sleep(self.interval)
+
+    def rescan(self):
+        # type: () -> None
+        """Re-baseline after the watched file set changed."""
+        self._snap = self._snapshot()
+
+    def close(self):
+        # type: () -> None
+        pass
+
+
+def make_watcher(session, poll=False, interval=1.0):
+    # type: (ScanSession, bool, float) -> Any
+    """inotify watcher over the session's roots, or a polling fallback."""
+    roots = session.watch_roots()
+    if not poll:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            logger.info("inotify unavailable (%s), polling", e)
+    return PollingWatcher(roots, session.dependencies, interval)
+
+
+# ---------------------------------------------------------------------------
+# Diffs
+# ---------------------------------------------------------------------------
+
+def _edges(modules):
+    # type: (Dict[str, Any]) -> Set[Tuple[str, str, str]]
+    return set((m.name, i.instance_name, i.module_type)
+               for m in modules.values() for i in m.instances)
+
+
+def _list_diff(old, new):
+    # type: (Iterable[str], Iterable[str]) -> Dict[str, List[str]]
+    old, new = set(old), set(new)
+    return {"added": sorted(new - old), "removed": sorted(old - new)}
+
+
+def result_diff(old_modules, new_modules, old_result, new_result):
+    # type: (Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]) -> Dict[str, Any]
+    """What changed between two scans of the same design.
+
+    Modules count as changed when their parsed content differs; unchanged
+    files keep their ModuleInfo objects, so most comparisons are identity
+    checks.  Hierarchy changes are reported as instance edges
+    ``parent.instance:child``.
+    """
+    changed = sorted(
+        name for name in set(old_modules) & set(new_modules)
+        if old_modules[name] is not new_modules[name]
+        and old_modules[name].to_full_dict() != new_modules[name].to_full_dict())
+    edges = _list_diff(
+        ("%s.%s:%s" % e for e in _edges(old_modules)),
+        ("%s.%s:%s" % e for e in _edges(new_modules)))
+    diff = {
+        "modules": dict(_list_diff(old_modules, new_modules), changed=changed),
+        "instances": edges,
+        "unresolved": _list_diff(old_result.get("unresolved", []),
+                                 new_result.get("unresolved", [])),
+    }  # type: Dict[str, Any]
+    if old_result.get("top") != new_result.get("top"):
+        diff["top"] = new_result.get("top")
+
+    old_fl = (old_result.get("filelist_info") or {}).get("filelist", [])
+    new_fl = (new_result.get("filelist_info") or {}).get("filelist", [])
+    fl = _list_diff(old_fl, new_fl)  # type: Dict[str, Any]
+    if not fl["added"] and not fl["removed"] and old_fl != new_fl:
+        fl["reordered"] = True
+    diff["filelist"] = fl
+    return diff
+
+
+def diff_is_empty(diff):
+    # type: (Dict[str, Any]) -> bool
+    """True if *diff* (from result_diff) reports no change."""
+    for key, val in diff.items():
+        if key == "files":
+            continue
+        if not isinstance(val, dict) or any(val.values()):
+            return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Event loop
+# ---------------------------------------------------------------------------
+
+def watch(session, emit, mode="hierarchy", top_module="", base_dir="",
+          top_params=None, poll=False, interval=1.0, max_updates=None,
+          timeout=None):
+    # type: (ScanSession, Callable[[Dict[str, Any], Dict[str, Any]], None], str, str, str, Optional[Dict[str, str]], bool, float, Optional[int], Optional[float]) -> int
+    """Watch the session's files and emit a diff after every change.
+
+    *emit* is called as ``emit(diff, result)`` for each update that
+    changed the files; ``diff["files"]`` holds the session refresh diff
+    (added / removed / changed files) and *result* is the fresh query
+    result.
+
+    Args:
+        session:     scanned design to keep current
+        emit:        update callback
+        mode, top_module, base_dir, top_params: the query to re-run
+        poll:        force the polling watcher
+        interval:    polling period in seconds
+        max_updates: stop after this many updates (None: until Ctrl-C)
+        timeout:     stop after this many idle seconds (None: never)
+
+    Returns:
+        Number of updates emitted.
+    """
+    query = dict(mode=mode, top_module=top_module, base_dir=base_dir,
+                 top_params=top_params)
+    result = session.query(**query)
+    watcher = make_watcher(session, poll=poll, interval=interval)
+    updates = 0
+    try:
+        while max_updates is None or updates < max_updates:
+            paths, structural = watcher.wait(timeout)
+            if not paths and not structural:
+                if timeout is not None:
+                    break
+                continue
+            old_modules = session.modules
+            files = session.refresh(rediscover=structural)
+            if isinstance(watcher, PollingWatcher):
+                watcher.rescan()
+            if not any(files.values()):
+                continue
+            new = session.query(**query)
+            diff = result_diff(old_modules, session.modules, result, new)
+            diff["files"] = files
+            result = new
+            emit(diff, result)
+            updates += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return updates
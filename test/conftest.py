@@ -6,3 +6,16 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def write_file(root, rel, text):
+    """Write *text* to *root*/*rel*, creating directories, and return the
+    path.  The mtime is pushed a second ahead so a rewrite is seen as a
+    change even on file systems with coarse timestamps."""
+    path = os.path.join(str(root), rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    return path
@@ -0,0 +1,178 @@
+"""Test the on-disk ATN and DFA caches."""
+import io
+import os
+
+import pytest
+
+pytest.importorskip("antlr4")
+pytest.importorskip("verilog.VerilogParser")
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.atn.ATNDeserializer import ATNDeserializer
+from antlr4.dfa.DFA import DFA
+
+from src.__main__ import main
+from src.antlr_cache import (
+    cached_atns, dfa_path, dfa_size, dump_atn, dump_dfas, load_atn,
+    load_dfa_cache, load_dfas, save_dfa_cache,
+)
+from src.verilog_parser import grammar
+
+from verilog.VerilogParser import serializedATN
+
+
+def _shape(atn):
+    """Structure of an ATN as plain data, for comparisons."""
+    return (
+        [(type(s).__name__, s.ruleIndex,
+          [(type(t).__name__, t.target.stateNumber) for t in s.transitions])
+         for s in atn.states],
+        [s.stateNumber for s in atn.decisionToState],
+        [s.stateNumber for s in atn.ruleToStartState],
+    )
+
+
+def test_roundtrip_preserves_structure():
+    atn = ATNDeserializer().deserialize(serializedATN())
+    f = io.BytesIO()
+    dump_atn(atn, f)
+    f.seek(0)
+    loaded = load_atn(f)
+    assert _shape(loaded) == _shape(atn)
+    # References stay shared, not copied
+    state = loaded.decisionToState[0]
+    assert loaded.states[state.stateNumber] is state
+    assert state.atn is loaded
+
+
+def test_cache_miss_then_hit(tmp_path):
+    with cached_atns(str(tmp_path)):
+        first = ATNDeserializer().deserialize(serializedATN())
+    files = os.listdir(str(tmp_path / "atn"))
+    assert len(files) == 1 and files[0].endswith(".atn")
+
+    with cached_atns(str(tmp_path)):
+        second = ATNDeserializer().deserialize(serializedATN())
+    assert second is not first
+    assert _shape(second) == _shape(first)
+
+    # The hook is removed on exit
+    assert ATNDeserializer.deserialize.__name__ == "deserialize"
+    assert ATNDeserializer.deserialize.__module__.startswith("antlr4")
+
+
+def test_parse_with_cached_atn(tmp_path):
+    g = grammar()
+    with cached_atns(str(tmp_path)):
+        ATNDeserializer().deserialize(serializedATN())
+        atn = ATNDeserializer().deserialize(serializedATN())
+    parser_cls = type("CachedParser", (g.Parser,), {
+        "atn": atn,
+        "decisionsToDFA": [DFA(s, i) for i, s in enumerate(atn.decisionToState)],
+    })
+    text = "module m(input a, output b);\n  sub u0 (.x(a));\nendmodule\n"
+
+    def _parse(cls):
+        parser = cls(CommonTokenStream(g.Lexer(InputStream(text))))
+        parser.removeErrorListeners()
+        visitor = g.Collector(file_path="m.v")
+        visitor.visit(parser.source_text())
+        return [m.to_full_dict() for m in visitor.modules]
+
+    assert _parse(parser_cls) == _parse(g.Parser)
+
+
+def test_corrupt_entry_falls_back(tmp_path):
+    with cached_atns(str(tmp_path)):
+        ATNDeserializer().deserialize(serializedATN())
+    (path,) = (tmp_path / "atn").iterdir()
+    path.write_bytes(b"not a pickle")
+    with cached_atns(str(tmp_path)):
+        atn = ATNDeserializer().deserialize(serializedATN())
+    assert atn.states
+    assert path.read_bytes() != b"not a pickle"    # rewritten
+
+
+def test_disabled_by_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("RTL_SCAN_ATN_CACHE", "0")
+    with cached_atns(str(tmp_path)):
+        ATNDeserializer().deserialize(serializedATN())
+    assert not (tmp_path / "atn").exists()
+
+
+# ---------------------------------------------------------------------------
+# Learned DFAs
+# ---------------------------------------------------------------------------
+
+_TEXT = """module m #(parameter W = 8) (input [W-1:0] a, output b);
+  wire [W*2-1:0] t = {a, a} + 1;
+  sub #(.N(W)) u0 (.x(a), .y(t[3:0]));
+  generate if (W > 4) begin : g
+    sub u1 (.x(a));
+  end endgenerate
+endmodule
+"""
+
+
+def _modules(g, lexer_cls, parser_cls, text=_TEXT):
+    parser = parser_cls(CommonTokenStream(lexer_cls(g.InputStream(text))))
+    parser.removeErrorListeners()
+    visitor = g.Collector(file_path="m.v")
+    visitor.visit(parser.source_text())
+    return [m.to_full_dict() for m in visitor.modules]
+
+
+def _fresh(cls, dfas=None):
+    """Subclass of a generated recognizer with its own DFAs."""
+    atn = cls.atn
+    return type(cls.__name__, (cls,), {
+        "__module__": cls.__module__,
+        "decisionsToDFA": dfas if dfas is not None else
+        [DFA(s, i) for i, s in enumerate(atn.decisionToState)],
+    })
+
+
+def test_dfa_roundtrip_parses_identically():
+    g = grammar()
+    lexer, parser = _fresh(g.Lexer), _fresh(g.Parser)
+    expected = _modules(g, lexer, parser)
+    sizes = (dfa_size(lexer), dfa_size(parser))
+    assert all(sizes)
+
+    loaded = []
+    for cls in (lexer, parser):
+        f = io.BytesIO()
+        dump_dfas(cls, f)
+        f.seek(0)
+        loaded.append(_fresh(cls, load_dfas(cls, f)))
+    assert (dfa_size(loaded[0]), dfa_size(loaded[1])) == sizes
+    assert _modules(g, *loaded) == expected
+    # Everything the text needs was learned already
+    assert (dfa_size(loaded[0]), dfa_size(loaded[1])) == sizes
+
+
+def test_dfa_cache_file(tmp_path):
+    g = grammar()
+    lexer, parser = _fresh(g.Lexer), _fresh(g.Parser)
+    assert not load_dfa_cache(parser, str(tmp_path))
+    _modules(g, lexer, parser)
+    save_dfa_cache(parser, str(tmp_path))
+    assert os.path.isfile(dfa_path(parser, str(tmp_path)))
+
+    warm = _fresh(g.Parser)
+    assert load_dfa_cache(warm, str(tmp_path))
+    assert dfa_size(warm) == dfa_size(parser)
+
+    # Data for another grammar is rejected
+    os.replace(dfa_path(parser, str(tmp_path)), dfa_path(lexer, str(tmp_path)))
+    assert not load_dfa_cache(_fresh(g.Lexer), str(tmp_path))
+
+
+def test_cli_dfa_cache(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("RTL_SCAN_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("src.verilog_parser._DFA_CACHE", False)
+    (tmp_path / "m.v").write_text(_TEXT)
+    assert main([str(tmp_path / "m.v"), "-m", "modules", "-j", "-q",
+                 "--dfa-cache"]) == 0
+    names = sorted(os.listdir(str(tmp_path / "cache" / "dfa")))
+    assert [n.split("-")[0] for n in names] == ["VerilogLexer", "VerilogParser"]
@@ -0,0 +1,66 @@
+"""Tests for clock / reset propagation through the hierarchy."""
+from src.clock_domains import propagate_clocks
+from src.design_db import scan_design
+from src.formatter import format_ports
+from src.rtl_scan import rtl_scan
+
+
+def _tree(root):
+    (root / "rtl.v").write_text(
+        "module chip(input i_clk, input i_rst_n, input [7:0] din,\n"
+        "            output clk_out);\n"
+        "  wire clk_div;\n"
+        "  core u_core0 (.clk_core(i_clk), .rst_core_n(i_rst_n),\n"
+        "                .d(din), .o_div(clk_div));\n"
+        "  core u_core1 (.clk_core(i_clk), .rst_core_n(i_rst_n),\n"
+        "                .d(din));\n"
+        "  sink u_sink (.ck(clk_div));\n"
+        "  gen u_gen (.clk(clk_out));\n"
+        "endmodule\n"
+        "module core(input clk_core, input rst_core_n, input [7:0] d,\n"
+        "            output o_div);\n"
+        "  regs u_r (.ck(clk_core), .arst(rst_core_n), .d(d));\n"
+        "endmodule\n"
+        "module regs(input ck, input arst, input [7:0] d); endmodule\n"
+        "module sink(input ck); endmodule\n"
+        "module gen(output clk);\n"
+        "  bufx u_b (.z(clk));\n"
+        "endmodule\n"
+        "module bufx(output z); endmodule\n"
+        "module other(input x); gen u (.clk(x)); endmodule\n")
+
+
+def test_propagation(tmp_path):
+    _tree(tmp_path)
+    result = rtl_scan(directory=str(tmp_path), mode="ports", top_module="chip")
+    prop = result["clock_propagation"]
+    clocks = {e["source"]: e for e in prop["clocks"]}
+    # Renamed at every level, each signal once despite two core instances
+    assert clocks["i_clk"]["ports"] == ["core.clk_core", "regs.ck"]
+    assert clocks["i_clk"]["wires"] == []
+    # An output clock reaches the child output driving it, and nothing in
+    # modules outside the top's hierarchy
+    assert clocks["clk_out"]["ports"] == ["gen.clk", "bufx.z"]
+    resets = prop["resets"]
+    assert [(e["source"], e["active"], e["ports"]) for e in resets] == \
+        [("i_rst_n", "low", ["core.rst_core_n", "regs.arst"])]
+    # The regs data port is not reached by any clock or reset
+    assert "regs.d" not in clocks["i_clk"]["ports"]
+    text = format_ports(result)
+    assert "Propagation" in text and "core.clk_core" in text
+
+
+def test_output_drives_parent_wires(tmp_path):
+    _tree(tmp_path)
+    # gen also drives a wire inside core: reaching gen's output from the
+    # top labels that wire and what it feeds in every core instance
+    (tmp_path / "rtl.v").write_text((tmp_path / "rtl.v").read_text().replace(
+        "  regs u_r (", "  wire gclk;\n  gen u_g (.clk(gclk));\n"
+        "  sink u_s (.ck(gclk));\n  regs u_r ("))
+    modules = scan_design(directory=str(tmp_path)).modules
+    clocks = {e["source"]: e
+              for e in propagate_clocks("chip", modules)["clocks"]}
+    assert clocks["clk_out"]["wires"] == ["core.gclk"]
+    assert clocks["clk_out"]["ports"] == ["gen.clk", "bufx.z", "sink.ck"]
+    assert "other.x" not in clocks["clk_out"]["ports"]
+    assert propagate_clocks("missing", modules) == {"clocks": [], "resets": []}
@@ -0,0 +1,139 @@
+"""Tests for the binary ModuleInfo codec."""
+import io
+import json
+import pickle
+
+import pytest
+
+from src.codec import (
+    CODEC_VERSION,
+    CodecError,
+    ModuleWriter,
+    decode_module,
+    decode_modules,
+    encode_module,
+    encode_modules,
+    iter_modules,
+)
+from src.columnar import InstanceTable
+from src.data_model import (
+    ConnectionInfo,
+    GenerateScope,
+    InstanceInfo,
+    ModuleInfo,
+    ParameterInfo,
+    PortInfo,
+    WireInfo,
+)
+from src.port_classify import PortDirection
+from src.rtl_scan import rtl_scan
+from src.scan_cache import ScanCache
+
+_SCOPES = (
+    GenerateScope(kind="for", cond="i<4", name="g", genvar="i", init="0",
+                  step="i+1"),
+    GenerateScope(kind="case", cond="MODE", labels=("1", "2")),
+    GenerateScope(kind="case", cond="MODE", others=("1", "2")),
+    GenerateScope(kind="if", cond="EN", negate=True),
+)
+
+
+def _module(name="top", n=5):
+    return ModuleInfo(
+        name=name, file_path="/rtl/%s.sv" % name, line_number=12,
+        kind="interface",
+        ports=[PortInfo("clk", PortDirection.INPUT, comment="// clock"),
+               PortInfo("dout", PortDirection.OUTPUT, 8, "[7:0]", "logic"),
+               PortInfo("pad", PortDirection.INOUT, -3)],
+        parameters=[ParameterInfo("W", "8", resolved=8),
+                    ParameterInfo("BIG", "64'hFFFF_FFFF_FFFF",
+                                  resolved=0xFFFFFFFFFFFF),
+                    ParameterInfo("NEG", "-5", "localparam", -5),
+                    ParameterInfo("T", "foo")],
+        instances=[InstanceInfo(
+            "u_%d" % i, "leaf", [ConnectionInfo("d", "x[%d]" % i),
+                                 ConnectionInfo("q")],
+            {"W": "8"} if i % 2 else {}, "[0:3]" if i == 1 else "",
+            _SCOPES[:i % 4]) for i in range(n)],
+        wires=[WireInfo("w", 4, "[3:0]"), WireInfo("ü_unicode")],
+    )
+
+
+def test_roundtrip_lossless():
+    mod = _module()
+    back = decode_module(encode_module(mod))
+    assert back == mod
+    assert back.ports[0].comment == "// clock"
+    assert back.parameters[1].resolved == 0xFFFFFFFFFFFF
+    assert back.parameters[3].resolved is None
+    # Decoded instances do not share their parameter dicts
+    back.instances[1].parameters["W"] = "1"
+    assert back.instances[3].parameters == {"W": "8"}
+
+
+def test_columnar_roundtrip(monkeypatch):
+    mod = _module(n=40)
+    mod.instances = InstanceTable(mod.instances)
+    data = encode_module(mod)
+    assert decode_module(data) == mod
+    monkeypatch.setenv("RTL_SCAN_COLUMNAR_THRESHOLD", "10")
+    assert isinstance(decode_module(data).instances, InstanceTable)
+
+
+def test_stream_shares_strings_and_decodes_lazily():
+    mods = [_module("a"), _module("b"), _module("c")]
+    data = encode_modules(mods)
+    # Strings repeated across modules are stored once
+    assert len(data) < 2 * len(encode_module(mods[0]))
+    assert len(data) < len(pickle.dumps(mods)) / 2
+    assert len(data) < len(json.dumps([m.to_full_dict() for m in mods])) / 2
+    assert decode_modules(data) == mods
+    assert [m.name for m in decode_modules(data, names={"b"})] == ["b"]
+
+    it = iter_modules(io.BytesIO(data))
+    assert next(it).name == "a"
+    assert [m.name for m in it] == ["b", "c"]
+
+
+def test_writer_keeps_stream_valid_after_failure():
+    buf = io.BytesIO()
+    writer = ModuleWriter(buf)
+    bad = _module("bad")
+    bad.wires.append(WireInfo("new_name", width="wide"))
+    with pytest.raises(TypeError):
+        writer.write(bad)
+    writer.write(_module("good"))
+    assert [m.name for m in decode_modules(buf.getvalue())] == ["good"]
+
+
+@pytest.mark.parametrize("data", [
+    b"", b"JUNK\x01\x00\x00\x00",
+    b"RTLM" + (CODEC_VERSION + 1).to_bytes(4, "little"),
+])
+def test_rejects_foreign_data(data):
+    with pytest.raises(CodecError):
+        decode_modules(data)
+
+
+def test_rejects_truncated_record():
+    data = encode_modules([_module("a"), _module("b")])
+    with pytest.raises(CodecError):
+        decode_modules(data[:-3])
+
+
+def test_scan_cache_binary(tmp_path):
+    (tmp_path / "top.v").write_text(
+        "module top(input clk); leaf u (.clk(clk)); endmodule\n"
+        "module leaf(input clk); endmodule\n")
+    cache = str(tmp_path / "scan.cache")
+    first = rtl_scan(directory=str(tmp_path), mode="full", cache=cache)
+    with open(cache, "rb") as f:
+        assert f.read(8) == b"RTLSCAN\0"
+    loaded = ScanCache.load(cache)
+    assert [m.name for m in loaded.modules()] == ["top", "leaf"]
+    assert rtl_scan(directory=str(tmp_path), mode="full", cache=cache) == first
+
+    # A cache in the old JSON format is ignored, not fatal
+    with open(cache, "w") as f:
+        json.dump({"cache_version": 1, "files": {}}, f)
+    assert not ScanCache.load(cache).files
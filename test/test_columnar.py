@@ -0,0 +1,105 @@
+"""Tests for the columnar instance store."""
+import pickle
+
+import pytest
+
+from src.columnar import InstanceTable, InstanceView, compact_instances
+from src.data_model import (
+    ConnectionInfo,
+    GenerateScope,
+    InstanceInfo,
+    ModuleInfo,
+)
+from src.hierarchy import build_hierarchy
+from src.rtl_scan import rtl_scan
+
+_LOOP = GenerateScope(kind="for", cond="i<4", name="g", genvar="i",
+                      init="0", step="i+1")
+
+
+def _instances(n=6):
+    return [InstanceInfo(
+        "u_%d" % i, "leaf" if i % 2 else "buf",
+        [ConnectionInfo("clk", "clk"), ConnectionInfo("d", "x[%d]" % i)],
+        {"W": "8"} if i % 3 == 0 else {},
+        "[0:3]" if i == 5 else "",
+        (_LOOP,) if i == 4 else ()) for i in range(n)]
+
+
+def test_roundtrip():
+    rows = _instances()
+    table = InstanceTable(rows)
+    assert len(table) == 6
+    assert table == rows and rows == table
+    assert list(table) == rows
+    assert isinstance(table[0], InstanceView)
+    assert isinstance(table[0], InstanceInfo)
+    assert table[-1].array_range == "[0:3]"
+    assert table[4].generate == (_LOOP,)
+    assert [v.instance_name for v in table[1:3]] == ["u_1", "u_2"]
+    assert [v.to_dict() for v in table] == [r.to_dict() for r in rows]
+    # Parameter dicts and scopes are stored once
+    assert len(table._param_sets) == 2
+    assert pickle.loads(pickle.dumps(table)) == rows
+
+
+def test_views_write_through():
+    table = InstanceTable(_instances())
+    view = table[2]
+    view.module_type = "leaf2"
+    view.parameters = {"W": "16"}
+    view.connections = [ConnectionInfo("q", "y")]
+    assert table[2].module_type == "leaf2"
+    assert table[2].parameters == {"W": "16"}
+    assert [(c.port_name, c.signal_expr) for c in table[2].connections] == \
+        [("q", "y")]
+    # Rows after the rewritten one keep their connections
+    assert table[3].connections[1].signal_expr == "x[3]"
+    # Returned containers are read-only
+    with pytest.raises(TypeError):
+        table[0].parameters["W"] = "1"
+    assert isinstance(table[0].connections, tuple)
+    assert table[0].parameters == {"W": "8"}
+
+
+def test_list_edits():
+    rows = _instances()
+    table = InstanceTable(rows)
+    del table[0]
+    del rows[0]
+    table.insert(1, InstanceInfo("u_new", "buf"))
+    rows.insert(1, InstanceInfo("u_new", "buf"))
+    assert table.pop().instance_name == rows.pop().instance_name
+    table.sort(key=lambda i: i.instance_name)
+    rows.sort(key=lambda i: i.instance_name)
+    assert table == rows
+
+
+def test_module_threshold_and_cache():
+    mod = ModuleInfo(name="top", instances=_instances())
+    assert not compact_instances(mod, threshold=10)
+    assert compact_instances(mod, threshold=6)
+    assert isinstance(mod.instances, InstanceTable)
+    assert mod.instantiated_modules == {"leaf", "buf"}
+    mod.instances.append(InstanceInfo("u_x", "other"))
+    assert mod.instantiated_modules == {"leaf", "buf", "other"}
+    mod.instances[0].module_type = "renamed"
+    assert "renamed" in mod.instantiated_modules
+
+    hier = build_hierarchy("top", {"top": mod})
+    assert [e["instance"] for e in hier["instances"]][:2] == ["u_0", "u_1"]
+
+    restored = ModuleInfo.from_full_dict(mod.to_full_dict())
+    assert restored == mod
+
+
+def test_scan_columnar(tmp_path, monkeypatch):
+    body = "\n".join("  leaf u_%d (.clk(clk), .d(d[%d]));" % (i, i)
+                     for i in range(20))
+    (tmp_path / "top.v").write_text(
+        "module top(input clk, input [19:0] d);\n%s\nendmodule\n"
+        "module leaf(input clk, input d); endmodule\n" % body)
+    expected = rtl_scan(directory=str(tmp_path), mode="full")
+    monkeypatch.setenv("RTL_SCAN_COLUMNAR_THRESHOLD", "8")
+    result = rtl_scan(directory=str(tmp_path), mode="full")
+    assert result == expected
@@ -0,0 +1,90 @@
+"""Tests for the cross-hierarchy connectivity graph."""
+from src.connectivity import ConnectivityGraph, simple_signal
+from src.data_model import ConnectionInfo, InstanceInfo, ModuleInfo, PortInfo
+from src.design_db import DesignDatabase, scan_design
+from src.port_classify import PortDirection
+
+
+def _tree(root):
+    (root / "rtl.v").write_text(
+        "module top(input clk_sys, input rst_n, input [3:0] d, output q);\n"
+        "  wire clk_core;\n"
+        "  core u_core (.i_clk(clk_sys), .rst_n(rst_n), .d(d[1:0]),\n"
+        "               .o_clk(clk_core));\n"
+        "  core u_core2 (clk_sys, rst_n, {d[3], 1'b0});\n"
+        "  ip u_ip (.clk(clk_core), .x(d[0] & d[1]));\n"
+        "endmodule\n"
+        "module core(input i_clk, input rst_n, input [1:0] d,\n"
+        "            output o_clk);\n"
+        "  rf u_rf0 (.ck(i_clk), .d(d));\n"
+        "  rf u_rf1 (.ck(i_clk), .d(d));\n"
+        "  flop u_f (.c(i_clk), .r(rst_n));\n"
+        "endmodule\n"
+        "module rf(input ck, input [1:0] d); endmodule\n"
+        "module flop(input c, input r); endmodule\n")
+
+
+def _graph(tmp_path):
+    _tree(tmp_path)
+    return ConnectivityGraph(scan_design(directory=str(tmp_path)).modules)
+
+
+def test_simple_signal():
+    assert simple_signal("clk") == "clk"
+    assert simple_signal("bus[7:0]") == "bus"
+    assert simple_signal("mem[3][1]") == "mem"
+    assert simple_signal("{a,b}") == ""
+    assert simple_signal("a&b") == ""
+    assert simple_signal("1'b0") == ""
+
+
+def test_trace_and_leaf_ports(tmp_path):
+    g = _graph(tmp_path)
+    top_clk = g.net("top", "clk_sys")
+    assert top_clk >= 0 and g.is_port(top_clk)
+    assert g.net("top", "nope") == -1
+    # Positional pins resolve to the child's port list
+    assert [g.name(c) for c in g.children(top_clk)] == \
+        [("core", "i_clk"), ("core", "i_clk")]
+    assert g.fanout(top_clk) == 2
+    # Each net is visited once although core is instantiated twice
+    assert [g.name(n) for n in g.trace("top", "clk_sys")] == [
+        ("top", "clk_sys"), ("core", "i_clk"), ("rf", "ck"), ("flop", "c")]
+    assert g.leaf_ports("top", "clk_sys") == [("rf", "ck"), ("flop", "c")]
+    # Undefined modules get pin nets; the internal wire is a net too and
+    # reaches the output driving it as well as the input it drives
+    assert g.leaf_ports("top", "clk_core") == [("core", "o_clk"), ("ip", "clk")]
+    assert not g.is_port(g.net("top", "clk_core"))
+    assert [g.name(p) for p in g.parents(g.net("core", "i_clk"))] == \
+        [("top", "clk_sys"), ("top", "clk_sys")]
+    # Concatenations and operators are counted, not followed
+    assert g.unresolved == 2
+
+
+def test_flattened_fanout(tmp_path):
+    g = _graph(tmp_path)
+    fanout = g.leaf_fanout()
+    # 2 core instances x (2 rf + 1 flop)
+    assert fanout[g.net("top", "clk_sys")] == 6
+    assert fanout[g.net("core", "i_clk")] == 3
+    assert fanout[g.net("top", "rst_n")] == 2
+    assert sorted(g.iter_pin_paths("top", "clk_sys")) == sorted(
+        "top.%s.%s" % (c, leaf) for c in ("u_core", "u_core2")
+        for leaf in ("u_rf0.ck", "u_rf1.ck", "u_f.c"))
+    assert list(g.iter_pin_paths("top", "nope")) == []
+    assert g.leaf_fanout() is fanout
+
+
+def test_wildcard_and_database():
+    # .* as the SystemVerilog extractor records it
+    leaf = ModuleInfo("leaf", ports=[
+        PortInfo(n, PortDirection.INPUT) for n in ("clk", "en", "other")])
+    top = ModuleInfo("top", ports=[
+        PortInfo(n, PortDirection.INPUT) for n in ("clk", "en")],
+        instances=[InstanceInfo("u", "leaf", [ConnectionInfo(".*")])])
+    db = DesignDatabase({"top": top, "leaf": leaf})
+    g = db.connectivity()
+    assert db.connectivity() is g
+    assert g.leaf_ports("top", "clk") == [("leaf", "clk")]
+    assert g.leaf_ports("top", "en") == [("leaf", "en")]
+    assert g.net("top", "other") == -1
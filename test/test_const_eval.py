@@ -0,0 +1,98 @@
+"""Test the Verilog constant-expression evaluator."""
+import pytest
+
+from src.ast_utils import range_text_width, try_eval_range
+from src.const_eval import ConstEvalError, evaluate, identifiers, try_evaluate
+
+
+@pytest.mark.parametrize("expr, value", [
+    ("42", 42),
+    ("1_000", 1000),
+    ("8'hFF", 255),
+    ("4'b1010", 10),
+    ("'d10", 10),
+    ("12'o17", 15),
+    ("4'hFF", 15),          # truncated to size
+    ("8'sd255", -1),        # signed sized literal
+    ("7-1", 6),
+    ("(1+2)*3", 9),
+    ("-7/2", -3),           # truncates toward zero
+    ("-7%2", -1),
+    ("2**3**2", 512),       # right associative
+    ("1<<4", 16),
+    ("256>>4", 16),
+    ("3>2", 1),
+    ("3==4", 0),
+    ("!0&&3", 1),
+    ("0||0", 0),
+    ("1?2:3", 2),
+    ("0?2:1?4:5", 4),
+    ("$clog2(1)", 0),
+    ("$clog2(16)", 4),
+    ("$clog2(17)", 5),
+    ("&4'b1111", 1),
+    ("|4'b0000", 0),
+    ("^3'b111", 1),
+    ("~0", -1),
+    ("{32'h000000B8}", 0xB8),
+    ("{4'hA, 4'h5}", 0xA5),
+    ("{2{4'hF}}", 0xFF),
+    ("{1'b1, {3{1'b0}}}", 8),
+])
+def test_literals_and_operators(expr, value):
+    assert evaluate(expr) == value
+
+
+def test_parameter_environment():
+    env = {"WIDTH": 8, "DATA_W": 16, "DEPTH": 1024}
+    assert evaluate("WIDTH-1", env) == 7
+    assert evaluate("DATA_W*2-1", env) == 31
+    assert evaluate("$clog2(DEPTH)+1", env) == 11
+    assert evaluate("WIDTH>DATA_W ? WIDTH : DATA_W", env) == 16
+
+
+@pytest.mark.parametrize("expr", [
+    "WIDTH-1", "8'hxx", "1.5", "a+", "(1", "$random(1)", "1/0", "2**-1",
+    "__import__('os')", "{3, 4}", "4'd1A", "3'o9", "8'b102", "1<<-1",
+])
+def test_unevaluable(expr):
+    with pytest.raises(ConstEvalError):
+        evaluate(expr)
+    assert try_evaluate(expr) is None
+
+
+@pytest.mark.parametrize("expr", [
+    "1<<(1<<62)", "1<<<70000", "2**(1<<62)", "3**100000",
+    "{(1<<40){1'b1}}", "{4611686018427387904{4'hF}}", "99999999999'd1",
+])
+def test_oversized_results_rejected(expr):
+    with pytest.raises(ConstEvalError):
+        evaluate(expr)
+    assert try_evaluate(expr) is None
+
+
+def test_size_cap_boundaries():
+    assert evaluate("1<<65536") == 1 << 65536
+    assert evaluate("2**65536") == 1 << 65536
+    assert evaluate("(-1)**(1<<62)") == 1
+    assert evaluate("5>>(1<<62)") == 0
+    assert evaluate("{8192{8'hFF}}") == (1 << 65536) - 1
+
+
+def test_unresolved_env_value():
+    # Parameters that could not be resolved are kept as text in envs
+    assert try_evaluate("W+1", {"W": "FOO*2"}) is None
+
+
+def test_identifiers():
+    assert sorted(identifiers("A*$clog2(B)+(C?D:1)")) == ["A", "B", "C", "D"]
+
+
+def test_range_helpers():
+    assert try_eval_range("31") == 31
+    assert try_eval_range("WIDTH-1") is None
+    assert try_eval_range("WIDTH-1", {"WIDTH": 4}) == 3
+    assert range_text_width("[7:0]") == 8
+    assert range_text_width("[W*2-1:0]", {"W": 8}) == 16
+    assert range_text_width("[W-1:0]") is None
+    assert range_text_width("") == 1
@@ -0,0 +1,96 @@
+"""Tests for the compact data model records and ModuleInfo's cached views."""
+import copy
+import dataclasses
+import pickle
+import sys
+
+import pytest
+
+from src.data_model import (
+    ConnectionInfo,
+    InstanceInfo,
+    ModuleInfo,
+    PortInfo,
+    WireInfo,
+)
+from src.port_classify import PortCategory, PortDirection
+
+
+def _module():
+    return ModuleInfo(
+        name="top",
+        ports=[PortInfo("clk", PortDirection.INPUT),
+               PortInfo("dout", PortDirection.OUTPUT, 8, "[7:0]")],
+        instances=[InstanceInfo("u_a", "leaf",
+                                [ConnectionInfo("clk", "clk")])],
+    )
+
+
+@pytest.mark.parametrize("record", [
+    PortInfo("a", PortDirection.INPUT), ConnectionInfo("a", "b"),
+    InstanceInfo("u", "m"), WireInfo("w")])
+def test_records_are_slotted(record):
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.extra = 1
+
+
+def test_record_equality_and_repr():
+    a = InstanceInfo("u_a", "leaf", [ConnectionInfo("d", "x[0]")], {"W": "8"})
+    b = InstanceInfo("u_a", "leaf", [ConnectionInfo("d", "x[0]")], {"W": "8"})
+    assert a == b
+    b.parameters["W"] = "4"
+    assert a != b
+    assert repr(ConnectionInfo("d", "x")) == \
+        "ConnectionInfo(port_name='d', signal_expr='x')"
+    # Defaults are not shared between instances
+    assert InstanceInfo("u1", "m").connections is not \
+        InstanceInfo("u2", "m").connections
+
+
+def test_names_are_interned():
+    name = "".join(["cl", "k"])
+    assert PortInfo(name, PortDirection.INPUT).name is sys.intern("clk")
+    assert ConnectionInfo(name).port_name is sys.intern("clk")
+
+
+def test_category_cached_per_name():
+    p = PortInfo("rst_n", PortDirection.INPUT)
+    assert p.category == PortCategory.RESET
+    p.name = "sys_clk"
+    assert p.category == PortCategory.CLOCK
+
+
+def test_derived_views_follow_mutation():
+    mod = _module()
+    assert [p.name for p in mod.input_ports] == ["clk"]
+    assert mod.input_ports is mod.input_ports          # cached
+    mod.ports.append(PortInfo("rst_n", PortDirection.INPUT))
+    assert [p.name for p in mod.input_ports] == ["clk", "rst_n"]
+    mod.ports = [PortInfo("io", PortDirection.INOUT)]
+    assert mod.input_ports == [] and mod.port_names == ["io"]
+
+    assert mod.instantiated_modules == {"leaf"}
+    mod.instances += [InstanceInfo("u_b", "other")]
+    assert mod.instantiated_modules == {"leaf", "other"}
+    del mod.instances[0]
+    assert mod.instantiated_modules == {"other"}
+
+    # In-place edits of an element need an explicit invalidate()
+    mod.instances[0].module_type = "renamed"
+    mod.invalidate()
+    assert mod.instantiated_modules == {"renamed"}
+
+
+def test_module_copies_keep_tracking():
+    mod = _module()
+    assert mod.output_ports
+    view = dataclasses.replace(mod, instances=[])
+    assert view.instantiated_modules == set()
+    assert mod.instantiated_modules == {"leaf"}
+
+    for clone in (pickle.loads(pickle.dumps(mod)), copy.deepcopy(mod)):
+        assert clone == mod
+        clone.ports.append(PortInfo("q", PortDirection.OUTPUT))
+        assert [p.name for p in clone.output_ports] == ["dout", "q"]
+    assert ModuleInfo.from_full_dict(mod.to_full_dict()) == mod
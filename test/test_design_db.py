@@ -0,0 +1,86 @@
+"""Tests for the indexed in-memory design database."""
+import os
+
+from conftest import write_file
+from src.design_db import DesignDatabase, scan_design, signal_names
+from src.port_classify import PortDirection
+from src.session import ScanSession
+
+
+def _tree(root):
+    (root / "leaf.v").write_text(
+        "module leaf(input clk, input [7:0] d, output irq_o);\nendmodule\n")
+    (root / "top.v").write_text(
+        "module top(input clk_sys, input [15:0] data, output irq_o);\n"
+        "  wire [1:0] irq;\n"
+        "  leaf u0 (.clk(clk_sys), .d(data[7:0]), .irq_o(irq[0]));\n"
+        "  leaf u1 (.clk(clk_sys), .d({data[15:9], 1'b0}), .irq_o(irq[1]));\n"
+        "  mid u2 (.a(8'hff));\n"
+        "endmodule\n")
+    (root / "mid.v").write_text("module mid(input [7:0] a);\nendmodule\n")
+    (root / "mid_old.v").write_text("module mid(input a);\nendmodule\n")
+
+
+def test_signal_names():
+    assert signal_names("{data[15:9], 1'b0}") == ["data"]
+    assert signal_names("a ? b[W-1:0] : 8'hff") == ["a", "b", "W"]
+    assert signal_names("`CLK") == []
+
+
+def test_queries(tmp_path):
+    _tree(tmp_path)
+    db = scan_design(directory=str(tmp_path))
+    assert not db.error
+    assert len(db) == 3 and "top" in db
+    assert db.module("nope") is None
+
+    assert sorted(m.name for m, _ in db.modules_with_port("irq_o")) == \
+        ["leaf", "top"]
+    assert db.modules_with_port("irq_o", PortDirection.INPUT) == []
+    assert db.modules_with_port("missing") == []
+
+    insts = db.instances_of("leaf")
+    assert [(p.name, i.instance_name) for p, i in insts] == \
+        [("top", "u0"), ("top", "u1")]
+    assert [m.name for m in db.parents("leaf")] == ["top"]
+
+    # Identifiers match every expression using them; other text is exact
+    hits = db.connections_to("data")
+    assert [(i.instance_name, c.port_name) for _, i, c in hits] == \
+        [("u0", "d"), ("u1", "d")]
+    assert [c.port_name for _, _, c in db.connections_to("clk_sys")] == \
+        ["clk", "clk"]
+    assert [i.instance_name for _, i, _ in db.connections_to("irq[1]")] == ["u1"]
+    assert [i.instance_name for _, i, _ in db.connections_to("8'hff")] == ["u2"]
+
+    top_file = str(tmp_path / "top.v")
+    assert [m.name for m in db.modules_in_file(top_file)] == ["top"]
+    assert db.modules_in_file(os.path.relpath(top_file)) == \
+        db.modules_in_file(top_file)
+
+    # Both definitions of mid are kept; the scan's choice is module()
+    defs = db.definitions("mid")
+    assert len(defs) == 2 and db.module("mid") is defs[-1]
+    assert list(db.duplicates()) == ["mid"]
+
+
+def test_dict_input_and_errors(tmp_path):
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    db = DesignDatabase(session.modules)
+    assert db.definitions("mid") == [session.modules["mid"]]
+    assert scan_design(directory=str(tmp_path / "missing")).error
+
+
+def test_session_database(tmp_path):
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    db = session.database()
+    assert session.database() is db
+    assert len(db.definitions("mid")) == 2
+    write_file(tmp_path, "leaf.v",
+               "module leaf(input clk, output irq_o, output done);\nendmodule\n")
+    session.refresh()
+    fresh = session.database()
+    assert fresh is not db
+    assert [m.name for m, _ in fresh.modules_with_port("done")] == ["leaf"]
@@ -0,0 +1,108 @@
+"""Test scandir-based RTL file discovery."""
+import os
+
+import pytest
+
+from src.file_discovery import GlobMatcher, discover_rtl_files
+
+
+def _touch(root, *paths):
+    for rel in paths:
+        path = os.path.join(str(root), rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("module m; endmodule\n")
+
+
+def _rel(root, files):
+    return [os.path.relpath(f, str(root)).replace(os.sep, "/") for f in files]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    _touch(tmp_path,
+           "top.v", "a_tb.v", "notes.txt",
+           "rtl/core.sv", "rtl/alu.v", "rtl/inc/defs.vh",
+           "syn/run1/netlist.v",
+           "vendor/ip/rtl/ip.v", "vendor/ip/sim/model.v",
+           ".git/objects/x.v")
+    return tmp_path
+
+
+def test_glob_matcher():
+    m = GlobMatcher(["syn/", "*.bak.v", "/top_*.v", "vendor/**/sim/"])
+    assert m.match("syn", is_dir=True)
+    assert m.match("a/syn", is_dir=True)
+    assert not m.match("syn")                     # dir-only pattern
+    assert m.match("x/y/old.bak.v")
+    assert m.match("top_a.v") and not m.match("sub/top_a.v")
+    assert m.match("vendor/sim", is_dir=True)
+    assert m.match("vendor/a/b/sim", is_dir=True)
+    assert not m.match("vendor/a/simx", is_dir=True)
+
+    # Last match wins with negation
+    neg = GlobMatcher(["*.v", "!keep*.v", "keep_not.v"])
+    assert neg.match("a.v")
+    assert not neg.match("d/keep1.v")
+    assert neg.match("keep_not.v")
+
+
+def test_default_order_and_pruning(tree):
+    files = _rel(tree, discover_rtl_files(str(tree)))
+    # files of a directory first, then subdirectories in name order;
+    # testbenches and .git are skipped
+    assert files == [
+        "top.v",
+        "rtl/alu.v", "rtl/core.sv", "rtl/inc/defs.vh",
+        "syn/run1/netlist.v",
+        "vendor/ip/rtl/ip.v", "vendor/ip/sim/model.v",
+    ]
+    assert "a_tb.v" in _rel(tree, discover_rtl_files(str(tree), exclude_tb=False))
+
+
+def test_exclude_include(tree):
+    files = _rel(tree, discover_rtl_files(
+        str(tree), exclude=["syn/", "vendor/**/sim/"]))
+    assert "syn/run1/netlist.v" not in files
+    assert "vendor/ip/sim/model.v" not in files
+    assert "vendor/ip/rtl/ip.v" in files
+
+    files = _rel(tree, discover_rtl_files(str(tree), include=["rtl/**"]))
+    assert files == ["rtl/alu.v", "rtl/core.sv", "rtl/inc/defs.vh"]
+
+
+def test_pruned_directory_not_opened(tree, monkeypatch):
+    opened = []
+    real = os.scandir
+
+    def spy(path):
+        opened.append(os.path.relpath(path, str(tree)))
+        return real(path)
+
+    monkeypatch.setattr(os, "scandir", spy)
+    discover_rtl_files(str(tree), exclude=["syn/"])
+    assert "syn" not in opened and "syn/run1" not in opened
+    assert ".git" not in opened
+
+
+def test_symlink_loop(tree):
+    try:
+        os.symlink(str(tree), os.path.join(str(tree), "rtl", "loop"))
+        os.symlink(os.path.join(str(tree), "rtl"),
+                   os.path.join(str(tree), "rtl_link"))
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks not supported")
+
+    plain = _rel(tree, discover_rtl_files(str(tree)))
+    assert not any(f.startswith("rtl_link/") for f in plain)
+
+    followed = discover_rtl_files(str(tree), follow_symlinks=True)
+    # Every physical file exactly once, despite the loop and the alias
+    real = [os.path.realpath(f) for f in followed]
+    assert len(real) == len(set(real))
+    assert len(followed) == len(plain)
+
+
+def test_parallel_matches_serial(tree):
+    serial = discover_rtl_files(str(tree), exclude=["syn/"])
+    assert discover_rtl_files(str(tree), exclude=["syn/"], jobs=4) == serial
@@ -0,0 +1,76 @@
+"""Test parameter-aware elaboration with memoized specializations."""
+from src.elaborate import elaborate, elaboration_summary, module_env
+from src.verilog_parser import VerilogFileParser
+
+RTL_SOURCE = """\
+module fifo #(
+  parameter WIDTH = 8,
+  parameter DEPTH = 16,
+  parameter AW    = 4
+)(
+  input              clk,
+  input  [WIDTH-1:0] din,
+  output [WIDTH-1:0] dout,
+  output [AW:0]      count
+);
+  localparam LAST = DEPTH - 1;
+endmodule
+
+module lane #(parameter W = 32)(input clk, input [W-1:0] d);
+  fifo #(.WIDTH(W), .DEPTH(4)) u_fifo (.clk(clk), .din(d));
+endmodule
+
+module top #(parameter LANE_W = 16)(input clk);
+  lane #(.W(LANE_W)) u_lane0 (.clk(clk));
+  lane #(.W(LANE_W)) u_lane1 (.clk(clk));
+  lane #(.W(LANE_W)) u_lane2 (.clk(clk));
+  lane #(LANE_W * 2) u_wide  (.clk(clk));
+  fifo u_dflt (.clk(clk));
+endmodule
+"""
+
+
+def _modules():
+    mods = VerilogFileParser().parse_text(RTL_SOURCE, "elab.v")
+    return {m.name: m for m in mods}
+
+
+def test_module_env_defaults_and_overrides():
+    fifo = _modules()["fifo"]
+    env = module_env(fifo)
+    assert env["WIDTH"] == 8
+    assert env["LAST"] == 15
+    env = module_env(fifo, {"DEPTH": 64})
+    assert env["LAST"] == 63
+
+
+def test_unique_specializations():
+    specs = elaborate("top", _modules())
+    labels = sorted(s.label for s in specs.values())
+    assert labels == [
+        "fifo#(WIDTH=16,DEPTH=4,AW=4)",
+        "fifo#(WIDTH=32,DEPTH=4,AW=4)",
+        "fifo#(WIDTH=8,DEPTH=16,AW=4)",
+        "lane#(W=16)",
+        "lane#(W=32)",
+        "top#(LANE_W=16)",
+    ]
+    counts = {s.label: s.count for s in specs.values()}
+    assert counts["lane#(W=16)"] == 3
+    assert counts["fifo#(WIDTH=16,DEPTH=4,AW=4)"] == 3
+
+
+def test_concrete_port_widths():
+    specs = elaborate("top", _modules())
+    by_label = {s.label: s for s in specs.values()}
+    widths = {n: w for n, _d, w in by_label["fifo#(WIDTH=32,DEPTH=4,AW=4)"].port_widths}
+    assert widths == {"clk": 1, "din": 32, "dout": 32, "count": 5}
+
+
+def test_top_params_and_summary():
+    summary = elaboration_summary("top", _modules(), {"LANE_W": "4"})
+    assert summary["unique_specializations"] == 6
+    assert summary["total_instances"] == 1 + 4 + 4 + 1
+    labels = [s["label"] for s in summary["specializations"]]
+    assert "lane#(W=4)" in labels
+    assert "lane#(W=8)" in labels
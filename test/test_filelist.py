@@ -0,0 +1,141 @@
+"""Test filelist parsing and lazy -v / -y library resolution."""
+import os
+
+import pytest
+
+from conftest import write_file
+from src.filelist import (
+    FilelistError, Library, parse_filelist, resolve_libraries,
+)
+from src.module_index import module_regions
+from src.rtl_scan import rtl_scan
+from src.verilog_parser import VerilogFileParser
+
+
+TOP = """
+module chip_top(input clk, input a, output y);
+  wire n;
+  INVX1 u_inv (.A(a), .Y(n));
+  blk   u_blk (.clk(clk), .d(n), .q(y));
+endmodule
+"""
+
+BLK = """
+module blk(input clk, input d, output q);
+  DFFX1 u_ff (.CK(clk), .D(d), .Q(q));
+endmodule
+"""
+
+# Std-cell style library: one file, many cells; DFFX1 uses another cell
+CELLS = """// cell library
+`celldefine
+module INVX1(input A, output Y);
+endmodule
+
+/* module FAKE(); endmodule */
+module NAND2X1(input A, input B, output Y);
+endmodule
+
+module DFFX1(input CK, input D, output Q);
+  BUFX1 u_buf (.A(D), .Y(Q));
+endmodule
+
+module BUFX1(input A, output Y);
+endmodule
+
+module UNUSEDX1(input A, output Y);
+endmodule
+`endcelldefine
+"""
+
+
+def test_parse_filelist_grammar(tmp_path):
+    write_file(tmp_path, "sub/inner.f", "leaf.v  // relative to sub/\n")
+    write_file(tmp_path, "other.f", "sub/x.v\n")
+    f = write_file(tmp_path, "top.f", """
+# comment
+/* block
+   comment */ top.v
+$PROJ/ip/a.v ${PROJ}/ip/b.v
++incdir+inc+$(PROJ)/inc2
++define+SYNTH+WIDTH=8
+-define FAST=1
+-incdir more_inc
+-F sub/inner.f
+-f other.f
+-v lib/cells.v -y lib/dir +libext+.v+.sv
+-sverilog -timescale 1ns/1ps +acc
+""")
+    fl = parse_filelist(f, env={"PROJ": "/proj"})
+    t = str(tmp_path)
+    assert fl.files == [
+        os.path.join(t, "top.v"), "/proj/ip/a.v", "/proj/ip/b.v",
+        os.path.join(t, "sub", "leaf.v"), os.path.join(t, "sub", "x.v"),
+    ]
+    assert fl.include_dirs == [os.path.join(t, "inc"), "/proj/inc2",
+                               os.path.join(t, "more_inc")]
+    assert fl.defines == {"SYNTH": "", "WIDTH": "8", "FAST": "1"}
+    assert fl.libraries == [("-v", os.path.join(t, "lib", "cells.v")),
+                            ("-y", os.path.join(t, "lib", "dir"))]
+    assert fl.libext == [".v", ".sv"]
+    assert "-sverilog" in fl.ignored
+
+
+def test_filelist_cycle(tmp_path):
+    write_file(tmp_path, "b.f", "-f a.f\n")
+    a = write_file(tmp_path, "a.f", "-f b.f\n")
+    with pytest.raises(FilelistError):
+        parse_filelist(a)
+
+
+def test_module_regions():
+    regions = module_regions(CELLS)
+    assert "FAKE" not in regions
+    assert set(regions) == {"INVX1", "NAND2X1", "DFFX1", "BUFX1", "UNUSEDX1"}
+    start, end = regions["NAND2X1"]
+    assert CELLS[start:end].startswith("module NAND2X1")
+    assert CELLS[start:end].endswith("endmodule")
+
+
+def test_lazy_library_resolution(tmp_path):
+    lib = write_file(tmp_path, "lib/cells.v", CELLS)
+    parser = VerilogFileParser()
+    modules = {m.name: m for m in parser.parse_text(TOP + BLK, "top.v")}
+    added = resolve_libraries(parser, modules, Library([("-v", lib)]))
+
+    # Only the cells that are used, transitively (DFFX1 → BUFX1)
+    assert sorted(m.name for m in added) == ["BUFX1", "DFFX1", "INVX1"]
+    assert "NAND2X1" not in modules and "UNUSEDX1" not in modules
+    assert modules["DFFX1"].file_path == lib
+    assert modules["DFFX1"].line_number == 10
+
+
+def test_y_directory(tmp_path):
+    write_file(tmp_path, "ydir/blk.sv", BLK)
+    write_file(tmp_path, "ydir/DFFX1.v", "module DFFX1(input CK, D, output Q);\nendmodule\n")
+    write_file(tmp_path, "ydir/unused.v", "module unused; endmodule\n")
+    parser = VerilogFileParser()
+    modules = {m.name: m for m in parser.parse_text(TOP, "top.v")}
+    library = Library([("-y", os.path.join(str(tmp_path), "ydir"))],
+                      libext=[".v", ".sv"])
+    resolve_libraries(parser, modules, library)
+    assert "blk" in modules and "DFFX1" in modules
+    assert "unused" not in modules
+    assert "INVX1" not in modules
+    assert len(library.used_files) == 2
+
+
+def test_rtl_scan_filelist(tmp_path):
+    write_file(tmp_path, "rtl/top.v", TOP)
+    write_file(tmp_path, "rtl/inc/defs.vh", "`define BLK_NAME blk\n")
+    write_file(tmp_path, "rtl/blk.v", '`include "defs.vh"\n' +
+               BLK.replace("module blk", "module `BLK_NAME"))
+    write_file(tmp_path, "lib/cells.v", CELLS)
+    f = write_file(tmp_path, "design.f",
+                   "+incdir+rtl/inc\nrtl/top.v\nrtl/blk.v\n-v lib/cells.v\n")
+
+    result = rtl_scan(filelist=f, top_module="chip_top", mode="filelist")
+    assert "error" not in result
+    names = {m["name"] for m in result["modules"]}
+    assert names == {"chip_top", "blk", "INVX1", "DFFX1", "BUFX1"}
+    assert result["unresolved"] == []
@@ -0,0 +1,125 @@
+"""Test generate-block extraction and instance multiplicity."""
+import os
+
+from src.elaborate import elaborate, module_env
+from src.generate import instance_multiplicity
+from src.hierarchy import iter_instance_paths
+from src.rtl_scan import rtl_scan
+from src.verilog_parser import VerilogFileParser
+
+RTL_SOURCE = """\
+module bitcell (input clk);
+endmodule
+
+module pll (input clk);
+endmodule
+
+module bypass (input clk);
+endmodule
+
+module array_top #(
+  parameter ROWS    = 64,
+  parameter COLS    = 64,
+  parameter USE_PLL = 0,
+  parameter MODE    = 2
+)(input clk);
+  genvar r, c;
+  generate
+    for (r = 0; r < ROWS; r = r + 1) begin : g_row
+      for (c = 0; c < COLS; c = c + 1) begin : g_col
+        bitcell u_cell (.clk(clk));
+      end
+    end
+    if (USE_PLL) begin : g_pll
+      pll u_pll (.clk(clk));
+    end else begin : g_byp
+      bypass u_byp (.clk(clk));
+    end
+    case (MODE)
+      0, 1:    bitcell u_low (.clk(clk));
+      default: bitcell u_dflt (.clk(clk));
+    endcase
+    for (r = 0; r < 4; r = r + 1) begin : g_tri
+      if (r < 2) bitcell u_half (.clk(clk));
+    end
+  endgenerate
+  bitcell u_arr [7:0] (.clk(clk));
+endmodule
+"""
+
+
+def _modules():
+    mods = VerilogFileParser().parse_text(RTL_SOURCE, "gen.v")
+    return {m.name: m for m in mods}
+
+
+def _inst(mod, name):
+    return [i for i in mod.instances if i.instance_name == name][0]
+
+
+def test_generate_scopes_extracted():
+    top = _modules()["array_top"]
+    cell = _inst(top, "u_cell")
+    assert [s.kind for s in cell.generate] == ["for", "for"]
+    assert cell.generate[0].name == "g_row"
+    assert cell.generate[1].genvar == "c"
+    assert cell.generate[1].cond == "c<COLS"
+    byp = _inst(top, "u_byp")
+    assert byp.generate[0].kind == "if" and byp.generate[0].negate
+    dflt = _inst(top, "u_dflt")
+    assert dflt.generate[0].labels == ()
+    assert dflt.generate[0].others == ("0", "1")
+    assert _inst(top, "u_arr").array_range == "[7:0]"
+
+
+def test_multiplicity():
+    top = _modules()["array_top"]
+    env = module_env(top)
+    assert instance_multiplicity(_inst(top, "u_cell"), env) == 4096
+    assert instance_multiplicity(_inst(top, "u_pll"), env) == 0
+    assert instance_multiplicity(_inst(top, "u_byp"), env) == 1
+    assert instance_multiplicity(_inst(top, "u_low"), env) == 0
+    assert instance_multiplicity(_inst(top, "u_dflt"), env) == 1
+    assert instance_multiplicity(_inst(top, "u_half"), env) == 2
+    assert instance_multiplicity(_inst(top, "u_arr"), env) == 8
+    env = module_env(top, {"USE_PLL": 1, "MODE": 1, "ROWS": 2})
+    assert instance_multiplicity(_inst(top, "u_cell"), env) == 128
+    assert instance_multiplicity(_inst(top, "u_pll"), env) == 1
+    assert instance_multiplicity(_inst(top, "u_low"), env) == 1
+
+
+def test_unknown_bounds():
+    top = _modules()["array_top"]
+    assert instance_multiplicity(_inst(top, "u_cell"), {"ROWS": "N"}) is None
+
+
+def test_elaboration_counts_and_pruning():
+    specs = elaborate("array_top", _modules())
+    counts = {s.module: s.count for s in specs.values()}
+    assert counts["bitcell"] == 4096 + 1 + 2 + 8
+    assert "pll" not in counts
+    assert counts["bypass"] == 1
+
+
+def test_hierarchy_and_filelist_pruned(tmp_path):
+    (tmp_path / "gen.v").write_text(RTL_SOURCE)
+    result = rtl_scan(directory=str(tmp_path), mode="full", top_module="array_top")
+    insts = result["hierarchy"]["array_top"]["instances"]
+    names = [i["instance"] for i in insts]
+    assert "u_pll" not in names and "u_low" not in names
+    assert {i["instance"]: i.get("count", 1) for i in insts}["u_cell"] == 4096
+    assert "pll" not in result["hierarchy"]["array_top"]
+    assert result["unresolved"] == []
+    assert any(os.path.basename(f) == "gen.v"
+               for f in result["filelist_info"]["filelist"])
+
+
+def test_paths_pruned(tmp_path):
+    (tmp_path / "gen.v").write_text(RTL_SOURCE)
+    result = rtl_scan(directory=str(tmp_path), mode="paths",
+                      top_module="array_top")
+    rows = {r[0]: r for r in iter_instance_paths(
+        "array_top", result["_modules"], counts=result["_counts"])}
+    assert "array_top.u_pll" not in rows and "array_top.u_low" not in rows
+    assert rows["array_top.u_cell"][3] == 4096
+    assert rows["array_top.u_arr"][3] == 8
@@ -31,6 +31,14 @@ def test_parameters():
         assert any(x.name == ep for x in module_params), "Missing param: " + ep
 
 
+def test_parameter_resolution():
+    m = _parse_gpio()
+    pm = {x.name: x for x in m.parameters}
+    assert pm["ALTERNATE_FUNC_MASK"].resolved == 0xFFFF
+    assert pm["IOADDR_WIDTH"].resolved == 12
+    assert pm["ARM_CMSDK_IOP_GPIO_PID1"].resolved == 0xB8
+
+
 def test_ports():
     m = _parse_gpio()
     assert len(m.input_ports) == 11
@@ -0,0 +1,131 @@
+"""Test reverse-dependency index, scan cache and change-impact analysis."""
+import os
+
+import pytest
+
+from src.impact import build_file_index, build_reverse_index
+from src.preprocessor import Preprocessor
+from src.rtl_scan import rtl_scan
+from src.scan_cache import ScanCache, parse_files_cached
+from src.verilog_parser import VerilogFileParser
+
+
+@pytest.fixture
+def rtl(tmp_path):
+    (tmp_path / "defs.vh").write_text("`define FIFO_W 8\n")
+    (tmp_path / "fifo_async.v").write_text("""`include "defs.vh"
+module fifo_async (input wr_clk, input [`FIFO_W-1:0] din);
+endmodule
+""")
+    (tmp_path / "dma.v").write_text("""
+module dma (input clk);
+  fifo_async u_fifo (.wr_clk(clk), .din(8'h0));
+endmodule
+""")
+    (tmp_path / "uart.v").write_text("""
+module uart (input clk);
+endmodule
+""")
+    (tmp_path / "soc_a.v").write_text("""
+module soc_a (input clk);
+  dma  u_dma  (.clk(clk));
+  uart u_uart (.clk(clk));
+endmodule
+""")
+    (tmp_path / "soc_b.v").write_text("""
+module soc_b (input clk);
+  uart u_uart (.clk(clk));
+endmodule
+""")
+    return tmp_path
+
+
+def test_reverse_and_file_index(rtl):
+    mods = VerilogFileParser().parse_files(
+        sorted(str(p) for p in rtl.glob("*.v")))
+    modules = {m.name: m for m in mods}
+    rindex = build_reverse_index(modules)
+    assert rindex["uart"] == {"soc_a", "soc_b"}
+    assert rindex["fifo_async"] == {"dma"}
+    findex = build_file_index(modules)
+    assert findex[str(rtl / "dma.v")] == ["dma"]
+
+
+def test_impact_scan(rtl):
+    result = rtl_scan(directory=str(rtl), mode="impact",
+                      changed_files=[str(rtl / "fifo_async.v")])
+    imp = result["impact"]
+    assert imp["changed_modules"] == ["fifo_async"]
+    assert imp["affected_modules"] == ["dma", "fifo_async", "soc_a"]
+    assert imp["affected_tops"] == ["soc_a"]
+
+
+def test_impact_from_cache_without_parsing(rtl, monkeypatch):
+    cache = str(rtl / "scan.cache")
+    rtl_scan(directory=str(rtl), mode="modules", cache=cache)
+    assert os.path.isfile(cache)
+
+    def _no_parse(*_args, **_kwargs):
+        raise AssertionError("impact mode must not parse")
+    monkeypatch.setattr(VerilogFileParser, "parse_file", _no_parse)
+
+    # Editing the include file affects everything that includes it
+    result = rtl_scan(mode="impact", cache=cache,
+                      changed_files=[str(rtl / "defs.vh")])
+    imp = result["impact"]
+    assert imp["changed_modules"] == ["fifo_async"]
+    assert imp["affected_tops"] == ["soc_a"]
+    assert imp["unknown_files"] == []
+
+    result = rtl_scan(mode="impact", cache=cache,
+                      changed_files=[str(rtl / "uart.v")])
+    assert result["impact"]["affected_tops"] == ["soc_a", "soc_b"]
+
+
+def test_cache_reuses_unchanged_files(rtl):
+    cache = str(rtl / "scan.cache")
+    first = rtl_scan(directory=str(rtl), mode="full", cache=cache)
+    second = rtl_scan(directory=str(rtl), mode="full", cache=cache)
+    assert first["modules"] == second["modules"]
+    assert first["hierarchy"] == second["hierarchy"]
+
+
+class _RecordingParser:
+    """Preprocess-only stand-in for VerilogFileParser."""
+
+    def __init__(self):
+        self.preprocessor = Preprocessor()
+        self.errors = []
+        self.parsed = []
+
+    def parse_file(self, filepath):
+        self.preprocessor.process_file(filepath)
+        self.parsed.append(os.path.basename(filepath))
+        return []
+
+
+def test_cache_keyed_on_incoming_macros(tmp_path):
+    (tmp_path / "a.v").write_text("`define W 8\n`undef OLD\n")
+    (tmp_path / "b.v").write_text("module b; endmodule\n")
+    files = [str(tmp_path / "a.v"), str(tmp_path / "b.v")]
+    path = str(tmp_path / "scan.cache")
+
+    def run():
+        parser = _RecordingParser()
+        parser.preprocessor.add_define("OLD", "1")
+        cache = ScanCache.load(path)
+        parse_files_cached(parser, files, cache)
+        cache.save(path)
+        return parser
+
+    run()
+    parser = run()
+    assert parser.parsed == []
+    # defines and undefs of the cached file are replayed
+    assert parser.preprocessor.macros == {"W": "8"}
+
+    # an upstream define change re-parses the downstream file
+    (tmp_path / "a.v").write_text("`define W 16\n`undef OLD\n")
+    parser = run()
+    assert parser.parsed == ["a.v", "b.v"]
+    assert run().parsed == []
@@ -0,0 +1,149 @@
+"""Test the LSP server: region reparse, definition, hover, completion."""
+import io
+import json
+
+from conftest import write_file
+from src import lsp_server
+from src.lsp_server import (
+    LspServer, path_to_uri, read_message, serve_stdio, write_message,
+)
+
+
+def _workspace(tmp_path):
+    write_file(tmp_path, "fifo.v",
+               "module fifo #(parameter DEPTH = 4) (\n"
+               "  input clk, input [7:0] i_data, output o_full);\nendmodule\n")
+    top = ("module top(input clk);\n"
+           "  fifo u0 (.clk(clk));\n"
+           "endmodule\n"
+           "\n"
+           "module other(input a);\n"
+           "endmodule\n")
+    path = write_file(tmp_path, "top.v", top)
+    server = LspServer()
+    server.handle({"id": 1, "method": "initialize",
+                   "params": {"rootUri": path_to_uri(str(tmp_path))}})
+    uri = path_to_uri(path)
+    server.handle({"method": "textDocument/didOpen", "params": {
+        "textDocument": {"uri": uri, "languageId": "verilog", "version": 1,
+                         "text": top}}})
+    return server, uri
+
+
+def _pos(uri, line, character):
+    return {"textDocument": {"uri": uri},
+            "position": {"line": line, "character": character}}
+
+
+def test_definition_and_hover(tmp_path):
+    server, uri = _workspace(tmp_path)
+    resp = server.handle({"id": 2, "method": "textDocument/definition",
+                          "params": _pos(uri, 1, 3)})
+    loc = resp["result"]
+    assert loc["uri"] == path_to_uri(str(tmp_path / "fifo.v"))
+    assert loc["range"]["start"]["line"] == 0
+
+    hover = server.handle({"id": 3, "method": "textDocument/hover",
+                           "params": _pos(uri, 1, 3)})["result"]
+    assert "i_data" in hover["contents"]["value"]
+    assert "\033" not in hover["contents"]["value"]
+
+    # Not a module name
+    assert server.handle({"id": 4, "method": "textDocument/hover",
+                          "params": _pos(uri, 1, 8)})["result"] is None
+
+
+def test_completion_inserts_instance(tmp_path):
+    server, uri = _workspace(tmp_path)
+    items = server.handle({"id": 2, "method": "textDocument/completion",
+                           "params": _pos(uri, 1, 0)})["result"]
+    fifo = next(i for i in items if i["label"] == "fifo")
+    assert fifo["insertText"].startswith("fifo #(")
+    assert ".i_data" in fifo["insertText"]
+    assert "wire [7:0] w_data;" in fifo["documentation"]["value"]
+
+
+def test_completion_items_reused_across_edits(tmp_path, monkeypatch):
+    server, uri = _workspace(tmp_path)
+    complete = {"id": 2, "method": "textDocument/completion",
+                "params": _pos(uri, 1, 0)}
+    first = server.handle(complete)["result"]
+    assert [i["label"] for i in first] == ["fifo", "other", "top"]
+
+    built = []
+    real = lsp_server.format_inst
+    monkeypatch.setattr(lsp_server, "format_inst",
+                        lambda result: built.append(
+                            result["_module_info"].name) or real(result))
+    server.handle({"method": "textDocument/didChange", "params": {
+        "textDocument": {"uri": uri, "version": 2},
+        "contentChanges": [{
+            "range": {"start": {"line": 4, "character": 20},
+                      "end": {"line": 4, "character": 20}},
+            "text": ", input b"}]}})
+    items = server.handle(complete)["result"]
+    # Only the re-parsed region's template is rebuilt
+    assert built == ["other"]
+    assert [i["label"] for i in items] == ["fifo", "other", "top"]
+    assert items[0] is first[0] and items[2] is first[2]
+    assert "2 port(s)" in items[1]["detail"]
+
+
+def test_incremental_edit_reparses_one_region(tmp_path):
+    server, uri = _workspace(tmp_path)
+    doc = server.docs[uri]
+
+    # Insert a port into `other` (line 4): only that region is re-parsed
+    server.handle({"method": "textDocument/didChange", "params": {
+        "textDocument": {"uri": uri, "version": 2},
+        "contentChanges": [{
+            "range": {"start": {"line": 4, "character": 20},
+                      "end": {"line": 4, "character": 20}},
+            "text": ", input b"}]}})
+    assert doc.reparsed == 1
+    assert server.modules()["other"].port_names == ["a", "b"]
+
+    # Inserting lines above shifts `other` without re-parsing it
+    server.handle({"method": "textDocument/didChange", "params": {
+        "textDocument": {"uri": uri, "version": 3},
+        "contentChanges": [{
+            "range": {"start": {"line": 3, "character": 0},
+                      "end": {"line": 3, "character": 0}},
+            "text": "\n\n"}]}})
+    assert doc.reparsed == 0
+    assert server.modules()["other"].line_number == 7
+
+    # The open buffer overrides the workspace copy of the file
+    server.handle({"method": "textDocument/didChange", "params": {
+        "textDocument": {"uri": uri, "version": 4},
+        "contentChanges": [{"text": "module renamed;\nendmodule\n"}]}})
+    mods = server.modules()
+    assert "renamed" in mods and "top" not in mods and "fifo" in mods
+
+
+def test_stdio_transport(tmp_path):
+    write_file(tmp_path, "a.v", "module a;\nendmodule\n")
+    rfile = io.BytesIO()
+    for msg in ({"jsonrpc": "2.0", "id": 1, "method": "initialize",
+                 "params": {"rootUri": path_to_uri(str(tmp_path))}},
+                {"jsonrpc": "2.0", "method": "initialized", "params": {}},
+                {"jsonrpc": "2.0", "id": 2, "method": "bogus"},
+                {"jsonrpc": "2.0", "id": 3, "method": "shutdown"},
+                {"jsonrpc": "2.0", "method": "exit"}):
+        write_message(rfile, msg)
+    rfile.seek(0)
+    wfile = io.BytesIO()
+    assert serve_stdio(rfile, wfile) == 0
+
+    wfile.seek(0)
+    responses = []
+    while True:
+        msg = read_message(wfile)
+        if msg is None:
+            break
+        responses.append(msg)
+    assert [r["id"] for r in responses] == [1, 2, 3]
+    caps = responses[0]["result"]["capabilities"]
+    assert caps["definitionProvider"] and caps["textDocumentSync"]["change"] == 2
+    assert responses[1]["error"]["code"] == -32601
+    assert json.dumps(responses[2]["result"]) == "null"
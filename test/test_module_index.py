@@ -0,0 +1,99 @@
+"""Test the module-name pre-index and demand-driven parsing."""
+import os
+
+from src.module_index import ModuleIndex, parse_from_top, scan_source
+from src.preprocessor import Preprocessor
+from src.rtl_scan import rtl_scan
+from src.verilog_parser import VerilogFileParser
+
+
+FILES = {
+    "a_defs.v": "`define LEAF_W 4\n",
+    "leaf.v": "module leaf(input [`LEAF_W-1:0] d, output q);\nendmodule\n",
+    "mid.v": "module mid(input d, output q);\n  leaf u_leaf (.d(d), .q(q));\nendmodule\n",
+    "top.v": "module top(input d, output q);\n  mid u_mid (.d(d), .q(q));\nendmodule\n",
+    "other.v": "module other(input d);\n  leaf u_leaf (.d(d));\nendmodule\n"
+               "// module ghost(); endmodule\n",
+    "z_macro.v": "`define NAME hidden\nmodule `NAME (input d);\nendmodule\n",
+}
+
+
+def _write_tree(root):
+    paths = []
+    for name in sorted(FILES):
+        path = os.path.join(str(root), name)
+        with open(path, "w") as f:
+            f.write(FILES[name])
+        paths.append(path)
+    return paths
+
+
+def test_scan_source():
+    info = scan_source(FILES["other.v"])
+    assert info == {"modules": ["other"], "opaque": False, "defines": False}
+    info = scan_source(FILES["z_macro.v"])
+    assert info["opaque"] and info["defines"] and info["modules"] == []
+
+
+def test_index_persistence(tmp_path):
+    files = _write_tree(tmp_path)
+    path = str(tmp_path / "idx.json")
+    index = ModuleIndex.load(path)
+    index.update(files)
+    assert index.rescanned == len(files)
+    assert index.files_defining("leaf") == [files[1]]
+    assert index.files_defining("ghost") == []
+    assert index.opaque_files() == [files[-1]]
+    index.save(path)
+
+    # Only the touched file is rescanned on reload
+    with open(files[1], "a") as f:
+        f.write("module leaf2; endmodule\n")
+    again = ModuleIndex.load(path)
+    again.update(files)
+    assert again.rescanned == 1
+    assert again.files_defining("leaf2") == [files[1]]
+
+
+def test_parse_from_top(tmp_path):
+    files = _write_tree(tmp_path)
+    index = ModuleIndex()
+    index.update(files)
+    parsed = []
+    parser = VerilogFileParser(preprocessor=Preprocessor())
+
+    def parse_one(fp):
+        parsed.append(os.path.basename(fp))
+        return parser.parse_file(fp)
+
+    modules = parse_from_top(parse_one, parser.preprocessor, index, "top")
+    assert sorted(modules) == ["leaf", "mid", "top"]
+    assert sorted(parsed) == ["leaf.v", "mid.v", "top.v"]
+    # The earlier `define file was replayed before leaf.v
+    assert modules["leaf"].ports[0].range_spec == "[4-1:0]"
+
+    parsed[:] = []
+    modules = parse_from_top(parse_one, parser.preprocessor, index, "mid",
+                             single=True)
+    assert parsed == ["mid.v"] and list(modules) == ["mid"]
+
+    # Macro-named modules are found through the opaque fallback
+    parsed[:] = []
+    modules = parse_from_top(parse_one, parser.preprocessor, index, "hidden")
+    assert "hidden" in modules and parsed == ["z_macro.v"]
+
+
+def test_rtl_scan_demand(tmp_path):
+    _write_tree(tmp_path)
+    idx = str(tmp_path / "scan.idx")
+    result = rtl_scan(directory=str(tmp_path), top_module="mid", mode="inst",
+                      module_index=idx)
+    assert result["top"] == "mid"
+    assert os.path.isfile(idx)
+
+    result = rtl_scan(directory=str(tmp_path), top_module="top", mode="elab")
+    labels = {s["module"] for s in result["elaboration"]["specializations"]}
+    assert labels == {"top", "mid", "leaf"}
+
+    result = rtl_scan(directory=str(tmp_path), top_module="nope", mode="inst")
+    assert "error" in result and "Available" in result["error"]
@@ -0,0 +1,97 @@
+"""Test streaming flattened instance-path export."""
+import io
+import json
+
+from src.data_model import GenerateScope, InstanceInfo, ModuleInfo
+from src.export import write_instance_paths
+from src.hierarchy import iter_instance_paths
+from src.rtl_scan import _build_result
+
+
+def _design():
+    leaf = ModuleInfo(name="leaf")
+    mid = ModuleInfo(name="mid", instances=[
+        InstanceInfo("u_leaf0", "leaf"),
+        InstanceInfo("u_leaf1", "leaf"),
+    ])
+    top = ModuleInfo(name="top", instances=[
+        InstanceInfo("u_mid", "mid"),
+        InstanceInfo("u_ext", "black_box"),
+    ])
+    return {m.name: m for m in (leaf, mid, top)}
+
+
+def test_depth_first_order():
+    rows = list(iter_instance_paths("top", _design()))
+    assert rows == [
+        ("top", "top", 0, 1),
+        ("top.u_mid", "mid", 1, 1),
+        ("top.u_mid.u_leaf0", "leaf", 2, 1),
+        ("top.u_mid.u_leaf1", "leaf", 2, 1),
+        ("top.u_ext", "black_box", 1, 1),
+    ]
+
+
+def test_max_depth():
+    rows = list(iter_instance_paths("top", _design(), max_depth=1))
+    assert [r[0] for r in rows] == ["top", "top.u_mid", "top.u_ext"]
+
+
+def test_module_filter_still_descends():
+    rows = list(iter_instance_paths("top", _design(), module_filter=["le*"]))
+    assert [r[0] for r in rows] == ["top.u_mid.u_leaf0", "top.u_mid.u_leaf1"]
+
+
+def test_circular_reference_terminates():
+    a = ModuleInfo(name="a", instances=[InstanceInfo("u_b", "b")])
+    b = ModuleInfo(name="b", instances=[InstanceInfo("u_a", "a")])
+    rows = list(iter_instance_paths("a", {"a": a, "b": b}))
+    assert [r[0] for r in rows] == ["a", "a.u_b", "a.u_b.u_a"]
+
+
+def test_write_csv_and_ndjson():
+    buf = io.StringIO()
+    n = write_instance_paths(buf, iter_instance_paths("top", _design()), "csv")
+    lines = buf.getvalue().splitlines()
+    assert n == 5
+    assert lines[0] == "path,module,depth,count"
+    assert lines[1] == "top,top,0,1"
+
+    buf = io.StringIO()
+    write_instance_paths(buf, iter_instance_paths("top", _design()), "ndjson")
+    recs = [json.loads(l) for l in buf.getvalue().splitlines()]
+    assert recs[2] == {"path": "top.u_mid.u_leaf0", "module": "leaf",
+                       "depth": 2, "count": 1}
+
+
+def test_counts_multiply_along_path():
+    counts = {"top": [4, None], "mid": [2, 1]}
+    rows = list(iter_instance_paths("top", _design(), counts=counts))
+    assert [(r[0], r[3]) for r in rows] == [
+        ("top", 1), ("top.u_mid", 4), ("top.u_mid.u_leaf0", 8),
+        ("top.u_mid.u_leaf1", 4), ("top.u_ext", None)]
+
+    buf = io.StringIO()
+    write_instance_paths(buf, iter(rows), "csv")
+    assert buf.getvalue().splitlines()[-1] == "top.u_ext,black_box,1,"
+
+
+def test_paths_mode_sees_pruned_generate():
+    top = ModuleInfo(name="top", instances=[
+        InstanceInfo("u_arr", "leaf", array_range="[7:0]"),
+        InstanceInfo("u_off", "leaf",
+                     generate=(GenerateScope("if", cond="0", name="g"),)),
+    ])
+    mods = {"top": top, "leaf": ModuleInfo(name="leaf")}
+    result = _build_result(mods, "top", "paths", "", "")
+    rows = list(iter_instance_paths("top", result["_modules"],
+                                    counts=result["_counts"]))
+    assert rows == [("top", "top", 0, 1), ("top.u_arr", "leaf", 1, 8)]
+
+
+def test_missing_top_error():
+    mods = {"leaf": ModuleInfo("leaf")}
+    assert _build_result(mods, "", "paths", "", "") == \
+        {"error": "No top module found"}
+    assert _build_result(mods, "cpu", "paths", "", "") == \
+        {"error": "Top module 'cpu' not found"}
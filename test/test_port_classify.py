@@ -0,0 +1,114 @@
+"""Tests for port classification rule sets."""
+import json
+
+import pytest
+
+from src import port_classify
+from src.data_model import ModuleInfo, PortInfo
+from src.port_classify import (
+    DEFAULT_RULES,
+    PortCategory,
+    PortDirection,
+    PortRules,
+    PortRulesError,
+    classify_port,
+    classify_ports,
+    load_port_rules,
+    set_port_rules,
+)
+
+
+@pytest.fixture(autouse=True)
+def _restore_rules(monkeypatch):
+    monkeypatch.delenv("RTL_SCAN_PORT_RULES", raising=False)
+    yield
+    set_port_rules(None)
+
+
+def test_default_priority():
+    # Earlier rules win wherever the later one matches in the name
+    assert classify_port("rst_clk_sel") == PortCategory.CLOCK
+    assert classify_port("scan_rst_n") == PortCategory.RESET
+    assert classify_port("irq_scan") == PortCategory.DFT
+    assert classify_port("u_int_req") == PortCategory.INTERRUPT
+    assert classify_port("HCLK") == PortCategory.CLOCK
+    assert classify_port("blocker") == PortCategory.DATA
+    assert classify_ports(["clk", "d", "clk", "sys_rst_n"]) == [
+        PortCategory.CLOCK, PortCategory.DATA, PortCategory.CLOCK,
+        PortCategory.RESET]
+
+
+def test_rules_with_groups_and_case():
+    rules = PortRules([("reset", r"(a)(b)"), ("clock", r"(^|_)ck$"),
+                       (PortCategory.DFT, "se")], ignore_case=False)
+    assert rules.classify("x_ab") == PortCategory.RESET
+    assert rules.classify("core_ck") == PortCategory.CLOCK
+    assert rules.classify("CORE_CK") == PortCategory.DATA
+    assert rules.classify("se") == PortCategory.DFT
+    assert rules.classify_ports([]) == []
+    with pytest.raises(PortRulesError):
+        PortRules([("clocks", "x")])
+    with pytest.raises(PortRulesError):
+        PortRules([("clock", "(")])
+
+
+def test_rules_file(tmp_path):
+    path = tmp_path / "ports.json"
+    path.write_text(json.dumps({
+        "rules": [{"category": "clock", "pattern": "^ck_|_ck$"},
+                  {"category": "data", "pattern": "^clk_en$"}],
+        "active_low": "_b$",
+    }))
+    rules = load_port_rules(str(path))
+    assert rules.classify("core_ck") == PortCategory.CLOCK
+    assert rules.classify("clk_en") == PortCategory.DATA
+    assert rules.classify("sys_clk") == PortCategory.CLOCK     # built-in
+    assert rules.is_active_low("rst_b") and not rules.is_active_low("rst_n")
+
+    path.write_text(json.dumps({"rules": [], "defaults": False}))
+    assert load_port_rules(str(path)).classify("clk") == PortCategory.DATA
+
+    for bad in ("[]", "{", '{"rules": [{"pattern": "x"}]}'):
+        path.write_text(bad)
+        with pytest.raises(PortRulesError):
+            load_port_rules(str(path))
+
+
+def test_active_rules_follow_ports(tmp_path, monkeypatch):
+    mod = ModuleInfo(name="m", ports=[
+        PortInfo("i_ck", PortDirection.INPUT),
+        PortInfo("rst_b", PortDirection.INPUT)])
+    assert mod.ports[0].category == PortCategory.DATA
+    set_port_rules(PortRules([("clock", "_ck$"), ("reset", "^rst")],
+                             active_low="_b$"))
+    assert mod.ports[0].category == PortCategory.CLOCK
+    cls = mod.classify_ports()
+    assert cls["clocks"] == [{"port": "i_ck", "direction": "input"}]
+    assert cls["resets"][0]["active"] == "low"
+
+    set_port_rules(None)
+    path = tmp_path / "env.json"
+    path.write_text(json.dumps({"rules": [{"category": "clock",
+                                           "pattern": "_ck$"}]}))
+    monkeypatch.setenv("RTL_SCAN_PORT_RULES", str(path))
+    assert classify_port("i_ck") == PortCategory.CLOCK
+    monkeypatch.setenv("RTL_SCAN_PORT_RULES", str(tmp_path / "missing"))
+    assert port_classify.port_rules() is DEFAULT_RULES
+
+
+def test_cli_port_rules(tmp_path, capsys):
+    from src.__main__ import main
+    (tmp_path / "top.v").write_text(
+        "module top(input core_ck, input d); endmodule\n")
+    rules = tmp_path / "ports.json"
+    rules.write_text(json.dumps({"rules": [{"category": "clock",
+                                            "pattern": "_ck$"}]}))
+    out = tmp_path / "out.json"
+    assert main([str(tmp_path / "top.v"), "-m", "ports", "-q",
+                 "--port-rules", str(rules), "-o", str(out)]) == 0
+    cls = json.loads(out.read_text())["port_classification"]
+    assert cls["clocks"] == [{"port": "core_ck", "direction": "input"}]
+    rules.write_text("{")
+    assert main([str(tmp_path / "top.v"), "-q",
+                 "--port-rules", str(rules)]) == 1
+    assert "Cannot read port rules" in capsys.readouterr().err
@@ -0,0 +1,133 @@
+"""Test incremental scanning (iter_scan) and streamed JSON / NDJSON output."""
+import io
+import json
+
+import pytest
+
+from src.__main__ import main
+from src.export import write_scan
+from src.rtl_scan import iter_scan, rtl_scan
+
+RTL = {
+    "leaf.v": "module leaf(input clk, output q);\nendmodule\n",
+    "mid.v": "module mid(input clk);\n"
+             "  genvar i;\n"
+             "  generate for (i = 0; i < 2; i = i + 1) begin : g\n"
+             "    leaf u_leaf (.clk(clk));\n"
+             "  end endgenerate\nendmodule\n",
+    "top.v": "module top(input clk, input rst_n);\n"
+             "  mid u_mid (.clk(clk));\n  leaf u_leaf (.clk(clk));\n"
+             "  black_box u_bb ();\nendmodule\n",
+}
+
+
+@pytest.fixture
+def rtl(tmp_path):
+    d = tmp_path / "rtl"
+    d.mkdir()
+    for name, text in RTL.items():
+        (d / name).write_text(text)
+    return d
+
+
+def _expected(result):
+    out = {k: v for k, v in result.items() if not k.startswith("_")}
+    return json.dumps(out, indent=2, ensure_ascii=False) + "\n"
+
+
+def test_iter_scan_events(rtl):
+    events = list(iter_scan(directory=str(rtl), mode="hierarchy"))
+    assert [k for k, _ in events] == ["module"] * 3 + ["result"]
+    assert "modules" not in events[-1][1]
+    assert events[-1][1]["top"] == "top"
+    # Modes without a module list stream nothing but the result
+    events = list(iter_scan(directory=str(rtl), mode="inst",
+                            top_module="leaf"))
+    assert [k for k, _ in events] == ["result"]
+
+
+@pytest.mark.parametrize("mode", ["full", "modules", "inst", "elab"])
+def test_json_matches_rtl_scan(rtl, mode):
+    args = dict(directory=str(rtl), mode=mode, top_module="top")
+    buf = io.StringIO()
+    write_scan(buf, iter_scan(**args))
+    assert buf.getvalue() == _expected(rtl_scan(**args))
+
+
+def test_json_lists_duplicates_in_parse_order(rtl):
+    (rtl / "zz_leaf2.v").write_text(
+        "module leaf(input clk, input en, output q);\nendmodule\n")
+    args = dict(directory=str(rtl), mode="modules")
+    buf = io.StringIO()
+    assert write_scan(buf, iter_scan(**args)) == 4
+    streamed = json.loads(buf.getvalue())
+    assert [m["name"] for m in streamed["modules"]] == \
+        ["leaf", "mid", "top", "leaf"]
+    # Keeping the last definition at its first position gives rtl_scan()
+    last = {}
+    for m in streamed["modules"]:
+        last[m["name"]] = m
+    streamed["modules"] = list(last.values())
+    assert json.dumps(streamed, indent=2) == json.dumps(rtl_scan(**args),
+                                                        indent=2)
+
+
+def test_json_of_finished_result_and_error(rtl):
+    result = rtl_scan(directory=str(rtl), mode="ports")
+    buf = io.StringIO()
+    write_scan(buf, [("result", result)])
+    assert buf.getvalue() == _expected(result)
+    buf = io.StringIO()
+    write_scan(buf, iter_scan(directory=str(rtl / "none")))
+    assert json.loads(buf.getvalue())["error"].startswith("Directory not")
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson"])
+def test_output_starts_while_parsing(rtl, fmt):
+    buf = io.StringIO()
+    seen = []
+
+    def events():
+        for kind, value in iter_scan(directory=str(rtl), mode="modules"):
+            seen.append(buf.getvalue())
+            yield kind, value
+
+    write_scan(buf, events(), fmt=fmt)
+    # The first module was written before the second file was parsed
+    assert '"name": "leaf"' in seen[1]
+    assert '"name": "mid"' not in seen[1]
+
+
+def test_ndjson_records(rtl):
+    buf = io.StringIO()
+    n = write_scan(buf, iter_scan(directory=str(rtl), mode="full"),
+                   fmt="ndjson")
+    records = [json.loads(line) for line in buf.getvalue().splitlines()]
+    assert len(records) == n
+    kinds = [r["record"] for r in records]
+    assert kinds[:3] == ["module"] * 3
+    assert records[0]["name"] == "leaf" and "type" not in records[0]
+    edges = [(r["parent"], r["instance"], r.get("count"))
+             for r in records if r["record"] == "instance"]
+    assert edges == [("top", "u_mid", None), ("top", "u_leaf", None),
+                     ("top", "u_bb", None), ("mid", "u_leaf", 2)]
+    assert {"record": "unresolved", "module": "black_box"} in records
+    files = [r["entry"] for r in records if r["record"] == "file"]
+    assert files[0].startswith("+incdir+") and files[-1].endswith("top.v")
+    assert "port_classification" in kinds
+
+
+def test_cli_streams(rtl, tmp_path, capsys):
+    out = str(tmp_path / "result.json")
+    assert main([str(rtl), "-o", out]) == 0
+    with open(out) as f:
+        assert f.read() == _expected(rtl_scan(directory=str(rtl)))
+    capsys.readouterr()
+
+    assert main([str(rtl), "-m", "modules", "-j", "--format", "ndjson"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == \
+        ["leaf", "mid", "top"]
+
+    assert main([str(rtl), "-m", "modules", "-j", "--format", "csv"]) == 1
+    assert "not available" in capsys.readouterr().err
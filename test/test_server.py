@@ -0,0 +1,140 @@
+"""Test the scan daemon and its thin client."""
+import os
+import threading
+
+import pytest
+
+from conftest import write_file
+from src.__main__ import main
+from src.server import ScanServer, ServerClient, ServerUnavailable
+
+
+RTL = {
+    "leaf.v": "module leaf(input clk, input [3:0] d, output q);\nendmodule\n",
+    "top.v": "module top(input clk, input [3:0] d, output q);\n"
+             "  leaf u0 (.clk(clk), .d(d), .q(q));\n"
+             "  leaf u1 (.clk(clk), .d(d));\nendmodule\n",
+}
+
+
+@pytest.fixture
+def rtl_dir(tmp_path):
+    d = tmp_path / "rtl"
+    d.mkdir()
+    for name, text in RTL.items():
+        (d / name).write_text(text)
+    return d
+
+
+@pytest.fixture
+def server(tmp_path):
+    # AF_UNIX paths are length-limited; keep the socket name short
+    path = os.path.join(str(tmp_path), "s.sock")
+    srv = ScanServer(path)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join(5)
+
+
+def test_protocol(server, rtl_dir):
+    with ServerClient(server.socket_path) as client:
+        assert "version" in client.call("ping")
+        result = client.call("scan", directory=str(rtl_dir), mode="hierarchy")
+        assert result["top"] == "top"
+        insts = result["hierarchy"]["top"]["instances"]
+        assert [i["instance"] for i in insts] == ["u0", "u1"]
+
+        # Same configuration → same warm session
+        client.call("scan", directory=str(rtl_dir), mode="inst",
+                    top_module="leaf")
+        stats = client.call("stats")["sessions"]
+        assert len(stats) == 1 and stats[0]["modules"] == 2
+        gen = stats[0]["generation"]
+
+        # Edits are picked up on the next request, without a restart
+        write_file(rtl_dir, "leaf.v",
+                   "module leaf(input clk, input [7:0] d, output q,"
+                   " output r);\nendmodule\n")
+        result = client.call("scan", directory=str(rtl_dir), mode="io",
+                             top_module="leaf")
+        assert [p["name"] for p in result["module"]["ports_detail"]] == \
+            ["clk", "d", "q", "r"]
+        assert client.call("stats")["sessions"][0]["generation"] == gen + 1
+
+        paths = client.call("scan", directory=str(rtl_dir), mode="paths",
+                            top_module="top", paths={"max_depth": 1})
+        assert paths["paths"] == [["top", "top", 0, 1],
+                                  ["top.u0", "leaf", 1, 1],
+                                  ["top.u1", "leaf", 1, 1]]
+
+        # Rows arrive one line each; unread ones are skipped by the next call
+        result, rows = client.stream("scan", directory=str(rtl_dir),
+                                     mode="paths", top_module="top")
+        assert result["stream"] == "paths" and "paths" not in result
+        assert next(rows) == ["top", "top", 0, 1]
+        assert "version" in client.call("ping")
+
+        with pytest.raises(RuntimeError):
+            client.call("scan", bogus=1)
+        with pytest.raises(RuntimeError):
+            client.call("nope")
+
+
+def test_cli_connect(server, rtl_dir, capsys):
+    rc = main([str(rtl_dir), "-m", "inst", "-t", "leaf", "--no-color",
+               "--connect", server.socket_path])
+    assert rc == 0
+    assert "leaf" in capsys.readouterr().out
+
+    rc = main([str(rtl_dir), "-m", "hierarchy", "-j",
+               "--connect", server.socket_path])
+    assert rc == 0
+    assert '"top": "top"' in capsys.readouterr().out
+
+    rc = main([str(rtl_dir), "-m", "paths", "-t", "top", "--format", "csv",
+               "--connect", server.socket_path])
+    assert rc == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[1:] == ["top,top,0,1", "top.u0,leaf,1,1", "top.u1,leaf,1,1"]
+
+
+def test_client_without_daemon(tmp_path, rtl_dir, capsys):
+    missing = os.path.join(str(tmp_path), "none.sock")
+    with pytest.raises(ServerUnavailable):
+        ServerClient(missing)
+    # The CLI falls back to a local scan
+    rc = main([str(rtl_dir), "-m", "modules", "-j", "--connect", missing])
+    assert rc == 0
+    captured = capsys.readouterr()
+    assert "scanning locally" in captured.err
+    assert '"leaf"' in captured.out
+
+
+def test_refuses_second_daemon(server):
+    with pytest.raises(OSError):
+        ScanServer(server.socket_path)
+
+
+def test_binary_transfer(server, rtl_dir, tmp_path):
+    from src.codec import decode_modules
+    from src.rtl_scan import rtl_scan
+
+    local = rtl_scan(directory=str(rtl_dir), mode="inst", top_module="top")
+    with ServerClient(server.socket_path) as client:
+        result = client.call("scan", directory=str(rtl_dir), mode="inst",
+                             top_module="top", encoding="binary")
+        assert "module" not in result and result["module_rtlm"]
+        mods = client.modules(directory=str(rtl_dir), names=["leaf"])
+        assert [m.name for m in mods] == ["leaf"]
+        assert client.modules(directory=str(rtl_dir))[1] == \
+            local["_module_info"]
+
+    out = str(tmp_path / "design.rtlm")
+    assert main([str(rtl_dir), "-o", out, "--output-format", "binary",
+                 "--connect", server.socket_path]) == 0
+    with open(out, "rb") as f:
+        assert sorted(m.name for m in decode_modules(f.read())) == \
+            ["leaf", "top"]
@@ -0,0 +1,129 @@
+"""Test ScanSession: repeated queries and incremental refresh."""
+import os
+import time
+
+from conftest import write_file
+from src.rtl_scan import rtl_scan
+from src.session import ScanSession
+
+
+def _tree(root):
+    write_file(root, "defs.vh", "`define W 8\n")
+    write_file(root, "a_cfg.v", "`define LEAF leaf\n")
+    write_file(root, "leaf.v", '`include "defs.vh"\n'
+               "module leaf(input [`W-1:0] d, output q);\nendmodule\n")
+    write_file(root, "top.v", "module top(input d, output q);\n"
+               "  `LEAF u0 (.d(d), .q(q));\n  mid u1 (.d(d));\nendmodule\n")
+    write_file(root, "mid.v", "module mid(input d);\nendmodule\n")
+    write_file(root, "mid_tb.v", "module mid_tb; mid dut(); endmodule\n")
+
+
+def test_queries_match_rtl_scan(tmp_path):
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    for mode in ("hierarchy", "filelist", "ports", "elab"):
+        got = session.query(mode=mode, top_module="top")
+        want = rtl_scan(directory=str(tmp_path), mode=mode, top_module="top")
+        assert got == want
+    # Memoized until something changes
+    assert session.query(mode="hierarchy") is session.query(mode="hierarchy")
+    # The testbench is not parsed but is listed as excluded
+    fl = session.query(mode="filelist", top_module="top")["filelist_info"]
+    assert any(e.endswith("mid_tb.v") for e in fl["excluded"])
+    assert "mid_tb" not in session.modules
+
+
+def test_refresh_reparses_changed_only(tmp_path):
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    leaf = session.modules["leaf"]
+    assert leaf.ports[0].range_spec == "[8-1:0]"
+
+    assert session.refresh() == {"added": [], "removed": [], "changed": []}
+    gen = session.generation
+
+    # Editing a header reports it and its includer as changed
+    time.sleep(0.01)
+    write_file(tmp_path, "defs.vh", "`define W 16\n")
+    diff = session.refresh()
+    assert [os.path.basename(f) for f in diff["changed"]] == ["defs.vh", "leaf.v"]
+    assert session.modules["leaf"].ports[0].range_spec == "[16-1:0]"
+    assert session.modules["mid"] is not None
+    assert session.generation == gen + 1
+
+    # New files need rediscovery
+    write_file(tmp_path, "extra.v", "module extra; endmodule\n")
+    assert "extra" not in session.modules
+    diff = session.refresh(rediscover=True)
+    assert [os.path.basename(f) for f in diff["added"]] == ["extra.v"]
+    assert "extra" in session.modules
+
+    os.remove(os.path.join(str(tmp_path), "extra.v"))
+    diff = session.refresh(rediscover=True)
+    assert [os.path.basename(f) for f in diff["removed"]] == ["extra.v"]
+    assert "extra" not in session.modules
+
+
+def test_macro_change_cascades(tmp_path):
+    _tree(tmp_path)
+    write_file(tmp_path, "other_leaf.v", "module other_leaf(input d, output q);\nendmodule\n")
+    session = ScanSession(directory=str(tmp_path))
+    assert "leaf" in session.modules["top"].instantiated_modules
+
+    write_file(tmp_path, "a_cfg.v", "`define LEAF other_leaf\n")
+    session.refresh()
+    assert "other_leaf" in session.modules["top"].instantiated_modules
+
+
+def test_session_impact(tmp_path):
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    result = session.query(mode="impact",
+                           changed_files=[os.path.join(str(tmp_path), "defs.vh")])
+    assert result["impact"]["affected_modules"] == ["leaf", "top"]
+
+
+def test_undef_replayed_on_reuse(tmp_path):
+    write_file(tmp_path, "a.v", "`define FAST\n")
+    write_file(tmp_path, "b.v", "`undef FAST\n")
+    write_file(tmp_path, "c.v", "`ifdef FAST\nmodule fast; endmodule\n`endif\n"
+               "module c; endmodule\n")
+    session = ScanSession(directory=str(tmp_path))
+    assert "fast" not in session.modules
+
+    # a.v and b.v are reused; b.v's `undef must still apply to c.v
+    write_file(tmp_path, "c.v", "`ifdef FAST\nmodule fast; endmodule\n`endif\n"
+               "module c(input x); endmodule\n")
+    session.refresh()
+    assert "fast" not in session.modules
+
+    # Dropping only the `undef re-parses the files after it
+    write_file(tmp_path, "b.v", "// nothing\n")
+    session.refresh()
+    assert "fast" in session.modules
+
+
+def test_library_edits_refresh(tmp_path):
+    rtl = tmp_path / "rtl"
+    rtl.mkdir()
+    write_file(rtl, "top.v", "module top(input a);\n  cell u0 (.a(a));\n"
+               "  blk u1 ();\nendmodule\n")
+    lib = write_file(tmp_path, "cells.v", "module cell(input a); endmodule\n")
+    (tmp_path / "ydir").mkdir()
+    write_file(tmp_path, "run.f", "rtl/top.v\n-v cells.v\n-y ydir\n")
+    session = ScanSession(filelist=str(tmp_path / "run.f"))
+    assert [p.name for p in session.modules["cell"].ports] == ["a"]
+    assert "blk" not in session.modules
+    assert session.refresh() == {"added": [], "removed": [], "changed": []}
+
+    # Editing a -v file re-reads it
+    write_file(tmp_path, "cells.v", "module cell(input a, output y); endmodule\n")
+    gen = session.generation
+    assert session.refresh()["changed"] == [lib]
+    assert [p.name for p in session.modules["cell"].ports] == ["a", "y"]
+    assert session.generation == gen + 1
+
+    # A file added under a -y directory resolves a missing module
+    write_file(tmp_path, "ydir/blk.v", "module blk; endmodule\n")
+    assert session.refresh()["changed"] == [str(tmp_path / "ydir")]
+    assert "blk" in session.modules
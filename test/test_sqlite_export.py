@@ -0,0 +1,127 @@
+"""Test the incremental SQLite design database export."""
+import os
+import sqlite3
+
+import pytest
+
+from conftest import write_file
+from src.__main__ import main
+from src.data_model import ModuleInfo, PortInfo
+from src.port_classify import PortDirection, PortRules, set_port_rules
+from src.session import ScanSession
+from src.sqlite_export import SCHEMA_VERSION, files_of, sync_sqlite
+
+RTL = {
+    "leaf.v": "module leaf #(parameter W = 8)(input clk, input [W-1:0] d,\n"
+              "  output q);\nendmodule\n",
+    "top.v": "module top(input clk, input [7:0] d, output q);\n"
+             "  leaf #(.W(8)) u0 (.clk(clk), .d(d), .q(q));\n"
+             "  leaf u1 (.clk(clk), .d(d));\n"
+             "  black_box u_bb (.clk(clk));\nendmodule\n",
+    "dup.v": "module leaf(input a); endmodule\n",
+}
+
+
+@pytest.fixture
+def rtl(tmp_path):
+    d = tmp_path / "rtl"
+    d.mkdir()
+    for name, text in RTL.items():
+        (d / name).write_text(text)
+    return d
+
+
+def _query(db, sql, *args):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(sql, args).fetchall()
+    finally:
+        conn.close()
+
+
+def test_tables_and_queries(rtl, tmp_path):
+    db = str(tmp_path / "design.db")
+    session = ScanSession(directory=str(rtl))
+    diff = sync_sqlite(db, session.file_modules())
+    assert len(diff["added"]) == 3 and not diff["changed"]
+
+    assert _query(db, "SELECT name, n_ports FROM modules WHERE n_ports > 2 "
+                      "ORDER BY name") == [("leaf", 3), ("top", 3)]
+    rows = _query(db, "SELECT m.name, i.name, i.parameters FROM instances i "
+                      "JOIN modules m ON m.id = i.module_id "
+                      "WHERE i.module_type = 'leaf' ORDER BY i.position")
+    assert rows == [("top", "u0", '{"W": "8"}'), ("top", "u1", None)]
+    dup = _query(db, "SELECT name, definitions FROM duplicate_modules")
+    assert dup == [("leaf", 2)]
+    assert _query(db, "SELECT i.name FROM connections c JOIN instances i "
+                      "ON i.id = c.instance_id WHERE c.signal = 'q'") == \
+        [("u0",)]
+    assert _query(db, "SELECT child, instances FROM edges ORDER BY child") == \
+        [("black_box", 1), ("leaf", 2)]
+    assert _query(db, "SELECT category FROM ports WHERE name = 'clk'")[0] == \
+        ("clock",)
+    assert _query(db, "SELECT value FROM meta WHERE key = 'schema'") == \
+        [(str(SCHEMA_VERSION),)]
+
+
+def test_incremental_update(rtl, tmp_path):
+    db = str(tmp_path / "design.db")
+    session = ScanSession(directory=str(rtl))
+    sync_sqlite(db, session.file_modules())
+    top_id = _query(db, "SELECT id FROM modules WHERE name = 'top'")
+
+    assert sync_sqlite(db, session.file_modules()) == \
+        {"added": [], "changed": [], "removed": []}
+
+    write_file(rtl, "leaf.v", "module leaf(input clk, output q, output r);\n"
+                              "endmodule\n")
+    os.remove(str(rtl / "dup.v"))
+    session.refresh(rediscover=True)
+    diff = sync_sqlite(db, session.file_modules())
+    assert [os.path.basename(f) for f in diff["changed"]] == ["leaf.v"]
+    assert [os.path.basename(f) for f in diff["removed"]] == ["dup.v"]
+    # Rows of the unchanged file were not rewritten
+    assert _query(db, "SELECT id FROM modules WHERE name = 'top'") == top_id
+    assert _query(db, "SELECT COUNT(*) FROM duplicate_modules") == [(0,)]
+    assert _query(db, "SELECT COUNT(*) FROM parameters") == [(0,)]
+    assert _query(db, "SELECT COUNT(*) FROM ports") == [(6,)]
+
+
+def test_port_rules_change_rewrites(tmp_path):
+    db = str(tmp_path / "design.db")
+    files = {"a.v": [ModuleInfo("a", file_path="a.v", ports=[
+        PortInfo("ck_main", PortDirection.INPUT)])]}
+    sync_sqlite(db, files)
+    assert _query(db, "SELECT category FROM ports") == [("data",)]
+    try:
+        set_port_rules(PortRules([("clock", "^ck_")]))
+        assert sync_sqlite(db, files)["changed"] == ["a.v"]
+        assert _query(db, "SELECT category FROM ports") == [("clock",)]
+        assert not sync_sqlite(db, files)["changed"]
+    finally:
+        set_port_rules(None)
+    assert sync_sqlite(db, files)["changed"] == ["a.v"]
+
+
+def test_old_schema_rebuilt(tmp_path):
+    db = str(tmp_path / "design.db")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("INSERT INTO meta VALUES ('schema', '0')")
+    conn.execute("CREATE TABLE legacy (x)")
+    conn.commit()
+    conn.close()
+    assert sync_sqlite(db, files_of([])) == \
+        {"added": [], "changed": [], "removed": []}
+    tables = {r[0] for r in _query(db, "SELECT name FROM sqlite_master")}
+    assert "legacy" not in tables and "modules" in tables
+
+
+def test_cli(rtl, tmp_path, capsys):
+    db = str(tmp_path / "design.db")
+    cache = str(tmp_path / "scan.cache")
+    assert main([str(rtl), "--sqlite", db, "--cache", cache]) == 0
+    assert "3 added" in capsys.readouterr().out
+    assert main([str(rtl), "--sqlite", db, "--cache", cache]) == 0
+    assert "0 added, 0 changed, 0 removed" in capsys.readouterr().out
+    assert _query(db, "SELECT COUNT(*) FROM modules") == [(3,)]
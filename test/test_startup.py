@@ -0,0 +1,59 @@
+"""Test CLI start-up cost: the grammar must not load unless parsing."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time budget for `--help`, summed over the modules the CLI
+# imports (the interpreter's own start-up is not counted).  It takes
+# about 0.05 s; importing src.rtl_scan alone would use most of the
+# budget, the ANTLR runtime and generated parser several times it.
+HELP_BUDGET = 0.15  # seconds
+
+
+def _importtime(*args):
+    """Run `python -X importtime -m src ...`.
+
+    Returns:
+        ({module: cumulative seconds}, seconds spent in top-level imports
+        from the `src` package on, i.e. excluding interpreter start-up)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "src"] + list(args),
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    times = {}
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue                    # header line
+        seconds = int(cumulative) / 1e6
+        times[name.strip()] = seconds
+        if "src" in times and not name[1:].startswith(" "):
+            total += seconds
+    return times, total
+
+
+def test_help_does_not_load_grammar():
+    times, _ = _importtime("--help")
+    assert "src" in times
+    loaded = [m for m in times if m.split(".")[0] in ("antlr4", "verilog")]
+    assert loaded == []
+    for heavy in ("src.rtl_scan", "src.verilog_parser", "src.data_model",
+                  "src.server", "src.session", "src.watch", "src.lsp_server"):
+        assert heavy not in times
+
+
+def test_help_within_budget():
+    _, total = _importtime("--help")
+    assert total < HELP_BUDGET, "import time %.3fs" % total
+
+
+def test_version_does_not_load_grammar():
+    times, _ = _importtime("--version")
+    assert not any(m.split(".")[0] in ("antlr4", "verilog") for m in times)
+    assert "src.rtl_scan" not in times
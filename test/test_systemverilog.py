@@ -0,0 +1,170 @@
+"""Tests for the SystemVerilog parsing backend."""
+import pytest
+
+pytest.importorskip("systemverilog.SystemVerilogParser")
+
+from src.data_model import PortDirection
+from src.module_index import module_regions
+from src.rtl_scan import rtl_scan
+from src.verilog_parser import VerilogFileParser, language_for
+
+SV = """\
+package pkg;
+  typedef logic [7:0] byte_t;
+endpackage
+
+interface axi_if #(parameter AW = 32) (input logic clk);
+  logic [AW-1:0] addr;
+  logic valid, ready;
+  modport master (output addr, valid, input ready);
+endinterface
+
+module fifo import pkg::*; #(parameter int W = 8, DEPTH = 16) (
+  input  logic         clk,
+  input  logic [W-1:0] din, extra,
+  input  pkg::byte_t   b,
+  output logic [3:0][7:0] dout,
+  axi_if.master        bus,
+  output int           count
+);
+  localparam int AW = $clog2(DEPTH);
+  logic [AW-1:0] wp;
+  wire [1:0] w2;
+  always_ff @(posedge clk) begin
+    logic tmp;
+    wp <= wp + 1'b1;
+  end
+  sub #(.W(W), .D(4)) u_sub (.clk, .d(din[3:0]), .q());
+  leaf u_arr [4] (.*);
+  for (genvar i = 0; i < 4; i++) begin : g
+    leaf #(8) u_leaf (.clk(clk), .d(din[i]));
+  end
+  if (W > 4) begin : big
+    leaf u_big ();
+  end
+  axi_if #(.AW(16)) u_if (.clk(clk));
+endmodule
+
+module nonansi (a, b);
+  input a;
+  output logic [2:0] b;
+endmodule
+"""
+
+
+@pytest.fixture(scope="module")
+def units():
+    p = VerilogFileParser()
+    mods = p.parse_text(SV, "units.sv")
+    assert p.errors == []
+    return {m.name: m for m in mods}
+
+
+def test_design_units(units):
+    assert sorted(units) == ["axi_if", "fifo", "nonansi"]
+    assert units["axi_if"].kind == "interface"
+    assert units["fifo"].kind == "module"
+    assert "type" not in units["fifo"].to_dict()
+    assert units["axi_if"].to_dict()["type"] == "interface"
+    assert units["fifo"].line_number == 11
+
+
+def test_ansi_ports(units):
+    pm = {p.name: p for p in units["fifo"].ports}
+    assert list(pm) == ["clk", "din", "extra", "b", "dout", "bus", "count"]
+    assert pm["clk"].net_type == "logic"
+    assert pm["clk"].width == 1
+    # Inherits direction, type and range from din
+    assert pm["extra"].direction == PortDirection.INPUT
+    assert pm["extra"].range_spec == "[W-1:0]"
+    assert pm["extra"].width == 0
+    assert pm["b"].net_type == "pkg::byte_t"
+    assert pm["dout"].width == 32
+    assert pm["count"].width == 32
+    assert pm["bus"].direction == PortDirection.INOUT
+    assert pm["bus"].net_type == "axi_if.master"
+
+
+def test_non_ansi_ports(units):
+    ports = units["nonansi"].ports
+    assert [(p.name, p.direction, p.width) for p in ports] == [
+        ("a", PortDirection.INPUT, 1), ("b", PortDirection.OUTPUT, 3)]
+
+
+def test_parameters(units):
+    pm = {p.name: p for p in units["fifo"].parameters}
+    assert pm["W"].resolved == 8
+    assert pm["DEPTH"].resolved == 16
+    assert pm["AW"].param_type == "localparam"
+    assert pm["AW"].resolved == 4
+
+
+def test_wires(units):
+    # Module-level variables and nets; procedural locals are skipped
+    names = [w.name for w in units["fifo"].wires]
+    assert names == ["wp", "w2"]
+    assert [w.name for w in units["axi_if"].wires] == ["addr", "valid", "ready"]
+
+
+def test_instances(units):
+    insts = {i.instance_name: i for i in units["fifo"].instances}
+    assert list(insts) == ["u_sub", "u_arr", "u_leaf", "u_big", "u_if"]
+    sub = insts["u_sub"]
+    assert sub.parameters == {"W": "W", "D": "4"}
+    assert [(c.port_name, c.signal_expr) for c in sub.connections] == [
+        ("clk", "clk"), ("d", "din[3:0]"), ("q", "")]
+    assert insts["u_arr"].array_range == "[0:3]"
+    assert insts["u_arr"].connections[0].port_name == ".*"
+    assert insts["u_if"].module_type == "axi_if"
+
+
+def test_generate_scopes(units):
+    insts = {i.instance_name: i for i in units["fifo"].instances}
+    (loop,) = insts["u_leaf"].generate
+    assert (loop.kind, loop.name, loop.genvar, loop.init, loop.cond,
+            loop.step) == ("for", "g", "i", "0", "i<4", "i+1")
+    (cond,) = insts["u_big"].generate
+    assert (cond.kind, cond.name, cond.cond) == ("if", "big", "W>4")
+    assert insts["u_sub"].generate == ()
+
+
+def test_language_selection(tmp_path):
+    assert language_for("a.sv") == "systemverilog"
+    assert language_for("a.SVH") == "systemverilog"
+    assert language_for("a.v") == "verilog"
+    assert language_for("a.sv", "verilog") == "verilog"
+    assert language_for("a.v", "systemverilog") == "systemverilog"
+    with pytest.raises(ValueError):
+        VerilogFileParser(language="vhdl")
+
+    # Verilog-2005 has no `logic`; only the SystemVerilog backend sees it
+    src = tmp_path / "top.v"
+    src.write_text("module top(input logic clk); endmodule\n")
+    (mod,) = VerilogFileParser(language="systemverilog").parse_file(str(src))
+    assert mod.ports[0].net_type == "logic"
+
+
+def test_mixed_scan(tmp_path):
+    (tmp_path / "top.sv").write_text(
+        "module top (input logic clk);\n"
+        "  axi_if bus (.clk);\n"
+        "  leaf u_leaf (.clk);\n"
+        "endmodule\n"
+        "interface axi_if (input logic clk); endinterface\n")
+    (tmp_path / "leaf.v").write_text(
+        "module leaf (input clk);\nendmodule\n")
+    result = rtl_scan(directory=str(tmp_path), mode="hierarchy")
+    assert result["top"] == "top"
+    kinds = {m["name"]: m.get("type", "module") for m in result["modules"]}
+    assert kinds == {"top": "module", "axi_if": "interface", "leaf": "module"}
+    assert result["unresolved"] == []
+
+
+def test_module_regions_sv_units():
+    regions = module_regions(SV)
+    assert sorted(regions) == ["axi_if", "fifo", "nonansi"]
+    assert SV[slice(*regions["axi_if"])].endswith("endinterface")
+    # Neither an interface class nor a virtual interface is a unit
+    text = ("interface class C; endclass\n"
+            "module m(interface bus); virtual interface x_if v; endmodule\n")
+    assert list(module_regions(text)) == ["m"]
@@ -0,0 +1,147 @@
+"""Test watch mode: watchers, result diffs and the update loop."""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import write_file
+from src.__main__ import main
+from src.session import ScanSession
+from src.watch import (
+    InotifyWatcher, PollingWatcher, diff_is_empty, result_diff, watch,
+)
+
+
+def _tree(root):
+    write_file(root, "top.v", "module top(input d);\n  mid u1 (.d(d));\nendmodule\n")
+    write_file(root, "mid.v", "module mid(input d);\nendmodule\n")
+
+
+def _inotify():
+    try:
+        InotifyWatcher([]).close()
+    except OSError:
+        return False
+    return True
+
+
+def test_result_diff(tmp_path):
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    old_modules = session.modules
+    old = session.query(mode="filelist", top_module="top")
+
+    write_file(tmp_path, "mid.v", "module mid(input d);\n  leaf u0 ();\nendmodule\n")
+    write_file(tmp_path, "leaf.v", "module leaf;\nendmodule\n")
+    session.refresh(rediscover=True)
+    new = session.query(mode="filelist", top_module="top")
+
+    diff = result_diff(old_modules, session.modules, old, new)
+    assert diff["modules"] == {"added": ["leaf"], "removed": [],
+                               "changed": ["mid"]}
+    assert diff["instances"] == {"added": ["mid.u0:leaf"], "removed": []}
+    assert [os.path.basename(f) for f in diff["filelist"]["added"]] == ["leaf.v"]
+    assert "top" not in diff
+    assert not diff_is_empty(diff)
+    assert diff_is_empty(result_diff(session.modules, session.modules, new, new))
+
+
+def test_polling_watcher(tmp_path):
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    watcher = PollingWatcher(session.watch_roots(), session.dependencies,
+                             interval=0.01)
+    assert watcher.wait(timeout=0.05) == (set(), False)
+
+    path = write_file(tmp_path, "mid.v", "module mid(input d, input e);\nendmodule\n")
+    changed, structural = watcher.wait(timeout=1)
+    assert path in changed
+
+    write_file(tmp_path, "new.v", "module extra;\nendmodule\n")
+    changed, structural = watcher.wait(timeout=1)
+    assert structural
+
+
+@pytest.mark.skipif(not _inotify(), reason="inotify not available")
+def test_inotify_watcher(tmp_path):
+    os.mkdir(str(tmp_path / "sub"))
+    watcher = InotifyWatcher([str(tmp_path)])
+    try:
+        assert watcher.wait(timeout=0.05) == (set(), False)
+        path = write_file(tmp_path / "sub", "a.v", "module a;\nendmodule\n")
+        changed, structural = watcher.wait(timeout=1)
+        assert path in changed and structural
+
+        # New directories are watched as they appear
+        os.mkdir(str(tmp_path / "sub" / "deep"))
+        watcher.wait(timeout=1)
+        path = write_file(tmp_path / "sub" / "deep", "b.v", "module b;\nendmodule\n")
+        changed, _ = watcher.wait(timeout=1)
+        assert path in changed
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("poll", [True, False])
+def test_watch_loop(tmp_path, poll):
+    if not poll and not _inotify():
+        pytest.skip("inotify not available")
+    _tree(tmp_path)
+    session = ScanSession(directory=str(tmp_path))
+    updates = []
+
+    def _edit():
+        time.sleep(0.2)
+        write_file(tmp_path, "top.v", "module top(input d);\n"
+                   "  mid u1 (.d(d));\n  mid u2 (.d(d));\nendmodule\n")
+
+    t = threading.Thread(target=_edit)
+    t.start()
+    n = watch(session, lambda diff, result: updates.append((diff, result)),
+              mode="hierarchy", top_module="top", poll=poll, interval=0.02,
+              max_updates=1, timeout=5)
+    t.join()
+
+    assert n == 1
+    diff, result = updates[0]
+    assert [os.path.basename(f) for f in diff["files"]["changed"]] == ["top.v"]
+    assert diff["instances"]["added"] == ["top.u2:mid"]
+    assert result["top"] == "top"
+
+
+def test_watch_library_edit(tmp_path):
+    (tmp_path / "rtl").mkdir()
+    write_file(tmp_path, "rtl/top.v", "module top(input d);\n"
+               "  cell u0 (.a(d));\nendmodule\n")
+    lib = write_file(tmp_path, "cells.v", "module cell(input a);\nendmodule\n")
+    write_file(tmp_path, "run.f", "rtl/top.v\n-v cells.v\n")
+    session = ScanSession(filelist=str(tmp_path / "run.f"))
+    updates = []
+
+    def _edit():
+        time.sleep(0.2)
+        write_file(tmp_path, "cells.v", "module cell(input a);\n"
+                   "  leaf u_leaf ();\nendmodule\n")
+
+    t = threading.Thread(target=_edit)
+    t.start()
+    n = watch(session, lambda diff, result: updates.append((diff, result)),
+              mode="hierarchy", top_module="top", poll=True, interval=0.02,
+              max_updates=1, timeout=5)
+    t.join()
+
+    assert n == 1
+    diff, _ = updates[0]
+    assert diff["files"]["changed"] == [lib]
+    assert diff["instances"]["added"] == ["cell.u_leaf:leaf"]
+
+
+def test_cli_watch_json(tmp_path, capsys, monkeypatch):
+    _tree(tmp_path)
+    monkeypatch.setattr("src.watch.watch", lambda session, emit, **kw: 0)
+    assert main([str(tmp_path), "-m", "hierarchy", "-t", "top",
+                 "--watch", "-j", "-q"]) == 0
+    first = json.loads(capsys.readouterr().out.splitlines()[0])
+    assert first["result"]["top"] == "top"